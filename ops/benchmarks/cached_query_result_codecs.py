@@ -0,0 +1,109 @@
+"""
+Compares CachedQueryResult codecs on real fixtures.
+
+For each fixture query, reports the stored size and decode time of every
+codec, plus the time spent in _validate_result_properties for model results.
+
+Run from the repository root with:
+    PYTHONPATH=src:ops python -m benchmarks.cached_query_result_codecs
+"""
+
+import argparse
+import glob
+import os
+from typing import Any, List, Sequence
+
+from benchmarks.lib import print_table, stubbed_ndb, time_ms
+from google.appengine.ext import ndb
+
+from backend.common.consts.api_version import ApiMajorVersion
+from backend.common.models.cached_query_result import CachedQueryResult
+from backend.common.models.cached_query_result_codec import CODECS
+from backend.common.models.event import Event
+from backend.common.models.event_details import EventDetails
+from backend.common.models.match import Match
+from backend.common.queries.database_query import CachedDatabaseQuery
+from backend.common.queries.event_query import EventQuery
+from backend.common.queries.match_query import EventMatchesQuery
+from backend.common.tests.fixture_loader import load_fixture
+
+FIXTURES_DIR = "test_data/fixtures"
+
+
+def _load_fixtures(fixture_paths: Sequence[str]) -> List[str]:
+    event_keys = []
+    for path in fixture_paths:
+        loaded = load_fixture(
+            path,
+            kind={"Event": Event, "EventDetails": EventDetails, "Match": Match},
+        )
+        event_keys.extend(
+            model.key.id() for model in loaded if isinstance(model, Event)
+        )
+    return event_keys
+
+
+def _benchmark_query(query: CachedDatabaseQuery, iterations: int) -> List[List[Any]]:
+    rows = []
+    name = f"{query.__class__.__name__}({query.cache_key})"
+
+    models = query._query_async(**query._query_args).get_result()
+    dicts = query.fetch_dict(ApiMajorVersion.API_V3)
+
+    for codec in CODECS.values():
+        for kind, value in [("models", models), ("dicts", dicts)]:
+            try:
+                encoded = codec.encode(value)
+            except TypeError:
+                # e.g. JSON can't encode ndb models
+                continue
+            rows.append(
+                [
+                    name,
+                    kind,
+                    codec.NAME,
+                    len(encoded),
+                    f"{time_ms(lambda: codec.decode(encoded), iterations):.2f}",
+                ]
+            )
+
+    cached_query_result = CachedQueryResult(result=models)
+    rows.append(
+        [
+            name,
+            "models",
+            "_validate_result_properties",
+            "",
+            f"{time_ms(cached_query_result._validate_result_properties, iterations):.2f}",
+        ]
+    )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "fixtures",
+        nargs="*",
+        default=sorted(glob.glob(os.path.join(FIXTURES_DIR, "*casj.json"))),
+        help="Fixture files to load (defaults to the event fixtures in test_data)",
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    with stubbed_ndb():
+        event_keys = _load_fixtures(args.fixtures)
+        ndb.get_context().clear_cache()
+
+        rows = []
+        for event_key in event_keys:
+            rows += _benchmark_query(EventQuery(event_key=event_key), args.iterations)
+            rows += _benchmark_query(
+                EventMatchesQuery(event_key=event_key), args.iterations
+            )
+
+    print_table(["query", "result", "codec", "bytes", "decode ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+Replays a recorded event through the live-event match sync path, and reports
+where the time and work goes.
+
+At each time one of the event's recorded FRC API responses changed (or every
+--poll-interval seconds), runs the tasks_io fmsapi_matches handler the way the
+task queue would, with DatafeedFMSAPI reading the recorded responses for that
+time. Then runs the post-update hook and cache clearing tasks it enqueued,
+until there are none left. Everything runs against the local stubs, as fast as
+it can, with the clock frozen at each replay time.
+
+For each stage, reports latency, datastore and memcache calls, tasks enqueued
+and query cache keys cleared. Tasks for other queues (notifications, Firebase,
+stats, ...) are counted, but not run.
+
+The event's responses must be in the local FRC API gcs_test_data_cache.
+
+Run from the repository root with:
+    PYTHONPATH=src:ops python -m benchmarks.event_replay 2017flwp --api-version v2.0
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import statistics
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Generator, List, Optional, Set
+from unittest.mock import patch
+
+from benchmarks.lib import percentile, print_table, RpcCounter, stubbed_ndb
+from freezegun import api as freezegun_api
+from freezegun import freeze_time
+from google.appengine.api import datastore_types
+from google.appengine.ext import testbed
+from pyre_extensions import none_throws
+from werkzeug.test import Client
+
+from backend.common.consts.event_type import EventType
+from backend.common.frc_api import frc_api
+from backend.common.frc_api.response_archive import (
+    FRCAPIResponseArchive,
+    FRCAPIResponseIndex,
+)
+from backend.common.futures import InstantFuture
+from backend.common.helpers.deferred import run_from_task
+from backend.common.models.event import Event
+from backend.common.models.keys import EventKey
+from backend.common.queries.database_query import CachedDatabaseQuery
+from backend.common.sitevars.fms_api_secrets import (
+    ContentType as FMSApiSecretsContentType,
+)
+from backend.common.sitevars.fms_api_secrets import FMSApiSecrets
+from backend.tasks_io.datafeeds.datafeed_fms_api import DatafeedFMSAPI
+from backend.tasks_io.handlers import frc_api as frc_api_handlers
+
+# Deferred tasks that are part of the sync path, and run during the replay
+PIPELINE_QUEUES = {
+    "post-update-hooks": "post_update_hooks",
+    "cache-clearing": "cache_clearing",
+}
+
+
+@dataclass
+class StageStats:
+    samples_ms: List[float] = field(default_factory=list)
+    calls: Counter[str] = field(default_factory=Counter)
+    tasks: Counter[str] = field(default_factory=Counter)
+    cache_keys_cleared: int = 0
+
+
+@dataclass
+class _RunningStage:
+    name: str
+    elapsed_ms: float = 0.0
+    calls: Counter[str] = field(default_factory=Counter)
+    tasks: Counter[str] = field(default_factory=Counter)
+    cache_keys_cleared: int = 0
+    started: float = 0.0
+    rpc_snapshot: Optional[RpcCounter] = None
+    cache_keys_snapshot: int = 0
+
+
+class StageRecorder:
+    """
+    Attributes time, API calls and cleared cache keys to named stages. Stages
+    can nest; work done in an inner stage only counts towards that stage.
+
+    Times use the real clock, since the replay freezes time.
+    """
+
+    def __init__(self, rpcs: RpcCounter) -> None:
+        self.rpcs = rpcs
+        self.stats: Dict[str, StageStats] = {}
+        self.cache_keys_cleared = 0
+        self._stack: List[_RunningStage] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Generator[None, None, None]:
+        self._pause()
+        self._stack.append(_RunningStage(name))
+        self._resume()
+        try:
+            yield
+        finally:
+            self._pause()
+            running = self._stack.pop()
+            stats = self.stats.setdefault(name, StageStats())
+            stats.samples_ms.append(running.elapsed_ms)
+            stats.calls += running.calls
+            stats.tasks += running.tasks
+            stats.cache_keys_cleared += running.cache_keys_cleared
+            self._resume()
+
+    def _pause(self) -> None:
+        if not self._stack:
+            return
+        running = self._stack[-1]
+        running.elapsed_ms += (
+            freezegun_api.real_perf_counter() - running.started
+        ) * 1000
+        rpcs = self.rpcs.since(none_throws(running.rpc_snapshot))
+        running.calls += rpcs.calls
+        running.tasks += rpcs.tasks
+        running.cache_keys_cleared += (
+            self.cache_keys_cleared - running.cache_keys_snapshot
+        )
+
+    def _resume(self) -> None:
+        if not self._stack:
+            return
+        running = self._stack[-1]
+        running.started = freezegun_api.real_perf_counter()
+        running.rpc_snapshot = self.rpcs.snapshot()
+        running.cache_keys_snapshot = self.cache_keys_cleared
+
+
+def _replay_times(
+    event_key: EventKey, api_version: str, poll_interval: Optional[int]
+) -> List[datetime.datetime]:
+    year = event_key[:4]
+    event_short = event_key[4:].lower()
+    base_dir = os.path.join(
+        os.path.dirname(frc_api.__file__),
+        "gcs_test_data_cache",
+        FRCAPIResponseArchive.BASE_DIR,
+        api_version,
+        year,
+    )
+
+    # eg. .../2017/scores/flwp/qual or .../2023/schedule/ncash@tournamentLevel=qual
+    times: Set[datetime.datetime] = set()
+    for dir_path, _, file_names in os.walk(base_dir):
+        parts = os.path.relpath(dir_path, base_dir).lower().split(os.sep)
+        if any(p == event_short or p.startswith(f"{event_short}@") for p in parts):
+            times.update(
+                FRCAPIResponseIndex.file_time(file_name)
+                for file_name in file_names
+                if file_name.endswith(".json")
+            )
+    if not times or poll_interval is None:
+        return sorted(times)
+
+    step = datetime.timedelta(seconds=poll_interval)
+    poll_time, end = min(times), max(times)
+    polls = []
+    while poll_time <= end:
+        polls.append(poll_time)
+        poll_time += step
+    return polls
+
+
+def _setup(event_key: EventKey, times: List[datetime.datetime], timezone_id: str):
+    FMSApiSecrets.put(FMSApiSecretsContentType(username="zach", authkey="authkey"))
+    Event(
+        id=event_key,
+        year=int(event_key[:4]),
+        event_short=event_key[4:],
+        event_type_enum=EventType.REGIONAL,
+        official=True,
+        start_date=times[0],
+        end_date=times[-1],
+        timezone_id=timezone_id,
+    ).put()
+
+    # ndb needs to know how to store freezegun's datetimes
+    fake_datetime = getattr(freezegun_api, "FakeDatetime")
+    getattr(datastore_types, "_VALIDATE_PROPERTY_VALUES")[
+        fake_datetime
+    ] = datastore_types.ValidatePropertyNothing
+    getattr(datastore_types, "_PACK_PROPERTY_VALUES")[
+        fake_datetime
+    ] = datastore_types.PackDatetime
+
+
+def _sim_datafeed(
+    sim_time: datetime.datetime, api_version: str, recorder: StageRecorder
+) -> type[DatafeedFMSAPI]:
+    class SimDatafeedFMSAPI(DatafeedFMSAPI):
+        def __init__(self, *args, skip_unchanged: bool = False, **kwargs) -> None:
+            super().__init__(
+                sim_time=sim_time,
+                sim_api_version=api_version,
+                skip_unchanged=skip_unchanged,
+            )
+
+        def get_event_matches(self, event_key):
+            with recorder.stage("datafeed"):
+                matches = super().get_event_matches(event_key).get_result()
+            return InstantFuture(matches)
+
+    return SimDatafeedFMSAPI
+
+
+def _run_pipeline_tasks(
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+    recorder: StageRecorder,
+) -> None:
+    # Hooks can enqueue more hooks and cache clears, so run until quiet
+    ran = True
+    while ran:
+        ran = False
+        for queue_name, stage in PIPELINE_QUEUES.items():
+            tasks = taskqueue_stub.get_filtered_tasks(queue_names=queue_name)
+            taskqueue_stub.FlushQueue(queue_name)
+            for task in tasks:
+                with recorder.stage(stage):
+                    run_from_task(task)
+                ran = True
+
+    # Everything else is only counted
+    for queue in taskqueue_stub.GetQueues():
+        taskqueue_stub.FlushQueue(queue["name"])
+
+
+def replay(
+    event_key: EventKey,
+    api_version: str,
+    poll_interval: Optional[int],
+    timezone_id: str,
+) -> StageRecorder:
+    times = _replay_times(event_key, api_version, poll_interval)
+    if not times:
+        raise ValueError(
+            f"No recorded {api_version} FRC API responses for {event_key} in the gcs_test_data_cache"
+        )
+
+    with stubbed_ndb() as tb:
+        from backend.tasks_io.main import app
+
+        _setup(event_key, times, timezone_id)
+        taskqueue_stub = tb.get_stub(testbed.TASKQUEUE_SERVICE_NAME)
+        client: Client = app.test_client()
+
+        rpcs = RpcCounter()
+        rpcs.install()
+        recorder = StageRecorder(rpcs)
+
+        original_delete_caches = CachedDatabaseQuery.delete_caches
+
+        def delete_caches(to_clear) -> None:
+            recorder.cache_keys_cleared += sum(
+                len(cache_keys) for cache_keys in to_clear.values()
+            )
+            original_delete_caches(to_clear)
+
+        with contextlib.ExitStack() as patches:
+            patches.enter_context(
+                patch.object(
+                    CachedDatabaseQuery,
+                    "delete_caches",
+                    staticmethod(delete_caches),
+                )
+            )
+            for sim_time in times:
+                with (
+                    freeze_time(sim_time),
+                    patch.object(
+                        frc_api_handlers,
+                        "DatafeedFMSAPI",
+                        _sim_datafeed(sim_time, api_version, recorder),
+                    ),
+                ):
+                    with recorder.stage("handler"):
+                        resp = client.get(
+                            f"/tasks/get/fmsapi_matches/{event_key}",
+                            headers={"X-Appengine-Taskname": "event_replay"},
+                        )
+                    if resp.status_code != 200:
+                        logging.warning(
+                            f"fmsapi_matches returned {resp.status_code} at {sim_time}"
+                        )
+                    _run_pipeline_tasks(taskqueue_stub, recorder)
+
+    return recorder
+
+
+def _report(recorder: StageRecorder, replays: int) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"replays": replays, "stages": {}}
+    for name, stats in recorder.stats.items():
+        samples = stats.samples_ms
+        report["stages"][name] = {
+            "runs": len(samples),
+            "total_ms": sum(samples),
+            "median_ms": statistics.median(samples),
+            "p95_ms": percentile(samples, 95),
+            "max_ms": max(samples),
+            "datastore_calls": sum(
+                count
+                for call, count in stats.calls.items()
+                if call.startswith("datastore_v3.")
+            ),
+            "memcache_calls": sum(
+                count
+                for call, count in stats.calls.items()
+                if call.startswith("memcache.")
+            ),
+            "tasks_enqueued": dict(stats.tasks),
+            "cache_keys_cleared": stats.cache_keys_cleared,
+            "calls": dict(stats.calls),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("event_key", nargs="?", default="2017flwp")
+    parser.add_argument(
+        "--api-version",
+        default="v2.0",
+        help="The FRC API version the responses were recorded with",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        help="Poll every this many (simulated) seconds, rather than only when a response changed",
+    )
+    parser.add_argument("--timezone", default="America/New_York")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument(
+        "--verbose", action="store_true", help="List API calls by method"
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    recorder = replay(
+        args.event_key, args.api_version, args.poll_interval, args.timezone
+    )
+    report = _report(
+        recorder, len(none_throws(recorder.stats.get("handler")).samples_ms)
+    )
+
+    print(f"Replayed {args.event_key} {report['replays']} times\n")
+    print_table(
+        [
+            "stage",
+            "runs",
+            "total ms",
+            "median ms",
+            "p95 ms",
+            "max ms",
+            "datastore",
+            "memcache",
+            "tasks",
+            "cache keys",
+        ],
+        [
+            [
+                name,
+                stage["runs"],
+                f"{stage['total_ms']:.1f}",
+                f"{stage['median_ms']:.2f}",
+                f"{stage['p95_ms']:.2f}",
+                f"{stage['max_ms']:.2f}",
+                stage["datastore_calls"],
+                stage["memcache_calls"],
+                sum(stage["tasks_enqueued"].values()),
+                stage["cache_keys_cleared"],
+            ]
+            for name, stage in report["stages"].items()
+        ],
+    )
+
+    tasks: Counter[str] = Counter()
+    for stage in report["stages"].values():
+        tasks.update(stage["tasks_enqueued"])
+    print()
+    print_table(["queue", "tasks enqueued"], sorted(tasks.items()))
+
+    if args.verbose:
+        print()
+        print_table(
+            ["stage", "call", "count"],
+            [
+                [name, call, count]
+                for name, stage in report["stages"].items()
+                for call, count in sorted(stage["calls"].items())
+            ],
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import contextlib
+import statistics
+import time
+from collections import Counter
+from typing import Any, Callable, Generator, List, Sequence
+
+from google.appengine.api import apiproxy_stub_map
+from google.appengine.ext import ndb, testbed
+
+
+@contextlib.contextmanager
+def stubbed_ndb() -> Generator[testbed.Testbed, None, None]:
+    """
+    Runs the benchmark against the local datastore/memcache/taskqueue stubs,
+    the same ones the unit tests use.
+    """
+    tb = testbed.Testbed()
+    tb.activate()
+    tb.init_datastore_v3_stub()
+    tb.init_memcache_stub()
+    tb.init_taskqueue_stub(root_path="src/")
+    tb.init_urlfetch_stub()
+    ndb.get_context().set_cache_policy(False)
+    try:
+        yield tb
+    finally:
+        tb.deactivate()
+
+
+def time_ms(fn: Callable[[], Any], iterations: int = 20) -> float:
+    """
+    Returns the median wall-clock time of fn, in milliseconds
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def print_table(headers: Sequence[str], rows: List[Sequence[Any]]) -> None:
+    str_rows = [[str(cell) for cell in row] for row in rows]
+    widths = [
+        max(len(header), *(len(row[i]) for row in str_rows))
+        for i, header in enumerate(headers)
+    ]
+    print("  ".join(header.ljust(width) for header, width in zip(headers, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in str_rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+class RpcCounter:
+    """
+    Counts the App Engine API calls (datastore, memcache, taskqueue, ...) made
+    while it's installed, keyed by "service.Method", plus the number of tasks
+    added to each queue. Install it after the stubs are set up, since the
+    testbed replaces the API proxy.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.tasks: Counter[str] = Counter()
+
+    def install(self) -> None:
+        apiproxy_stub_map.apiproxy.GetPreCallHooks().Append(
+            f"rpc_counter_{id(self)}", self._hook
+        )
+
+    def _hook(self, service: str, call: str, request: Any, response: Any) -> None:
+        self.calls[f"{service}.{call}"] += 1
+        if service == "taskqueue" and call == "BulkAdd":
+            for add_request in request.add_request:
+                queue_name = add_request.queue_name
+                if isinstance(queue_name, bytes):
+                    queue_name = queue_name.decode()
+                self.tasks[queue_name] += 1
+
+    def snapshot(self) -> "RpcCounter":
+        counter = RpcCounter()
+        counter.calls = self.calls.copy()
+        counter.tasks = self.tasks.copy()
+        return counter
+
+    def since(self, snapshot: "RpcCounter") -> "RpcCounter":
+        counter = RpcCounter()
+        counter.calls = self.calls - snapshot.calls
+        counter.tasks = self.tasks - snapshot.tasks
+        return counter
+
+    def service_calls(self, service: str) -> int:
+        return sum(
+            count
+            for name, count in self.calls.items()
+            if name.startswith(f"{service}.")
+        )
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
@@ -0,0 +1,205 @@
+"""
+Times OPR/DPR/CCWM and COPR calculation for events, comparing
+MatchstatsHelper.calculate_stats with the previous approach. That approach
+pseudo-inverted M once, then walked every match again to build s for each
+stat.
+
+Reports the time for each approach per event, the number of stats solved and
+the largest difference between the results. Also reports the time for an
+incremental update (MatchstatsHelper.update_state and solve_state) to apply
+one changed match, which is the work event_matchstats_update does per score.
+
+Run from the repository root with:
+    PYTHONPATH=src:ops python -m benchmarks.matchstats 2023micmp 2025oncmp2
+"""
+
+import argparse
+import glob
+import itertools
+import os
+from collections import OrderedDict
+from typing import Any, List, Tuple
+
+import numpy as np
+from benchmarks.lib import print_table, stubbed_ndb, time_ms
+
+from backend.common.consts.alliance_color import ALLIANCE_COLORS
+from backend.common.consts.comp_level import CompLevel
+from backend.common.game_specific.registry import get_game
+from backend.common.helpers.matchstats_helper import (
+    CCWM_ACCESSOR,
+    DPR_ACCESSOR,
+    make_default_component_accessor,
+    MatchstatsHelper,
+    OPR_ACCESSOR,
+    StatAccessor,
+    TTeamIdMap,
+)
+from backend.common.models.event_matchstats import EventComponentOPRs
+from backend.common.models.match import Match
+from backend.common.models.stats import EventMatchStats, StatType
+from backend.tests.json_data_importer import JsonDataImporter
+
+FIXTURES_DIR = "src/backend/common/helpers/tests/data"
+
+
+def _build_Minv(matches: List[Match], team_id_map: TTeamIdMap) -> Any:
+    M = np.zeros((len(team_id_map), len(team_id_map)))
+    for match in matches:
+        if match.comp_level != CompLevel.QM or not match.has_been_played:
+            continue
+        for alliance_color in ALLIANCE_COLORS:
+            alliance_teams = match.alliances[alliance_color]["teams"]
+            for team1 in alliance_teams:
+                for team2 in alliance_teams:
+                    M[team_id_map[team1[3:]], team_id_map[team2[3:]]] += 1
+    return np.linalg.pinv(M)
+
+
+def _build_s(
+    matches: List[Match], team_id_map: TTeamIdMap, stat_accessor: StatAccessor
+) -> Any:
+    s = np.zeros((len(team_id_map), 1))
+    for match in matches:
+        if match.comp_level != CompLevel.QM or not match.has_been_played:
+            continue
+        for alliance_color in ALLIANCE_COLORS:
+            stat = stat_accessor(match, alliance_color)
+            for team in match.alliances[alliance_color]["teams"]:
+                s[team_id_map[team[3:]]] += stat
+    return s
+
+
+def _solve_each(matches: List[Match], accessors: List[StatAccessor]) -> List[Any]:
+    team_list, team_id_map = MatchstatsHelper.build_team_mapping(matches)
+    Minv = _build_Minv(matches, team_id_map)
+    results = []
+    for accessor in accessors:
+        x = Minv.dot(_build_s(matches, team_id_map, accessor))
+        results.append({team: x[team_id_map[team], 0] for team in team_list})
+    return results
+
+
+def _per_stat(
+    matches: List[Match], year: int
+) -> Tuple[EventMatchStats, EventComponentOPRs]:
+    """
+    The previous approach: one pass over the matches for each stat
+    """
+    matchstats: EventMatchStats = dict(
+        zip(
+            [StatType.OPR, StatType.DPR, StatType.CCWM],
+            _solve_each(matches, [OPR_ACCESSOR, DPR_ACCESSOR, CCWM_ACCESSOR]),
+        )
+    )
+
+    matches = [match for match in matches if match.score_breakdown is not None]
+    if not matches:
+        return matchstats, OrderedDict()
+    accessors = dict(get_game(year).get_manual_coprs())
+    for component in MatchstatsHelper.get_components(matches):
+        accessors[component] = make_default_component_accessor(component)
+    coprs = OrderedDict(
+        zip(accessors.keys(), _solve_each(matches, list(accessors.values())))
+    )
+    return matchstats, coprs
+
+
+def _time_update(matches: List[Match], year: int, iterations: int) -> float:
+    """
+    Median ms to apply one match to the state and solve, alternating between
+    adding and removing the last played quals match
+    """
+    played = [
+        match
+        for match in matches
+        if match.comp_level == CompLevel.QM and match.has_been_played
+    ]
+    without_last = [match for match in matches if match is not played[-1]]
+    state = MatchstatsHelper.build_state(matches, year)
+    versions = itertools.cycle([without_last, matches])
+
+    def update() -> None:
+        MatchstatsHelper.update_state(state, next(versions))
+        MatchstatsHelper.solve_state(state)
+
+    return time_ms(update, iterations)
+
+
+def _max_diff(a: Any, b: Any) -> float:
+    return max(abs(a[stat][team] - b[stat][team]) for stat in a for team in a[stat])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "events",
+        nargs="*",
+        help=f"Event fixtures to load from {FIXTURES_DIR}. Defaults to all of them",
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    event_keys = args.events or sorted(
+        os.path.basename(path)[: -len("_matches.json")]
+        for path in glob.glob(os.path.join(FIXTURES_DIR, "20*_matches.json"))
+    )
+
+    rows = []
+    with stubbed_ndb():
+        importer = JsonDataImporter()
+        for event_key in event_keys:
+            matches = importer.parse_match_list(
+                os.path.join(FIXTURES_DIR, "_"), f"{event_key}_matches.json"
+            )
+            year = int(event_key[:4])
+            # Parse the JSON up front, since both approaches share it
+            for match in matches:
+                _ = (match.alliances, match.score_breakdown)
+
+            matchstats, coprs = MatchstatsHelper.calculate_stats(matches, year)
+            if not matchstats:
+                # No quals
+                continue
+            old_matchstats, old_coprs = _per_stat(matches, year)
+            max_diff = max(
+                _max_diff(matchstats, old_matchstats),
+                _max_diff(coprs, old_coprs) if coprs else 0,
+            )
+
+            per_stat_ms = time_ms(lambda: _per_stat(matches, year), args.iterations)
+            update_ms = _time_update(matches, year, args.iterations)
+            batched_ms = time_ms(
+                lambda: MatchstatsHelper.calculate_stats(matches, year),
+                args.iterations,
+            )
+            rows.append(
+                [
+                    event_key,
+                    len(matches),
+                    len(matchstats) + len(coprs),
+                    f"{per_stat_ms:.2f}",
+                    f"{batched_ms:.2f}",
+                    f"{per_stat_ms / batched_ms:.1f}x",
+                    f"{update_ms:.2f}",
+                    f"{max_diff:.1e}",
+                ]
+            )
+
+    print_table(
+        [
+            "event",
+            "matches",
+            "stats",
+            "per stat ms",
+            "batched ms",
+            "speedup",
+            "update ms",
+            "max diff",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
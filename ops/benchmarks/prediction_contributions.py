@@ -0,0 +1,231 @@
+"""
+Compares ContributionCalculator's incremental solve with a dense one that
+rebuilds AoT.Ao and inverts it before every match, which is how contributions
+were computed before.
+
+For each event, runs calculate_before_match over every match in play order
+for each of the year's prediction stats, and reports the time for each
+approach and the largest difference between their estimates. Past-event
+priors are looked up before timing starts.
+
+Defaults to Championship division fixtures from the helper tests. Division
+sized schedules can also be generated with --synthetic-teams.
+
+Run from the repository root with:
+    PYTHONPATH=src:ops python -m benchmarks.prediction_contributions
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import time
+from typing import Any, List, Sequence, Tuple, Type
+
+import numpy as np
+from benchmarks.lib import print_table, stubbed_ndb
+
+from backend.common.consts.alliance_color import AllianceColor
+from backend.common.consts.comp_level import CompLevel
+from backend.common.consts.event_type import EventType
+from backend.common.game_specific.registry import get_game
+from backend.common.helpers.match_helper import MatchHelper
+from backend.common.helpers.prediction_helper import ContributionCalculator
+from backend.common.models.event import Event
+from backend.common.models.keys import TeamKey
+from backend.common.models.match import Match
+from backend.tests.json_data_importer import JsonDataImporter
+
+FIXTURES_DIR = "src/backend/common/helpers/tests/data"
+DEFAULT_EVENTS = ["2019micmp3", "2025oncmp2"]
+
+TStat = Tuple[str, float, float]
+
+
+class DenseContributionCalculator(ContributionCalculator):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._rows: List[np.ndarray] = []
+
+    def _add_alliance(self, teams: List[TeamKey], mean: float, var: float) -> None:
+        super()._add_alliance(teams, mean, var)
+        row = np.zeros(len(self._team_list))
+        for team in teams:
+            row[self._team_id_map[team]] = 1
+        self._rows.append(row)
+
+    def _solve(self, AoTM: np.ndarray, Oe: np.ndarray) -> np.ndarray:
+        Ao = np.array(self._rows).reshape(-1, len(self._team_list))
+        D = self.PRIOR_WEIGHT * np.eye(len(self._team_list))
+        return np.linalg.inv(Ao.T.dot(Ao) + D).dot(AoTM + D.dot(Oe))
+
+
+def _load_fixture_event(event_key: str) -> Tuple[Event, List[Match]]:
+    importer = JsonDataImporter()
+    base_path = os.path.join(FIXTURES_DIR, "_")
+    importer.import_event(base_path, f"{event_key}.json")
+    matches = importer.parse_match_list(base_path, f"{event_key}_matches.json")
+    return Event.get_by_id(event_key), MatchHelper.play_order_sorted_matches(matches)
+
+
+def _synthetic_event(
+    n_teams: int, n_matches: int, seed: int
+) -> Tuple[Event, List[Match]]:
+    """
+    A qual schedule with random alliances and scores. Only the score stat
+    has a breakdown.
+    """
+    rng = random.Random(seed)
+    event = Event(
+        id="2019synth",
+        year=2019,
+        event_short="synth",
+        event_type_enum=EventType.CMP_DIVISION,
+        start_date=datetime.datetime(2019, 4, 17),
+        end_date=datetime.datetime(2019, 4, 20),
+    )
+    event.put()
+
+    teams = [f"frc{number}" for number in rng.sample(range(1, 9000), n_teams)]
+    matches = []
+    for match_number in range(1, n_matches + 1):
+        match_teams = rng.sample(teams, 6)
+        alliances = {
+            color: {
+                "teams": match_teams[i * 3 : i * 3 + 3],
+                "score": rng.randint(20, 120),
+            }
+            for i, color in enumerate([AllianceColor.RED, AllianceColor.BLUE])
+        }
+        matches.append(
+            Match(
+                id=f"{event.key_name}_qm{match_number}",
+                event=event.key,
+                year=event.year,
+                comp_level=CompLevel.QM,
+                set_number=1,
+                match_number=match_number,
+                alliances_json=json.dumps(alliances),
+                score_breakdown_json=json.dumps(
+                    {
+                        color: {"totalPoints": alliance["score"]}
+                        for color, alliance in alliances.items()
+                    }
+                ),
+            )
+        )
+    return event, matches
+
+
+def _time_calculator(
+    calculator_class: Type[ContributionCalculator],
+    event: Event,
+    matches: List[Match],
+    stats: Sequence[TStat],
+    iterations: int,
+) -> Tuple[float, List[List[Any]]]:
+    """
+    Returns the median ms to run every stat's calculator over the matches, and
+    the estimates from the last run
+    """
+    samples = []
+    results: List[List[Any]] = []
+    for _ in range(iterations):
+        calculators = [
+            calculator_class(event, matches, stat, default_mean, default_var)
+            for stat, default_mean, default_var in stats
+        ]
+        results = []
+        start = time.perf_counter()
+        for calculator in calculators:
+            for i in range(len(matches)):
+                mean_var = calculator.calculate_before_match(i)
+                results.append(
+                    [list(mean_var["mean"].values()), list(mean_var["var"].values())]
+                )
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), results
+
+
+def _benchmark_event(
+    event: Event, matches: List[Match], stats: Sequence[TStat], iterations: int
+) -> List[Any]:
+    dense_ms, dense_results = _time_calculator(
+        DenseContributionCalculator, event, matches, stats, iterations
+    )
+    incremental_ms, incremental_results = _time_calculator(
+        ContributionCalculator, event, matches, stats, iterations
+    )
+    max_diff = max(
+        float(np.max(np.abs(np.array(incremental) - np.array(dense))))
+        for incremental, dense in zip(incremental_results, dense_results)
+    )
+    n_teams = len(ContributionCalculator(event, matches, *stats[0])._team_list)
+    return [
+        event.key_name,
+        len(stats),
+        n_teams,
+        len(matches),
+        f"{dense_ms:.1f}",
+        f"{incremental_ms:.1f}",
+        f"{dense_ms / incremental_ms:.1f}x",
+        f"{max_diff:.1e}",
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "events",
+        nargs="*",
+        default=DEFAULT_EVENTS,
+        help=f"Event fixtures to load from {FIXTURES_DIR}",
+    )
+    parser.add_argument(
+        "--synthetic-teams",
+        type=int,
+        default=0,
+        help="Also run a generated schedule with this many teams",
+    )
+    parser.add_argument("--synthetic-matches", type=int, default=150)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = []
+    with stubbed_ndb():
+        for event_key in args.events:
+            event, matches = _load_fixture_event(event_key)
+            stats = get_game(event.year).get_prediction_relevant_stats()
+            rows.append(_benchmark_event(event, matches, stats, args.iterations))
+
+        if args.synthetic_teams:
+            event, matches = _synthetic_event(
+                args.synthetic_teams, args.synthetic_matches, args.seed
+            )
+            score_stat = [
+                stat
+                for stat in get_game(event.year).get_prediction_relevant_stats()
+                if stat[0] == "score"
+            ]
+            rows.append(_benchmark_event(event, matches, score_stat, args.iterations))
+
+    print_table(
+        [
+            "event",
+            "stats",
+            "teams",
+            "matches",
+            "dense ms",
+            "incremental ms",
+            "speedup",
+            "max diff",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
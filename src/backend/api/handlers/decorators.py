@@ -8,12 +8,12 @@ from flask import g, jsonify, request, Response
 from backend.api.client_api_types import VoidRequest
 from backend.api.trusted_api_auth_helper import TrustedApiAuthHelper
 from backend.common.auth import current_user
+from backend.common.cache.api_auth_access_cache import ApiAuthAccessCache
 from backend.common.consts.auth_type import AuthType
 from backend.common.consts.event_code_exceptions import EventCodeExceptions
 from backend.common.consts.fms_report_type import FMSReportType
 from backend.common.consts.renamed_districts import RenamedDistricts
 from backend.common.logging import set_logging_context
-from backend.common.models.api_auth_access import ApiAuthAccess
 from backend.common.models.district import District
 from backend.common.models.event import Event
 from backend.common.models.match import Match
@@ -32,7 +32,7 @@ def api_authenticated(func):
             auth_owner_id = None
 
             if auth_key:
-                auth = ApiAuthAccess.get_by_id(auth_key)
+                auth = ApiAuthAccessCache.get(auth_key)
                 if auth:
                     auth_owner_id = auth.owner.id() if auth.owner else None
                     # Set for our GA event tracking in `track_call_after_response`
@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 from flask import abort
 
@@ -15,6 +15,7 @@ from backend.api.handlers.helpers.nexus_info_converter import (
     NexusInfoDict,
 )
 from backend.api.handlers.helpers.profiled_jsonify import (
+    profiled_cached_jsonify,
     profiled_jsonify,
     TypedFlaskResponse,
 )
@@ -29,6 +30,7 @@ from backend.common.memcache_models.event_nexus_queue_status_memcache import (
 )
 from backend.common.models.keys import EventKey
 from backend.common.queries.award_query import EventAwardsQuery
+from backend.common.queries.database_query import CachedDatabaseQuery
 from backend.common.queries.dict_converters.award_converter import AwardDict
 from backend.common.queries.dict_converters.event_converter import EventDict
 from backend.common.queries.dict_converters.match_converter import MatchDict
@@ -73,15 +75,14 @@ def event_list_all(
     """
     track_call_after_response("event/list", "all", model_type)
 
-    futures = []
-    for year in SeasonHelper.get_valid_years():
-        futures.append(
-            EventListQuery(year=year).fetch_dict_async(ApiMajorVersion.API_V3)
-        )
+    queries: List[CachedDatabaseQuery] = [
+        EventListQuery(year=year) for year in SeasonHelper.get_valid_years()
+    ]
 
     events = []
-    for future in futures:
-        partial_event_list = future.get_result()
+    for partial_event_list in CachedDatabaseQuery.fetch_dict_multi(
+        queries, ApiMajorVersion.API_V3
+    ):
         events += partial_event_list
 
     if model_type is not None:
@@ -227,10 +228,9 @@ def event_matches(
     """
     track_call_after_response("event/matches", event_key, model_type)
 
-    matches = EventMatchesQuery(event_key=event_key).fetch_dict(ApiMajorVersion.API_V3)
-    if model_type is not None:
-        matches = filter_match_properties(matches, model_type)
-    return profiled_jsonify(matches)
+    return profiled_cached_jsonify(
+        EventMatchesQuery(event_key=event_key), model_type, filter_match_properties
+    )
 
 
 @api_authenticated
@@ -1,8 +1,11 @@
-from typing import Generic, TypeVar
+from typing import Any, Callable, Generic, Optional, TypeVar
 
-from flask import jsonify, Response
+from flask import current_app, jsonify, Response
 
+from backend.api.handlers.helpers.model_properties import ModelType
+from backend.common.consts.api_version import ApiMajorVersion
 from backend.common.profiler import Span
+from backend.common.queries.database_query import CachedDatabaseQuery
 
 T = TypeVar("T")
 
@@ -14,3 +17,30 @@ class TypedFlaskResponse(Response, Generic[T]):
 def profiled_jsonify(obj: T) -> TypedFlaskResponse[T]:
     with Span("profiled_jsonify"):
         return jsonify(obj)  # type: ignore[return-value]
+
+
+def profiled_cached_jsonify(
+    query: CachedDatabaseQuery[Any, T],
+    model_type: Optional[ModelType] = None,
+    filter_properties: Optional[Callable[[T, ModelType], Any]] = None,
+) -> TypedFlaskResponse[T]:
+    """
+    Like profiled_jsonify(query.fetch_dict(...)), but serves the response body
+    and ETag from the query's JSON cache when it has one.
+    """
+
+    def serialize(result: T) -> bytes:
+        if model_type is not None and filter_properties is not None:
+            result = filter_properties(result, model_type)
+        return jsonify(result).get_data()
+
+    with Span("profiled_cached_jsonify"):
+        cached_json = query.fetch_json(
+            ApiMajorVersion.API_V3, model_type or "full", serialize
+        )
+        response = current_app.response_class(
+            cached_json.body, mimetype=current_app.json.mimetype
+        )
+        # Setting the ETag up front means cached_public won't rehash the body
+        response.set_etag(cached_json.etag)
+        return response  # type: ignore[return-value]
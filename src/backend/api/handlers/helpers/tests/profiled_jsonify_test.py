@@ -1,10 +1,17 @@
+import hashlib
 import json
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 from flask import Flask
 
-from backend.api.handlers.helpers.profiled_jsonify import profiled_jsonify
+from backend.api.handlers.helpers.model_properties import ModelType
+from backend.api.handlers.helpers.profiled_jsonify import (
+    profiled_cached_jsonify,
+    profiled_jsonify,
+)
+from backend.common.consts.api_version import ApiMajorVersion
+from backend.common.queries.database_query import CachedJson
 
 
 @pytest.fixture
@@ -49,3 +56,41 @@ def test_profiled_jsonify_uses_span(mock_span, app: Flask) -> None:
         profiled_jsonify({"test": "data"})
 
     mock_span.assert_called_once_with("profiled_jsonify")
+
+
+def _mock_query(result) -> MagicMock:
+    def fetch_json(version, variant, serialize):
+        body = serialize(result)
+        return CachedJson(body=body, etag=hashlib.sha1(body).hexdigest())
+
+    query = MagicMock()
+    query.fetch_json.side_effect = fetch_json
+    return query
+
+
+def test_profiled_cached_jsonify(app: Flask) -> None:
+    data = [{"key": "frc254", "name": "The Cheesy Poofs"}]
+    query = _mock_query(data)
+    with app.app_context():
+        response = profiled_cached_jsonify(query)
+        expected = profiled_jsonify(data)
+
+    query.fetch_json.assert_called_once()
+    assert query.fetch_json.call_args[0][:2] == (ApiMajorVersion.API_V3, "full")
+    assert response.content_type == "application/json"
+    assert response.data == expected.data
+    assert response.get_etag() == (hashlib.sha1(response.data).hexdigest(), False)
+
+
+def test_profiled_cached_jsonify_model_type(app: Flask) -> None:
+    data = [{"key": "frc254", "name": "The Cheesy Poofs"}]
+    query = _mock_query(data)
+    with app.app_context():
+        response = profiled_cached_jsonify(
+            query,
+            ModelType("keys"),
+            lambda result, model_type: [item["key"] for item in result],
+        )
+
+    assert query.fetch_json.call_args[0][:2] == (ApiMajorVersion.API_V3, "keys")
+    assert json.loads(response.data) == ["frc254"]
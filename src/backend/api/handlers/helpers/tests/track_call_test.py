@@ -2,10 +2,16 @@ from unittest.mock import patch
 
 import pytest
 from flask import Flask, g
-
+from freezegun import freeze_time
+from google.appengine.ext import testbed
 
 from backend.api.handlers.helpers import track_call
-from backend.api.handlers.helpers.track_call import track_call_after_response
+from backend.api.handlers.helpers.track_call import (
+    ApiCallAggregator,
+    track_call_after_response,
+)
+from backend.common.helpers.deferred import run_from_task
+from backend.common.memcache import MemcacheClient
 
 
 @pytest.fixture
@@ -14,104 +20,200 @@ def app() -> Flask:
     return app
 
 
-@patch("backend.api.handlers.helpers.track_call.defer_safe_async")
-def test_track_call_after_response(mock_defer_safe_async, app: Flask) -> None:
+@pytest.fixture(autouse=True)
+def run_callbacks_now():
+    with patch.object(
+        track_call, "run_after_response", side_effect=lambda callback: callback()
+    ) as mock_run_after_response:
+        yield mock_run_after_response
+
+
+@pytest.fixture(autouse=True)
+def auto_add_memcache_stub(memcache_stub) -> None:
+    pass
+
+
+def _event(action: str, label: str | None, count: int) -> tuple:
+    return (
+        "owner123",
+        "api_v03",
+        {
+            "client_id": "_owner123",
+            "owner_description": "owner123:Test API Key",
+            "action": action,
+            "label": label,
+            "call_count": count,
+        },
+    )
+
+
+def _bucket() -> int:
+    return int(1577836800 // ApiCallAggregator.BUCKET.total_seconds())
+
+
+@freeze_time("2020-01-01 00:00:00")
+@patch.object(track_call.GoogleAnalytics, "track_events")
+def test_track_call_after_response(
+    mock_track_events,
+    app: Flask,
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
     with app.app_context():
         g.auth_owner_id = "owner123"
         g.auth_description = "Test API Key"
 
         track_call_after_response("teams/list", api_label="2020")
 
-        mock_defer_safe_async.assert_called_once_with(
-            track_call.GoogleAnalytics.track_event,
-            "owner123",
-            "api_v03",
-            {
-                "client_id": "_owner123",
-                "owner_description": "owner123:Test API Key",
-                "action": "teams/list",
-                "label": "2020",
-            },
-            _queue="api-track-call",
-            _url="/_ah/queue/deferred_track_call_apiv3",
-        )
-
-
-@patch("backend.api.handlers.helpers.track_call.defer_safe_async")
-def test_track_call_after_response_with_model_type(
-    mock_defer_safe_async, app: Flask
+    mock_track_events.assert_not_called()
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="api-track-call")
+    assert len(tasks) == 1
+    assert tasks[0].name == f"api_track_call_{_bucket()}"
+    assert tasks[0].url == "/_ah/queue/deferred_track_call_apiv3"
+    # Drained once the bucket is over
+    assert tasks[0].eta_posix == 1577836800 + 60 + 15
+
+    run_from_task(tasks[0])
+    mock_track_events.assert_called_once_with([_event("teams/list", "2020", 1)])
+
+
+@freeze_time("2020-01-01 00:00:00")
+@patch.object(track_call.GoogleAnalytics, "track_events")
+def test_track_call_after_response_aggregates(
+    mock_track_events,
+    app: Flask,
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
 ) -> None:
     with app.app_context():
         g.auth_owner_id = "owner123"
         g.auth_description = "Test API Key"
 
+        for _ in range(3):
+            track_call_after_response("teams/list", api_label="2020")
+        track_call_after_response("teams/list", api_label="2021")
         track_call_after_response("teams/list", api_label="2020", model_type="simple")
+        track_call_after_response("teams/list")
 
-        mock_defer_safe_async.assert_called_once_with(
-            track_call.GoogleAnalytics.track_event,
-            "owner123",
-            "api_v03",
-            {
-                "client_id": "_owner123",
-                "owner_description": "owner123:Test API Key",
-                "action": "teams/list/simple",
-                "label": "2020",
-            },
-            _queue="api-track-call",
-            _url="/_ah/queue/deferred_track_call_apiv3",
-        )
-
-
-@patch("backend.api.handlers.helpers.track_call.defer_safe_async")
-def test_track_call_after_response_no_label(mock_defer_safe_async, app: Flask) -> None:
+    # One task for the whole bucket
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="api-track-call")
+    assert len(tasks) == 1
+
+    ApiCallAggregator.drain(_bucket())
+    mock_track_events.assert_called_once_with(
+        [
+            _event("teams/list", "2020", 3),
+            _event("teams/list", "2021", 1),
+            _event("teams/list/simple", "2020", 1),
+            _event("teams/list", None, 1),
+        ]
+    )
+
+    # Nothing left to drain
+    ApiCallAggregator.drain(_bucket())
+    mock_track_events.assert_called_once()
+
+
+@patch.object(track_call.GoogleAnalytics, "track_events")
+def test_track_call_after_response_buckets(
+    mock_track_events,
+    app: Flask,
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
     with app.app_context():
         g.auth_owner_id = "owner123"
         g.auth_description = "Test API Key"
 
-        track_call_after_response("teams/list")
+        with freeze_time("2020-01-01 00:00:59"):
+            track_call_after_response("teams/list", api_label="2020")
+        with freeze_time("2020-01-01 00:01:00"):
+            track_call_after_response("teams/list", api_label="2020")
+            track_call_after_response("teams/list", api_label="2020")
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="api-track-call")
+    assert [task.name for task in tasks] == [
+        f"api_track_call_{_bucket()}",
+        f"api_track_call_{_bucket() + 1}",
+    ]
+
+    for task in tasks:
+        run_from_task(task)
+    assert [call.args for call in mock_track_events.call_args_list] == [
+        ([_event("teams/list", "2020", 1)],),
+        ([_event("teams/list", "2020", 2)],),
+    ]
+
+
+@freeze_time("2020-01-01 00:00:00")
+@patch.object(track_call.GoogleAnalytics, "track_events")
+def test_enqueue_failure_retries_on_next_key(
+    mock_track_events,
+    app: Flask,
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    with app.app_context():
+        g.auth_owner_id = "owner123"
+        g.auth_description = "Test API Key"
+
+        with patch.object(
+            track_call, "defer_safe", side_effect=Exception("Queue unavailable")
+        ):
+            track_call_after_response("teams/list", api_label="2020")
+        track_call_after_response("teams/list", api_label="2020")
+        tasks = taskqueue_stub.get_filtered_tasks(queue_names="api-track-call")
+        assert len(tasks) == 0
+
+        track_call_after_response("teams/list", api_label="2021")
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="api-track-call")
+    assert len(tasks) == 1
+
+    run_from_task(tasks[0])
+    mock_track_events.assert_called_once_with(
+        [_event("teams/list", "2020", 2), _event("teams/list", "2021", 1)]
+    )
+
+
+@freeze_time("2020-01-01 00:00:00")
+def test_drain_task_already_enqueued(
+    app: Flask,
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    with app.app_context():
+        g.auth_owner_id = "owner123"
+        g.auth_description = "Test API Key"
+
+        track_call_after_response("teams/list", api_label="2020")
+        # Memcache forgets the drain task was enqueued
+        MemcacheClient.get().delete(ApiCallAggregator._drain_enqueued_key(_bucket()))
+        track_call_after_response("teams/list", api_label="2021")
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="api-track-call")
+    assert len(tasks) == 1
+
 
-        mock_defer_safe_async.assert_called_once_with(
-            track_call.GoogleAnalytics.track_event,
-            "owner123",
-            "api_v03",
-            {
-                "client_id": "_owner123",
-                "owner_description": "owner123:Test API Key",
-                "action": "teams/list",
-                "label": None,
-            },
-            _queue="api-track-call",
-            _url="/_ah/queue/deferred_track_call_apiv3",
-        )
-
-
-@patch("backend.api.handlers.helpers.track_call.defer_safe_async")
 def test_track_call_after_response_missing_auth_owner_id(
-    mock_defer_safe_async, app: Flask
+    app: Flask, run_callbacks_now
 ) -> None:
     with app.app_context():
         g.auth_description = "Test API Key"
 
         track_call_after_response("teams/list")
 
-        mock_defer_safe_async.assert_not_called()
+    run_callbacks_now.assert_not_called()
 
 
-@patch("backend.api.handlers.helpers.track_call.defer_safe_async")
 def test_track_call_after_response_missing_auth_description(
-    mock_defer_safe_async, app: Flask
+    app: Flask, run_callbacks_now
 ) -> None:
     with app.app_context():
         g.auth_owner_id = "owner123"
 
         track_call_after_response("teams/list")
 
-        mock_defer_safe_async.assert_not_called()
+    run_callbacks_now.assert_not_called()
 
 
-@patch("backend.api.handlers.helpers.track_call.defer_safe_async")
 def test_track_call_after_response_non_string_auth_owner_id(
-    mock_defer_safe_async, app: Flask
+    app: Flask, run_callbacks_now
 ) -> None:
     with app.app_context():
         g.auth_owner_id = 12345
@@ -119,12 +221,11 @@ def test_track_call_after_response_non_string_auth_owner_id(
 
         track_call_after_response("teams/list")
 
-        mock_defer_safe_async.assert_not_called()
+    run_callbacks_now.assert_not_called()
 
 
-@patch("backend.api.handlers.helpers.track_call.defer_safe_async")
 def test_track_call_after_response_non_string_auth_description(
-    mock_defer_safe_async, app: Flask
+    app: Flask, run_callbacks_now
 ) -> None:
     with app.app_context():
         g.auth_owner_id = "owner123"
@@ -132,4 +233,4 @@ def test_track_call_after_response_non_string_auth_description(
 
         track_call_after_response("teams/list")
 
-        mock_defer_safe_async.assert_not_called()
+    run_callbacks_now.assert_not_called()
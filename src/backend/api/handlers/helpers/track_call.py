@@ -1,14 +1,162 @@
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
 from flask import g
+from google.appengine.api import taskqueue
 
+from backend.common.cache.cache_if import CacheIf
 from backend.common.google_analytics import GoogleAnalytics
-from backend.common.helpers.deferred import defer_safe_async
+from backend.common.helpers.deferred import defer_safe
+from backend.common.memcache import MemcacheClient
+from backend.common.run_after_response import run_after_response
+
+# (auth_owner_id, auth_description, api_action, api_label)
+ApiCallKey = Tuple[str, str, str, Optional[str]]
+
+
+class ApiCallAggregator:
+    """
+    Counts API calls per (owner, action, label) in memcache, and sends each
+    BUCKET of counts to Google Analytics through a single deferred task,
+    rather than enqueueing one task per call.
+
+    Counters live in memcache rather than in-process, so counts aren't lost
+    when an instance shuts down. The first time a key is counted in a bucket
+    it's added to the bucket's key registry, and the first key in a bucket
+    enqueues a task named for it to drain the bucket once it's over. A
+    bucket's counts are only lost if memcache evicts them first.
+
+    Each GA event carries the number of calls it represents in `call_count`.
+    """
+
+    BUCKET = timedelta(seconds=60)
+    # Leaves time for calls counted at the end of a bucket to land
+    DRAIN_DELAY = timedelta(seconds=15)
+    TTL = timedelta(hours=1)
+
+    @classmethod
+    def add(cls, key: ApiCallKey) -> None:
+        bucket = int(time.time() // cls.BUCKET.total_seconds())
+        memcache = MemcacheClient.get()
+        if cls._incr(memcache, cls._counter_key(bucket, key)) != 1:
+            return
+
+        # First call for this key in the bucket
+        index = cls._incr(memcache, cls._num_keys_key(bucket))
+        if index is None:
+            return
+        memcache.set(
+            cls._registry_key(bucket, index), key, int(cls.TTL.total_seconds())
+        )
+        if memcache.add(
+            cls._drain_enqueued_key(bucket), True, int(cls.TTL.total_seconds())
+        ):
+            cls._enqueue_drain(memcache, bucket)
+
+    @classmethod
+    def drain(cls, bucket: int) -> None:
+        """
+        Sends a bucket's counts to Google Analytics
+        """
+        memcache = MemcacheClient.get()
+        num_keys = memcache.get(cls._num_keys_key(bucket)) or 0
+        registry_keys = [
+            cls._registry_key(bucket, index) for index in range(1, num_keys + 1)
+        ]
+        registered = memcache.get_multi(registry_keys)
+        call_keys: List[ApiCallKey] = [
+            registered[registry_key]
+            for registry_key in registry_keys
+            if registered.get(registry_key) is not None
+        ]
+        counter_keys = [cls._counter_key(bucket, key) for key in call_keys]
+        counts = memcache.get_multi(counter_keys)
+
+        events = [
+            (
+                auth_owner_id,
+                "api_v03",
+                {
+                    "client_id": f"_{auth_owner_id}",  # Force this to be non-numeric so GA doesn't try to handle it as a number
+                    "owner_description": f"{auth_owner_id}:{auth_description}",
+                    "action": api_action,
+                    "label": api_label,
+                    "call_count": count,
+                },
+            )
+            for (
+                auth_owner_id,
+                auth_description,
+                api_action,
+                api_label,
+            ), counter_key in zip(call_keys, counter_keys)
+            if (count := counts.get(counter_key))
+        ]
+        if events:
+            GoogleAnalytics.track_events(events)
+
+        memcache.delete_multi(
+            registry_keys + counter_keys + [cls._num_keys_key(bucket)]
+        )
+
+    @classmethod
+    def _enqueue_drain(cls, memcache: CacheIf, bucket: int) -> None:
+        bucket_end = (bucket + 1) * cls.BUCKET.total_seconds()
+        try:
+            defer_safe(
+                cls.drain,
+                bucket,
+                _queue="api-track-call",
+                _url="/_ah/queue/deferred_track_call_apiv3",
+                _name=f"api_track_call_{bucket}",
+                _countdown=max(
+                    0, bucket_end - time.time() + cls.DRAIN_DELAY.total_seconds()
+                ),
+            )
+        except (taskqueue.TaskAlreadyExistsError, taskqueue.TombstonedTaskError):
+            pass
+        except Exception:
+            logging.exception(
+                f"Failed to enqueue tracked API call drain for bucket {bucket}; retrying on the next new key"
+            )
+            memcache.delete(cls._drain_enqueued_key(bucket))
+
+    @staticmethod
+    def _incr(memcache: CacheIf, key: bytes) -> Optional[int]:
+        value = memcache.incr(key)
+        if value is None:
+            if memcache.add(key, 1, int(ApiCallAggregator.TTL.total_seconds())):
+                return 1
+            value = memcache.incr(key)
+        return value
+
+    @staticmethod
+    def _counter_key(bucket: int, key: ApiCallKey) -> bytes:
+        digest = hashlib.md5(repr(key).encode(), usedforsecurity=False).hexdigest()
+        return f"api_track_call:{bucket}:count:{digest}".encode()
+
+    @staticmethod
+    def _registry_key(bucket: int, index: int) -> bytes:
+        return f"api_track_call:{bucket}:key:{index}".encode()
+
+    @staticmethod
+    def _num_keys_key(bucket: int) -> bytes:
+        return f"api_track_call:{bucket}:num_keys".encode()
+
+    @staticmethod
+    def _drain_enqueued_key(bucket: int) -> bytes:
+        return f"api_track_call:{bucket}:drain_enqueued".encode()
 
 
 def track_call_after_response(
     api_action: str, api_label: str | None = None, model_type: str | None = None
 ) -> None:
     """
-    Schedules a callback to Google Analytics to track an API call.
+    Counts an API call after the response, to be sent to Google Analytics in
+    the next batch.
     """
     # Save |auth_owner_id| and |auth_description| while we stil have access to the flask request context.
     auth_owner_id = g.auth_owner_id if hasattr(g, "auth_owner_id") else None
@@ -21,18 +169,5 @@ def track_call_after_response(
     if model_type is not None:
         api_action += f"/{model_type}"
 
-    params = {
-        "client_id": f"_{auth_owner_id}",  # Force this to be non-numeric so GA doesn't try to handle it as a number
-        "owner_description": f"{auth_owner_id}:{auth_description}",
-        "action": api_action,
-        "label": api_label,
-    }
-
-    defer_safe_async(
-        GoogleAnalytics.track_event,
-        auth_owner_id,
-        "api_v03",
-        params,
-        _queue="api-track-call",
-        _url="/_ah/queue/deferred_track_call_apiv3",
-    )
+    key: ApiCallKey = (auth_owner_id, auth_description, api_action, api_label)
+    run_after_response(lambda: ApiCallAggregator.add(key))
@@ -1,3 +1,5 @@
+from typing import List
+
 from backend.api.handlers.decorators import api_authenticated
 from backend.api.handlers.helpers.model_properties import (
     filter_event_properties,
@@ -13,6 +15,7 @@ from backend.common.consts.api_version import ApiMajorVersion
 from backend.common.decorators import cached_public
 from backend.common.helpers.season_helper import SeasonHelper
 from backend.common.models.team import Team
+from backend.common.queries.database_query import CachedDatabaseQuery
 from backend.common.queries.event_query import EventListQuery
 from backend.common.queries.team_query import TeamListQuery
 
@@ -27,26 +30,24 @@ def search_index() -> TypedFlaskResponse[dict]:
     max_team_num = int(max_team_key.id()[3:])
     max_team_page = int(max_team_num / 500)
 
-    team_futures = []
-    for page_num in range(max_team_page + 1):
-        team_futures.append(
-            TeamListQuery(page=page_num).fetch_dict_async(ApiMajorVersion.API_V3)
-        )
+    team_queries: List[CachedDatabaseQuery] = [
+        TeamListQuery(page=page_num) for page_num in range(max_team_page + 1)
+    ]
+    event_queries: List[CachedDatabaseQuery] = [
+        EventListQuery(year=year) for year in SeasonHelper.get_valid_years()
+    ]
 
-    event_futures = []
-    for year in SeasonHelper.get_valid_years():
-        event_futures.append(
-            EventListQuery(year=year).fetch_dict_async(ApiMajorVersion.API_V3)
-        )
+    # Fetch every page in one batch, so this is one cache lookup RPC total
+    results = CachedDatabaseQuery.fetch_dict_multi(
+        team_queries + event_queries, ApiMajorVersion.API_V3
+    )
 
     team_list = []
-    for future in team_futures:
-        partial_team_list = future.get_result()
+    for partial_team_list in results[: len(team_queries)]:
         team_list += partial_team_list
 
     event_list = []
-    for future in event_futures:
-        partial_event_list = future.get_result()
+    for partial_event_list in results[len(team_queries) :]:
         event_list += partial_event_list
 
     event_list = filter_event_properties(event_list, ModelType("search"))
@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 from flask import abort
 
@@ -13,6 +13,7 @@ from backend.api.handlers.helpers.model_properties import (
     ModelType,
 )
 from backend.api.handlers.helpers.profiled_jsonify import (
+    profiled_cached_jsonify,
     profiled_jsonify,
     TypedFlaskResponse,
 )
@@ -30,6 +31,7 @@ from backend.common.queries.award_query import (
     TeamEventAwardsQuery,
     TeamYearAwardsQuery,
 )
+from backend.common.queries.database_query import CachedDatabaseQuery
 from backend.common.queries.dict_converters.award_converter import AwardDict
 from backend.common.queries.dict_converters.district_converter import DistrictDict
 from backend.common.queries.dict_converters.event_converter import EventDict
@@ -400,15 +402,14 @@ def team_list_all(
     max_team_num = int(max_team_key.id()[3:])
     max_team_page = int(max_team_num / TEAM_PAGE_SIZE)
 
-    futures = []
-    for page_num in range(max_team_page + 1):
-        futures.append(
-            TeamListQuery(page=page_num).fetch_dict_async(ApiMajorVersion.API_V3)
-        )
+    queries: List[CachedDatabaseQuery] = [
+        TeamListQuery(page=page_num) for page_num in range(max_team_page + 1)
+    ]
 
     team_list = []
-    for future in futures:
-        partial_team_list = future.get_result()
+    for partial_team_list in CachedDatabaseQuery.fetch_dict_multi(
+        queries, ApiMajorVersion.API_V3
+    ):
         team_list += partial_team_list
 
     if model_type is not None:
@@ -434,13 +435,10 @@ def team_list(
         api_action += f"/{year}"
     track_call_after_response(api_action, str(page_num), model_type)
 
+    query: CachedDatabaseQuery[list[Team], list[TeamDict]]
     if year is None:
-        team_list = TeamListQuery(page=page_num).fetch_dict(ApiMajorVersion.API_V3)
+        query = TeamListQuery(page=page_num)
     else:
-        team_list = TeamListYearQuery(year=year, page=page_num).fetch_dict(
-            ApiMajorVersion.API_V3
-        )
+        query = TeamListYearQuery(year=year, page=page_num)
 
-    if model_type is not None:
-        team_list = filter_team_properties(team_list, model_type)
-    return profiled_jsonify(team_list)
+    return profiled_cached_jsonify(query, model_type, filter_team_properties)
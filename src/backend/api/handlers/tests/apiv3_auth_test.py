@@ -55,6 +55,30 @@ def test_bad_auth(ndb_stub, api_client: Client) -> None:
     assert "invalid" in resp.json["Error"]
 
 
+def test_auth_key_cached(ndb_stub, api_client: Client) -> None:
+    auth_key = ApiAuthAccess(
+        id="test_auth_key", auth_types_enum=[AuthType.READ_API]
+    ).put()
+    Team(id="frc254", team_number=254).put()
+
+    with patch.object(
+        ApiAuthAccess, "get_by_id", wraps=ApiAuthAccess.get_by_id
+    ) as mock_get:
+        for _ in range(2):
+            resp = api_client.get(
+                "/api/v3/team/frc254", headers={"X-TBA-Auth-Key": "test_auth_key"}
+            )
+            assert resp.status_code == 200
+        mock_get.assert_called_once_with("test_auth_key")
+
+        # Deleting the key takes effect immediately
+        auth_key.delete()
+        resp = api_client.get(
+            "/api/v3/team/frc254", headers={"X-TBA-Auth-Key": "test_auth_key"}
+        )
+        assert resp.status_code == 401
+
+
 @pytest.mark.parametrize("account", [None, Account()])
 def test_authenticated_header(ndb_stub, api_client: Client, account: Account) -> None:
     if account:
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import Optional, TypedDict
+
+from backend.common.cache.lru_cache import LRUCache
+from backend.common.models.api_auth_access import ApiAuthAccess
+
+
+class ApiAuthAccessCacheStats(TypedDict):
+    lookups: int
+    datastore_lookups_saved: int
+    valid_keys: int
+    invalid_keys: int
+
+
+class ApiAuthAccessCache:
+    """
+    A per-instance cache of ApiAuthAccess lookups by auth key, used to keep a
+    Datastore get off the hot path of every APIv3 request.
+
+    Keys that don't exist are cached too, for a shorter time, so repeated
+    requests with a bad key don't each hit the Datastore.
+
+    ApiAuthAccess invalidates its own entry whenever it is put or deleted.
+    That only clears the current instance, so other instances can keep
+    accepting an edited or deleted key for up to VALID_TTL.
+
+    Cached entities are shared between requests and must not be modified.
+    """
+
+    VALID_TTL = timedelta(seconds=60)
+    INVALID_TTL = timedelta(seconds=10)
+    MAX_ITEMS = 10000
+    # Log stats every this many lookups
+    STATS_LOG_INTERVAL = 10000
+
+    # Entries are tiny, so bound these by count rather than size
+    _valid: LRUCache[str, ApiAuthAccess] = LRUCache(
+        max_items=MAX_ITEMS, max_bytes=MAX_ITEMS, ttl=VALID_TTL, sizer=lambda _: 1
+    )
+    _invalid: LRUCache[str, bool] = LRUCache(
+        max_items=MAX_ITEMS, max_bytes=MAX_ITEMS, ttl=INVALID_TTL, sizer=lambda _: 1
+    )
+    _lookups: int = 0
+
+    @classmethod
+    def get(cls, auth_key: str) -> Optional[ApiAuthAccess]:
+        cls._lookups += 1
+        if cls._lookups % cls.STATS_LOG_INTERVAL == 0:
+            logging.info(f"ApiAuthAccessCache stats: {cls.stats()}")
+
+        auth = cls._valid.get(auth_key)
+        if auth is not None:
+            return auth
+        if cls._invalid.get(auth_key):
+            return None
+
+        auth = ApiAuthAccess.get_by_id(auth_key)
+        if auth is None:
+            cls._invalid.set(auth_key, True)
+        else:
+            cls._valid.set(auth_key, auth)
+        return auth
+
+    @classmethod
+    def invalidate(cls, auth_key: str) -> None:
+        cls._valid.delete(auth_key)
+        cls._invalid.delete(auth_key)
+
+    @classmethod
+    def stats(cls) -> ApiAuthAccessCacheStats:
+        valid_stats = cls._valid.get_stats()
+        invalid_stats = cls._invalid.get_stats()
+        return ApiAuthAccessCacheStats(
+            lookups=cls._lookups,
+            datastore_lookups_saved=valid_stats["hits"] + invalid_stats["hits"],
+            valid_keys=valid_stats["items"],
+            invalid_keys=invalid_stats["items"],
+        )
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._valid.clear()
+        cls._invalid.clear()
+        cls._lookups = 0
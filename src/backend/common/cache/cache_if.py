@@ -40,6 +40,44 @@ class CacheIf(abc.ABC):
         True if set.  False on error.
         """
 
+    @abc.abstractmethod
+    def add(self, key: bytes, value: Any, time: Optional[int] = None) -> bool:
+        """Sets a key's value, iff item is not already in memcache.
+
+        Args:
+        key: Key to set.  See docs on Client for details.
+        value: Value to set.  Any type.  If complex, will be pickled.
+        time: Optional expiration time, a relative number of seconds
+            from current time (up to 1 month).
+
+        Returns:
+        True if added.  False on error or if the key was already set.
+        """
+
+    @abc.abstractmethod
+    def add_async(
+        self, key: bytes, value: Any, time: Optional[int] = None
+    ) -> TypedFuture[bool]: ...
+
+    @abc.abstractmethod
+    def cas(self, key: bytes, value: Any, time: Optional[int] = None) -> bool:
+        """Compare-And-Set update.
+
+        This requires that the key has previously been successfully fetched
+        with gets() on this client, and sets it only if it hasn't been changed
+        since.
+
+        Args:
+        key: Key to set.  See docs on Client for details.
+        value: The new value.
+        time: Optional expiration time, a relative number of seconds
+            from current time (up to 1 month).
+
+        Returns:
+        True if updated.  False on error, or if the value was changed or
+        evicted since the gets().
+        """
+
     @abc.abstractmethod
     def set_async(
         self, key: bytes, value: Any, time: Optional[int] = None
@@ -87,6 +125,18 @@ class CacheIf(abc.ABC):
     @abc.abstractmethod
     def get_async(self, key: bytes) -> TypedFuture[Optional[Any]]: ...
 
+    @abc.abstractmethod
+    def gets(self, key: bytes) -> Optional[Any]:
+        """Looks up a single key in memcache, for a following cas().
+
+        Args:
+        key: The key in memcache to look up.  See docs on Client
+            for details of format.
+
+        Returns:
+        The value of the key, if found in memcache, else None.
+        """
+
     @abc.abstractmethod
     def get_multi(
         self,
@@ -119,6 +169,9 @@ class CacheIf(abc.ABC):
         key: Key to delete.  See docs on Client for detils.
         """
 
+    @abc.abstractmethod
+    def delete_async(self, key: bytes) -> TypedFuture[None]: ...
+
     @abc.abstractmethod
     def delete_multi(self, keys: List[bytes]) -> None:
         """Delete multiple keys at once.
@@ -143,6 +196,9 @@ class CacheIf(abc.ABC):
         The new integer value of the key
         """
 
+    @abc.abstractmethod
+    def incr_async(self, key: bytes) -> TypedFuture[Optional[int]]: ...
+
     @abc.abstractmethod
     def decr(self, key: bytes) -> Optional[int]:
         """Atomically decrements a key's value.
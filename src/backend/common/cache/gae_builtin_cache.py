@@ -21,6 +21,20 @@ class AppEngineBuiltinCache(CacheIf):
     def set(self, key: bytes, value: Any, time: Optional[int] = None) -> bool:
         return self.memcache_client.set(key, value, time or 0)
 
+    def add(self, key: bytes, value: Any, time: Optional[int] = None) -> bool:
+        return self.memcache_client.add(key, value, time or 0)
+
+    @typed_tasklet
+    def add_async(
+        self, key: bytes, value: Any, time: Optional[int] = None
+    ) -> Generator[Any, Any, bool]:
+        status_dict = yield self.memcache_client.add_multi_async(
+            {key: value}, time or 0
+        )
+        return (
+            status_dict and status_dict.get(key) == memcache.MemcacheSetResponse.STORED
+        )
+
     @typed_tasklet
     def set_async(
         self, key: bytes, value: Any, time: Optional[int] = None
@@ -40,9 +54,15 @@ class AppEngineBuiltinCache(CacheIf):
     ) -> None:
         self.memcache_client.set_multi(mapping, time=(time or 0), namespace=namespace)
 
+    def cas(self, key: bytes, value: Any, time: Optional[int] = None) -> bool:
+        return self.memcache_client.cas(key, value, time or 0)
+
     def get(self, key: bytes) -> Optional[Any]:
         return self.memcache_client.get(key)
 
+    def gets(self, key: bytes) -> Optional[Any]:
+        return self.memcache_client.gets(key)
+
     @typed_tasklet
     def get_async(self, key: bytes) -> Generator[Any, Any, Any]:
         results = yield self.memcache_client.get_multi_async([key])
@@ -56,12 +76,21 @@ class AppEngineBuiltinCache(CacheIf):
     def delete(self, key: bytes) -> None:
         self.memcache_client.delete(key)
 
+    @typed_tasklet
+    def delete_async(self, key: bytes) -> Generator[Any, Any, None]:
+        yield self.memcache_client.delete_multi_async([key])
+
     def delete_multi(self, keys: List[bytes]) -> None:
         self.memcache_client.delete_multi(keys)
 
     def incr(self, key: bytes) -> Optional[int]:
         return self.memcache_client.incr(key)
 
+    @typed_tasklet
+    def incr_async(self, key: bytes) -> Generator[Any, Any, Optional[int]]:
+        result = yield self.memcache_client.incr_async(key)
+        return result
+
     def decr(self, key: bytes) -> Optional[int]:
         return self.memcache_client.decr(key)
 
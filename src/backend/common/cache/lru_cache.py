@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Hashable,
+    Iterable,
+    Optional,
+    TypedDict,
+    TypeVar,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCacheStats(TypedDict):
+    hits: int
+    misses: int
+    evictions: int
+    items: int
+    bytes: int
+
+
+def pickled_size(value: Any) -> int:
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A bounded, per-instance, least-recently-used cache.
+
+    Entries expire after `ttl`, and the cache evicts the least recently used
+    entries once either `max_items` or `max_bytes` would be exceeded. Sizes are
+    estimated once on insert via `sizer` (by default, the pickled size).
+
+    Values are returned by reference, so callers must treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        max_bytes: int,
+        ttl: timedelta,
+        sizer: Callable[[V], int] = pickled_size,
+    ) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizer = sizer
+
+        # key --> (expires_at, size, value)
+        self._entries: OrderedDict[K, tuple[float, int, V]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: K, value: V) -> bool:
+        """
+        Returns False if the value is too large to ever fit in the cache
+        """
+        size = self.sizer(value)
+        if size > self.max_bytes:
+            return False
+
+        expires_at = time.monotonic() + self.ttl.total_seconds()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            while self._entries and (
+                len(self._entries) >= self.max_items
+                or self._bytes + size > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+        return True
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def delete_multi(self, keys: Iterable[K]) -> None:
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def get_stats(self) -> LRUCacheStats:
+        with self._lock:
+            return LRUCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                items=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def _remove(self, key: K) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
@@ -17,6 +17,14 @@ class NoopCache(CacheIf):
     def set(self, key: bytes, value: Any, time: Optional[int] = None) -> bool:
         return True
 
+    def add(self, key: bytes, value: Any, time: Optional[int] = None) -> bool:
+        return True
+
+    def add_async(
+        self, key: bytes, value: Any, time: Optional[int] = None
+    ) -> TypedFuture[bool]:
+        return InstantFuture(True)  # pyre-ignore[7]
+
     def set_async(
         self, key: bytes, value: Any, time: Optional[int] = None
     ) -> TypedFuture[bool]:
@@ -30,10 +38,17 @@ class NoopCache(CacheIf):
     ) -> None:
         return None
 
+    def cas(self, key: bytes, value: Any, time: Optional[int] = None) -> bool:
+        return False
+
     def get(self, key: bytes) -> Optional[Any]:
         self.miss_count += 1
         return None
 
+    def gets(self, key: bytes) -> Optional[Any]:
+        self.miss_count += 1
+        return None
+
     def get_async(self, key: bytes) -> Optional[Any]:
         self.miss_count += 1
         return InstantFuture(None)
@@ -49,12 +64,18 @@ class NoopCache(CacheIf):
     def delete(self, key: bytes) -> None:
         return None
 
+    def delete_async(self, key: bytes) -> TypedFuture[None]:
+        return InstantFuture(None)  # pyre-ignore[7]
+
     def delete_multi(self, keys: List[bytes]) -> None:
         return None
 
     def incr(self, key: bytes) -> Optional[int]:
         return None
 
+    def incr_async(self, key: bytes) -> TypedFuture[Optional[int]]:
+        return InstantFuture(None)  # pyre-ignore[7]
+
     def decr(self, key: bytes) -> Optional[int]:
         return None
 
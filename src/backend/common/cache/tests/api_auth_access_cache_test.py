@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import pytest
+from google.appengine.ext import ndb
+
+from backend.common.cache.api_auth_access_cache import ApiAuthAccessCache
+from backend.common.consts.auth_type import AuthType
+from backend.common.models.api_auth_access import ApiAuthAccess
+
+
+@pytest.fixture(autouse=True)
+def auto_add_ndb_stub(ndb_stub) -> None:
+    pass
+
+
+def _make_key(auth_key: str = "test_key") -> ApiAuthAccess:
+    auth = ApiAuthAccess(
+        id=auth_key,
+        description="test",
+        auth_types_enum=[AuthType.READ_API],
+    )
+    auth.put()
+    return auth
+
+
+def test_get_valid_key() -> None:
+    _make_key()
+
+    with patch.object(
+        ApiAuthAccess, "get_by_id", wraps=ApiAuthAccess.get_by_id
+    ) as mock_get:
+        assert ApiAuthAccessCache.get("test_key").description == "test"
+        assert ApiAuthAccessCache.get("test_key").description == "test"
+    mock_get.assert_called_once_with("test_key")
+
+    assert ApiAuthAccessCache.stats() == {
+        "lookups": 2,
+        "datastore_lookups_saved": 1,
+        "valid_keys": 1,
+        "invalid_keys": 0,
+    }
+
+
+def test_get_invalid_key() -> None:
+    with patch.object(
+        ApiAuthAccess, "get_by_id", wraps=ApiAuthAccess.get_by_id
+    ) as mock_get:
+        assert ApiAuthAccessCache.get("bad_key") is None
+        assert ApiAuthAccessCache.get("bad_key") is None
+    mock_get.assert_called_once_with("bad_key")
+
+    assert ApiAuthAccessCache.stats() == {
+        "lookups": 2,
+        "datastore_lookups_saved": 1,
+        "valid_keys": 0,
+        "invalid_keys": 1,
+    }
+
+
+def test_invalid_key_expires() -> None:
+    assert ApiAuthAccessCache.get("test_key") is None
+
+    # Created on another instance, so nothing invalidates this one
+    ApiAuthAccess(
+        id="test_key", description="test", auth_types_enum=[AuthType.READ_API]
+    ).put()
+    ApiAuthAccessCache._invalid.set("test_key", True)
+    assert ApiAuthAccessCache.get("test_key") is None
+
+    with patch("time.monotonic", return_value=10**9):
+        assert ApiAuthAccessCache.get("test_key") is not None
+
+
+def test_put_invalidates() -> None:
+    auth = _make_key()
+    assert ApiAuthAccessCache.get("test_key").description == "test"
+
+    auth.description = "edited"
+    auth.put()
+    assert ApiAuthAccessCache.get("test_key").description == "edited"
+
+
+def test_create_invalidates_negative_entry() -> None:
+    assert ApiAuthAccessCache.get("test_key") is None
+
+    _make_key()
+    assert ApiAuthAccessCache.get("test_key") is not None
+
+
+def test_delete_invalidates() -> None:
+    auth = _make_key()
+    assert ApiAuthAccessCache.get("test_key") is not None
+
+    auth.key.delete()
+    assert ApiAuthAccessCache.get("test_key") is None
+
+
+def test_delete_multi_invalidates() -> None:
+    auths = [_make_key("key_1"), _make_key("key_2")]
+    assert ApiAuthAccessCache.get("key_1") is not None
+    assert ApiAuthAccessCache.get("key_2") is not None
+
+    ndb.delete_multi([auth.key for auth in auths])
+    assert ApiAuthAccessCache.get("key_1") is None
+    assert ApiAuthAccessCache.get("key_2") is None
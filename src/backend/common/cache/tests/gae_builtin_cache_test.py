@@ -19,6 +19,33 @@ def test_set(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
     assert mc.get(b"foo") == "bar"
 
 
+def test_add(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
+    assert cache.add(b"foo", "bar") is True
+    assert cache.add(b"foo", "baz") is False
+    assert mc.get(b"foo") == "bar"
+
+
+def test_cas(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
+    # Not fetched with gets()
+    assert cache.cas(b"foo", "bar") is False
+
+    mc.set(b"foo", "bar")
+    assert cache.gets(b"foo") == "bar"
+    assert cache.cas(b"foo", "baz") is True
+    assert mc.get(b"foo") == "baz"
+
+    assert cache.gets(b"foo") == "baz"
+    mc.set(b"foo", "qux")
+    assert cache.cas(b"foo", "quux") is False
+    assert mc.get(b"foo") == "qux"
+
+
+def test_add_async(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
+    assert cache.add_async(b"foo", "bar").get_result() is True
+    assert cache.add_async(b"foo", "baz").get_result() is False
+    assert mc.get(b"foo") == "bar"
+
+
 def test_set_async(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
     assert cache.set_async(b"foo", "bar").get_result() is True
     assert mc.get(b"foo") == "bar"
@@ -50,6 +77,12 @@ def test_delete(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
     assert mc.get(b"foo") is None
 
 
+def test_delete_async(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
+    mc.set(b"foo", "bar")
+    cache.delete_async(b"foo").get_result()
+    assert mc.get(b"foo") is None
+
+
 def test_delete_multi(mc: memcache.Client, cache: AppEngineBuiltinCache):
     mc.set_multi({b"foo": "bar", b"woof": "meow"})
     cache.delete_multi([b"foo", b"woof"])
@@ -62,6 +95,12 @@ def test_incr(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
     assert mc.get(b"foo") == 1
 
 
+def test_incr_async(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
+    mc.set(b"foo", 0)
+    assert cache.incr_async(b"foo").get_result() == 1
+    assert mc.get(b"foo") == 1
+
+
 def test_decr(mc: memcache.Client, cache: AppEngineBuiltinCache) -> None:
     mc.set(b"foo", 5)
     cache.decr(b"foo")
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from freezegun import freeze_time
+
+from backend.common.cache.lru_cache import LRUCache
+
+
+def test_get_set() -> None:
+    cache: LRUCache[str, str] = LRUCache(
+        max_items=10, max_bytes=1000, ttl=timedelta(seconds=60), sizer=len
+    )
+
+    assert cache.get("key") is None
+    assert cache.set("key", "value") is True
+    assert cache.get("key") == "value"
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["items"] == 1
+    assert stats["bytes"] == 5
+
+
+def test_delete() -> None:
+    cache: LRUCache[str, str] = LRUCache(
+        max_items=10, max_bytes=1000, ttl=timedelta(seconds=60), sizer=len
+    )
+    cache.set("a", "value")
+    cache.set("b", "value")
+    cache.set("c", "value")
+
+    cache.delete("a")
+    assert cache.get("a") is None
+
+    cache.delete_multi(["b", "c", "d"])
+    assert cache.get("b") is None
+    assert cache.get("c") is None
+    assert cache.get_stats()["bytes"] == 0
+
+
+def test_ttl_expiry() -> None:
+    cache: LRUCache[str, str] = LRUCache(
+        max_items=10, max_bytes=1000, ttl=timedelta(seconds=60), sizer=len
+    )
+    with freeze_time("2026-01-01 00:00:00") as frozen:
+        cache.set("key", "value")
+        frozen.tick(timedelta(seconds=59))
+        assert cache.get("key") == "value"
+
+        frozen.tick(timedelta(seconds=2))
+        assert cache.get("key") is None
+        assert cache.get_stats()["items"] == 0
+
+
+def test_evicts_least_recently_used_by_count() -> None:
+    cache: LRUCache[str, str] = LRUCache(
+        max_items=2, max_bytes=1000, ttl=timedelta(seconds=60), sizer=len
+    )
+    cache.set("a", "1")
+    cache.set("b", "2")
+
+    # Touch a, so b is the least recently used
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_evicts_by_bytes() -> None:
+    cache: LRUCache[str, str] = LRUCache(
+        max_items=10, max_bytes=10, ttl=timedelta(seconds=60), sizer=len
+    )
+    cache.set("a", "12345")
+    cache.set("b", "12345")
+    cache.set("c", "123")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "12345"
+    assert cache.get("c") == "123"
+    assert cache.get_stats()["bytes"] == 8
+
+
+def test_rejects_oversized_value() -> None:
+    cache: LRUCache[str, str] = LRUCache(
+        max_items=10, max_bytes=4, ttl=timedelta(seconds=60), sizer=len
+    )
+    cache.set("a", "1")
+    assert cache.set("b", "12345") is False
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+
+
+def test_overwrite_updates_size() -> None:
+    cache: LRUCache[str, str] = LRUCache(
+        max_items=10, max_bytes=100, ttl=timedelta(seconds=60), sizer=len
+    )
+    cache.set("a", "12345")
+    cache.set("a", "12")
+    assert cache.get("a") == "12"
+    assert cache.get_stats()["bytes"] == 2
+    assert cache.get_stats()["items"] == 1
+
+
+def test_default_sizer() -> None:
+    cache: LRUCache[str, dict] = LRUCache(
+        max_items=10, max_bytes=10000, ttl=timedelta(seconds=60)
+    )
+    cache.set("a", {"key": "value"})
+    assert cache.get_stats()["bytes"] > 0
+
+
+def test_clear() -> None:
+    cache: LRUCache[str, str] = LRUCache(
+        max_items=10, max_bytes=100, ttl=timedelta(seconds=60), sizer=len
+    )
+    cache.set("a", "1")
+    cache.get("a")
+    cache.clear()
+    assert cache.get_stats() == {
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+        "items": 0,
+        "bytes": 0,
+    }
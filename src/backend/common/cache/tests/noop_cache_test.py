@@ -6,6 +6,7 @@ def test_noop_cache() -> None:
 
     assert cache.get(b"key") is None
     assert cache.set(b"key", "value") is True
+    assert cache.add(b"key", "value") is True
     assert cache.get(b"key") is None
 
     stats = cache.get_stats()
@@ -22,6 +23,9 @@ def test_noop_cache() -> None:
     assert cache.incr(b"key") is None
     assert cache.decr(b"key") is None
 
+    assert cache.gets(b"key") is None
+    assert cache.cas(b"key", "value") is False
+
     stats = cache.get_stats()
     assert stats is not None
-    assert stats["misses"] == 4
+    assert stats["misses"] == 5
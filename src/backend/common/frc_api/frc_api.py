@@ -1,8 +1,10 @@
 import datetime
+import functools
 import json
 import logging
 import os
 import re
+import zlib
 from typing import (
     Any,
     cast,
@@ -21,6 +23,11 @@ from google.appengine.runtime import apiproxy_errors
 from pyre_extensions import JSON, none_throws
 
 from backend.common.environment import Environment
+from backend.common.frc_api.response_archive import (
+    FRCAPIResponseArchive,
+    FRCAPIResponseIndex,
+)
+from backend.common.frc_api.response_fingerprints import FRCAPIResponseFingerprints
 from backend.common.frc_api.types import (
     AllianceListModelV2,
     ApiIndexModelV2,
@@ -50,11 +57,15 @@ from backend.common.frc_api.types import (
     TeamAvatarListingsModelV2,
 )
 from backend.common.futures import TypedFuture
+from backend.common.memcache_models.frc_api_response_validators_memcache import (
+    FRCAPIResponseValidators,
+    FRCAPIResponseValidatorsMemcache,
+)
 from backend.common.models.keys import Year
 from backend.common.profiler import Span
 from backend.common.sitevars.fms_api_secrets import FMSApiSecrets
 from backend.common.tasklets import typed_tasklet
-from backend.common.urlfetch import TypedURLFetchResult
+from backend.common.urlfetch import NotModifiedURLFetchResult, TypedURLFetchResult
 
 TCompLevel = Literal["qual", "playoff"]
 
@@ -83,7 +94,7 @@ class TScoreDetailReturn(TypedDict):
 
 class FRCAPI:
     BASE_URL = "https://frc-api.firstinspires.org"
-    STORAGE_BUCKET_BASE_DIR = "frc-api-response"
+    STORAGE_BUCKET_BASE_DIR = FRCAPIResponseArchive.BASE_DIR
 
     class ValidationError(Exception):
         pass
@@ -99,7 +110,15 @@ class FRCAPI:
         sim_time: Optional[datetime.datetime] = None,
         sim_api_version: Optional[str] = None,
         save_response: bool = False,
+        conditional: bool = False,
     ):
+        """
+        With conditional, requests send the ETag / Last-Modified validators
+        from the last full response for the same URL, and an unchanged
+        response comes back as a NotModifiedURLFetchResult. It carries the
+        body cached with the validators, if memcache still has it; otherwise
+        it has no content, and refetch() gets the full body.
+        """
         # Load auth_token from Sitevar if not specified
         if not auth_token:
             auth_token = FMSApiSecrets.auth_token()
@@ -114,6 +133,7 @@ class FRCAPI:
         self._sim_time = sim_time
         self._sim_api_version = sim_api_version
         self._save_response = save_response
+        self._conditional = conditional
 
     def root(self) -> TypedFuture[TypedURLFetchResult[ApiIndexModelV2]]:
         return self._get("/", ApiIndexModelV2)
@@ -267,6 +287,20 @@ class FRCAPI:
             )
 
         url = f"{self.BASE_URL}/{versioned_endpoint}"
+        return (yield self._fetch(url, return_type, self._conditional))
+
+    def refetch(
+        self, response: TypedURLFetchResult[T]
+    ) -> TypedFuture[TypedURLFetchResult[T]]:
+        """
+        Fetches the full body for a (not modified) response, unconditionally.
+        """
+        return self._fetch(response.request_url, response.json_type, False)
+
+    @typed_tasklet
+    def _fetch(
+        self, url: str, return_type: type, conditional: bool
+    ) -> Generator[Any, Any, TypedURLFetchResult]:
         headers = {
             "Accept": "application/json",
             "Cache-Control": "no-cache, max-age=10",
@@ -274,6 +308,15 @@ class FRCAPI:
             "Authorization": f"Basic {self.auth_token}",
         }
 
+        validators: Optional[FRCAPIResponseValidators] = None
+        if conditional:
+            validators = yield FRCAPIResponseValidatorsMemcache(url).get_async()
+            if validators and validators["etag"]:
+                headers["If-None-Match"] = validators["etag"]
+            if validators and validators["last_modified"]:
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        endpoint = url.replace(f"{self.BASE_URL}/", "")
         with Span(f"frc_api_fetch:{endpoint}"):
             try:
                 r = yield self.ndb_context.urlfetch(url, headers=headers, deadline=30)
@@ -286,44 +329,74 @@ class FRCAPI:
                     url, 408, "", return_type
                 )
 
+            if validators and r.status_code == 304:
+                cached_content = validators.get("content")
+                return NotModifiedURLFetchResult(
+                    url,
+                    r,
+                    return_type,
+                    validators["content_hash"],
+                    (
+                        zlib.decompress(cached_content).decode()
+                        if cached_content
+                        else None
+                    ),
+                )
+
             response = TypedURLFetchResult(url, r, return_type)
             if response.status_code == 200:
                 with Span(f"maybe_save_fmsapi_response:{response.url}"):
                     self._maybe_save_response(response.url, response.content)
+                if conditional:
+                    yield self._save_validators(url, response)
 
             return response
 
+    @ndb.tasklet
+    def _save_validators(self, url: str, response: TypedURLFetchResult):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        content = response.content
+        if isinstance(content, str):
+            content = content.encode()
+        yield FRCAPIResponseValidatorsMemcache(url).put_async(
+            FRCAPIResponseValidators(
+                etag=etag,
+                last_modified=last_modified,
+                content_hash=FRCAPIResponseFingerprints.fingerprint(content),
+                content=zlib.compress(content),
+            )
+        )
+
     def _maybe_save_response(self, url: str, content: str) -> None:
         if not Environment.save_frc_api_response() or not self._save_response:
             return
 
         endpoint = url.replace(f"{self.BASE_URL}/", "")
-        gcs_dir_name = f"{FRCAPI.STORAGE_BUCKET_BASE_DIR}/{endpoint}/"
-
-        from backend.common.storage import (
-            get_files as cloud_storage_get_files,
-            read as cloud_storage_read,
-            write as cloud_storage_write,
-        )
-
-        # Check to see if the last saved response is the same as the current response
         try:
-            # Check for last response
-            gcs_files = cloud_storage_get_files(gcs_dir_name)
-            last_item_filename = gcs_files[-1] if len(gcs_files) > 0 else None
-
-            write_new = True
-            if last_item_filename is not None:
-                last_json_file = cloud_storage_read(last_item_filename)
-                if last_json_file == content:
-                    write_new = False  # Do not write if content didn't change
-
-            if write_new:
-                file_name = gcs_dir_name + "{}.json".format(datetime.datetime.now())
-                cloud_storage_write(file_name, content)
+            FRCAPIResponseArchive.save(endpoint, content)
         except Exception:
             logging.exception("Error saving API response for: {}".format(url))
 
+    @staticmethod
+    @functools.cache
+    def get_local_gcs_index(gcs_dir_name: str) -> Optional[FRCAPIResponseIndex]:
+        """
+        An index of the locally cached files for a directory, if there are
+        any. Replays only read these, never write them, so each is kept for
+        the process.
+        """
+        safe_dir_name = gcs_dir_name.replace(":", "_").replace("?", "@")
+        path = os.path.join(
+            os.path.dirname(__file__), f"gcs_test_data_cache/{safe_dir_name}"
+        )
+        if not os.path.exists(path):
+            return None
+        return FRCAPIResponseIndex(FRCAPI.get_cached_gcs_files(gcs_dir_name))
+
     @staticmethod
     def get_cached_gcs_files(gcs_dir_name: str):
         """
@@ -419,29 +492,33 @@ class FRCAPI:
             gcs_dir_name = (
                 f"{self.STORAGE_BUCKET_BASE_DIR}/{version}/{endpoint.lstrip('/')}/"
             )
-            gcs_files = self.get_cached_gcs_files(gcs_dir_name)
-
-            # Find appropriate timed response
-            last_file_name = None
-            for filename in gcs_files:
-                time_str = filename.split("/")[-1].replace(".json", "").strip()
-                file_time = datetime.datetime.strptime(time_str, "%Y-%m-%d %H_%M_%S.%f")
-                if file_time <= self._sim_time:
-                    last_file_name = filename
-                else:
-                    break
-
-            # Fetch response
+            sim_time = none_throws(self._sim_time)
+
+            # Find appropriate timed response, from the local copy if there is
+            # one, otherwise from the archive's index
             content: Optional[str] = None
-            if last_file_name:
-                with open(
-                    os.path.join(
-                        os.path.dirname(__file__),
-                        f"gcs_test_data_cache/{last_file_name}",
-                    ),
-                    "r",
-                ) as f:
-                    content = f.read()
+            local_index = self.get_local_gcs_index(gcs_dir_name)
+            if local_index is not None:
+                last_file_name = local_index.file_at(sim_time)
+                if last_file_name:
+                    with open(
+                        os.path.join(
+                            os.path.dirname(__file__),
+                            f"gcs_test_data_cache/{last_file_name}",
+                        ),
+                        "r",
+                    ) as f:
+                        content = f.read()
+            else:
+                index = FRCAPIResponseArchive.index(versioned_endpoint)
+                last_file_name = index.file_at(sim_time) if index else None
+                if last_file_name:
+                    from backend.common.storage import read
+
+                    stored = read(last_file_name)
+                    if isinstance(stored, bytes):
+                        stored = stored.decode()
+                    content = stored
 
             if content is None:
                 return TypedURLFetchResult.typed_mock_for_content(
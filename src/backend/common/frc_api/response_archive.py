@@ -0,0 +1,151 @@
+import bisect
+import datetime
+import json
+import logging
+from typing import List, Optional, TypedDict
+
+from backend.common import storage
+from backend.common.frc_api.response_fingerprints import FRCAPIResponseFingerprints
+
+
+class FRCAPIResponseArchiveManifest(TypedDict):
+    latest_hash: str
+    # When each archived response was fetched, oldest first
+    times: List[str]
+
+
+class FRCAPIResponseArchive:
+    """
+    An append-only archive of FRC API responses in Cloud Storage. Each
+    endpoint gets a directory holding one file per distinct response, named
+    for when it was fetched.
+
+    Each endpoint also has a small manifest with the hash of its latest
+    response and a sorted index of when each response was fetched. Saving a
+    response costs one small read and a hash compare, rather than listing the
+    directory and reading the last response back, and replays find the
+    response for a time without listing the directory. Manifests live outside
+    the response directories, so listing a directory only returns responses.
+    """
+
+    BASE_DIR = "frc-api-response"
+    MANIFEST_BASE_DIR = "frc-api-response-manifest"
+
+    @classmethod
+    def response_dir(cls, endpoint: str) -> str:
+        return f"{cls.BASE_DIR}/{endpoint}/"
+
+    @classmethod
+    def manifest_file(cls, endpoint: str) -> str:
+        return f"{cls.MANIFEST_BASE_DIR}/{endpoint}/manifest.json"
+
+    @classmethod
+    def save(
+        cls,
+        endpoint: str,
+        content: str | bytes,
+        now: Optional[datetime.datetime] = None,
+    ) -> bool:
+        """
+        Archives a response for an endpoint, unless it's the same as the last
+        one archived. Returns True if the response was written.
+        """
+        content_hash = FRCAPIResponseFingerprints.fingerprint(content)
+        manifest = cls.manifest(endpoint)
+        if manifest is not None and manifest["latest_hash"] == content_hash:
+            return False
+
+        time = str(now or datetime.datetime.now())
+        storage.write(f"{cls.response_dir(endpoint)}{time}.json", content)
+
+        times = list(manifest["times"]) if manifest is not None else []
+        bisect.insort(times, time)
+        cls._write_manifest(
+            endpoint,
+            FRCAPIResponseArchiveManifest(latest_hash=content_hash, times=times),
+        )
+        return True
+
+    @classmethod
+    def manifest(cls, endpoint: str) -> Optional[FRCAPIResponseArchiveManifest]:
+        manifest = storage.read(cls.manifest_file(endpoint))
+        if manifest is not None:
+            parsed = json.loads(manifest)
+            # Manifests written before the index was kept get rebuilt
+            if "times" in parsed:
+                return parsed
+        return cls._build_manifest(endpoint)
+
+    @classmethod
+    def index(cls, endpoint: str) -> Optional["FRCAPIResponseIndex"]:
+        """
+        The endpoint's archived response files, from its manifest.
+        """
+        manifest = cls.manifest(endpoint)
+        if manifest is None:
+            return None
+        return FRCAPIResponseIndex(
+            [f"{cls.response_dir(endpoint)}{time}.json" for time in manifest["times"]]
+        )
+
+    @classmethod
+    def _build_manifest(cls, endpoint: str) -> Optional[FRCAPIResponseArchiveManifest]:
+        # Responses archived before manifests existed; index them and hash the
+        # latest once, and write the manifest right away so this isn't
+        # repeated until the endpoint's content changes
+        files = storage.get_files(cls.response_dir(endpoint))
+        if not files:
+            return None
+
+        logging.info(f"Building FRC API response archive manifest for {endpoint}")
+        index = FRCAPIResponseIndex(files)
+        last_content = storage.read(index.files[-1])
+        manifest = FRCAPIResponseArchiveManifest(
+            latest_hash=FRCAPIResponseFingerprints.fingerprint(last_content or ""),
+            times=[cls._file_time_str(file) for file in index.files],
+        )
+        cls._write_manifest(endpoint, manifest)
+        return manifest
+
+    @classmethod
+    def _write_manifest(
+        cls, endpoint: str, manifest: FRCAPIResponseArchiveManifest
+    ) -> None:
+        storage.write(
+            cls.manifest_file(endpoint),
+            json.dumps(manifest).encode(),
+            content_type="application/json",
+        )
+
+    @staticmethod
+    def _file_time_str(file_name: str) -> str:
+        return file_name.split("/")[-1].removesuffix(".json")
+
+
+class FRCAPIResponseIndex:
+    """
+    Archived response files for one endpoint, sorted by when they were
+    fetched, for finding the response that was current at a given time.
+    """
+
+    files: List[str]
+    times: List[datetime.datetime]
+
+    def __init__(self, files: List[str]) -> None:
+        indexed = sorted((self.file_time(file), file) for file in files)
+        self.times = [time for time, _ in indexed]
+        self.files = [file for _, file in indexed]
+
+    def file_at(self, time: datetime.datetime) -> Optional[str]:
+        """
+        The last file fetched at or before `time`, if any.
+        """
+        i = bisect.bisect_right(self.times, time)
+        return self.files[i - 1] if i > 0 else None
+
+    @staticmethod
+    def file_time(file_name: str) -> datetime.datetime:
+        # eg. ".../2017-03-04 18:18:03.096010.json". Local copies replace the
+        # `:`s with `_`s.
+        time = file_name.split("/")[-1].removesuffix(".json").strip()
+        return datetime.datetime.fromisoformat(time.replace("_", ":"))
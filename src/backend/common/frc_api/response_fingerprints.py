@@ -0,0 +1,70 @@
+import datetime
+import hashlib
+from typing import Dict, List, Optional
+
+from google.appengine.ext import ndb
+
+from backend.common.memcache_models.frc_api_response_fingerprint_memcache import (
+    FRCAPIResponseFingerprintMemcache,
+)
+from backend.common.models.frc_api_response_fingerprint import (
+    FRCAPIResponseFingerprint,
+)
+
+
+class FRCAPIResponseFingerprints:
+    """
+    Remembers a hash of the last FRC API response that was fully processed for
+    each URL (optionally scoped to an event), so datafeed tasks can skip parsing and writing payloads that
+    haven't changed since the last poll. Hashes are kept in memcache, with the
+    Datastore as a fallback.
+
+    Fingerprints older than MAX_AGE are ignored, so every endpoint is still
+    fully processed periodically. That picks up changes that don't come from
+    the FRC API, like an event's remap_teams.
+    """
+
+    MAX_AGE = FRCAPIResponseFingerprintMemcache.TTL
+
+    @staticmethod
+    def fingerprint(content: str | bytes) -> str:
+        if isinstance(content, str):
+            content = content.encode()
+        return hashlib.sha1(content).hexdigest()
+
+    @classmethod
+    def get_multi(cls, keys: List[str]) -> Dict[str, Optional[str]]:
+        futures = {
+            key: FRCAPIResponseFingerprintMemcache(key).get_async() for key in keys
+        }
+        fingerprints = {key: future.get_result() for key, future in futures.items()}
+
+        missing = [key for key, fingerprint in fingerprints.items() if not fingerprint]
+        if missing:
+            cutoff = (
+                datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+                - cls.MAX_AGE
+            )
+            entities = ndb.get_multi(
+                [ndb.Key(FRCAPIResponseFingerprint, key) for key in missing]
+            )
+            for key, entity in zip(missing, entities):
+                if entity and entity.updated >= cutoff:
+                    fingerprints[key] = entity.content_hash
+
+        return fingerprints
+
+    @classmethod
+    def put_multi(cls, fingerprints: Dict[str, str]) -> None:
+        futures = [
+            FRCAPIResponseFingerprintMemcache(key).put_async(fingerprint)
+            for key, fingerprint in fingerprints.items()
+        ]
+        ndb.put_multi(
+            [
+                FRCAPIResponseFingerprint(id=key, content_hash=fingerprint)
+                for key, fingerprint in fingerprints.items()
+            ]
+        )
+        for future in futures:
+            future.get_result()
@@ -8,6 +8,7 @@ from google.appengine.api import urlfetch_errors
 from google.appengine.ext import testbed
 
 from backend.common.frc_api import FRCAPI
+from backend.common.frc_api.response_fingerprints import FRCAPIResponseFingerprints
 from backend.common.sitevars.fms_api_secrets import (
     ContentType as FMSApiSecretsContentType,
 )
@@ -16,6 +17,7 @@ from backend.common.storage import (
     get_files as cloud_storage_get_files,
     read as cloud_storage_read,
 )
+from backend.common.urlfetch import NotModifiedURLFetchResult
 
 
 @pytest.fixture(autouse=True)
@@ -388,3 +390,85 @@ def test_save_response_updated(
     f2 = cloud_storage_read(files[1])
     assert f2 is not None
     assert f2 == json.dumps(content2).encode()
+
+
+def _mock_frc_api_conditional(
+    urlfetch_stub: testbed.urlfetch_stub.URLFetchServiceStub,
+    content: dict,
+    etag: str,
+    request_headers: list[dict[str, str]],
+) -> None:
+    def mock_fetch_fn(
+        url,
+        payload,
+        method,
+        headers,
+        request,
+        response,
+        follow_redirects,
+        deadline,
+        validate_certificate,
+    ):
+        called_headers = {h.Key: h.Value for h in request.header}
+        request_headers.append(called_headers)
+        if called_headers.get("If-None-Match") == etag:
+            response.StatusCode = 304
+            return
+
+        response.StatusCode = 200
+        response.Content = json.dumps(content).encode()
+        for key, value in [
+            ("ETag", etag),
+            ("Last-Modified", "Wed, 01 Apr 2020 00:00:00 GMT"),
+        ]:
+            header = response.header.add()
+            header.Key = key
+            header.Value = value
+
+    urlfetch_stub._urlmatchers_to_fetch_functions.append(
+        (lambda url: "frc-api.firstinspires.org" in url, mock_fetch_fn)
+    )
+
+
+def test_get_conditional(
+    memcache_stub, urlfetch_stub: testbed.urlfetch_stub.URLFetchServiceStub
+) -> None:
+    content = {"Rankings": []}
+    request_headers: list[dict[str, str]] = []
+    _mock_frc_api_conditional(urlfetch_stub, content, '"abc"', request_headers)
+
+    api = FRCAPI("zach", conditional=True)
+    response = api.rankings(2020, "MIKET").get_result()
+    assert response.status_code == 200
+    assert not response.not_modified
+    assert "If-None-Match" not in request_headers[0]
+
+    response = api.rankings(2020, "MIKET").get_result()
+    assert request_headers[1]["If-None-Match"] == '"abc"'
+    assert request_headers[1]["If-Modified-Since"] == "Wed, 01 Apr 2020 00:00:00 GMT"
+    assert response.not_modified
+    assert isinstance(response, NotModifiedURLFetchResult)
+    assert response.content_hash == FRCAPIResponseFingerprints.fingerprint(
+        json.dumps(content)
+    )
+    # The body cached with the validators
+    assert response.json() == content
+
+    response = api.refetch(response).get_result()
+    assert "If-None-Match" not in request_headers[2]
+    assert response.status_code == 200
+    assert response.json() == content
+
+
+def test_get_not_conditional(
+    memcache_stub, urlfetch_stub: testbed.urlfetch_stub.URLFetchServiceStub
+) -> None:
+    request_headers: list[dict[str, str]] = []
+    _mock_frc_api_conditional(urlfetch_stub, {"Rankings": []}, '"abc"', request_headers)
+
+    api = FRCAPI("zach")
+    api.rankings(2020, "MIKET").get_result()
+    response = api.rankings(2020, "MIKET").get_result()
+
+    assert response.status_code == 200
+    assert all("If-None-Match" not in headers for headers in request_headers)
@@ -0,0 +1,204 @@
+import datetime
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from backend.common import storage
+from backend.common.frc_api import frc_api
+from backend.common.frc_api.frc_api import FRCAPI
+from backend.common.frc_api.response_archive import (
+    FRCAPIResponseArchive,
+    FRCAPIResponseIndex,
+)
+from backend.common.frc_api.response_fingerprints import FRCAPIResponseFingerprints
+from backend.common.frc_api.types import EventScheduleHybridModelV2
+
+
+@pytest.fixture(autouse=True)
+def auto_use_gcs_stub(gcs_stub):
+    pass
+
+
+ENDPOINT = "v3.0/2020/awards/MIKET"
+
+
+def test_save() -> None:
+    now = datetime.datetime(2020, 3, 1, 12, 0, 0, 123)
+    assert FRCAPIResponseArchive.save(ENDPOINT, b"[1]", now=now)
+
+    assert storage.get_files("frc-api-response/v3.0/2020/awards/MIKET/") == [
+        "frc-api-response/v3.0/2020/awards/MIKET/2020-03-01 12:00:00.000123.json"
+    ]
+    assert FRCAPIResponseArchive.manifest(ENDPOINT) == {
+        "latest_hash": FRCAPIResponseFingerprints.fingerprint(b"[1]"),
+        "times": ["2020-03-01 12:00:00.000123"],
+    }
+
+
+def test_save_unchanged() -> None:
+    assert FRCAPIResponseArchive.save(
+        ENDPOINT, b"[1]", now=datetime.datetime(2020, 3, 1, 12)
+    )
+
+    with patch.object(storage, "get_files") as mock_get_files:
+        assert not FRCAPIResponseArchive.save(
+            ENDPOINT, b"[1]", now=datetime.datetime(2020, 3, 1, 13)
+        )
+
+    # The manifest is enough to tell the content didn't change
+    mock_get_files.assert_not_called()
+    assert len(storage.get_files("frc-api-response/v3.0/2020/awards/MIKET/")) == 1
+
+
+def test_save_changed() -> None:
+    assert FRCAPIResponseArchive.save(
+        ENDPOINT, b"[1]", now=datetime.datetime(2020, 3, 1, 12)
+    )
+    assert FRCAPIResponseArchive.save(
+        ENDPOINT, b"[2]", now=datetime.datetime(2020, 3, 1, 13)
+    )
+    assert FRCAPIResponseArchive.save(
+        ENDPOINT, b"[1]", now=datetime.datetime(2020, 3, 1, 14)
+    )
+
+    manifest = FRCAPIResponseArchive.manifest(ENDPOINT)
+    assert manifest is not None
+    assert manifest["latest_hash"] == FRCAPIResponseFingerprints.fingerprint(b"[1]")
+    assert manifest["times"] == [
+        "2020-03-01 12:00:00",
+        "2020-03-01 13:00:00",
+        "2020-03-01 14:00:00",
+    ]
+    assert len(storage.get_files("frc-api-response/v3.0/2020/awards/MIKET/")) == 3
+
+
+def test_save_without_manifest() -> None:
+    # Responses archived before there were manifests
+    response_dir = "frc-api-response/v3.0/2020/awards/MIKET/"
+    storage.write(f"{response_dir}2020-03-01 12:00:00.000001.json", b"[1]")
+    storage.write(f"{response_dir}2020-03-01 13:00:00.000001.json", b"[2]")
+
+    assert not FRCAPIResponseArchive.save(
+        ENDPOINT, b"[2]", now=datetime.datetime(2020, 3, 1, 14)
+    )
+
+    # The manifest is written as soon as it's built, so unchanged responses
+    # don't list the directory again
+    manifest = json.loads(
+        storage.read(FRCAPIResponseArchive.manifest_file(ENDPOINT)) or ""
+    )
+    assert manifest == {
+        "latest_hash": FRCAPIResponseFingerprints.fingerprint(b"[2]"),
+        "times": ["2020-03-01 12:00:00.000001", "2020-03-01 13:00:00.000001"],
+    }
+    with patch.object(storage, "get_files") as mock_get_files:
+        assert not FRCAPIResponseArchive.save(
+            ENDPOINT, b"[2]", now=datetime.datetime(2020, 3, 1, 14)
+        )
+        assert FRCAPIResponseArchive.save(
+            ENDPOINT, b"[3]", now=datetime.datetime(2020, 3, 1, 15)
+        )
+    mock_get_files.assert_not_called()
+
+    manifest = json.loads(
+        storage.read(FRCAPIResponseArchive.manifest_file(ENDPOINT)) or ""
+    )
+    assert manifest == {
+        "latest_hash": FRCAPIResponseFingerprints.fingerprint(b"[3]"),
+        "times": [
+            "2020-03-01 12:00:00.000001",
+            "2020-03-01 13:00:00.000001",
+            "2020-03-01 15:00:00",
+        ],
+    }
+
+
+def test_save_with_manifest_without_times() -> None:
+    # Manifests written before they kept an index
+    storage.write(
+        f"{FRCAPIResponseArchive.response_dir(ENDPOINT)}2020-03-01 12:00:00.json",
+        b"[1]",
+    )
+    storage.write(
+        FRCAPIResponseArchive.manifest_file(ENDPOINT),
+        json.dumps(
+            {"latest_hash": FRCAPIResponseFingerprints.fingerprint(b"[1]")}
+        ).encode(),
+    )
+
+    assert FRCAPIResponseArchive.manifest(ENDPOINT) == {
+        "latest_hash": FRCAPIResponseFingerprints.fingerprint(b"[1]"),
+        "times": ["2020-03-01 12:00:00"],
+    }
+
+
+def test_index_file_at() -> None:
+    index = FRCAPIResponseIndex(
+        [
+            "a/2020-03-01 13_00_00.000001.json",
+            "a/2020-03-01 12_00_00.json",
+            "a/2020-03-01 14_00_00.5.json",
+        ]
+    )
+
+    assert index.file_at(datetime.datetime(2020, 3, 1, 11)) is None
+    assert index.file_at(datetime.datetime(2020, 3, 1, 12)) == (
+        "a/2020-03-01 12_00_00.json"
+    )
+    assert index.file_at(datetime.datetime(2020, 3, 1, 13, 30)) == (
+        "a/2020-03-01 13_00_00.000001.json"
+    )
+    assert index.file_at(datetime.datetime(2020, 3, 2)) == (
+        "a/2020-03-01 14_00_00.5.json"
+    )
+
+
+def test_get_simulated() -> None:
+    dir_name = "frc-api-response/v2.0/2017/schedule/flwp/playoff/hybrid/"
+    api = FRCAPI("zach", sim_time=datetime.datetime(2017, 3, 4, 18, 30))
+
+    response = api._get_api_response_from_gcs(
+        "/2017/schedule/flwp/playoff/hybrid", "v2.0", EventScheduleHybridModelV2
+    )
+    assert response.status_code == 200
+
+    with open(
+        os.path.join(
+            os.path.dirname(frc_api.__file__),
+            "gcs_test_data_cache",
+            dir_name,
+            "2017-03-04 18_18_03.096010.json",
+        )
+    ) as f:
+        assert response.content == f.read().encode()
+
+
+def test_get_simulated_from_archive() -> None:
+    FRCAPIResponseArchive.save(
+        "v3.0/2020/awards/MIKET", b"[1]", now=datetime.datetime(2020, 3, 1, 12)
+    )
+    FRCAPIResponseArchive.save(
+        "v3.0/2020/awards/MIKET", b"[2]", now=datetime.datetime(2020, 3, 1, 13)
+    )
+    api = FRCAPI("zach", sim_time=datetime.datetime(2020, 3, 1, 12, 30))
+
+    with patch.object(storage, "get_files") as mock_get_files:
+        response = api._get_api_response_from_gcs(
+            "/2020/awards/MIKET", "v3.0", EventScheduleHybridModelV2
+        )
+        assert response.content == b"[1]"
+
+        # Sees responses archived after the last lookup
+        FRCAPIResponseArchive.save(
+            "v3.0/2020/awards/MIKET", b"[3]", now=datetime.datetime(2020, 3, 1, 14)
+        )
+        api = FRCAPI("zach", sim_time=datetime.datetime(2020, 3, 1, 14, 30))
+        response = api._get_api_response_from_gcs(
+            "/2020/awards/MIKET", "v3.0", EventScheduleHybridModelV2
+        )
+        assert response.content == b"[3]"
+
+    # Found through the manifest, without listing the directory
+    mock_get_files.assert_not_called()
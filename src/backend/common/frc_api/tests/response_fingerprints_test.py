@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+from freezegun import freeze_time
+from google.appengine.ext import ndb
+
+from backend.common.frc_api.response_fingerprints import FRCAPIResponseFingerprints
+from backend.common.memcache import MemcacheClient
+from backend.common.memcache_models.frc_api_response_fingerprint_memcache import (
+    FRCAPIResponseFingerprintMemcache,
+)
+from backend.common.models.frc_api_response_fingerprint import (
+    FRCAPIResponseFingerprint,
+)
+
+
+@pytest.fixture(autouse=True)
+def auto_add_stubs(ndb_stub, memcache_stub) -> None:
+    pass
+
+
+def test_fingerprint() -> None:
+    assert FRCAPIResponseFingerprints.fingerprint(
+        "{}"
+    ) == FRCAPIResponseFingerprints.fingerprint(b"{}")
+    assert FRCAPIResponseFingerprints.fingerprint(
+        "{}"
+    ) != FRCAPIResponseFingerprints.fingerprint("[]")
+
+
+def test_get_multi_missing() -> None:
+    assert FRCAPIResponseFingerprints.get_multi(["a", "b"]) == {"a": None, "b": None}
+
+
+def test_put_multi() -> None:
+    FRCAPIResponseFingerprints.put_multi({"a": "hash_a", "b": "hash_b"})
+
+    assert FRCAPIResponseFingerprints.get_multi(["a", "b", "c"]) == {
+        "a": "hash_a",
+        "b": "hash_b",
+        "c": None,
+    }
+    assert FRCAPIResponseFingerprint.get_by_id("a").content_hash == "hash_a"
+
+
+def test_get_multi_falls_back_to_datastore() -> None:
+    FRCAPIResponseFingerprints.put_multi({"a": "hash_a"})
+    MemcacheClient.get().delete(FRCAPIResponseFingerprintMemcache("a").key())
+
+    assert FRCAPIResponseFingerprints.get_multi(["a"]) == {"a": "hash_a"}
+
+
+def test_get_multi_ignores_old_datastore_fingerprints() -> None:
+    with freeze_time(
+        datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=2)
+    ):
+        FRCAPIResponseFingerprint(id="a", content_hash="hash_a").put()
+    ndb.get_context().clear_cache()
+
+    assert FRCAPIResponseFingerprints.get_multi(["a"]) == {"a": None}
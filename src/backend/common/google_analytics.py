@@ -1,6 +1,8 @@
 import json
 import logging
 import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 from google.appengine.ext import ndb
 
@@ -15,14 +17,11 @@ class GoogleAnalytics:
     https://developers.google.com/analytics/devguides/collection/protocol/ga4
     """
 
+    # The Measurement Protocol accepts at most this many events per request
+    MAX_EVENTS_PER_REQUEST = 25
+
     @classmethod
-    def track_event(
-        cls,
-        client_id: str,
-        event_name: str,
-        event_params: dict,
-        run_after: bool = False,
-    ) -> None:
+    def _collect_url(cls) -> Optional[str]:
         from backend.common.sitevars.google_analytics_id import GoogleAnalyticsID
 
         google_analytics_id = GoogleAnalyticsID.google_analytics_id()
@@ -30,17 +29,38 @@ class GoogleAnalytics:
             logging.warning(
                 "Missing sitevar: google_analytics.id GOOGLE_ANALYTICS_ID. Can't track API usage."
             )
-            return
+            return None
 
         api_secret = GoogleAnalyticsID.api_secret()
         if not api_secret:
             logging.warning(
                 "Missing sitevar: google_analytics.id API_SECRET. Can't track API usage."
             )
+            return None
+
+        return (
+            "https://www.google-analytics.com/mp/collect"
+            f"?measurement_id={google_analytics_id}&api_secret={api_secret}"
+        )
+
+    @staticmethod
+    def _client_id(client_id: str) -> str:
+        return str(uuid.uuid3(uuid.NAMESPACE_X500, str(client_id)))
+
+    @classmethod
+    def track_event(
+        cls,
+        client_id: str,
+        event_name: str,
+        event_params: dict,
+        run_after: bool = False,
+    ) -> None:
+        url = cls._collect_url()
+        if url is None:
             return
 
         payload = {
-            "client_id": str(uuid.uuid3(uuid.NAMESPACE_X500, str(client_id))),
+            "client_id": cls._client_id(client_id),
             "events": [
                 {
                     "name": event_name,
@@ -50,10 +70,6 @@ class GoogleAnalytics:
         }
 
         def make_request():
-            url = (
-                "https://www.google-analytics.com/mp/collect"
-                f"?measurement_id={google_analytics_id}&api_secret={api_secret}"
-            )
             try:
                 ndb.get_context().urlfetch(
                     url,
@@ -69,3 +85,44 @@ class GoogleAnalytics:
             run_after_response(make_request)
         else:
             make_request()
+
+    @classmethod
+    def track_events(cls, events: List[Tuple[str, str, dict]]) -> None:
+        """
+        Sends many (client_id, event_name, event_params) events at once.
+
+        Events are grouped by client and sent MAX_EVENTS_PER_REQUEST at a time,
+        with all of the requests in flight concurrently.
+        """
+        url = cls._collect_url()
+        if url is None:
+            return
+
+        events_by_client: Dict[str, List[dict]] = defaultdict(list)
+        for client_id, event_name, event_params in events:
+            events_by_client[client_id].append(
+                {"name": event_name, "params": event_params}
+            )
+
+        futures = []
+        for client_id, client_events in events_by_client.items():
+            for i in range(0, len(client_events), cls.MAX_EVENTS_PER_REQUEST):
+                payload = {
+                    "client_id": cls._client_id(client_id),
+                    "events": client_events[i : i + cls.MAX_EVENTS_PER_REQUEST],
+                }
+                futures.append(
+                    ndb.get_context().urlfetch(
+                        url,
+                        method="POST",
+                        headers={"Content-Type": "application/json"},
+                        payload=json.dumps(payload).encode("utf-8"),
+                        deadline=10,
+                    )
+                )
+
+        for future in futures:
+            try:
+                future.get_result()
+            except Exception:
+                logging.warning("Failed to send GA4 events", exc_info=True)
@@ -1,6 +1,16 @@
 import copy
 from collections import defaultdict
-from typing import cast, List, Optional, Set, Tuple
+from typing import (
+    AbstractSet,
+    cast,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from pyre_extensions import none_throws
 
@@ -265,34 +275,78 @@ class EventTeamStatusHelper:
         :param event: Event object
         :param matches: Organized matches (via MatchHelper.organized_matches) from the event, optional
         """
+        return cls.generate_event_statuses(event, [team_key], match_list)[team_key]
+
+    @classmethod
+    def generate_event_statuses(
+        cls,
+        event: Event,
+        team_keys: Iterable[TeamKey],
+        match_list: Optional[List[Match]] = None,
+    ) -> Dict[TeamKey, EventTeamStatus]:
+        """
+        Generate team@event status for each of the teams at an event
+        The event's matches are organized and indexed by team, and its rankings,
+        alliances and playoff results are built once for all the teams.
+        :param event: Event object
+        :param team_keys: Key names of the teams to generate statuses for
+        :param match_list: The event's matches, optional
+        """
         event_details = event.details
         if not match_list:
             match_list = event.matches
-        team_matches = [m for m in match_list if team_key in m.team_key_names]
-        next_match = MatchHelper.upcoming_matches(team_matches, num=1)
-        last_match = MatchHelper.recent_matches(team_matches, num=1)
         matches = MatchHelper.organized_matches(match_list)[1]
-        status = EventTeamStatus(
-            qual=cls._build_qual_info(team_key, event_details, matches, event.year),
-            alliance=cls._build_alliance_info(team_key, event_details, matches),
-            playoff=cls._build_playoff_info(
-                team_key, event_details, matches, event.year, event.playoff_type
-            ),
-            last_match_key=last_match[0].key_name if last_match else None,
-            next_match_key=next_match[0].key_name if next_match else None,
-        )
 
-        # TODO: Results are getting mixed unless copied. 2017-02-03 -fangeugene
-        return copy.deepcopy(status)
+        team_matches: Dict[TeamKey, List[Match]] = defaultdict(list)
+        for match in match_list:
+            for team_key in set(match.team_key_names):
+                team_matches[team_key].append(match)
+
+        qual_infos = cls._build_qual_infos(event_details, matches, event.year)
+        alliances = cls._get_alliances(event_details, matches)
+        # Everyone on an alliance has the same playoff results
+        playoff_infos: Dict[FrozenSet[TeamKey], Optional[PlayoffAllianceStatus]] = {}
+
+        statuses: Dict[TeamKey, EventTeamStatus] = {}
+        for team_key in team_keys:
+            next_match = MatchHelper.upcoming_matches(team_matches[team_key], num=1)
+            last_match = MatchHelper.recent_matches(team_matches[team_key], num=1)
+            alliance, number = alliances.get(team_key, (None, 0))
+
+            complete_alliance = cls._get_complete_alliance(alliance)
+            if complete_alliance not in playoff_infos:
+                playoff_infos[complete_alliance] = cls._build_alliance_playoff_info(
+                    complete_alliance,
+                    event_details,
+                    matches,
+                    event.year,
+                    event.playoff_type,
+                )
+
+            status = EventTeamStatus(
+                qual=qual_infos.get(team_key),
+                alliance=cls._build_alliance_info(
+                    team_key, event_details, alliance, number
+                ),
+                playoff=playoff_infos[complete_alliance],
+                last_match_key=last_match[0].key_name if last_match else None,
+                next_match_key=next_match[0].key_name if next_match else None,
+            )
+
+            # TODO: Results are getting mixed unless copied. 2017-02-03 -fangeugene
+            statuses[team_key] = copy.deepcopy(status)
+        return statuses
 
     @classmethod
-    def _build_qual_info(
+    def _build_qual_infos(
         cls,
-        team_key: TeamKey,
         event_details: EventDetails,
         matches: TOrganizedMatches,
         year: Year,
-    ) -> Optional[EventTeamStatusQual]:
+    ) -> Dict[TeamKey, EventTeamStatusQual]:
+        """
+        Qual info for each team with a ranking, or on the quals schedule
+        """
         if not matches[CompLevel.QM]:
             status = EventTeamLevelStatus.NOT_STARTED
         else:
@@ -302,75 +356,59 @@ class EventTeamStatusHelper:
                     status = EventTeamLevelStatus.PLAYING
                     break
 
+        qual_infos: Dict[TeamKey, EventTeamStatusQual] = {}
         if event_details and event_details.rankings2:
             rankings = event_details.rankings2
-
-            qual_info: Optional[EventTeamStatusQual] = None
+            sort_order_info = RankingsHelper.get_sort_order_info(event_details) or []
             for ranking in rankings:
-                if ranking["team_key"] == team_key:
-                    qual_info = {
+                if ranking["team_key"] not in qual_infos:
+                    qual_infos[ranking["team_key"]] = {
                         "status": status,
                         "ranking": cast(EventTeamRanking, ranking),
-                        "num_teams": 0,
-                        "sort_order_info": None,
+                        "num_teams": len(rankings),
+                        "sort_order_info": sort_order_info,
                     }
-                    break
-
-            if qual_info:
-                qual_info["num_teams"] = len(rankings)
-                qual_info["sort_order_info"] = (
-                    RankingsHelper.get_sort_order_info(event_details) or []
-                )
-
-            return qual_info
+            return qual_infos
         else:
             # Use matches as fallback
-            all_teams = set()
-            wins = 0
-            losses = 0
-            ties = 0
-            qual_score_sum = 0
-            matches_played = 0
+            all_teams: Dict[TeamKey, None] = {}
+            records: Dict[TeamKey, WLTRecord] = defaultdict(
+                lambda: WLTRecord(wins=0, losses=0, ties=0)
+            )
+            qual_score_sums: Dict[TeamKey, int] = defaultdict(int)
+            matches_played: Dict[TeamKey, int] = defaultdict(int)
             for match in matches[CompLevel.QM]:
                 for color in ALLIANCE_COLORS:
                     for team in match.alliances[color]["teams"]:
-                        all_teams.add(team)
+                        all_teams[team] = None
                         if (
-                            team == team_key
-                            and match.has_been_played
-                            and team_key not in match.alliances[color]["surrogates"]
+                            match.has_been_played
+                            and team not in match.alliances[color]["surrogates"]
                         ):
-                            matches_played += 1
+                            matches_played[team] += 1
 
                             if match.winning_alliance == color:
-                                wins += 1
+                                records[team]["wins"] += 1
                             elif match.winning_alliance == "":
-                                ties += 1
+                                records[team]["ties"] += 1
                             else:
-                                losses += 1
-
-                            qual_score_sum += match.alliances[color]["score"]
+                                records[team]["losses"] += 1
 
-            qual_average = (
-                float(qual_score_sum) / matches_played if matches_played else 0
-            )
+                            qual_score_sums[team] += match.alliances[color]["score"]
 
-            if team_key in all_teams:
-                return {
+            for team_key in all_teams:
+                qual_average = (
+                    float(qual_score_sums[team_key]) / matches_played[team_key]
+                    if matches_played[team_key]
+                    else 0
+                )
+                qual_infos[team_key] = {
                     "status": status,
                     "ranking": {
                         "rank": None,
-                        "matches_played": matches_played,
+                        "matches_played": matches_played[team_key],
                         "dq": None,
-                        "record": (
-                            WLTRecord(
-                                wins=wins,
-                                losses=losses,
-                                ties=ties,
-                            )
-                            if year != 2015
-                            else None
-                        ),
+                        "record": records[team_key] if year != 2015 else None,
                         "qual_average": qual_average if year == 2015 else None,
                         "sort_orders": None,
                         "team_key": team_key,
@@ -378,16 +416,18 @@ class EventTeamStatusHelper:
                     "num_teams": len(all_teams),
                     "sort_order_info": None,
                 }
-            else:
-                return None
+            return qual_infos
 
     @classmethod
     def _build_alliance_info(
-        cls, team_key: TeamKey, event_details: EventDetails, matches: TOrganizedMatches
+        cls,
+        team_key: TeamKey,
+        event_details: EventDetails,
+        alliance: Optional[EventAlliance],
+        number: Optional[int],
     ) -> Optional[EventTeamStatusAlliance]:
         if not event_details or not event_details.alliance_selections:
             return None
-        alliance, number = cls._get_alliance(team_key, event_details, matches)
         if not alliance:
             return None
 
@@ -416,10 +456,32 @@ class EventTeamStatusHelper:
         playoff_type: PlayoffType,
     ) -> Optional[PlayoffAllianceStatus]:
         alliance, _ = cls._get_alliance(team_key, event_details, matches)
+        return cls._build_alliance_playoff_info(
+            cls._get_complete_alliance(alliance),
+            event_details,
+            matches,
+            year,
+            playoff_type,
+        )
+
+    @classmethod
+    def _get_complete_alliance(
+        cls, alliance: Optional[EventAlliance]
+    ) -> FrozenSet[TeamKey]:
         complete_alliance = set(alliance["picks"]) if alliance else set()
         if alliance and alliance.get("backup"):
             complete_alliance.add(alliance["backup"]["in"])
+        return frozenset(complete_alliance)
 
+    @classmethod
+    def _build_alliance_playoff_info(
+        cls,
+        complete_alliance: FrozenSet[TeamKey],
+        event_details: EventDetails,
+        matches: TOrganizedMatches,
+        year: Year,
+        playoff_type: PlayoffType,
+    ) -> Optional[PlayoffAllianceStatus]:
         if playoff_type == PlayoffType.AVG_SCORE_8_TEAM:
             # 2015 tournament; the bracket function handles its special cases as well
             return cls._build_playoff_info_bracket(
@@ -454,7 +516,7 @@ class EventTeamStatusHelper:
     @classmethod
     def _build_playoff_info_bracket(
         cls,
-        complete_alliance: Set[TeamKey],
+        complete_alliance: AbstractSet[TeamKey],
         matches: TOrganizedMatches,
         year: Year,
         playoff_type: PlayoffType,
@@ -561,7 +623,7 @@ class EventTeamStatusHelper:
     @classmethod
     def _build_playoff_info_double_elim(
         cls,
-        complete_alliance: Set[TeamKey],
+        complete_alliance: AbstractSet[TeamKey],
         matches: TOrganizedMatches,
         year: Year,
         playoff_type: PlayoffType,
@@ -661,7 +723,7 @@ class EventTeamStatusHelper:
     @classmethod
     def _build_playoff_info_round_robin(
         cls,
-        complete_alliance: Set[TeamKey],
+        complete_alliance: AbstractSet[TeamKey],
         matches: TOrganizedMatches,
         year: Year,
         playoff_type: PlayoffType,
@@ -777,16 +839,26 @@ class EventTeamStatusHelper:
         Get the alliance number of the team
         Returns 0 when the team is not on an alliance
         """
+        return cls._get_alliances(event_details, matches).get(team_key, (None, 0))
+
+    @classmethod
+    def _get_alliances(
+        cls, event_details: EventDetails, matches: TOrganizedMatches
+    ) -> Dict[TeamKey, Tuple[EventAlliance, Optional[int]]]:
+        """
+        The alliance and alliance number of each team on an alliance
+        """
+        alliances: Dict[TeamKey, Tuple[EventAlliance, Optional[int]]] = {}
         if event_details and event_details.alliance_selections:
             for i, alliance in enumerate(event_details.alliance_selections):
                 alliance_number = i + 1
-                if team_key in alliance["picks"]:
-                    return alliance, alliance_number
+                for team_key in alliance["picks"]:
+                    alliances.setdefault(team_key, (alliance, alliance_number))
 
                 backup_info = alliance.get("backup") or {}
-                if team_key == backup_info.get("in", ""):
+                if backup_info.get("in"):
                     # If this team came in as a backup team
-                    return alliance, alliance_number
+                    alliances.setdefault(backup_info["in"], (alliance, alliance_number))
         else:
             # No event_details. Use matches to generate alliances.
             complete_alliances = []
@@ -812,13 +884,12 @@ class EventTeamStatusHelper:
                             complete_alliances.append(alliance)
 
             for complete_alliance in complete_alliances:
-                if team_key in complete_alliance:
-                    return {
-                        "picks": complete_alliance
-                    }, None  # Alliance number is unknown
+                # Alliance number is unknown
+                found_alliance: EventAlliance = {"picks": complete_alliance}
+                for team_key in complete_alliance:
+                    alliances.setdefault(team_key, (found_alliance, None))
 
-        alliance_number = 0
-        return None, alliance_number  # Team didn't make it to elims
+        return alliances
 
     @classmethod
     def _build_verbose_record(cls, record: WLTRecord) -> str:
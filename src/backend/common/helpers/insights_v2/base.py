@@ -7,6 +7,13 @@ from backend.common.models.keys import Year
 
 
 class InsightV2Calculator(ABC):
+    # Calculators that implement merge() can be computed one season at a time
+    # and combined, rather than walking every event for all-time insights.
+    MERGEABLE: bool = False
+    # Bump when on_event's accumulated state changes shape or meaning, so
+    # stored per-season partials are recomputed
+    STATE_VERSION: int = 1
+
     @abstractmethod
     def on_event(self, event: Event) -> None: ...
 
@@ -14,3 +21,13 @@ class InsightV2Calculator(ABC):
     def make_insights(
         self, year: Year, team_to_district: Dict[str, str]
     ) -> List[InsightV2]: ...
+
+    def merge(self, later: "InsightV2Calculator") -> None:
+        """
+        Folds in the state of `later`, a calculator of the same type that has
+        only seen events after every event this one has seen. `later` must not
+        be used afterwards.
+
+        Calculator state must be picklable, so partials can be stored.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can't be merged")
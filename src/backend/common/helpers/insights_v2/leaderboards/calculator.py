@@ -168,6 +168,8 @@ def build_leaderboard_pair_event_list_rankings(
 
 
 class LeaderboardV2Calculator(InsightV2Calculator):
+    MERGEABLE = True
+
     def __init__(self) -> None:
         self.counts: Dict[str, int] = defaultdict(int)
 
@@ -205,6 +207,11 @@ class LeaderboardV2Calculator(InsightV2Calculator):
     def _increment(self, key: str, count: int = 1) -> None:
         self.counts[key] += count
 
+    def merge(self, later: InsightV2Calculator) -> None:
+        assert isinstance(later, LeaderboardV2Calculator)
+        for key, count in later.counts.items():
+            self._increment(key, count)
+
     def make_insights(
         self, year: Year, team_to_district: Dict[str, str]
     ) -> List[InsightV2]:
@@ -291,6 +298,12 @@ class EventListLeaderboardV2Calculator(LeaderboardV2Calculator):
             self._increment(team_key)
             self._team_events[team_key].append(event_key)
 
+    def merge(self, later: InsightV2Calculator) -> None:
+        assert isinstance(later, EventListLeaderboardV2Calculator)
+        for team_key, event_keys in later._team_events.items():
+            for event_key in event_keys:
+                self._record_event(team_key, event_key)
+
     def _build_rankings(self, counts: Dict[str, int]) -> List[LeaderboardRanking]:
         filtered = {k: self._team_events[k] for k in counts}
         return build_leaderboard_event_list_rankings(filtered, min_count=self.min_count)
@@ -363,6 +376,12 @@ class MatchAllianceLeaderboardV2Calculator(LeaderboardV2Calculator):
             alliance=alliance,
         )
 
+    def merge(self, later: InsightV2Calculator) -> None:
+        assert isinstance(later, MatchAllianceLeaderboardV2Calculator)
+        for match_key, score in later.counts.items():
+            self.counts[match_key] = score
+        self._match_contexts.update(later._match_contexts)
+
     def _build_rankings(self, counts: Dict[str, int]) -> List[LeaderboardRanking]:
         return build_leaderboard_match_alliance_rankings(
             counts, self._match_contexts, min_count=self.min_count
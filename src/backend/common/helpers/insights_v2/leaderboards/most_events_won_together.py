@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import DefaultDict, Dict, List, Optional, Set, Tuple
 
 from backend.common.consts.award_type import AwardType
+from backend.common.helpers.insights_v2.base import InsightV2Calculator
 from backend.common.helpers.insights_v2.leaderboards.calculator import (
     build_leaderboard_pair_event_list_rankings,
     LeaderboardV2Calculator,
@@ -70,6 +71,13 @@ class MostEventsWonTogetherV2Calculator(LeaderboardV2Calculator):
             self._increment(pair_key)
             self._pair_events[pair_key].append(event_key)
 
+    def merge(self, later: InsightV2Calculator) -> None:
+        assert isinstance(later, MostEventsWonTogetherV2Calculator)
+        self._event_start_dates.update(later._event_start_dates)
+        for pair_key, event_keys in later._pair_events.items():
+            for event_key in event_keys:
+                self._record_pair_event(pair_key, event_key)
+
     def on_event(self, event: Event) -> None:
         event_key = str(event.key.id())
         self._event_start_dates[event_key] = event.start_date
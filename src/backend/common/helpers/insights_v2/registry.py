@@ -1,6 +1,7 @@
+import logging
 from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional
 
 from google.appengine.ext import ndb
 
@@ -90,6 +91,7 @@ from backend.common.helpers.insights_v2.timeseries.high_score_over_time import (
 )
 from backend.common.helpers.season_helper import SeasonHelper
 from backend.common.models.insight_v2 import InsightV2
+from backend.common.models.insight_v2_partial import InsightV2Partial
 from backend.common.models.keys import Year
 from backend.common.queries.district_query import AllDistrictTeamsQuery
 from backend.common.queries.event_query import EventListQuery
@@ -115,31 +117,119 @@ def _build_team_district_map() -> Dict[str, str]:
     }
 
 
+def _run_season_events(year: Year, calculators: List[InsightV2Calculator]) -> None:
+    """
+    Calls on_event() on every calculator once per season event in the year.
+    Preps and clears event relations per-event so memory stays bounded.
+    """
+    events = sorted(
+        EventListQuery(year=year).fetch(),
+        key=lambda e: (e.start_date or datetime(1, 1, 1), e.key_name),
+    )
+    for event in events:
+        if event.event_type_enum not in SEASON_EVENT_TYPES:
+            continue
+
+        event.prep_awards()
+        event.prep_matches()
+        for calc in calculators:
+            calc.on_event(event)
+        event.clear_awards()
+        event.clear_matches()
+        ndb.get_context().clear_cache()
+
+
+def _partial_key(year: Year, calc: InsightV2Calculator) -> ndb.Key:
+    return ndb.Key(
+        InsightV2Partial,
+        InsightV2Partial.render_key_name(year, type(calc).__name__, calc.STATE_VERSION),
+    )
+
+
+def compute_season_partials(
+    year: Year,
+    calculators: List[InsightV2Calculator],
+    use_stored: bool,
+    store: bool,
+    stored_since: Optional[datetime] = None,
+) -> List[InsightV2Calculator]:
+    """
+    Returns new calculators of the same types as `calculators` that have seen
+    every season event in the year. With use_stored, previously stored
+    partials (updated since stored_since, if given) are reused, and only the
+    missing calculators walk the events.
+    """
+    keys = [_partial_key(year, calc) for calc in calculators]
+    stored = ndb.get_multi(keys) if use_stored else [None] * len(keys)
+    if stored_since is not None:
+        stored = [
+            partial if partial and partial.updated >= stored_since else None
+            for partial in stored
+        ]
+
+    missing = [i for i, partial in enumerate(stored) if partial is None]
+    computed = [type(calculators[i])() for i in missing]
+    if computed:
+        _run_season_events(year, computed)
+        if store:
+            try:
+                ndb.put_multi(
+                    [
+                        InsightV2Partial(
+                            id=keys[i].id(),
+                            year=year,
+                            calculator_name=type(calc).__name__,
+                            calculator=calc,
+                        )
+                        for i, calc in zip(missing, computed)
+                    ]
+                )
+            except Exception:
+                logging.exception(f"Failed to store insights_v2 partials for {year}")
+
+    partials = [partial.calculator if partial else None for partial in stored]
+    for i, calc in zip(missing, computed):
+        partials[i] = calc
+    return partials
+
+
 def compute_insights_for_year(
-    year: Year, calculators: List[InsightV2Calculator]
+    year: Year,
+    calculators: List[InsightV2Calculator],
+    refresh_partials: bool = False,
+    partials_since: Optional[datetime] = None,
 ) -> List[InsightV2]:
     """
     Iterates over all season events for a year (or all years if year=0),
-    calling on_event() on every calculator once per event. Preps and clears
-    event relations per-event so memory stays bounded.
+    calling on_event() on every calculator once per event.
+
+    For year=0, each season is computed as a separate partial and merged in
+    order. Partials for seasons before the current one are stored, and reused
+    on later runs unless refresh_partials is set.
+
+    partials_since is for the reduce step of the all-time pipeline: partials
+    that have to be fresh (the current season's, or every season's when
+    refreshing) are reused if stored since then, instead of being recomputed.
     """
-    event_years = [year] if year != 0 else SeasonHelper.get_valid_years()
-    for event_year in event_years:
-        events = sorted(
-            EventListQuery(year=event_year).fetch(),
-            key=lambda e: (e.start_date or datetime(1, 1, 1), e.key_name),
-        )
-        for event in events:
-            if event.event_type_enum not in SEASON_EVENT_TYPES:
-                continue
-
-            event.prep_awards()
-            event.prep_matches()
-            for calc in calculators:
-                calc.on_event(event)
-            event.clear_awards()
-            event.clear_matches()
-            ndb.get_context().clear_cache()
+    if year != 0:
+        _run_season_events(year, calculators)
+    elif all(calc.MERGEABLE for calc in calculators):
+        current_season = SeasonHelper.get_current_season()
+        for event_year in SeasonHelper.get_valid_years():
+            completed = event_year < current_season
+            fresh_only = not completed or refresh_partials
+            partials = compute_season_partials(
+                event_year,
+                calculators,
+                use_stored=partials_since is not None or not fresh_only,
+                store=completed,
+                stored_since=partials_since if fresh_only else None,
+            )
+            for calc, partial in zip(calculators, partials):
+                calc.merge(partial)
+    else:
+        for event_year in SeasonHelper.get_valid_years():
+            _run_season_events(event_year, calculators)
 
     team_to_district = _build_team_district_map()
 
@@ -149,7 +239,7 @@ def compute_insights_for_year(
     return insights
 
 
-def make_all_insights(year: Year) -> List[InsightV2]:
+def make_calculators(year: Year) -> List[InsightV2Calculator]:
     calculators: List[InsightV2Calculator] = [
         BlueBannersV2Calculator(),
         MostMatchesPlayedV2Calculator(),
@@ -187,4 +277,74 @@ def make_all_insights(year: Year) -> List[InsightV2]:
             calculators.append(HighestEndgameScoreV2Calculator())
         if year in {2016, 2017, 2019, 2020, 2022, 2023, 2024, 2025, 2026}:
             calculators.append(MostGamePiecesScoredV2Calculator())
-    return compute_insights_for_year(year, calculators)
+    return calculators
+
+
+def make_all_insights(
+    year: Year,
+    refresh_partials: bool = False,
+    partials_since: Optional[datetime] = None,
+) -> List[InsightV2]:
+    return compute_insights_for_year(
+        year, make_calculators(year), refresh_partials, partials_since
+    )
+
+
+def store_season_partials(year: Year, refresh_partials: bool = False) -> None:
+    """
+    The map step of the all-time pipeline: computes and stores the partials
+    of every all-time calculator for one season. Completed seasons that
+    already have stored partials are skipped unless refresh_partials is set.
+    """
+    completed = year < SeasonHelper.get_current_season()
+    compute_season_partials(
+        year,
+        make_calculators(0),
+        use_stored=completed and not refresh_partials,
+        store=True,
+    )
+
+
+def invalidate_season_partials(years: Iterable[Year]) -> None:
+    """
+    Deletes the stored all-time partials of completed seasons, so the next
+    all-time run walks those seasons again. Called when matches or awards
+    from a completed season change, since their partials are otherwise
+    reused forever.
+    """
+    current_season = SeasonHelper.get_current_season()
+    completed_years = sorted({year for year in years if year < current_season})
+    if not completed_years:
+        return
+
+    calculators = make_calculators(0)
+    ndb.delete_multi(
+        [_partial_key(year, calc) for year in completed_years for calc in calculators]
+    )
+
+
+def pending_season_partials(
+    since: datetime, refresh_partials: bool = False
+) -> List[Year]:
+    """
+    Returns the seasons whose all-time partials aren't ready for the reduce
+    step yet: missing, or (for the current season, or every season when
+    refreshing) not stored since the pipeline started.
+    """
+    calculators = make_calculators(0)
+    current_season = SeasonHelper.get_current_season()
+    years = SeasonHelper.get_valid_years()
+    stored = ndb.get_multi(
+        [_partial_key(year, calc) for year in years for calc in calculators]
+    )
+
+    pending = []
+    for i, year in enumerate(years):
+        fresh_only = year >= current_season or refresh_partials
+        partials = stored[i * len(calculators) : (i + 1) * len(calculators)]
+        if any(
+            partial is None or (fresh_only and partial.updated < since)
+            for partial in partials
+        ):
+            pending.append(year)
+    return pending
@@ -30,9 +30,14 @@ class StreakV2Calculator(InsightV2Calculator):
     may iterate at event granularity, match granularity, or any other unit.
     """
 
+    MERGEABLE = True
+
     def __init__(self) -> None:
         self._active: Dict[str, _StreakRecord] = {}
         self._completed: Dict[str, List[_StreakRecord]] = defaultdict(list)
+        # Whether each key's first update was an advance (True) or a reset (False).
+        # When merging, this says whether an earlier active streak continues.
+        self._first_update: Dict[str, bool] = {}
 
     @property
     @abstractmethod
@@ -57,6 +62,7 @@ class StreakV2Calculator(InsightV2Calculator):
 
     def _advance_streak(self, key: str, label: str) -> None:
         """Extend key's active streak. label identifies the current unit (event key, year, etc.)."""
+        self._first_update.setdefault(key, True)
         if key in self._active:
             rec = self._active[key]
             self._active[key] = _StreakRecord(rec.length + 1, rec.start, label)
@@ -65,9 +71,36 @@ class StreakV2Calculator(InsightV2Calculator):
 
     def _reset_streak(self, key: str) -> None:
         """Break key's active streak, saving it to completed history."""
+        self._first_update.setdefault(key, False)
         if key in self._active:
             self._completed[key].append(self._active.pop(key))
 
+    def merge(self, later: InsightV2Calculator) -> None:
+        assert isinstance(later, StreakV2Calculator)
+        for key, advanced_first in later._first_update.items():
+            self._first_update.setdefault(key, advanced_first)
+            active = self._active.pop(key, None)
+            if active is None:
+                continue
+            if not advanced_first:
+                self._completed[key].append(active)
+                continue
+
+            # later's first streak for this key continues our active one
+            later_completed = later._completed.get(key)
+            first = later_completed[0] if later_completed else later._active[key]
+            joined = _StreakRecord(
+                active.length + first.length, active.start, first.end
+            )
+            if later_completed:
+                later_completed[0] = joined
+            else:
+                later._active[key] = joined
+
+        for key, completed_list in later._completed.items():
+            self._completed[key].extend(completed_list)
+        self._active.update(later._active)
+
     def _build_streak_entries(self) -> List[StreakEntry]:
         """
         Returns all StreakEntry items sorted by streak_length descending then by
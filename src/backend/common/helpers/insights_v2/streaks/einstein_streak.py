@@ -1,7 +1,9 @@
-from typing import Dict, List, Optional, Set
+from collections import defaultdict
+from typing import Dict, List, Set
 
 from backend.common.consts.award_type import AwardType
 from backend.common.consts.event_type import EventType
+from backend.common.helpers.insights_v2.base import InsightV2Calculator
 from backend.common.helpers.insights_v2.names import InsightV2NameEntry, InsightV2Names
 from backend.common.helpers.insights_v2.streaks.calculator import StreakV2Calculator
 from backend.common.models.event import Event
@@ -19,53 +21,49 @@ class LongestEinsteinStreakV2Calculator(StreakV2Calculator):
 
     def __init__(self) -> None:
         super().__init__()
-        self._current_year: Optional[int] = None
-        self._year_winners: Set[str] = set()
-        self._had_cmp_divisions: bool = False
+        # Division winners for each year that had CMP_DIVISION events. Streaks
+        # are only built from these in make_insights, so that per-season
+        # partials merge by just combining years.
+        self._division_winners: Dict[int, Set[str]] = {}
 
     @property
     def insight_name(self) -> InsightV2NameEntry:
         return InsightV2Names.EINSTEIN_WIN_STREAK
 
     def on_event(self, event: Event) -> None:
-        year = event.year
-        if self._current_year is not None and year != self._current_year:
-            self._finalize_year(self._current_year)
-        self._current_year = year
-
         if event.event_type_enum != EventType.CMP_DIVISION:
             return
         if not event.matches:  # Skip cancelled events
             return
 
-        self._had_cmp_divisions = True
+        year_winners = self._division_winners.setdefault(event.year, set())
         for award in event.awards:
             if award.award_type_enum == AwardType.WINNER:
                 for team_key in award.team_list:
-                    self._year_winners.add(str(team_key.id()))
+                    year_winners.add(str(team_key.id()))
 
-    def _finalize_year(self, year: int) -> None:
-        if not self._had_cmp_divisions:
-            # No CMP_DIVISION events this year — skip without resetting streaks.
-            self._year_winners = set()
-            return
+    def merge(self, later: InsightV2Calculator) -> None:
+        assert isinstance(later, LongestEinsteinStreakV2Calculator)
+        for year, winners in later._division_winners.items():
+            self._division_winners.setdefault(year, set()).update(winners)
 
+    def _finalize_year(self, year: int, year_winners: Set[str]) -> None:
         label = str(year)
-        for key in self._year_winners:
+        for key in year_winners:
             self._advance_streak(key, label)
 
         # Reset any team with an active streak that did not win a division this year.
         for key in list(self._active.keys()):
-            if key not in self._year_winners:
+            if key not in year_winners:
                 self._reset_streak(key)
 
-        self._year_winners = set()
-        self._had_cmp_divisions = False
-
     def make_insights(
         self, year: Year, team_to_district: Dict[str, str]
     ) -> List[InsightV2]:
-        if self._current_year is not None:
-            self._finalize_year(self._current_year)
-            self._current_year = None
+        # Years with no CMP_DIVISION events (e.g. 2020/2021) are absent, so
+        # they're skipped without resetting streaks.
+        self._active = {}
+        self._completed = defaultdict(list)
+        for division_year, year_winners in sorted(self._division_winners.items()):
+            self._finalize_year(division_year, year_winners)
         return super().make_insights(year, team_to_district)
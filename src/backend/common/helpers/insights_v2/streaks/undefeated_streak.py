@@ -2,6 +2,7 @@ from typing import Optional, Set
 
 from backend.common.consts.alliance_color import ALLIANCE_COLORS
 from backend.common.consts.comp_level import COMP_LEVELS_PLAY_ORDER
+from backend.common.helpers.insights_v2.base import InsightV2Calculator
 from backend.common.helpers.insights_v2.names import InsightV2NameEntry, InsightV2Names
 from backend.common.helpers.insights_v2.streaks.calculator import StreakV2Calculator
 from backend.common.models.event import Event
@@ -56,6 +57,19 @@ class LongestUndefeatedStreakV2Calculator(StreakV2Calculator):
                         self._reset_streak(team_key)
                         self._year_lost.add(team_key)
 
+    def merge(self, later: InsightV2Calculator) -> None:
+        """
+        Partials must cover whole seasons, since a season's undefeated run can't
+        be resumed from a partial that didn't see its first loss.
+        """
+        assert isinstance(later, LongestUndefeatedStreakV2Calculator)
+        if later._current_year is not None:
+            # later starts a new season, which ends ours
+            self._finalize_year()
+            self._current_year = later._current_year
+            self._year_lost = later._year_lost
+        super().merge(later)
+
     def _finalize_year(self) -> None:
         for key in list(self._active.keys()):
             self._reset_streak(key)
@@ -8,8 +8,11 @@
 
 # x is OPR and should be n x 1
 
+import hashlib
+import logging
 from collections import defaultdict, OrderedDict
-from typing import Any, Callable, Dict, List, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import numpy.typing as npt
@@ -22,8 +25,8 @@ from backend.common.consts.alliance_color import (
     OPPONENT,
 )
 from backend.common.consts.comp_level import CompLevel
-from backend.common.consts.event_type import EventType
 from backend.common.game_specific.registry import get_game
+from backend.common.helpers.team_priors_helper import TeamPriorsHelper
 from backend.common.memcache import MemcacheClient
 from backend.common.models.event_matchstats import (
     Component,
@@ -33,7 +36,6 @@ from backend.common.models.event_matchstats import (
 from backend.common.models.keys import TeamId, Year
 from backend.common.models.match import Match
 from backend.common.models.stats import EventMatchStats, StatType
-from backend.common.queries import event_query
 
 TTeamIdMap = Dict[TeamId, int]
 StatAccessor = Callable[[Match, AllianceColor], float]
@@ -53,7 +55,52 @@ def make_default_component_accessor(component: Component) -> StatAccessor:
     return lambda match, color: float(match.score_breakdown[color].get(component, 0))
 
 
+MATCHSTAT_ACCESSORS: Dict[StatType, StatAccessor] = {
+    StatType.OPR: OPR_ACCESSOR,
+    StatType.DPR: DPR_ACCESSOR,
+    StatType.CCWM: CCWM_ACCESSOR,
+}
+
+
+@dataclass
+class AppliedMatch:
+    # Hash of the alliances and score breakdown the match was applied with
+    digest: str
+    # Team indexes for each alliance
+    alliances: List[List[int]]
+    # A row per alliance, with a column per stat. COPRs are None for matches
+    # without a score breakdown.
+    matchstats: npt.NDArray[np.float64]
+    coprs: Optional[npt.NDArray[np.float64]]
+
+
+@dataclass
+class MatchstatsState:
+    """
+    An event's matchstats and COPRs as normal equations, [M][X]=[S], which can
+    be updated one match at a time. Played quals matches add to M and S; only
+    the ones with a score breakdown add to copr_M and copr_S.
+    """
+
+    year: Year
+    copr_names: List[Component]
+    # Teams are only ever added to M and S, so their indexes don't change
+    team_id_map: TTeamIdMap
+    # The teams to return stats for, from the latest matches
+    teams: List[TeamId]
+    copr_teams: List[TeamId]
+    M: npt.NDArray[np.float64]
+    S: npt.NDArray[np.float64]
+    copr_M: npt.NDArray[np.float64]
+    copr_S: npt.NDArray[np.float64]
+    # Keyed by match key
+    applied: Dict[str, AppliedMatch] = field(default_factory=dict)
+
+
 class MatchstatsHelper(object):
+    STATE_TTL = 60 * 60 * 24
+    STATE_CAS_RETRIES = 3
+
     @classmethod
     def build_team_mapping(
         cls, matches: List[Match]
@@ -80,181 +127,409 @@ class MatchstatsHelper(object):
         return team_list, team_id_map
 
     @classmethod
-    def build_Minv_matrix(
-        cls, matches: List[Match], team_id_map: TTeamIdMap
-    ) -> npt.NDArray[np.float64]:
-        n = len(team_id_map.keys())
-        M = np.zeros((n, n))
-        for match in matches:
-            # only consider quals matches that have been played
-            if (match.comp_level != CompLevel.QM) or (not match.has_been_played):
-                continue
-
-            for alliance_color in ALLIANCE_COLORS:
-                alliance_teams = match.alliances[alliance_color]["teams"]
-                for team1 in alliance_teams:
-                    team1_id = team_id_map[team1[3:]]
-                    for team2 in alliance_teams:
-                        M[team1_id, team_id_map[team2[3:]]] += 1
-        return np.linalg.pinv(M)
-
-    @classmethod
-    def build_s_matrix(
+    def build_alliance_matrices(
         cls,
         matches: List[Match],
         team_id_map: TTeamIdMap,
-        stat_accessor: StatAccessor,
-    ) -> npt.NDArray[np.float64]:
-        n = len(team_id_map.keys())
-        s = np.zeros((n, 1))
+        stat_accessors: List[StatAccessor],
+        components: List[Component],
+    ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        """
+        Returns (A, Y) from one pass over the played quals matches
+        A: a row per alliance, with a 1 in the column of each of its teams
+        Y: a row per alliance, with a column for each stat accessor, followed
+        by a column for each score breakdown component
+        """
+        # only consider quals matches that have been played
+        matches = [
+            match
+            for match in matches
+            if match.comp_level == CompLevel.QM and match.has_been_played
+        ]
+        A = np.zeros((2 * len(matches), len(team_id_map)))
+        Y = np.zeros((2 * len(matches), len(stat_accessors) + len(components)))
+        row = 0
         for match in matches:
-            # only consider quals matches that have been played
-            if (match.comp_level != CompLevel.QM) or (not match.has_been_played):
-                continue
-
             for alliance_color in ALLIANCE_COLORS:
-                alliance_teams = [
-                    team[3:] for team in match.alliances[alliance_color]["teams"]
+                for team in match.alliances[alliance_color]["teams"]:
+                    A[row, team_id_map[team[3:]]] += 1
+                Y[row, : len(stat_accessors)] = [
+                    accessor(match, alliance_color) for accessor in stat_accessors
                 ]
-                stat = stat_accessor(match, alliance_color)
-                for team in alliance_teams:
-                    s[team_id_map[team]] += stat
-        return s
+                if components:
+                    breakdown = none_throws(match.score_breakdown)[alliance_color]
+                    Y[row, len(stat_accessors) :] = [
+                        float(breakdown.get(component, 0)) for component in components
+                    ]
+                row += 1
+        return A, Y
 
     @classmethod
-    def calc_stat(
-        cls,
-        matches: List[Match],
-        team_list: List[TeamId],
-        team_id_map: TTeamIdMap,
-        Minv: Any,
-        stat_accessor: StatAccessor,
-    ) -> TeamStatMap:
-        s = cls.build_s_matrix(
-            matches,
-            team_id_map,
-            stat_accessor,
-        )
-        x = np.dot(Minv, s)
+    def solve(
+        cls, M: npt.NDArray[np.float64], S: npt.NDArray[np.float64]
+    ) -> npt.NDArray[np.float64]:
+        """
+        Solves [M][X]=[S] for every column of S at once
+        M is singular until every team has played, and whenever some teams
+        have only played together, so this is a least squares solve. Like
+        pinv(M), it gives the minimum norm solution.
+        """
+        return np.linalg.lstsq(M, S, rcond=None)[0]
 
-        stat_dict = {}
-        for team, stat in zip(team_list, x):
-            stat_dict[team] = stat[0]
-        return stat_dict
+    @classmethod
+    def get_components(cls, matches: List[Match]) -> List[Component]:
+        """
+        The score breakdown fields to calculate component OPRs for
+        """
+        # For each k-v in score_breakdown, attempt to convert v to a float.
+        # If we can't do that, we can't calculate a component OPR for it.
+        # As such, this will calculate cOPRs for any int/float/bool field.
+        # Use red on the first match just to get all the score_breakdown keys available.
+        components = []
+        for component, value in none_throws(matches[0].score_breakdown)[
+            AllianceColor.RED
+        ].items():
+            try:
+                float(value)
+            except (ValueError, TypeError):
+                pass
+            else:
+                components.append(component)
+        return components
 
     @classmethod
-    def calculate_matchstats(cls, matches: List[Match], year: Year) -> EventMatchStats:
+    def calculate_stats(
+        cls, matches: List[Match], year: Year
+    ) -> Tuple[EventMatchStats, EventComponentOPRs]:
+        """
+        Calculates OPR/DPR/CCWM and all component OPRs together, with one pass
+        over the matches and one solve for every stat
+        Returns (matchstats, coprs)
+        """
         if not matches:
-            return {}
+            return {}, OrderedDict()
 
         team_list, team_id_map = cls.build_team_mapping(matches)
         if not team_list:
-            return {}
-        Minv = cls.build_Minv_matrix(matches, team_id_map)
+            return {}, OrderedDict()
 
-        oprs_dict = cls.calc_stat(matches, team_list, team_id_map, Minv, OPR_ACCESSOR)
-        dprs_dict = cls.calc_stat(matches, team_list, team_id_map, Minv, DPR_ACCESSOR)
-        ccwms_dict = cls.calc_stat(matches, team_list, team_id_map, Minv, CCWM_ACCESSOR)
+        matches_with_score_breakdown = [
+            match for match in matches if match.score_breakdown is not None
+        ]
+        copr_team_list, manual_coprs, components = cls.get_copr_accessors(matches, year)
+
+        matchstat_accessors = list(MATCHSTAT_ACCESSORS.values())
+        if len(matches_with_score_breakdown) == len(matches):
+            A, Y = cls.build_alliance_matrices(
+                matches,
+                team_id_map,
+                matchstat_accessors + list(manual_coprs.values()),
+                components,
+            )
+            X = cls.solve(A.T.dot(A), A.T.dot(Y))
+            matchstats_X = X[:, : len(matchstat_accessors)]
+            coprs_X = X[:, len(matchstat_accessors) :]
+        else:
+            # Only matches with a score breakdown count towards COPRs
+            A, Y = cls.build_alliance_matrices(
+                matches, team_id_map, matchstat_accessors, []
+            )
+            matchstats_X = cls.solve(A.T.dot(A), A.T.dot(Y))
+            A, Y = cls.build_alliance_matrices(
+                matches_with_score_breakdown,
+                team_id_map,
+                list(manual_coprs.values()),
+                components,
+            )
+            coprs_X = cls.solve(A.T.dot(A), A.T.dot(Y))
 
-        stats: EventMatchStats = {
-            StatType.OPR: oprs_dict,
-            StatType.DPR: dprs_dict,
-            StatType.CCWM: ccwms_dict,
+        matchstats: EventMatchStats = {
+            stat_type: {team: x[team_id_map[team]] for team in team_list}
+            for stat_type, x in zip(MATCHSTAT_ACCESSORS.keys(), matchstats_X.T)
         }
 
-        return stats
+        coprs: OrderedDict[Component, TeamStatMap] = OrderedDict()
+        for name, x in zip(list(manual_coprs.keys()) + components, coprs_X.T):
+            coprs[name] = {team: x[team_id_map[team]] for team in copr_team_list}
+
+        return matchstats, coprs
+
+    @classmethod
+    def calculate_matchstats(cls, matches: List[Match], year: Year) -> EventMatchStats:
+        matchstats, _ = cls.calculate_stats(matches, year)
+        return matchstats
 
     @classmethod
     def calculate_coprs(cls, matches: List[Match], year: Year) -> EventComponentOPRs:
-        coprs: OrderedDict[Component, TeamStatMap] = OrderedDict()
+        _, coprs = cls.calculate_stats(matches, year)
+        return coprs
+
+    @classmethod
+    def get_copr_accessors(
+        cls, matches: List[Match], year: Year
+    ) -> Tuple[List[TeamId], Dict[Component, StatAccessor], List[Component]]:
+        """
+        Returns (copr_team_list, manual_coprs, components), the teams and COPRs
+        to calculate from the matches with a score breakdown
+        """
         matches_with_score_breakdown = [
             match for match in matches if match.score_breakdown is not None
         ]
+        copr_team_list, _ = cls.build_team_mapping(matches_with_score_breakdown)
+        if not copr_team_list:
+            return [], {}, []
+        return (
+            copr_team_list,
+            get_game(year).get_manual_coprs(),
+            cls.get_components(matches_with_score_breakdown),
+        )
 
-        if len(matches_with_score_breakdown) == 0:
-            return coprs
+    @classmethod
+    def build_state(cls, matches: List[Match], year: Year) -> MatchstatsState:
+        _, manual_coprs, components = cls.get_copr_accessors(matches, year)
+        state = MatchstatsState(
+            year=year,
+            copr_names=list(manual_coprs.keys()) + components,
+            team_id_map={},
+            teams=[],
+            copr_teams=[],
+            M=np.zeros((0, 0)),
+            S=np.zeros((0, len(MATCHSTAT_ACCESSORS))),
+            copr_M=np.zeros((0, 0)),
+            copr_S=np.zeros((0, len(manual_coprs) + len(components))),
+        )
+        none_throws(cls.update_state(state, matches))
+        return state
 
-        first_match = matches_with_score_breakdown[0]
+    @classmethod
+    def update_state(
+        cls, state: MatchstatsState, matches: List[Match]
+    ) -> Optional[int]:
+        """
+        Brings the state up to date with an event's matches, applying only
+        the played quals matches that are new or changed since the last
+        update, and removing ones that no longer count.
+        Returns the number of matches applied or removed, or None if the
+        state has to be rebuilt because the COPR components changed.
+        """
+        copr_team_list, manual_coprs, components = cls.get_copr_accessors(
+            matches, state.year
+        )
+        if list(manual_coprs.keys()) + components != state.copr_names:
+            return None
+
+        team_list, _ = cls.build_team_mapping(matches)
+        cls._add_teams(state, team_list)
+        state.teams = team_list
+        state.copr_teams = copr_team_list
+
+        played = {
+            none_throws(match.key.string_id()): match
+            for match in matches
+            if match.comp_level == CompLevel.QM and match.has_been_played
+        }
+        changed = 0
+        for match_key in list(state.applied.keys()):
+            if match_key not in played:
+                cls._apply(state, state.applied.pop(match_key), -1)
+                changed += 1
+
+        accessors = list(MATCHSTAT_ACCESSORS.values())
+        for match_key, match in played.items():
+            digest = hashlib.md5(
+                (match.alliances_json + (match.score_breakdown_json or "")).encode(),
+                usedforsecurity=False,
+            ).hexdigest()
+            old = state.applied.get(match_key)
+            if old is not None and old.digest == digest:
+                continue
+            if old is not None:
+                cls._apply(state, old, -1)
+
+            has_score_breakdown = match.score_breakdown is not None
+            _, Y = cls.build_alliance_matrices(
+                [match],
+                state.team_id_map,
+                (
+                    accessors + list(manual_coprs.values())
+                    if has_score_breakdown
+                    else accessors
+                ),
+                components if has_score_breakdown else [],
+            )
+            applied = AppliedMatch(
+                digest=digest,
+                alliances=[
+                    [
+                        state.team_id_map[team[3:]]
+                        for team in match.alliances[alliance_color]["teams"]
+                    ]
+                    for alliance_color in ALLIANCE_COLORS
+                ],
+                matchstats=Y[:, : len(accessors)],
+                coprs=Y[:, len(accessors) :] if has_score_breakdown else None,
+            )
+            cls._apply(state, applied, 1)
+            state.applied[match_key] = applied
+            changed += 1
+        return changed
 
-        team_list, team_id_map = cls.build_team_mapping(matches_with_score_breakdown)
-        if not team_list:
-            return {}
+    @classmethod
+    def solve_state(
+        cls, state: MatchstatsState
+    ) -> Tuple[EventMatchStats, EventComponentOPRs]:
+        """
+        Returns (matchstats, coprs), the same as calculate_stats would for the
+        matches the state was last updated with
+        """
+        if not state.teams:
+            return {}, OrderedDict()
+
+        if np.array_equal(state.M, state.copr_M):
+            X = cls.solve(state.M, np.hstack([state.S, state.copr_S]))
+            matchstats_X = X[:, : state.S.shape[1]]
+            coprs_X = X[:, state.S.shape[1] :]
+        else:
+            matchstats_X = cls.solve(state.M, state.S)
+            coprs_X = cls.solve(state.copr_M, state.copr_S)
+
+        matchstats: EventMatchStats = {
+            stat_type: {team: x[state.team_id_map[team]] for team in state.teams}
+            for stat_type, x in zip(MATCHSTAT_ACCESSORS.keys(), matchstats_X.T)
+        }
 
-        Minv = cls.build_Minv_matrix(matches_with_score_breakdown, team_id_map)
+        coprs: OrderedDict[Component, TeamStatMap] = OrderedDict()
+        for name, x in zip(state.copr_names, coprs_X.T):
+            coprs[name] = {
+                team: x[state.team_id_map[team]] for team in state.copr_teams
+            }
+        return matchstats, coprs
 
-        for name, accessor in get_game(year).get_manual_coprs().items():
-            coprs[name] = cls.calc_stat(
-                matches_with_score_breakdown, team_list, team_id_map, Minv, accessor
+    @classmethod
+    def update_event_stats(
+        cls, event_key: ndb.Key, matches: List[Match]
+    ) -> Tuple[EventMatchStats, EventComponentOPRs]:
+        """
+        Calculates an event's matchstats and COPRs from the state kept in
+        memcache by the last update, so only new or changed matches have to
+        be applied. The state is rebuilt if it's missing.
+        """
+        year = int(none_throws(event_key.string_id())[:4])
+        memcache = MemcacheClient.get()
+        cache_key = cls.state_cache_key(event_key)
+
+        # Updates for the same event can run concurrently, so only write the
+        # state back if no one else has since we read it. Otherwise, apply our
+        # matches to theirs.
+        for _ in range(cls.STATE_CAS_RETRIES):
+            cached_state: Optional[MatchstatsState] = memcache.gets(cache_key)
+            state, changed = cached_state, None
+            if state is not None:
+                changed = cls.update_state(state, matches)
+            if state is None or changed is None:
+                state = cls.build_state(matches, year)
+
+            if changed == 0:
+                stored = True
+            elif cached_state is None:
+                stored = memcache.add(cache_key, state, cls.STATE_TTL)
+            else:
+                stored = memcache.cas(cache_key, state, cls.STATE_TTL)
+            if stored:
+                break
+        else:
+            logging.warning(
+                f"Matchstats state for {event_key.id()} kept changing; not saved"
             )
 
-        # For each k-v in score_breakdown, attempt to convert v to a float.
-        # If we can't do that, we can't calculate a component OPR for it.
-        # As such, this will calculate cOPRs for any int/float/bool field.
-        # Use red on the first match just to get all the score_breakdown keys available.
-        for component, value in none_throws(first_match.score_breakdown)[
-            AllianceColor.RED
-        ].items():
-            try:
-                float(value)
-            except (ValueError, TypeError):
-                pass
-            else:
-                coprs[component] = cls.calc_stat(
-                    matches_with_score_breakdown,
-                    team_list,
-                    team_id_map,
-                    Minv,
-                    make_default_component_accessor(component),
-                )
+        if changed is None:
+            logging.info(
+                f"Rebuilt matchstats state for {event_key.id()} from "
+                f"{len(state.applied)} matches"
+            )
+        else:
+            logging.info(
+                f"Applied {changed} changed matches to matchstats state for "
+                f"{event_key.id()}"
+            )
+        return cls.solve_state(state)
 
-        return coprs
+    @classmethod
+    def save_state(cls, event_key: ndb.Key, matches: List[Match]) -> None:
+        """
+        Replaces the state with one built from scratch from the event's
+        matches, so the next update only applies what changed since
+        """
+        year = int(none_throws(event_key.string_id())[:4])
+        MemcacheClient.get().set(
+            cls.state_cache_key(event_key),
+            cls.build_state(matches, year),
+            cls.STATE_TTL,
+        )
+
+    @classmethod
+    def clear_state(cls, event_key: ndb.Key) -> None:
+        MemcacheClient.get().delete(cls.state_cache_key(event_key))
+
+    @staticmethod
+    def state_cache_key(event_key: ndb.Key) -> bytes:
+        return f"{event_key.id()}:matchstats_state".encode()
+
+    @staticmethod
+    def _add_teams(state: MatchstatsState, team_list: List[TeamId]) -> None:
+        """
+        Adds rows and columns for teams the state hasn't seen yet
+        """
+        new_teams = [team for team in team_list if team not in state.team_id_map]
+        if not new_teams:
+            return
+
+        for team in new_teams:
+            state.team_id_map[team] = len(state.team_id_map)
+        n = len(new_teams)
+        state.M = np.pad(state.M, ((0, n), (0, n)))
+        state.S = np.pad(state.S, ((0, n), (0, 0)))
+        state.copr_M = np.pad(state.copr_M, ((0, n), (0, n)))
+        state.copr_S = np.pad(state.copr_S, ((0, n), (0, 0)))
+
+    @staticmethod
+    def _apply(state: MatchstatsState, applied: AppliedMatch, sign: int) -> None:
+        """
+        Adds (sign=1) or removes (sign=-1) a match's alliances from the state
+        """
+        A = np.zeros((len(applied.alliances), len(state.team_id_map)))
+        for row, team_ids in enumerate(applied.alliances):
+            np.add.at(A[row], team_ids, 1)
+        AT = A.T
+        ATA = AT.dot(A)
+        state.M += sign * ATA
+        state.S += sign * AT.dot(applied.matchstats)
+        if applied.coprs is not None:
+            state.copr_M += sign * ATA
+            state.copr_S += sign * AT.dot(applied.coprs)
 
     @classmethod
     def get_last_event_stats(
         cls, team_list: List[TeamId], event_key: ndb.Key
     ) -> EventMatchStats:
-        year = int(none_throws(event_key.string_id())[:4])
-        cur_event = event_key.get()
+        """
+        Each team's stats from its last official event before this one
+        """
+        cur_event = none_throws(event_key.get())
+        priors = TeamPriorsHelper.get_priors(
+            cur_event, [f"frc{team}" for team in team_list]
+        )
 
-        # Check cache for stored OPRs
         last_event_stats: EventMatchStats = defaultdict(dict)
+        for team in team_list:
+            official_priors = [
+                prior for prior in priors[f"frc{team}"] if prior["official"]
+            ]
+            if not official_priors:
+                continue
 
-        memcache = MemcacheClient.get()
-        cache_key = f"{event_key.id()}:last_event_stats".encode()
-        last_event_stats = memcache.get(cache_key)
-        if last_event_stats is None:
-            last_event_stats = defaultdict(dict)
+            last_prior = max(official_priors, key=lambda prior: prior["start_date"])
+            for stat, value in last_prior["matchstats"].items():
+                last_event_stats[StatType(stat)][team] = value
 
-        # Make necessary queries for missing stats
-        futures = []
-        for team in team_list:
-            if team not in last_event_stats:
-                events_future = event_query.TeamYearEventsQuery(
-                    "frc{}".format(team), year
-                ).fetch_async()
-                futures.append((team, events_future))
-
-        # Add missing stats to last_event_stats
-        for team, events_future in futures:
-            events = events_future.get_result()
-
-            # Find last event before current event
-            last_event = None
-            last_event_start = None
-            for event in events:
-                if (
-                    event.official
-                    and event.start_date < cur_event.start_date
-                    and event.event_type_enum != EventType.CMP_FINALS
-                ):
-                    if last_event is None or event.start_date > last_event_start:
-                        last_event = event
-                        last_event_start = event.start_date
-
-            if last_event is not None and last_event.matchstats:
-                for stat, values in last_event.matchstats.items():
-                    if values and team in values:
-                        last_event_stats[stat][team] = values[team]
-
-        memcache.set(cache_key, last_event_stats, 60 * 60 * 24)
         return last_event_stats
@@ -22,14 +22,10 @@ from backend.common.consts.alliance_color import (
     TMatchWinner,
 )
 from backend.common.consts.comp_level import CompLevel
-from backend.common.consts.event_type import (
-    CMP_EVENT_TYPES,
-    EventType,
-    SEASON_EVENT_TYPES,
-)
+from backend.common.consts.event_type import CMP_EVENT_TYPES, SEASON_EVENT_TYPES
 from backend.common.game_specific.registry import get_game
-from backend.common.helpers.event_helper import EventHelper
 from backend.common.helpers.match_helper import MatchHelper
+from backend.common.helpers.team_priors_helper import TeamPriorsHelper
 from backend.common.models.event import Event
 from backend.common.models.event_predictions import (
     MatchPrediction,
@@ -45,11 +41,25 @@ from backend.common.models.event_predictions import (
 )
 from backend.common.models.keys import TeamKey
 from backend.common.models.match import Match
-from backend.common.models.team import Team
-from backend.common.queries.event_query import TeamYearEventsQuery
 
 
 class ContributionCalculator:
+    """
+    Estimates each team's contribution (mean and variance) to a stat before
+    every match, from the matches played before it and priors from earlier
+    events.
+
+    Each estimate is the MMSE solution (AoT.Ao + D)^-1 . (AoT.M + D.Oe), where
+    Ao has a row per played alliance, with a 1 for each of its teams. D is
+    constant, so (AoT.Ao + D)^-1 is kept up to date with a Sherman-Morrison
+    rank-1 update for each alliance, and AoT.M is accumulated alongside it.
+    That makes each match O(t^2) rather than rebuilding AoT.Ao and inverting
+    it, at O(t^3).
+    """
+
+    # Weight of each team's prior estimate, as a diagonal entry of D
+    PRIOR_WEIGHT = 3  # TODO
+
     def __init__(
         self,
         event: Event,
@@ -70,11 +80,11 @@ class ContributionCalculator:
         self._team_list, self._team_id_map = self._build_team_mapping()
 
         # Setup matrices
-        m = len(self._matches)
         t = len(self._team_list)
-        self._Ao = np.zeros((2 * m, t))  # Match teams
-        self._Mmean = np.zeros((2 * m, 1))  # Means
-        self._Mvar = np.zeros((2 * m, 1))  # Variances
+        # (AoT.Ao + D)^-1, starting with no matches played
+        self._P = np.eye(t) / self.PRIOR_WEIGHT
+        self._AoTMmean = np.zeros((t, 1))  # AoT.M for means
+        self._AoTMvar = np.zeros((t, 1))  # AoT.M for variances
 
         # Past event stats for initialization
         self._past_stats_mean, self._past_stats_var = self._get_past_stats(
@@ -87,7 +97,6 @@ class ContributionCalculator:
 
         # These aren't used to persist state, just allocating space
         self._Oe = np.zeros((t, 1))  # Prior estimates
-        self._diags = np.ndarray(t)  # Prior estimates variances
 
         # Things to return
         self._means: Dict[TeamKey, float] = {}
@@ -114,7 +123,7 @@ class ContributionCalculator:
         return team_list, team_id_map
 
     def _get_past_stats(
-        self, cur_event: Event, team_list: List[Team]
+        self, cur_event: Event, team_list: List[TeamKey]
     ) -> Tuple[Mapping[TeamKey, List[float]], Mapping[TeamKey, List[float]]]:
         past_stats_mean: MutableMapping[TeamKey, List[float]] = defaultdict(
             list
@@ -123,61 +132,15 @@ class ContributionCalculator:
             list
         )  # team key > values
 
-        no_priors_team_list = team_list
-
-        for year_diff in range(1):
-            team_events_futures = []
-            for team in no_priors_team_list:
-                team_events_futures.append(
-                    (
-                        team,
-                        TeamYearEventsQuery(
-                            team, cur_event.year - year_diff
-                        ).fetch_async(),
-                    )
-                )
-
-            no_priors_team_list = []
-            for team, events_future in team_events_futures:
-                events = events_future.get_result()
-                events = EventHelper.sorted_events(events)
-                no_past_mean = True
-                for event in events:
-                    if (
-                        event.event_type_enum in SEASON_EVENT_TYPES
-                        and event.start_date < cur_event.start_date
-                        and event.event_type_enum != EventType.CMP_FINALS
-                        and event.details
-                    ):
-                        # event.details is backed by in-context cache
-                        predictions = event.details.predictions
-                        if (
-                            predictions
-                            and predictions.get("stat_mean_vars")
-                            and none_throws(predictions["stat_mean_vars"]).get("qual")
-                        ):
-                            team_mean = none_throws(predictions["stat_mean_vars"])[
-                                "qual"
-                            ][self._stat]["mean"].get(team)
-                            if team_mean is not None:
-                                if year_diff != 0:
-                                    team_mean *= (
-                                        1  # TODO: Hacky; scale based on actual data
-                                    )
-                                past_stats_mean[team].append(team_mean)
-                                no_past_mean = False
-
-                            team_var = none_throws(predictions["stat_mean_vars"])[
-                                "qual"
-                            ][self._stat]["var"].get(team)
-                            if team_var is not None:
-                                if year_diff != 0:
-                                    team_var = (
-                                        self._default_var * 3
-                                    )  # TODO: Hacky; scale based on actual data
-                                past_stats_var[team].append(team_var)
-                if no_past_mean:
-                    no_priors_team_list.append(team)
+        priors = TeamPriorsHelper.get_priors(cur_event, team_list)
+        for team, team_priors in priors.items():
+            for prior in team_priors:
+                if prior["event_type"] not in SEASON_EVENT_TYPES:
+                    continue
+                stat_mean_var = prior["stat_mean_vars"].get(self._stat)
+                if stat_mean_var is not None:
+                    past_stats_mean[team].append(stat_mean_var["mean"])
+                    past_stats_var[team].append(stat_mean_var["var"])
 
         return past_stats_mean, past_stats_var
 
@@ -189,11 +152,24 @@ class ContributionCalculator:
         y = (1.0 / (np.sqrt(2.0 * np.pi) * abs(sigma))) * np.exp(-u * u / 2.0)
         return y
 
-    def calculate_before_match(self, i: int) -> TComputedMatchInfo:
-        # Used for both mean and var
-        AoT = self._Ao.transpose()
-        Aoo = np.dot(AoT, self._Ao)
+    def _add_alliance(self, teams: List[TeamKey], mean: float, var: float) -> None:
+        """
+        Adds a played alliance's row to Ao, with its mean and variance.
+        """
+        team_ids = list({self._team_id_map[team] for team in teams})
+
+        # Sherman-Morrison: (A + a.aT)^-1 = P - (P.a)(P.a)T / (1 + aT.P.a)
+        # With a being 0s and 1s, P.a is a sum of P's columns
+        Pa = self._P[:, team_ids].sum(axis=1, keepdims=True)
+        self._P -= Pa.dot(Pa.T) / (1 + Pa[team_ids].sum())
 
+        self._AoTMmean[team_ids] += mean
+        self._AoTMvar[team_ids] += var
+
+    def _solve(self, AoTM: np.ndarray, Oe: np.ndarray) -> np.ndarray:
+        return self._P.dot(AoTM + self.PRIOR_WEIGHT * Oe)
+
+    def calculate_before_match(self, i: int) -> TComputedMatchInfo:
         ####################################################################
         # Estimate Team Means
         # Populate priors
@@ -218,12 +194,9 @@ class ContributionCalculator:
                     mean = np.mean(self._mean_sums) / 3
 
             self._Oe[self._team_id_map[team]] = mean
-            self._diags[self._team_id_map[team]] = 3  # TODO
 
         # MMSE Contribution Mean
-        Omean = np.linalg.inv(Aoo + np.diag(self._diags)).dot(
-            AoT.dot(self._Mmean) + np.diag(self._diags).dot(self._Oe)
-        )
+        Omean = self._solve(self._AoTMmean, self._Oe)
         for team, Omean in zip(self._team_list, Omean):
             self._means[team] = Omean[0]
 
@@ -250,14 +223,9 @@ class ContributionCalculator:
             #         var = np.mean(self._var_sums) / 3
 
             self._Oe[self._team_id_map[team]] = var
-            self._diags[self._team_id_map[team]] = 3  # TODO
 
         # MMSE Contribution Variance
-        Ovar = abs(
-            np.linalg.inv(Aoo + np.diag(self._diags)).dot(
-                AoT.dot(self._Mvar) + np.diag(self._diags).dot(self._Oe)
-            )
-        )
+        Ovar = abs(self._solve(self._AoTMvar, self._Oe))
         for team, stat in zip(self._team_list, Ovar):
             self._vars[team] = stat[0]
 
@@ -423,20 +391,15 @@ class ContributionCalculator:
                 else:
                     raise Exception("Unknown stat: {}".format(self._stat))
 
-            self._Mmean[2 * i] = means[AllianceColor.RED]
-            self._Mmean[2 * i + 1] = means[AllianceColor.BLUE]
-
             self._mean_sums.append(means[AllianceColor.RED])
             self._mean_sums.append(means[AllianceColor.BLUE])
 
             predicted_mean_red = 0
             for team in match.alliances[AllianceColor.RED]["teams"]:
-                self._Ao[2 * i, self._team_id_map[team]] = 1
                 predicted_mean_red += self._means[team]
 
             predicted_mean_blue = 0
             for team in match.alliances[AllianceColor.BLUE]["teams"]:
-                self._Ao[2 * i + 1, self._team_id_map[team]] = 1
                 predicted_mean_blue += self._means[team]
 
             # Find max of prob over var_sum
@@ -462,7 +425,7 @@ class ContributionCalculator:
                 else:
                     var_sum -= var_sum_step
                 var_sum_step /= 2
-            self._Mvar[2 * i] = best_var_sum
+            var_red = best_var_sum
             self._var_sums.append(best_var_sum)
 
             # Optimize prob over var_sum for max
@@ -488,9 +451,20 @@ class ContributionCalculator:
                 else:
                     var_sum -= var_sum_step
                 var_sum_step /= 2
-            self._Mvar[2 * i + 1] = best_var_sum
+            var_blue = best_var_sum
             self._var_sums.append(best_var_sum)
 
+            self._add_alliance(
+                match.alliances[AllianceColor.RED]["teams"],
+                means[AllianceColor.RED],
+                none_throws(var_red),
+            )
+            self._add_alliance(
+                match.alliances[AllianceColor.BLUE]["teams"],
+                means[AllianceColor.BLUE],
+                none_throws(var_blue),
+            )
+
         return {"mean": self._means, "var": self._vars}
 
 
@@ -0,0 +1,440 @@
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from google.appengine.ext import ndb
+
+from backend.common.consts.client_type import ClientType
+from backend.common.consts.model_type import ModelType
+from backend.common.consts.notification_type import NotificationType
+from backend.common.helpers.deferred import defer_safe
+from backend.common.models.account import Account
+from backend.common.models.mobile_client import MobileClient
+from backend.common.models.mobile_client_index import MobileClientIndex
+from backend.common.models.subscriber_index import SubscriberIndex
+from backend.common.models.subscription import Subscription
+from backend.common.queries.mobile_client_query import MobileClientQuery
+from backend.common.sitevars.notifications_subscriber_index import (
+    NotificationsSubscriberIndex,
+)
+
+
+class SubscriberIndexHelper:
+    """
+    Maintains and reads the SubscriberIndex and MobileClientIndex entities,
+    which let TBANS find the clients to notify with a few key lookups:
+
+        (model, notification type) -> user IDs -> MobileClient keys -> clients
+
+    Subscription and MobileClient put and delete hooks call into this to keep
+    the index current. rebuild_all() builds it from every Subscription and
+    MobileClient. Until the first rebuild finishes, the index is incomplete, so
+    subscribers() and clients() query Subscriptions and MobileClients instead;
+    the NotificationsSubscriberIndex sitevar records when it's ready.
+    """
+
+    REBUILD_PAGE_SIZE = 500
+    REINDEX_COUNTDOWN = 10
+
+    @classmethod
+    def subscribers(
+        cls,
+        models: List[Tuple[ModelType, str]],
+        notification_type: NotificationType,
+    ) -> List[List[str]]:
+        """
+        The IDs of users subscribed to each (model type, model key) for a
+        notification type, in the same order as `models`.
+        """
+        if not NotificationsSubscriberIndex.index_ready():
+            return cls._query_subscribers(models, notification_type)
+
+        entries = ndb.get_multi(
+            [
+                cls._subscriber_index_key(model_type, model_key, notification_type)
+                for model_type, model_key in models
+            ]
+        )
+        return [entry.user_ids if entry else [] for entry in entries]
+
+    @staticmethod
+    def _query_subscribers(
+        models: List[Tuple[ModelType, str]],
+        notification_type: NotificationType,
+    ) -> List[List[str]]:
+        futures = [
+            Subscription.query(
+                Subscription.model_key == model_key,
+                Subscription.notification_types == notification_type,
+                Subscription.model_type == model_type,
+            ).fetch_async()
+            for model_type, model_key in models
+        ]
+        return [
+            list(
+                dict.fromkeys(
+                    subscription.user_id for subscription in future.get_result()
+                )
+            )
+            for future in futures
+        ]
+
+    @staticmethod
+    def clients(
+        user_ids: Iterable[str],
+        client_types: Iterable[ClientType] = list(ClientType),
+    ) -> List[MobileClient]:
+        """
+        The verified clients of the given types registered to any of the users.
+        """
+        if not NotificationsSubscriberIndex.index_ready():
+            return MobileClientQuery(
+                list(dict.fromkeys(user_ids)), client_types=list(client_types)
+            ).fetch()
+
+        client_types = set(client_types)
+        indexes = ndb.get_multi(
+            [ndb.Key(MobileClientIndex, user_id) for user_id in dict.fromkeys(user_ids)]
+        )
+        # A client is only ever indexed under one user, but don't rely on it
+        client_keys = list(
+            dict.fromkeys(
+                client_key
+                for index in indexes
+                if index is not None
+                for client_key in index.client_keys
+            )
+        )
+        return [
+            client
+            for client in ndb.get_multi(client_keys)
+            # Deleted clients are pruned from the index by MobileClient's
+            # delete hook, except ones without an Account parent
+            if client is not None
+            and client.client_type in client_types
+            and client.verified
+        ]
+
+    @classmethod
+    def update_subscription(cls, subscription: Subscription) -> None:
+        """
+        Indexes a Subscription after it's written. The types it was previously
+        subscribed to aren't known, so each type's entry for the model is
+        checked.
+        """
+        cls._try_update_subscriber(
+            subscription.user_id,
+            ModelType(subscription.model_type),
+            subscription.model_key,
+            {NotificationType(t) for t in subscription.notification_types},
+        )
+
+    @classmethod
+    def remove_subscription(cls, subscription: Subscription) -> None:
+        cls._try_update_subscriber(
+            subscription.user_id,
+            ModelType(subscription.model_type),
+            subscription.model_key,
+            set(),
+        )
+
+    @classmethod
+    def _try_update_subscriber(
+        cls,
+        user_id: str,
+        model_type: ModelType,
+        model_key: str,
+        notification_types: Set[NotificationType],
+    ) -> None:
+        """
+        Updates the index from a Subscription's put or delete hook. Entries for
+        popular models are written by many users, so the transaction can fail
+        on contention; that mustn't fail the Subscription write, so the update
+        is retried in a task instead. If even that can't be enqueued, the
+        index is marked not ready, until it's rebuilt.
+        """
+        try:
+            cls._update_subscriber(user_id, model_type, model_key, notification_types)
+        except Exception:
+            logging.warning(
+                f"Failed to index {user_id}'s subscription to {model_key}, retrying in a task",
+                exc_info=True,
+            )
+            try:
+                defer_safe(
+                    cls._reindex_subscriber,
+                    user_id,
+                    model_type,
+                    model_key,
+                    # Let a pending delete finish first
+                    _countdown=cls.REINDEX_COUNTDOWN,
+                )
+            except Exception:
+                logging.exception(
+                    "Failed to enqueue subscriber reindex; marking the subscriber index not ready"
+                )
+                NotificationsSubscriberIndex.set_index_ready(False)
+
+    @classmethod
+    def _reindex_subscriber(
+        cls, user_id: str, model_type: ModelType, model_key: str
+    ) -> None:
+        """
+        Indexes whatever the user is currently subscribed to for the model.
+        Exceptions are raised, so the task is retried.
+        """
+        subscriptions = Subscription.query(
+            Subscription.model_key == model_key,
+            Subscription.model_type == model_type,
+            ancestor=ndb.Key(Account, user_id),
+        ).fetch()
+        cls._update_subscriber(
+            user_id,
+            model_type,
+            model_key,
+            {
+                NotificationType(t)
+                for subscription in subscriptions
+                for t in subscription.notification_types
+            },
+        )
+
+    @classmethod
+    def _update_subscriber(
+        cls,
+        user_id: str,
+        model_type: ModelType,
+        model_key: str,
+        notification_types: Set[NotificationType],
+    ) -> None:
+        keys = [
+            cls._subscriber_index_key(model_type, model_key, notification_type)
+            for notification_type in NotificationType
+        ]
+        entries = ndb.get_multi(keys)
+        for notification_type, key, entry in zip(NotificationType, keys, entries):
+            subscribed = notification_type in notification_types
+            indexed = entry is not None and user_id in entry.user_ids
+            if subscribed != indexed:
+                cls._set_subscribed(key, user_id, subscribed)
+
+    @staticmethod
+    @ndb.transactional()
+    def _set_subscribed(key: ndb.Key, user_id: str, subscribed: bool) -> None:
+        entry = key.get() or SubscriberIndex(key=key)
+        if subscribed and user_id not in entry.user_ids:
+            entry.user_ids.append(user_id)
+            entry.put()
+        elif not subscribed and user_id in entry.user_ids:
+            entry.user_ids.remove(user_id)
+            if entry.user_ids:
+                entry.put()
+            else:
+                key.delete()
+
+    @classmethod
+    def add_client(cls, user_id: str, client_key: ndb.Key) -> None:
+        # Clients are re-saved far more often than they're created; skip the
+        # transaction when the client is already indexed
+        index = MobileClientIndex.get_by_id(user_id)
+        if index is None or client_key not in index.client_keys:
+            cls._add_client(user_id, client_key)
+
+    @staticmethod
+    @ndb.transactional()
+    def _add_client(user_id: str, client_key: ndb.Key) -> None:
+        index = MobileClientIndex.get_by_id(user_id) or MobileClientIndex(id=user_id)
+        if client_key not in index.client_keys:
+            index.client_keys.append(client_key)
+            index.put()
+
+    @staticmethod
+    @ndb.transactional()
+    def remove_client(user_id: str, client_key: ndb.Key) -> None:
+        index = MobileClientIndex.get_by_id(user_id)
+        if index is None or client_key not in index.client_keys:
+            return
+
+        index.client_keys.remove(client_key)
+        if index.client_keys:
+            index.put()
+        else:
+            index.key.delete()
+
+    @staticmethod
+    def client_user_id(client_key: ndb.Key) -> Optional[str]:
+        # MobileClients are created with their Account as the parent
+        parent = client_key.parent()
+        return parent.id() if parent is not None else None
+
+    @classmethod
+    def rebuild_all(cls) -> None:
+        """
+        Rebuilds the index from every Subscription and MobileClient, then
+        removes index entries that are no longer used, and marks the index
+        ready. Runs as a chain of tasks that each handle one page of entities.
+
+        Pages are merged into the existing entries in transactions, like the
+        put and delete hooks' updates, so writes during the rebuild aren't lost.
+        """
+        cls._defer_rebuild_page(0, None)
+
+    @classmethod
+    def _rebuild_stages(
+        cls,
+    ) -> List[Tuple[ndb.Query, Callable[[List[Any]], None]]]:
+        return [
+            (Subscription.query(), cls._index_subscriptions),
+            (MobileClient.query(), cls._index_clients),
+            (SubscriberIndex.query(), cls._prune_subscribers),
+            (MobileClientIndex.query(), cls._prune_clients),
+        ]
+
+    @classmethod
+    def _defer_rebuild_page(cls, stage: int, cursor: Optional[str]) -> None:
+        defer_safe(cls._rebuild_page, stage, cursor, _queue="admin")
+
+    @classmethod
+    def _rebuild_page(cls, stage: int, cursor: Optional[str]) -> None:
+        stages = cls._rebuild_stages()
+        query, process = stages[stage]
+        results, next_cursor, more = query.fetch_page(
+            cls.REBUILD_PAGE_SIZE,
+            start_cursor=ndb.Cursor(urlsafe=cursor) if cursor else None,
+        )
+        process(results)
+
+        if more and next_cursor:
+            cls._defer_rebuild_page(stage, next_cursor.urlsafe())
+        elif stage + 1 < len(stages):
+            cls._defer_rebuild_page(stage + 1, None)
+        else:
+            logging.info("Rebuilt the subscriber index")
+            NotificationsSubscriberIndex.set_index_ready(True)
+
+    @classmethod
+    def _index_subscriptions(cls, subscriptions: List[Subscription]) -> None:
+        # Dicts rather than sets, to keep the order users subscribed in
+        subscribers: Dict[ndb.Key, Dict[str, None]] = {}
+        for subscription in subscriptions:
+            for notification_type in subscription.notification_types:
+                key = cls._subscriber_index_key(
+                    ModelType(subscription.model_type),
+                    subscription.model_key,
+                    NotificationType(notification_type),
+                )
+                subscribers.setdefault(key, {})[subscription.user_id] = None
+
+        cls._wait_all(
+            [
+                cls._add_subscribers_async(key, list(user_ids))
+                for key, user_ids in subscribers.items()
+            ]
+        )
+
+    @staticmethod
+    @ndb.transactional_tasklet()
+    def _add_subscribers_async(key: ndb.Key, user_ids: List[str]):
+        entry = (yield key.get_async()) or SubscriberIndex(key=key)
+        new_user_ids = [
+            user_id for user_id in user_ids if user_id not in entry.user_ids
+        ]
+        if new_user_ids:
+            entry.user_ids.extend(new_user_ids)
+            yield entry.put_async()
+
+    @classmethod
+    def _index_clients(cls, clients: List[MobileClient]) -> None:
+        user_clients: Dict[str, List[ndb.Key]] = {}
+        for client in clients:
+            user_clients.setdefault(client.user_id, []).append(client.key)
+
+        cls._wait_all(
+            [
+                cls._add_clients_async(user_id, client_keys)
+                for user_id, client_keys in user_clients.items()
+            ]
+        )
+
+    @staticmethod
+    @ndb.transactional_tasklet()
+    def _add_clients_async(user_id: str, client_keys: List[ndb.Key]):
+        index = (yield MobileClientIndex.get_by_id_async(user_id)) or (
+            MobileClientIndex(id=user_id)
+        )
+        new_client_keys = [key for key in client_keys if key not in index.client_keys]
+        if new_client_keys:
+            index.client_keys.extend(new_client_keys)
+            yield index.put_async()
+
+    @classmethod
+    def _prune_subscribers(cls, entries: List[SubscriberIndex]) -> None:
+        """
+        Removes users who are no longer subscribed from the entries
+        """
+        subscribed_futures = [
+            Subscription.query(
+                Subscription.model_key == model_key,
+                Subscription.notification_types == notification_type,
+                Subscription.model_type == model_type,
+            ).fetch_async()
+            for model_type, model_key, notification_type in (
+                SubscriberIndex.parse_key_name(entry.key.id()) for entry in entries
+            )
+        ]
+        for entry, subscribed_future in zip(entries, subscribed_futures):
+            subscribed = {s.user_id for s in subscribed_future.get_result()}
+            for user_id in entry.user_ids:
+                # That query is eventually consistent, so check each user
+                # missing from it against their own Subscriptions
+                if user_id not in subscribed and not cls._is_subscribed(
+                    entry.key, user_id
+                ):
+                    cls._set_subscribed(entry.key, user_id, False)
+                    # In case they subscribed since the check
+                    if cls._is_subscribed(entry.key, user_id):
+                        cls._set_subscribed(entry.key, user_id, True)
+
+    @staticmethod
+    def _is_subscribed(key: ndb.Key, user_id: str) -> bool:
+        model_type, model_key, notification_type = SubscriberIndex.parse_key_name(
+            key.id()
+        )
+        return (
+            Subscription.query(
+                Subscription.model_key == model_key,
+                Subscription.notification_types == notification_type,
+                Subscription.model_type == model_type,
+                ancestor=ndb.Key(Account, user_id),
+            ).count(limit=1)
+            > 0
+        )
+
+    @classmethod
+    def _prune_clients(cls, indexes: List[MobileClientIndex]) -> None:
+        """
+        Removes deleted clients, and ones that belong to another user
+        """
+        clients = ndb.get_multi(
+            [client_key for index in indexes for client_key in index.client_keys]
+        )
+        existing = {
+            client.key: client.user_id for client in clients if client is not None
+        }
+        for index in indexes:
+            for client_key in index.client_keys:
+                if existing.get(client_key) != index.key.id():
+                    cls.remove_client(index.key.id(), client_key)
+
+    @staticmethod
+    def _wait_all(futures: List[ndb.Future]) -> None:
+        for future in futures:
+            future.get_result()
+
+    @staticmethod
+    def _subscriber_index_key(
+        model_type: ModelType, model_key: str, notification_type: NotificationType
+    ) -> ndb.Key:
+        return ndb.Key(
+            SubscriberIndex,
+            SubscriberIndex.render_key_name(model_type, model_key, notification_type),
+        )
@@ -1,12 +1,16 @@
 import datetime
 import enum
+import itertools
 import logging
 import time
+from typing import Callable, Optional
 
 import firebase_admin
 from firebase_admin.exceptions import FirebaseError
+from google.appengine.ext import ndb
 
 from backend.common.consts.client_type import ClientType, FCM_CLIENTS
+from backend.common.consts.model_type import ModelType
 from backend.common.consts.notification_type import (
     ENABLED_EVENT_NOTIFICATIONS,
     ENABLED_MATCH_NOTIFICATIONS,
@@ -14,6 +18,8 @@ from backend.common.consts.notification_type import (
     NotificationType,
 )
 from backend.common.helpers.deferred import defer_safe
+from backend.common.helpers.subscriber_index_helper import SubscriberIndexHelper
+from backend.common.helpers.webhook_dispatcher import WebhookDispatcher
 from backend.common.models.district import District
 from backend.common.models.event import Event
 from backend.common.models.match import Match
@@ -285,61 +291,12 @@ class TBANSHelper:
             else _NotificationMode.ALL
         )
 
-        # Send to Event subscribers
-        event_subscriptions_future = None
-        if NotificationType.MATCH_SCORE in ENABLED_EVENT_NOTIFICATIONS:
-            event_subscriptions_future = Subscription.subscriptions_for_event(
-                event, NotificationType.MATCH_SCORE
-            )
-
-        # Send to Team subscribers
-        # Key is a team key, value is a future
-        team_subscriptions_futures = {}
-        if NotificationType.MATCH_SCORE in ENABLED_TEAM_NOTIFICATIONS:
-            for team_key in match.team_keys:
-                team = team_key.get()
-                if not team:
-                    continue
-
-                if team.key_name:
-                    team_subscriptions_futures[team.key_name] = (
-                        Subscription.subscriptions_for_team(
-                            team, NotificationType.MATCH_SCORE
-                        )
-                    )
-
-        # Send to Match subscribers
-        match_subscriptions_future = None
-        if NotificationType.MATCH_SCORE in ENABLED_MATCH_NOTIFICATIONS:
-            match_subscriptions_future = Subscription.subscriptions_for_match(
-                match, NotificationType.MATCH_SCORE
-            )
-
-        if event_subscriptions_future:
-            cls._batch_send_subscriptions(
-                event_subscriptions_future.get_result(),
-                MatchScoreNotification(match),
-                mode,
-            )
-
-        for team_key, team_subscriptions_future in team_subscriptions_futures.items():
-            try:
-                team = Team.get_by_id(team_key)
-            except Exception:
-                continue
-
-            cls._batch_send_subscriptions(
-                team_subscriptions_future.get_result(),
-                MatchScoreNotification(match, team),
-                mode,
-            )
-
-        if match_subscriptions_future:
-            cls._batch_send_subscriptions(
-                match_subscriptions_future.get_result(),
-                MatchScoreNotification(match),
-                mode,
-            )
+        cls._send_to_match_subscribers(
+            match,
+            NotificationType.MATCH_SCORE,
+            lambda team: MatchScoreNotification(match, team),
+            mode,
+        )
 
         # Send UPCOMING_MATCH for the N + 2 match after this one.
         # Skip for score breakdown updates — upcoming match scheduling
@@ -380,58 +337,11 @@ class TBANSHelper:
         match.push_sent = True
         MatchManipulator.createOrUpdate(match, run_post_update_hook=False)
 
-        # Send to Event subscribers
-        event_subscriptions_future = None
-        if NotificationType.UPCOMING_MATCH in ENABLED_EVENT_NOTIFICATIONS:
-            event_subscriptions_future = Subscription.subscriptions_for_event(
-                match.event.get(), NotificationType.UPCOMING_MATCH
-            )
-
-        # Send to Team subscribers
-        # Key is a team key, value is a future
-        team_subscriptions_futures = {}
-        if NotificationType.UPCOMING_MATCH in ENABLED_TEAM_NOTIFICATIONS:
-            for team_key in match.team_keys:
-                team = team_key.get()
-                if not team:
-                    continue
-
-                if team.key_name:
-                    team_subscriptions_futures[team.key_name] = (
-                        Subscription.subscriptions_for_team(
-                            team, NotificationType.UPCOMING_MATCH
-                        )
-                    )
-
-        # Send to Match subscribers
-        match_subscriptions_future = None
-        if NotificationType.UPCOMING_MATCH in ENABLED_MATCH_NOTIFICATIONS:
-            match_subscriptions_future = Subscription.subscriptions_for_match(
-                match, NotificationType.UPCOMING_MATCH
-            )
-
-        if event_subscriptions_future:
-            cls._batch_send_subscriptions(
-                event_subscriptions_future.get_result(),
-                MatchUpcomingNotification(match),
-            )
-
-        for team_key, team_subscriptions_future in team_subscriptions_futures.items():
-            try:
-                team = Team.get_by_id(team_key)
-            except Exception:
-                continue
-
-            cls._batch_send_subscriptions(
-                team_subscriptions_future.get_result(),
-                MatchUpcomingNotification(match, team),
-            )
-
-        if match_subscriptions_future:
-            cls._batch_send_subscriptions(
-                match_subscriptions_future.get_result(),
-                MatchUpcomingNotification(match),
-            )
+        cls._send_to_match_subscribers(
+            match,
+            NotificationType.UPCOMING_MATCH,
+            lambda team: MatchUpcomingNotification(match, team),
+        )
 
         # Send LEVEL_STARTING for the first match of a new type
         if match.set_number == 1 and match.match_number == 1:
@@ -443,56 +353,11 @@ class TBANSHelper:
         if match is None:
             return
 
-        # Send to Event subscribers
-        event_subscriptions_future = None
-        if NotificationType.MATCH_VIDEO in ENABLED_EVENT_NOTIFICATIONS:
-            event_subscriptions_future = Subscription.subscriptions_for_event(
-                match.event.get(), NotificationType.MATCH_VIDEO
-            )
-
-        # Send to Team subscribers
-        # Key is a team key, value is a future
-        team_subscriptions_futures = {}
-        if NotificationType.MATCH_VIDEO in ENABLED_TEAM_NOTIFICATIONS:
-            for team_key in match.team_keys:
-                team = team_key.get()
-                if not team:
-                    continue
-
-                if team.key_name:
-                    team_subscriptions_futures[team.key_name] = (
-                        Subscription.subscriptions_for_team(
-                            team, NotificationType.MATCH_VIDEO
-                        )
-                    )
-
-        # Send to Match subscribers
-        match_subscriptions_future = None
-        if NotificationType.MATCH_VIDEO in ENABLED_MATCH_NOTIFICATIONS:
-            match_subscriptions_future = Subscription.subscriptions_for_match(
-                match, NotificationType.MATCH_VIDEO
-            )
-
-        if event_subscriptions_future:
-            cls._batch_send_subscriptions(
-                event_subscriptions_future.get_result(), MatchVideoNotification(match)
-            )
-
-        for team_key, team_subscriptions_future in team_subscriptions_futures.items():
-            try:
-                team = Team.get_by_id(team_key)
-            except Exception:
-                continue
-
-            cls._batch_send_subscriptions(
-                team_subscriptions_future.get_result(),
-                MatchVideoNotification(match, team),
-            )
-
-        if match_subscriptions_future:
-            cls._batch_send_subscriptions(
-                match_subscriptions_future.get_result(), MatchVideoNotification(match)
-            )
+        cls._send_to_match_subscribers(
+            match,
+            NotificationType.MATCH_VIDEO,
+            lambda team: MatchVideoNotification(match, team),
+        )
 
     @classmethod
     def update_favorites(
@@ -763,12 +628,82 @@ class TBANSHelper:
 
         return None
 
+    @classmethod
+    def _send_to_match_subscribers(
+        cls,
+        match: Match,
+        notification_type: NotificationType,
+        build_notification: Callable[[Optional[Team]], Notification],
+        mode: _NotificationMode = _NotificationMode.ALL,
+    ) -> None:
+        """Send a match notification to subscribers of the match's Event, Teams and the Match itself.
+
+        Once the SubscriberIndex is built, this is one batch of key lookups for every
+        subscribed model (see SubscriberIndexHelper). Event and Match subscribers get the
+        notification without a Team, and each Team's subscribers get it for that Team.
+        """
+        event_models = []
+        if notification_type in ENABLED_EVENT_NOTIFICATIONS:
+            event_models = [
+                (ModelType.EVENT, match.event.id()),
+                (ModelType.EVENT, f"{match.year}*"),
+            ]
+        team_keys = []
+        if notification_type in ENABLED_TEAM_NOTIFICATIONS:
+            team_keys = match.team_keys
+        match_models = []
+        if notification_type in ENABLED_MATCH_NOTIFICATIONS:
+            match_models = [(ModelType.MATCH, match.key_name)]
+
+        team_futures = ndb.get_multi_async(team_keys)
+        subscribers = SubscriberIndexHelper.subscribers(
+            event_models
+            + [(ModelType.TEAM, team_key.id()) for team_key in team_keys]
+            + match_models,
+            notification_type,
+        )
+        event_subscribers = subscribers[: len(event_models)]
+        team_subscribers = subscribers[
+            len(event_models) : len(subscribers) - len(match_models)
+        ]
+        match_subscribers = subscribers[len(subscribers) - len(match_models) :]
+
+        if event_models:
+            # Users subscribed to both the Event and the year only get one
+            cls._batch_send_users(
+                list(dict.fromkeys(itertools.chain(*event_subscribers))),
+                build_notification(None),
+                mode,
+            )
+
+        for team_future, user_ids in zip(team_futures, team_subscribers):
+            team = team_future.get_result()
+            if not team:
+                continue
+
+            cls._batch_send_users(user_ids, build_notification(team), mode)
+
+        for user_ids in match_subscribers:
+            cls._batch_send_users(user_ids, build_notification(None), mode)
+
     @classmethod
     def _batch_send_subscriptions(
         cls,
         subscriptions: list[Subscription],
         notification: Notification,
         mode: _NotificationMode = _NotificationMode.ALL,
+    ) -> None:
+        # Convert subscriptions -> user IDs
+        # Allows us to send in batches
+        users = list(dict.fromkeys(sub.user_id for sub in subscriptions))
+        cls._batch_send_users(users, notification, mode)
+
+    @classmethod
+    def _batch_send_users(
+        cls,
+        user_ids: list[str],
+        notification: Notification,
+        mode: _NotificationMode = _NotificationMode.ALL,
     ) -> None:
         def batch(iterable, n=1):
             la = len(iterable)
@@ -777,9 +712,9 @@ class TBANSHelper:
 
         BATCH_SIZE = 500
 
-        for batch in batch(subscriptions, BATCH_SIZE):
+        for batch in batch(user_ids, BATCH_SIZE):
             defer_safe(
-                cls._send_subscriptions,
+                cls._send,
                 batch,
                 notification,
                 mode,
@@ -788,6 +723,7 @@ class TBANSHelper:
                 _url="/_ah/queue/deferred_notification_send",
             )
 
+    # Tasks enqueued before _batch_send_users may still call this
     @classmethod
     def _send_subscriptions(
         cls,
@@ -810,29 +746,26 @@ class TBANSHelper:
         send_fcm = bool(mode & _NotificationMode.FCM)
         send_webhooks = bool(mode & _NotificationMode.WEBHOOK)
 
-        fcm_clients_future = (
-            MobileClientQuery(user_ids, client_types=list(FCM_CLIENTS)).fetch_async()
-            if send_fcm
-            else None
-        )
-        webhook_clients_future = (
-            MobileClientQuery(user_ids, client_types=[ClientType.WEBHOOK]).fetch_async()
-            if send_webhooks
-            else None
-        )
+        client_types = []
+        if send_fcm:
+            client_types.extend(FCM_CLIENTS)
+        if send_webhooks:
+            client_types.append(ClientType.WEBHOOK)
+        clients = SubscriberIndexHelper.clients(user_ids, client_types)
 
         # Send to FCM clients
-        if fcm_clients_future:
-            fcm_clients = fcm_clients_future.get_result()
-            if fcm_clients:
-                cls._defer_fcm(fcm_clients, notification)
+        fcm_clients = [
+            client for client in clients if client.client_type in FCM_CLIENTS
+        ]
+        if fcm_clients:
+            cls._defer_fcm(fcm_clients, notification)
 
         # Send to webhooks
-        if webhook_clients_future:
-            webhook_clients = webhook_clients_future.get_result()
-            if webhook_clients:
-                for webhook in webhook_clients:
-                    cls._defer_webhook(webhook, notification)
+        webhook_clients = [
+            client for client in clients if client.client_type == ClientType.WEBHOOK
+        ]
+        if webhook_clients:
+            cls._defer_webhook(webhook_clients, notification)
 
     @classmethod
     def _defer_fcm(
@@ -848,7 +781,9 @@ class TBANSHelper:
         )
 
     @classmethod
-    def _defer_webhook(cls, clients: MobileClient, notification: Notification) -> None:
+    def _defer_webhook(
+        cls, clients: list[MobileClient], notification: Notification
+    ) -> None:
         defer_safe(
             cls._send_webhook,
             clients,
@@ -882,6 +817,12 @@ class TBANSHelper:
             and notification.should_send_to_client(client)
         ]
 
+        # Clients with stale tokens are deleted in the background while later
+        # batches send, then waited on at the end
+        cleanup_futures = []
+        stale_count = 0
+        cleanup_start = None
+
         # We can only send to so many FCM clients at a time - send to our clients across several requests
         for subclients in [
             clients[i : i + MAXIMUM_TOKENS]
@@ -897,6 +838,7 @@ class TBANSHelper:
             batch_response = fcm_request.send()
             logging.info(f"Got FCM response: {time.strftime('%X')}")
             retry_clients = []
+            stale_messaging_ids = []
 
             # Handle our failed sends - this might include logging/alerting, removing old clients, or retrying sends
             from firebase_admin.exceptions import (
@@ -919,12 +861,12 @@ class TBANSHelper:
                     logging.info(
                         f"Deleting mobile client with ID: {client.messaging_id}"
                     )
-                    MobileClientQuery.delete_for_messaging_id(client.messaging_id)
+                    stale_messaging_ids.append(client.messaging_id)
                 elif isinstance(response.exception, SenderIdMismatchError):
                     logging.info(
                         f"Deleting mobile client with ID: {client.messaging_id}"
                     )
-                    MobileClientQuery.delete_for_messaging_id(client.messaging_id)
+                    stale_messaging_ids.append(client.messaging_id)
                 elif isinstance(response.exception, QuotaExceededError):
                     logging.error("Quota exceeded - retrying client...")
                     retry_clients.append(client)
@@ -954,6 +896,16 @@ class TBANSHelper:
                         )
                     )
 
+            if stale_messaging_ids:
+                stale_count += len(stale_messaging_ids)
+                if cleanup_start is None:
+                    cleanup_start = time.perf_counter()
+                cleanup_futures.append(
+                    MobileClientQuery.delete_for_messaging_ids_async(
+                        stale_messaging_ids
+                    )
+                )
+
             # if retry_clients:
             #     # Try again, with exponential backoff
             #     defer_safe(
@@ -967,27 +919,59 @@ class TBANSHelper:
             #         _url="/_ah/queue/deferred_notification_send",
             #     )
 
+        if cleanup_start is not None:
+            deleted = sum(future.get_result() for future in cleanup_futures)
+            cleanup_ms = (time.perf_counter() - cleanup_start) * 1000
+            logging.info(
+                f"Deleted {deleted} mobile clients for {stale_count} stale FCM tokens in {cleanup_ms:.0f}ms"
+            )
+
         return
 
     @classmethod
-    def _send_webhook(cls, client: MobileClient, notification: Notification) -> None:
+    def _send_webhook(
+        cls,
+        clients: list[MobileClient],
+        notification: Notification,
+        backoff_iteration: int = 0,
+    ) -> None:
         # Only send to webhooks if notifications are enabled
         if not cls._notifications_enabled():
             return
 
-        # Make sure we're only sending to verified webhook clients
-        if client.client_type != ClientType.WEBHOOK or not client.verified:
+        # Only allow so many retries
+        backoff_time = 2**backoff_iteration
+        if backoff_time > MAXIMUM_BACKOFF:
             return
 
-        if not notification.should_send_to_client(client):
+        # Make sure we're only sending to verified webhook clients
+        clients = [
+            client
+            for client in clients
+            if client.client_type == ClientType.WEBHOOK
+            and client.verified
+            and notification.should_send_to_client(client)
+        ]
+        if not clients:
             return
 
-        webhook_request = WebhookRequest(
-            notification, client.messaging_id, client.secret
+        result = WebhookDispatcher().send(
+            [(client, notification) for client in clients]
         )
-        webhook_request.send()
 
-        return
+        retry_clients = [client for client, _ in result.retry]
+        if retry_clients:
+            # Try again, with exponential backoff
+            defer_safe(
+                cls._send_webhook,
+                retry_clients,
+                notification,
+                backoff_iteration + 1,
+                _countdown=backoff_time,
+                _target="py3-tasks-io",
+                _queue="push-notifications",
+                _url="/_ah/queue/deferred_notification_send",
+            )
 
     # Returns a list of debug strings for a FirebaseError
     @classmethod
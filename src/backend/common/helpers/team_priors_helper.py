@@ -0,0 +1,249 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+from google.appengine.ext import ndb
+
+from backend.common.consts.event_type import EventType, SEASON_EVENT_TYPES
+from backend.common.models.event import Event
+from backend.common.models.event_details import EventDetails
+from backend.common.models.event_team import EventTeam
+from backend.common.models.keys import EventKey, TeamKey, Year
+from backend.common.models.team_year_priors import (
+    TeamEventPrior,
+    TeamStatMeanVar,
+    TeamYearPriors,
+)
+from backend.common.queries.event_query import TeamYearEventsQuery
+from backend.common.sitevars.team_priors_rebuilt_years import TeamPriorsRebuiltYears
+
+
+class TeamPriorsHelper:
+    """
+    Maintains and reads TeamYearPriors, the stats each team put up at its
+    earlier events in a season. The OPR and prediction calculations look up
+    priors for every team at an event with a single get_multi.
+
+    EventDetails' post-update hook calls update_events() when an event's
+    matchstats or predictions change. rebuild_year() regenerates a season from
+    scratch. Until a season is first rebuilt, its entries are missing the
+    events from before they were maintained, so get_priors() loads each
+    team's events instead; the TeamPriorsRebuiltYears sitevar records which
+    seasons are ready.
+    """
+
+    @classmethod
+    def get_priors(
+        cls, event: Event, team_keys: Iterable[TeamKey]
+    ) -> Dict[TeamKey, List[TeamEventPrior]]:
+        """
+        The priors for each team from events that started before this one,
+        sorted by end date, then start date.
+        Teams without a TeamYearPriors, and every team before rebuild_year()
+        has backfilled the season, fall back to loading their events' details.
+        """
+        team_keys = list(team_keys)
+        if event.start_date is None:
+            return {team_key: [] for team_key in team_keys}
+
+        entries: List[Optional[TeamYearPriors]] = (
+            ndb.get_multi(
+                [cls._priors_key(team_key, event.year) for team_key in team_keys]
+            )
+            if TeamPriorsRebuiltYears.rebuilt(event.year)
+            else [None] * len(team_keys)
+        )
+
+        team_events_futures = {
+            team_key: TeamYearEventsQuery(team_key, event.year).fetch_async()
+            for team_key, entry in zip(team_keys, entries)
+            if entry is None
+        }
+        team_priors: Dict[TeamKey, List[TeamEventPrior]] = {
+            team_key: entry.events
+            for team_key, entry in zip(team_keys, entries)
+            if entry
+        }
+        for team_key, events_future in team_events_futures.items():
+            team_priors[team_key] = cls._priors_from_events(
+                team_key, events_future.get_result()
+            )
+
+        start_date = event.start_date.isoformat()
+        return {
+            team_key: [
+                prior
+                for prior in team_priors[team_key]
+                if prior["start_date"] < start_date
+            ]
+            for team_key in team_keys
+        }
+
+    @classmethod
+    def _priors_from_events(
+        cls, team_key: TeamKey, events: List[Event]
+    ) -> List[TeamEventPrior]:
+        priors = []
+        for event in events:
+            # event.details is backed by in-context cache
+            prior = (
+                cls._event_priors(event, event.details).get(team_key)
+                if event.details
+                else None
+            )
+            if prior is not None:
+                priors.append(prior)
+        cls._sort(priors)
+        return priors
+
+    @classmethod
+    def update_events(cls, event_details_list: Iterable[EventDetails]) -> None:
+        for event_details in event_details_list:
+            event = Event.get_by_id(event_details.key_name)
+            if event is not None:
+                cls.update_event(event, event_details)
+
+    @classmethod
+    def update_event(cls, event: Event, event_details: EventDetails) -> None:
+        """
+        Replaces the event's priors for each team at it
+        """
+        priors = cls._event_priors(event, event_details)
+        # Teams can drop out of an event's stats, so also look at everyone
+        # registered to remove their old priors
+        event_team_keys = EventTeam.query(EventTeam.event == event.key).fetch(
+            keys_only=True
+        )
+        team_keys = list(
+            set(priors).union(key.id().split("_")[1] for key in event_team_keys)
+        )
+        if not team_keys:
+            return
+
+        keys = [cls._priors_key(team_key, event.year) for team_key in team_keys]
+        entries: List[Optional[TeamYearPriors]] = ndb.get_multi(keys)
+        # Entries are shared by every event the team attends, so only ones
+        # that look out of date are rewritten, each in its own transaction
+        futures = [
+            cls._set_event_prior_async(key, event.key_name, priors.get(team_key))
+            for team_key, key, entry in zip(team_keys, keys, entries)
+            if cls._replace_event_prior(
+                entry.events if entry else [], event.key_name, priors.get(team_key)
+            )
+            is not None
+        ]
+        for future in futures:
+            future.get_result()
+
+    @classmethod
+    @ndb.transactional_tasklet()
+    def _set_event_prior_async(
+        cls, key: ndb.Key, event_key: EventKey, prior: Optional[TeamEventPrior]
+    ):
+        entry = yield key.get_async()
+        events = cls._replace_event_prior(
+            entry.events if entry else [], event_key, prior
+        )
+        if events is not None:
+            yield TeamYearPriors(key=key, events=events).put_async()
+
+    @classmethod
+    def _replace_event_prior(
+        cls,
+        old_events: List[TeamEventPrior],
+        event_key: EventKey,
+        prior: Optional[TeamEventPrior],
+    ) -> Optional[List[TeamEventPrior]]:
+        """
+        The events with the event's prior replaced, or None if that's no change
+        """
+        events = [
+            existing for existing in old_events if existing["event_key"] != event_key
+        ]
+        if prior is not None:
+            events.append(prior)
+            cls._sort(events)
+        return events if events != old_events else None
+
+    @classmethod
+    def rebuild_year(cls, year: Year) -> int:
+        """
+        Rebuilds every team's priors for a season from its events'
+        EventDetails. Returns the number of TeamYearPriors written.
+        """
+        events = Event.query(Event.year == year).fetch()
+        details = ndb.get_multi(
+            [ndb.Key(EventDetails, event.key_name) for event in events]
+        )
+
+        team_priors: Dict[TeamKey, List[TeamEventPrior]] = {}
+        for event, event_details in zip(events, details):
+            if event_details is None:
+                continue
+            for team_key, prior in cls._event_priors(event, event_details).items():
+                team_priors.setdefault(team_key, []).append(prior)
+
+        entries = []
+        for team_key, priors in team_priors.items():
+            cls._sort(priors)
+            entries.append(
+                TeamYearPriors(key=cls._priors_key(team_key, year), events=priors)
+            )
+        ndb.put_multi(entries)
+        TeamPriorsRebuiltYears.set_rebuilt(year)
+        return len(entries)
+
+    @classmethod
+    def _event_priors(
+        cls, event: Event, event_details: EventDetails
+    ) -> Dict[TeamKey, TeamEventPrior]:
+        """
+        A prior for each team with stats at the event. Only events that later
+        events would draw priors from are included.
+        """
+        if (
+            event.start_date is None
+            or event.event_type_enum == EventType.CMP_FINALS
+            or not (event.official or event.event_type_enum in SEASON_EVENT_TYPES)
+        ):
+            return {}
+
+        matchstats: Dict[TeamKey, Dict[str, float]] = {}
+        for stat, values in (event_details.matchstats or {}).items():
+            for team, value in (values or {}).items():
+                matchstats.setdefault(f"frc{team}", {})[stat] = value
+
+        stat_mean_vars: Dict[TeamKey, Dict[str, TeamStatMeanVar]] = {}
+        predictions = event_details.predictions or {}
+        qual_mean_vars = (predictions.get("stat_mean_vars") or {}).get("qual") or {}
+        for stat, mean_vars in qual_mean_vars.items():
+            for team_key, mean in mean_vars["mean"].items():
+                var = mean_vars["var"].get(team_key)
+                if var is not None:
+                    stat_mean_vars.setdefault(team_key, {})[stat] = {
+                        "mean": mean,
+                        "var": var,
+                    }
+
+        team_keys: Set[TeamKey] = set(matchstats).union(stat_mean_vars)
+        start_date = event.start_date.isoformat()
+        end_date = (event.end_date or event.start_date).isoformat()
+        return {
+            team_key: {
+                "event_key": event.key_name,
+                "start_date": start_date,
+                "end_date": end_date,
+                "event_type": event.event_type_enum,
+                "official": event.official,
+                "matchstats": matchstats.get(team_key, {}),
+                "stat_mean_vars": stat_mean_vars.get(team_key, {}),
+            }
+            for team_key in team_keys
+        }
+
+    @staticmethod
+    def _sort(priors: List[TeamEventPrior]) -> None:
+        # The order EventHelper.sorted_events puts the events in
+        priors.sort(key=lambda prior: (prior["end_date"], prior["start_date"]))
+
+    @staticmethod
+    def _priors_key(team_key: TeamKey, year: Year) -> ndb.Key:
+        return ndb.Key(TeamYearPriors, TeamYearPriors.render_key_name(team_key, year))
@@ -877,6 +877,20 @@ class Test2016nytrEventTeamStatusHelper(unittest.TestCase):
             "--",
         )
 
+    def test_event_statuses(self):
+        statuses = EventTeamStatusHelper.generate_event_statuses(
+            self.event, ["frc359", "frc5240", "frc229", "frc1665", "frc5964"]
+        )
+        self.assertDictEqual(statuses["frc359"], self.status_359)
+        self.assertDictEqual(statuses["frc5240"], self.status_5240)
+        self.assertDictEqual(statuses["frc229"], self.status_229)
+        self.assertDictEqual(statuses["frc1665"], self.status_1665)
+        self.assertDictEqual(statuses["frc5964"], self.status_5964)
+
+        # Alliance partners share playoff results, but not status objects
+        statuses["frc229"]["playoff"]["record"]["wins"] = 0
+        self.assertDictEqual(statuses["frc1665"], self.status_1665)
+
 
 @pytest.mark.usefixtures("ndb_context")
 class Test2016nytrEventTeamStatusHelperNoEventDetails(unittest.TestCase):
@@ -1091,6 +1105,16 @@ class Test2016nytrEventTeamStatusHelperNoEventDetails(unittest.TestCase):
             "Team 5964 had a record of <b>6-6-0</b> in quals.",
         )
 
+    def test_event_statuses(self):
+        statuses = EventTeamStatusHelper.generate_event_statuses(
+            self.event, ["frc359", "frc5240", "frc229", "frc1665", "frc5964"]
+        )
+        self.assertDictEqual(statuses["frc359"], self.status_359)
+        self.assertDictEqual(statuses["frc5240"], self.status_5240)
+        self.assertDictEqual(statuses["frc229"], self.status_229)
+        self.assertDictEqual(statuses["frc1665"], self.status_1665)
+        self.assertDictEqual(statuses["frc5964"], self.status_5964)
+
 
 @pytest.mark.usefixtures("ndb_context")
 class Test2016casjEventTeamStatusHelperNoEventDetails(unittest.TestCase):
@@ -1839,3 +1863,12 @@ class Test2023njflaEventTeamStatusHelper(unittest.TestCase):
             ),
             "Team 555 had a record of <b>3-9-0</b> in quals.",
         )
+
+    def test_event_statuses(self) -> None:
+        statuses = EventTeamStatusHelper.generate_event_statuses(
+            self.event, ["frc125", "frc11", "frc1811", "frc555"]
+        )
+        self.assertDictEqual(statuses["frc125"], self.status_125)
+        self.assertDictEqual(statuses["frc11"], self.status_11)
+        self.assertDictEqual(statuses["frc1811"], self.status_1811)
+        self.assertDictEqual(statuses["frc555"], self.status_555)
@@ -223,3 +223,16 @@ def test_district_uses_most_recent_district_team(ndb_stub) -> None:
     ).put()
 
     assert _build_team_district_map() == {"frc1": "ne"}
+
+
+def test_merge_adds_counts() -> None:
+    calc = _StubLeaderboard()
+    calc._increment("frc1", 2)
+    calc._increment("frc2", 1)
+    later = _StubLeaderboard()
+    later._increment("frc1", 3)
+    later._increment("frc3", 4)
+
+    calc.merge(later)
+
+    assert calc.counts == {"frc1": 5, "frc2": 1, "frc3": 4}
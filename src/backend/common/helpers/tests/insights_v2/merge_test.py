@@ -0,0 +1,142 @@
+import json
+import pickle
+import random
+from datetime import datetime
+from typing import List, Type
+
+import pytest
+from google.appengine.ext import ndb
+
+from backend.common.consts.award_type import AwardType
+from backend.common.consts.comp_level import CompLevel
+from backend.common.consts.event_type import EventType
+from backend.common.helpers.insights_v2.base import InsightV2Calculator
+from backend.common.helpers.insights_v2.registry import (
+    _run_season_events,
+    compute_season_partials,
+    make_calculators,
+)
+from backend.common.models.award import Award
+from backend.common.models.event import Event
+from backend.common.models.match import Match
+from backend.common.models.team import Team
+
+YEARS = [2022, 2023, 2024]
+TEAMS = [f"frc{number}" for number in range(1, 10)]
+TEAM_TO_DISTRICT = {team: "ne" if i % 2 else "fim" for i, team in enumerate(TEAMS)}
+
+# (event_short, event_type)
+EVENTS = [
+    ("reg1", EventType.REGIONAL),
+    ("dist1", EventType.DISTRICT),
+    ("reg2", EventType.REGIONAL),
+    ("dcmp", EventType.DISTRICT_CMP),
+    ("div1", EventType.CMP_DIVISION),
+    ("div2", EventType.CMP_DIVISION),
+    ("cmp", EventType.CMP_FINALS),
+]
+
+AWARD_TYPES = [
+    AwardType.WINNER,
+    AwardType.FINALIST,
+    AwardType.CHAIRMANS,
+    AwardType.WOODIE_FLOWERS,
+    AwardType.ENGINEERING_INSPIRATION,
+]
+
+MERGEABLE_CALCULATORS = [type(calc) for calc in make_calculators(0) if calc.MERGEABLE]
+
+
+def _put_match(
+    rng: random.Random, event: Event, comp_level: CompLevel, set_number: int
+) -> None:
+    teams = rng.sample(TEAMS, 6)
+    # Narrow score range, so there are ties
+    red_score, blue_score = rng.randint(0, 3), rng.randint(0, 3)
+    Match(
+        id=Match.render_key_name(event.key_name, comp_level, set_number, 1),
+        event=event.key,
+        year=event.year,
+        comp_level=comp_level,
+        set_number=set_number,
+        match_number=1,
+        team_key_names=teams,
+        alliances_json=json.dumps(
+            {
+                "red": {"teams": teams[:3], "score": red_score},
+                "blue": {"teams": teams[3:], "score": blue_score},
+            }
+        ),
+    ).put()
+
+
+def _put_seasons() -> None:
+    rng = random.Random(254)
+    for year in YEARS:
+        for i, (event_short, event_type) in enumerate(EVENTS):
+            event = Event(
+                id=f"{year}{event_short}",
+                year=year,
+                event_short=event_short,
+                event_type_enum=event_type,
+                official=True,
+                start_date=datetime(year, 3, 1 + i * 3),
+                end_date=datetime(year, 3, 3 + i * 3),
+            )
+            event.put()
+            # An event cancelled in the middle of a season
+            if year == 2023 and event_short == "reg2":
+                continue
+
+            for set_number in range(1, 6):
+                _put_match(rng, event, CompLevel.QM, set_number)
+            _put_match(rng, event, CompLevel.F, 1)
+
+            # Winners are drawn from the first few teams, so some repeat
+            for award_type in AWARD_TYPES:
+                team_count = (
+                    3 if award_type in {AwardType.WINNER, AwardType.FINALIST} else 1
+                )
+                pool = TEAMS[:5] if award_type == AwardType.WINNER else TEAMS
+                Award(
+                    id=Award.render_key_name(event.key_name, award_type),
+                    year=year,
+                    award_type_enum=award_type,
+                    event_type_enum=event_type,
+                    event=event.key,
+                    name_str=award_type.name,
+                    team_list=[
+                        ndb.Key(Team, team) for team in rng.sample(pool, team_count)
+                    ],
+                ).put()
+
+
+@pytest.mark.parametrize(
+    "calculator_type",
+    MERGEABLE_CALCULATORS,
+    ids=[calculator_type.__name__ for calculator_type in MERGEABLE_CALCULATORS],
+)
+def test_merged_partials_match_serial_walk(
+    calculator_type: Type[InsightV2Calculator], ndb_stub
+) -> None:
+    _put_seasons()
+
+    serial = calculator_type()
+    for year in YEARS:
+        _run_season_events(year, [serial])
+    serial_insights = serial.make_insights(0, TEAM_TO_DISTRICT)
+
+    merged = calculator_type()
+    for year in YEARS:
+        [partial] = compute_season_partials(
+            year, [calculator_type()], use_stored=False, store=False
+        )
+        # Partials are stored pickled
+        merged.merge(pickle.loads(pickle.dumps(partial)))
+    merged_insights = merged.make_insights(0, TEAM_TO_DISTRICT)
+
+    def summarize(insights: List) -> List:
+        return [(insight.key.id(), insight.data) for insight in insights]
+
+    assert serial_insights
+    assert summarize(merged_insights) == summarize(serial_insights)
@@ -1,8 +1,30 @@
+from datetime import datetime
+from typing import Dict, List
 from unittest.mock import patch
 
 import pytest
+from google.appengine.ext import ndb
 
-from backend.common.helpers.insights_v2.registry import make_all_insights
+from backend.common.consts.event_type import EventType
+from backend.common.helpers.insights_v2 import registry
+from backend.common.helpers.insights_v2.leaderboards.calculator import (
+    build_leaderboard_rankings,
+    LeaderboardV2Calculator,
+)
+from backend.common.helpers.insights_v2.names import InsightV2NameEntry, InsightV2Names
+from backend.common.helpers.insights_v2.registry import (
+    _run_season_events,
+    compute_insights_for_year,
+    invalidate_season_partials,
+    make_all_insights,
+    pending_season_partials,
+    store_season_partials,
+)
+from backend.common.helpers.insights_v2.streaks.calculator import StreakV2Calculator
+from backend.common.helpers.season_helper import SeasonHelper
+from backend.common.models.event import Event
+from backend.common.models.insight_v2 import LeaderboardKeyType, LeaderboardRanking
+from backend.common.models.insight_v2_partial import InsightV2Partial
 
 
 @patch(
@@ -187,3 +209,177 @@ def test_average_by_week_calculators_not_instantiated_for_all_time(
     make_all_insights(0)
     mock_score.assert_not_called()
     mock_margin.assert_not_called()
+
+
+class _EventCountCalculator(LeaderboardV2Calculator):
+    """Counts season events attended by frc1, so partials are easy to check."""
+
+    @property
+    def insight_name(self) -> InsightV2NameEntry:
+        return InsightV2Names.MOST_MATCHES_PLAYED
+
+    @property
+    def key_type(self) -> LeaderboardKeyType:
+        return "team"
+
+    def _build_rankings(self, counts: Dict[str, int]) -> List[LeaderboardRanking]:
+        return build_leaderboard_rankings(counts, min_count=0)
+
+    def on_event(self, event: Event) -> None:
+        self._increment("frc1")
+
+
+class _StubStreak(StreakV2Calculator):
+    """Advances frc1 at every event, and resets frc2 at every event."""
+
+    @property
+    def insight_name(self) -> InsightV2NameEntry:
+        return InsightV2Names.QUALIFYING_EVENT_WIN_STREAK
+
+    def on_event(self, event: Event) -> None:
+        self._advance_streak("frc1", event.key_name)
+        self._reset_streak("frc2")
+
+
+def _put_events(years: List[int]) -> None:
+    for year in years:
+        Event(
+            id=f"{year}test",
+            year=year,
+            event_short="test",
+            event_type_enum=EventType.REGIONAL,
+        ).put()
+
+
+def _all_time_count(refresh_partials: bool = False) -> int:
+    insights = compute_insights_for_year(0, [_EventCountCalculator()], refresh_partials)
+    return insights[0].data["rankings"][0]["value"]
+
+
+def _partial_key(year: int) -> ndb.Key:
+    return ndb.Key(
+        InsightV2Partial,
+        InsightV2Partial.render_key_name(year, "_EventCountCalculator", 1),
+    )
+
+
+@patch.object(SeasonHelper, "get_current_season", return_value=2024)
+@patch.object(SeasonHelper, "get_valid_years", return_value=[2022, 2023, 2024])
+def test_all_time_stores_partials_for_completed_seasons(
+    mock_years, mock_current, ndb_stub
+) -> None:
+    _put_events([2022, 2023, 2024])
+
+    assert _all_time_count() == 3
+    assert _partial_key(2022).get().calculator.counts == {"frc1": 1}
+    assert _partial_key(2023).get() is not None
+    assert _partial_key(2024).get() is None
+
+
+@patch.object(SeasonHelper, "get_current_season", return_value=2024)
+@patch.object(SeasonHelper, "get_valid_years", return_value=[2022, 2023, 2024])
+def test_all_time_reuses_stored_partials(mock_years, mock_current, ndb_stub) -> None:
+    _put_events([2022, 2023, 2024])
+    assert _all_time_count() == 3
+
+    # Completed seasons come from their partials, the current one is rewalked
+    with patch(
+        "backend.common.helpers.insights_v2.registry._run_season_events",
+        wraps=_run_season_events,
+    ) as mock_run:
+        assert _all_time_count() == 3
+        assert [c.args[0] for c in mock_run.call_args_list] == [2024]
+
+        mock_run.reset_mock()
+        assert _all_time_count(refresh_partials=True) == 3
+        assert [c.args[0] for c in mock_run.call_args_list] == [2022, 2023, 2024]
+
+
+@patch.object(SeasonHelper, "get_current_season", return_value=2024)
+@patch.object(SeasonHelper, "get_valid_years", return_value=[2022, 2023, 2024])
+def test_all_time_streaks_match_serial_walk(mock_years, mock_current, ndb_stub) -> None:
+    _put_events([2022, 2023, 2024])
+
+    serial = _StubStreak()
+    for year in [2022, 2023, 2024]:
+        _run_season_events(year, [serial])
+
+    merged = compute_insights_for_year(0, [_StubStreak()])
+    assert merged == serial.make_insights(0, {})
+    # And again, from the stored partials
+    assert compute_insights_for_year(0, [_StubStreak()]) == merged
+
+
+@patch.object(SeasonHelper, "get_current_season", return_value=2024)
+@patch.object(SeasonHelper, "get_valid_years", return_value=[2023, 2024])
+def test_pending_season_partials(mock_years, mock_current, ndb_stub) -> None:
+    since = datetime(2024, 6, 1)
+    assert pending_season_partials(since) == [2023, 2024]
+
+    with patch.object(registry, "make_calculators", return_value=[_StubStreak()]):
+        store_season_partials(2023)
+        assert pending_season_partials(since) == [2024]
+
+        store_season_partials(2024)
+        assert pending_season_partials(since) == []
+        # Refreshing needs every season to be rewritten since the pipeline began
+        assert pending_season_partials(datetime.max, refresh_partials=True) == [
+            2023,
+            2024,
+        ]
+
+
+@patch.object(SeasonHelper, "get_current_season", return_value=2024)
+@patch.object(SeasonHelper, "get_valid_years", return_value=[2022, 2023, 2024])
+def test_all_time_reduce_uses_fresh_current_season_partials(
+    mock_years, mock_current, ndb_stub
+) -> None:
+    _put_events([2022, 2023, 2024])
+    with patch.object(
+        registry, "make_calculators", return_value=[_EventCountCalculator()]
+    ):
+        for year in [2022, 2023, 2024]:
+            store_season_partials(year)
+
+    with patch.object(
+        registry, "_run_season_events", wraps=_run_season_events
+    ) as mock_run:
+        assert (
+            compute_insights_for_year(
+                0, [_EventCountCalculator()], partials_since=datetime.min
+            )[0].data["rankings"][0]["value"]
+            == 3
+        )
+        mock_run.assert_not_called()
+
+        # Partials from before the pipeline started aren't used for the current season
+        compute_insights_for_year(
+            0, [_EventCountCalculator()], partials_since=datetime.max
+        )
+        assert [c.args[0] for c in mock_run.call_args_list] == [2024]
+
+
+@patch.object(SeasonHelper, "get_current_season", return_value=2024)
+@patch.object(SeasonHelper, "get_valid_years", return_value=[2022, 2023, 2024])
+def test_invalidate_season_partials(mock_years, mock_current, ndb_stub) -> None:
+    _put_events([2022, 2023, 2024])
+    with patch.object(
+        registry, "make_calculators", return_value=[_EventCountCalculator()]
+    ):
+        for year in [2022, 2023, 2024]:
+            store_season_partials(year)
+
+        invalidate_season_partials([2022, 2024])
+
+    assert _partial_key(2022).get() is None
+    assert _partial_key(2023).get() is not None
+    # The current season's partials are always rewalked, so they're kept
+    assert _partial_key(2024).get() is not None
+
+    # The invalidated season is walked again on the next run
+    with patch.object(
+        registry, "_run_season_events", wraps=_run_season_events
+    ) as mock_run:
+        assert _all_time_count() == 3
+        assert [c.args[0] for c in mock_run.call_args_list] == [2022, 2024]
+    assert _partial_key(2022).get() is not None
@@ -222,3 +222,37 @@ def test_renamed_district_normalized_to_latest_code(ndb_stub) -> None:
     assert len(district_insights) == 1
     assert district_insights[0].district_abbreviation == "fch"
     assert {e["key"] for e in district_insights[0].data["entries"]} == {"frc1", "frc2"}
+
+
+def test_merge_continues_active_streak() -> None:
+    early = _StubStreak()
+    early._advance_streak("frc1", "e1")
+    early._advance_streak("frc2", "e1")
+    later = _StubStreak()
+    later._advance_streak("frc1", "e2")
+    later._reset_streak("frc1")
+    later._advance_streak("frc1", "e3")
+    later._reset_streak("frc2")
+    later._advance_streak("frc3", "e2")
+
+    early.merge(later)
+
+    serial = _StubStreak()
+    serial._advance_streak("frc1", "e1")
+    serial._advance_streak("frc2", "e1")
+    serial._advance_streak("frc1", "e2")
+    serial._reset_streak("frc1")
+    serial._advance_streak("frc1", "e3")
+    serial._reset_streak("frc2")
+    serial._advance_streak("frc3", "e2")
+
+    assert early._active == serial._active
+    assert early._completed == serial._completed
+
+
+def test_merge_without_later_updates_keeps_streak() -> None:
+    early = _StubStreak()
+    early._advance_streak("frc1", "e1")
+    early.merge(_StubStreak())
+
+    assert early._active["frc1"].length == 1
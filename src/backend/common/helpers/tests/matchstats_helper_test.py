@@ -1,13 +1,31 @@
+import datetime
 import json
 import os
-from typing import Dict
+from typing import Dict, List
+from unittest.mock import patch
 
+import numpy as np
 import pytest
 
-from backend.common.helpers.matchstats_helper import MatchstatsHelper
+from google.appengine.ext import ndb
+
+from backend.common.consts.event_type import EventType
+from backend.common.helpers.matchstats_helper import (
+    make_default_component_accessor,
+    MatchstatsHelper,
+    OPR_ACCESSOR,
+)
+from backend.common.helpers.team_priors_helper import TeamPriorsHelper
+from backend.common.memcache import MemcacheClient
+from backend.common.models.event import Event
+from backend.common.models.event_details import EventDetails
 from backend.common.models.event_matchstats import EventComponentOPRs
+from backend.common.models.event_team import EventTeam
 from backend.common.models.keys import TeamKey
+from backend.common.models.match import Match
 from backend.common.models.stats import EventMatchStats, StatType
+from backend.common.models.team import Team
+from backend.common.sitevars.team_priors_rebuilt_years import TeamPriorsRebuiltYears
 
 
 @pytest.fixture(autouse=True)
@@ -40,6 +58,27 @@ def assert_coprs_keys_equal(
         assert oprs.keys() == expected_coprs[component].keys()
 
 
+def assert_stats_values_equal(
+    stats: EventMatchStats,
+    coprs: EventComponentOPRs,
+    expected_stats: EventMatchStats,
+    expected_coprs: EventComponentOPRs,
+) -> None:
+    assert stats.keys() == expected_stats.keys()
+    for stat, team_stats in stats.items():
+        assert team_stats == pytest.approx(expected_stats[stat])
+    assert_coprs_values_equal(coprs, expected_coprs)
+
+
+def unplay(match: Match) -> None:
+    alliances = match.alliances
+    for alliance in alliances.values():
+        alliance["score"] = -1
+    match.alliances = alliances
+    match._score_breakdown = None
+    match.score_breakdown_json = None
+
+
 def assert_coprs_values_equal(
     coprs: EventComponentOPRs, expected_coprs: EventComponentOPRs
 ) -> None:
@@ -128,3 +167,244 @@ def test_compute_coprs_with_b_teams(test_data_importer) -> None:
 
     coprs = MatchstatsHelper.calculate_coprs(matches, 2019)
     assert_coprs_keys_equal(coprs, expected_coprs)
+
+
+def test_calculate_stats_matches_pinv(test_data_importer) -> None:
+    matches = test_data_importer.parse_match_list(
+        __file__, "data/2019nyny_matches.json"
+    )
+    team_list, team_id_map = MatchstatsHelper.build_team_mapping(matches)
+
+    # Solve OPR and one component OPR the way they used to be, one at a time
+    expected = {}
+    for name, accessor in [
+        ("opr", OPR_ACCESSOR),
+        ("hatchPanelPoints", make_default_component_accessor("hatchPanelPoints")),
+    ]:
+        A, Y = MatchstatsHelper.build_alliance_matrices(
+            matches, team_id_map, [accessor], []
+        )
+        x = np.linalg.pinv(A.T.dot(A)).dot(A.T.dot(Y))
+        expected[name] = {team: x[team_id_map[team], 0] for team in team_list}
+
+    matchstats, coprs = MatchstatsHelper.calculate_stats(matches, 2019)
+    assert matchstats[StatType.OPR] == pytest.approx(expected["opr"])
+    assert coprs["hatchPanelPoints"] == pytest.approx(expected["hatchPanelPoints"])
+
+
+def test_calculate_stats_missing_score_breakdowns(test_data_importer) -> None:
+    matches = test_data_importer.parse_match_list(
+        __file__, "data/2019nyny_matches.json"
+    )
+    expected_matchstats = MatchstatsHelper.calculate_matchstats(matches, 2019)
+    without_breakdowns = [match for match in matches if match.comp_level == "qm"][:10]
+    for match in without_breakdowns:
+        match._score_breakdown = None
+        match.score_breakdown_json = None
+
+    matchstats, coprs = MatchstatsHelper.calculate_stats(matches, 2019)
+
+    # Matches without a score breakdown still count for OPR, but not COPRs
+    for stat_type, team_stats in matchstats.items():
+        assert team_stats == pytest.approx(expected_matchstats[stat_type])
+    assert_coprs_values_equal(
+        coprs,
+        MatchstatsHelper.calculate_coprs(
+            [match for match in matches if match not in without_breakdowns], 2019
+        ),
+    )
+    assert matchstats[StatType.OPR] != pytest.approx(coprs["totalPoints"])
+
+
+def test_build_state(test_data_importer) -> None:
+    matches = test_data_importer.parse_match_list(
+        __file__, "data/2019nyny_matches.json"
+    )
+
+    state = MatchstatsHelper.build_state(matches, 2019)
+
+    assert_stats_values_equal(
+        *MatchstatsHelper.solve_state(state),
+        *MatchstatsHelper.calculate_stats(matches, 2019),
+    )
+
+
+def test_build_state_no_matches() -> None:
+    state = MatchstatsHelper.build_state([], 2019)
+    assert MatchstatsHelper.solve_state(state) == ({}, {})
+
+
+def test_update_state(test_data_importer) -> None:
+    def load() -> List[Match]:
+        return test_data_importer.parse_match_list(
+            __file__, "data/2019nyny_matches.json"
+        )
+
+    matches = load()
+    quals = [match for match in matches if match.comp_level == "qm"]
+    for match in quals[20:]:
+        unplay(match)
+    state = MatchstatsHelper.build_state(matches, 2019)
+
+    # The rest of the quals are played
+    matches = load()
+    assert MatchstatsHelper.update_state(state, matches) == len(quals) - 20
+    assert_stats_values_equal(
+        *MatchstatsHelper.solve_state(state),
+        *MatchstatsHelper.calculate_stats(matches, 2019),
+    )
+
+    # Nothing changed
+    assert MatchstatsHelper.update_state(state, matches) == 0
+
+    # A score is corrected, and a match is reset to unplayed
+    edited = next(match for match in matches if match.comp_level == "qm")
+    alliances = edited.alliances
+    alliances["red"]["score"] += 10
+    edited.alliances = alliances
+    unplay(
+        next(match for match in matches if match.comp_level == "qm" and match != edited)
+    )
+    assert MatchstatsHelper.update_state(state, matches) == 2
+    assert_stats_values_equal(
+        *MatchstatsHelper.solve_state(state),
+        *MatchstatsHelper.calculate_stats(matches, 2019),
+    )
+
+
+def test_update_state_new_components(test_data_importer) -> None:
+    matches = test_data_importer.parse_match_list(
+        __file__, "data/2019nyny_matches.json"
+    )
+    without_breakdowns = test_data_importer.parse_match_list(
+        __file__, "data/2019nyny_matches.json"
+    )
+    for match in without_breakdowns:
+        match._score_breakdown = None
+        match.score_breakdown_json = None
+
+    state = MatchstatsHelper.build_state(without_breakdowns, 2019)
+    assert MatchstatsHelper.solve_state(state)[1] == {}
+
+    assert MatchstatsHelper.update_state(state, matches) is None
+
+
+def test_update_event_stats(test_data_importer) -> None:
+    matches = test_data_importer.parse_match_list(
+        __file__, "data/2019nyny_matches.json"
+    )
+    event_key = ndb.Key(Event, "2019nyny")
+    expected = MatchstatsHelper.calculate_stats(matches, 2019)
+
+    assert_stats_values_equal(
+        *MatchstatsHelper.update_event_stats(event_key, matches), *expected
+    )
+    with patch.object(
+        MatchstatsHelper, "build_state", wraps=MatchstatsHelper.build_state
+    ) as mock_build_state:
+        # Updated from the state the first call left in memcache
+        assert_stats_values_equal(
+            *MatchstatsHelper.update_event_stats(event_key, matches), *expected
+        )
+        mock_build_state.assert_not_called()
+
+        MatchstatsHelper.clear_state(event_key)
+        assert_stats_values_equal(
+            *MatchstatsHelper.update_event_stats(event_key, matches), *expected
+        )
+        mock_build_state.assert_called_once()
+
+
+def test_update_event_stats_concurrent_update(test_data_importer) -> None:
+    matches = test_data_importer.parse_match_list(
+        __file__, "data/2019nyny_matches.json"
+    )
+    event_key = ndb.Key(Event, "2019nyny")
+    MatchstatsHelper.update_event_stats(event_key, matches[:10])
+
+    cache = MemcacheClient.get()
+    cache_key = MatchstatsHelper.state_cache_key(event_key)
+    gets = cache.gets
+
+    def concurrent_gets(key):
+        state = gets(key)
+        # Another update stores its state between our first read and write
+        if mock_gets.call_count == 1:
+            cache.set(cache_key, MatchstatsHelper.build_state(matches[:20], 2019))
+        return state
+
+    with (
+        patch.object(cache, "gets", side_effect=concurrent_gets) as mock_gets,
+        patch.object(cache, "cas", wraps=cache.cas) as mock_cas,
+    ):
+        MatchstatsHelper.update_event_stats(event_key, matches)
+        assert mock_gets.call_count == 2
+        assert mock_cas.call_count == 2
+
+    state = cache.get(cache_key)
+    assert_stats_values_equal(
+        *MatchstatsHelper.solve_state(state),
+        *MatchstatsHelper.calculate_stats(matches, 2019),
+    )
+
+
+def test_get_last_event_stats() -> None:
+    def event(event_short: str, month: int, official: bool = True) -> Event:
+        event = Event(
+            id=f"2019{event_short}",
+            year=2019,
+            event_short=event_short,
+            event_type_enum=EventType.REGIONAL,
+            official=official,
+            start_date=datetime.datetime(2019, month, 1),
+            end_date=datetime.datetime(2019, month, 3),
+        )
+        event.put()
+        return event
+
+    for past_event, oprs in [
+        (event("casj", 2), {"254": 10.0, "604": 5.0}),
+        (event("cada", 3), {"254": 20.0}),
+        (event("caoff", 3, official=False), {"604": 50.0}),
+    ]:
+        TeamPriorsHelper.update_event(
+            past_event, EventDetails(id=past_event.key_name, matchstats={"oprs": oprs})
+        )
+    cur_event = event("cmptx", 4)
+    TeamPriorsRebuiltYears.set_rebuilt(2019)
+
+    assert MatchstatsHelper.get_last_event_stats(
+        ["254", "604", "1114"], cur_event.key
+    ) == {StatType.OPR: {"254": 20.0, "604": 5.0}}
+
+
+def test_get_last_event_stats_without_priors() -> None:
+    def event(event_short: str, month: int) -> Event:
+        event = Event(
+            id=f"2019{event_short}",
+            year=2019,
+            event_short=event_short,
+            event_type_enum=EventType.REGIONAL,
+            official=True,
+            start_date=datetime.datetime(2019, month, 1),
+            end_date=datetime.datetime(2019, month, 3),
+        )
+        event.put()
+        EventTeam(
+            id=f"{event.key_name}_frc254",
+            event=event.key,
+            team=ndb.Key(Team, "frc254"),
+            year=2019,
+        ).put()
+        return event
+
+    for past_event, oprs in [
+        (event("casj", 2), {"254": 10.0}),
+        (event("cada", 3), {"254": 20.0}),
+    ]:
+        EventDetails(id=past_event.key_name, matchstats={"oprs": oprs}).put()
+    cur_event = event("cmptx", 4)
+
+    assert MatchstatsHelper.get_last_event_stats(["254"], cur_event.key) == {
+        StatType.OPR: {"254": 20.0}
+    }
@@ -1,14 +1,27 @@
+import copy
 import json
+from typing import List
 
+import numpy as np
 import pytest
 from google.appengine.ext import ndb
+from pyre_extensions import none_throws
 
 from backend.common.consts.alliance_color import AllianceColor
+from backend.common.game_specific.registry import get_game
 from backend.common.helpers.match_helper import MatchHelper
-from backend.common.helpers.prediction_helper import PredictionHelper
+from backend.common.helpers.prediction_helper import (
+    ContributionCalculator,
+    PredictionHelper,
+)
+from backend.common.helpers.team_priors_helper import TeamPriorsHelper
 from backend.common.models.event import Event
-from backend.common.models.keys import EventKey
+from backend.common.models.event_details import EventDetails
+from backend.common.models.event_team import EventTeam
+from backend.common.models.keys import EventKey, TeamKey
 from backend.common.models.match import Match
+from backend.common.models.team import Team
+from backend.common.sitevars.team_priors_rebuilt_years import TeamPriorsRebuiltYears
 
 
 @pytest.mark.parametrize(
@@ -38,6 +51,58 @@ def test_compute_match_predictions(event_key: EventKey, test_data_importer) -> N
     assert stat_mean_vars is not None
 
 
+class DenseContributionCalculator(ContributionCalculator):
+    """
+    Rebuilds AoT.Ao from every played alliance and inverts it before each
+    match, rather than updating its inverse.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._rows: List[np.ndarray] = []
+
+    def _add_alliance(self, teams: List[TeamKey], mean: float, var: float) -> None:
+        super()._add_alliance(teams, mean, var)
+        row = np.zeros(len(self._team_list))
+        for team in teams:
+            row[self._team_id_map[team]] = 1
+        self._rows.append(row)
+
+    def _solve(self, AoTM: np.ndarray, Oe: np.ndarray) -> np.ndarray:
+        Ao = np.array(self._rows).reshape(-1, len(self._team_list))
+        D = self.PRIOR_WEIGHT * np.eye(len(self._team_list))
+        return np.linalg.inv(Ao.T.dot(Ao) + D).dot(AoTM + D.dot(Oe))
+
+
+@pytest.mark.parametrize("event_key", ["2019nyny", "2025oncmp2"])
+def test_contribution_calculator_matches_dense_solve(
+    event_key: EventKey, test_data_importer
+) -> None:
+    test_data_importer.import_event(__file__, f"data/{event_key}.json")
+    test_data_importer.import_match_list(__file__, f"data/{event_key}_matches.json")
+
+    event = none_throws(Event.get_by_id(event_key))
+    matches = MatchHelper.play_order_sorted_matches(
+        Match.query(Match.event == ndb.Key(Event, event_key)).fetch()
+    )
+    for stat, default_mean, default_var in get_game(
+        event.year
+    ).get_prediction_relevant_stats():
+        calculator = ContributionCalculator(
+            event, matches, stat, default_mean, default_var
+        )
+        dense_calculator = DenseContributionCalculator(
+            event, matches, stat, default_mean, default_var
+        )
+        for i in range(len(matches)):
+            mean_var = copy.deepcopy(calculator.calculate_before_match(i))
+            dense_mean_var = dense_calculator.calculate_before_match(i)
+            for key in ["mean", "var"]:
+                assert mean_var[key] == pytest.approx(
+                    dense_mean_var[key], rel=1e-9, abs=1e-9
+                )
+
+
 def test_past_event_seeds_match_predictions(test_data_importer) -> None:
     test_data_importer.import_event(__file__, "data/2019scmb.json")
     test_data_importer.import_event_predictions(
@@ -48,6 +113,24 @@ def test_past_event_seeds_match_predictions(test_data_importer) -> None:
 
     matches = Match.query(Match.event == ndb.Key(Event, "2019nyny")).fetch()
     sorted_matches = MatchHelper.play_order_sorted_matches(matches)
+
+    # A 2019nyny team's contribution at an earlier event
+    team_key = sorted_matches[0].alliances[AllianceColor.RED]["teams"][0]
+    scmb = none_throws(Event.get_by_id("2019scmb"))
+    scmb_details = none_throws(EventDetails.get_by_id("2019scmb"))
+    stat_mean_vars = none_throws(
+        none_throws(scmb_details.predictions)["stat_mean_vars"]
+    )
+    stat_mean_vars["qual"]["score"]["mean"][team_key] = 42.0
+    stat_mean_vars["qual"]["score"]["var"][team_key] = 4.0
+    TeamPriorsHelper.update_event(scmb, scmb_details)
+    TeamPriorsRebuiltYears.set_rebuilt(2019)
+
+    calculator = ContributionCalculator(
+        none_throws(Event.get_by_id("2019nyny")), sorted_matches, "score", 20, 10
+    )
+    assert calculator._past_stats_mean == {team_key: [42.0]}
+    assert calculator._past_stats_var == {team_key: [4.0]}
     (
         match_predictions,
         match_prediction_stats,
@@ -59,6 +142,40 @@ def test_past_event_seeds_match_predictions(test_data_importer) -> None:
     assert stat_mean_vars is not None
 
 
+def test_past_event_seeds_match_predictions_without_priors(test_data_importer) -> None:
+    test_data_importer.import_event(__file__, "data/2019scmb.json")
+    test_data_importer.import_event_predictions(
+        __file__, "data/2019scmb_predictions.json", "2019scmb"
+    )
+    test_data_importer.import_event(__file__, "data/2019nyny.json")
+    test_data_importer.import_match_list(__file__, "data/2019nyny_matches.json")
+
+    matches = Match.query(Match.event == ndb.Key(Event, "2019nyny")).fetch()
+    sorted_matches = MatchHelper.play_order_sorted_matches(matches)
+
+    # No TeamYearPriors yet, so the team's events are loaded instead
+    team_key = sorted_matches[0].alliances[AllianceColor.RED]["teams"][0]
+    EventTeam(
+        id=f"2019scmb_{team_key}",
+        event=ndb.Key(Event, "2019scmb"),
+        team=ndb.Key(Team, team_key),
+        year=2019,
+    ).put()
+    scmb_details = none_throws(EventDetails.get_by_id("2019scmb"))
+    stat_mean_vars = none_throws(
+        none_throws(scmb_details.predictions)["stat_mean_vars"]
+    )
+    stat_mean_vars["qual"]["score"]["mean"][team_key] = 42.0
+    stat_mean_vars["qual"]["score"]["var"][team_key] = 4.0
+    scmb_details.put()
+
+    calculator = ContributionCalculator(
+        none_throws(Event.get_by_id("2019nyny")), sorted_matches, "score", 20, 10
+    )
+    assert calculator._past_stats_mean == {team_key: [42.0]}
+    assert calculator._past_stats_var == {team_key: [4.0]}
+
+
 @pytest.mark.parametrize(
     "event_key",
     [
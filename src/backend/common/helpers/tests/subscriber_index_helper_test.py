@@ -0,0 +1,400 @@
+from unittest.mock import patch
+
+import pytest
+from google.appengine.api import datastore_errors
+from google.appengine.ext import ndb, testbed
+from pyre_extensions import none_throws
+
+from backend.common.consts.client_type import ClientType
+from backend.common.consts.model_type import ModelType
+from backend.common.consts.notification_type import NotificationType
+from backend.common.helpers.deferred import run_from_task
+from backend.common.helpers.subscriber_index_helper import SubscriberIndexHelper
+from backend.common.models.account import Account
+from backend.common.models.mobile_client import MobileClient
+from backend.common.models.mobile_client_index import MobileClientIndex
+from backend.common.models.subscriber_index import SubscriberIndex
+from backend.common.models.subscription import Subscription
+from backend.common.sitevars.notifications_subscriber_index import (
+    NotificationsSubscriberIndex,
+)
+
+
+@pytest.fixture(autouse=True)
+def auto_add_ndb_stub(ndb_stub) -> None:
+    pass
+
+
+@pytest.fixture
+def index_ready() -> None:
+    NotificationsSubscriberIndex.set_index_ready(True)
+
+
+def _subscription(
+    user_id: str,
+    model_key: str = "frc7332",
+    model_type: ModelType = ModelType.TEAM,
+    notification_types: list[NotificationType] = [NotificationType.MATCH_SCORE],
+) -> Subscription:
+    return Subscription(
+        parent=ndb.Key(Account, user_id),
+        user_id=user_id,
+        model_key=model_key,
+        model_type=model_type,
+        notification_types=notification_types,
+    )
+
+
+def _client(
+    user_id: str,
+    messaging_id: str,
+    client_type: ClientType = ClientType.OS_ANDROID,
+    verified: bool = True,
+) -> MobileClient:
+    return MobileClient(
+        parent=ndb.Key(Account, user_id),
+        user_id=user_id,
+        messaging_id=messaging_id,
+        client_type=client_type,
+        verified=verified,
+    )
+
+
+def _subscribers(
+    notification_type: NotificationType = NotificationType.MATCH_SCORE,
+) -> list[str]:
+    return SubscriberIndexHelper.subscribers(
+        [(ModelType.TEAM, "frc7332")], notification_type
+    )[0]
+
+
+def test_subscribers_empty() -> None:
+    assert SubscriberIndexHelper.subscribers(
+        [(ModelType.TEAM, "frc7332"), (ModelType.EVENT, "2020miket")],
+        NotificationType.MATCH_SCORE,
+    ) == [[], []]
+
+
+def test_subscription_put() -> None:
+    _subscription("user_1").put()
+    _subscription("user_2").put()
+    _subscription("user_3", model_key="frc254").put()
+
+    assert _subscribers() == ["user_1", "user_2"]
+    assert _subscribers(NotificationType.UPCOMING_MATCH) == []
+    assert SubscriberIndex.get_by_id(
+        SubscriberIndex.render_key_name(
+            ModelType.TEAM, "frc254", NotificationType.MATCH_SCORE
+        )
+    ).user_ids == ["user_3"]
+
+
+def test_subscription_update_types() -> None:
+    subscription = _subscription("user_1")
+    subscription.put()
+
+    subscription.notification_types = [NotificationType.UPCOMING_MATCH]
+    subscription.put()
+
+    assert _subscribers() == []
+    assert _subscribers(NotificationType.UPCOMING_MATCH) == ["user_1"]
+    # Empty entries are removed
+    assert SubscriberIndex.query().count() == 1
+
+
+def test_subscription_delete() -> None:
+    subscription = _subscription("user_1")
+    subscription.put()
+    _subscription("user_2").put()
+
+    subscription.key.delete()
+
+    assert _subscribers() == ["user_2"]
+
+
+def test_subscription_delete_multi() -> None:
+    keys = ndb.put_multi([_subscription("user_1"), _subscription("user_2")])
+
+    ndb.delete_multi(keys)
+
+    assert _subscribers() == []
+    assert SubscriberIndex.query().count() == 0
+
+
+def _run_reindex(taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub) -> None:
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="default")
+    assert len(tasks) == 1
+    run_from_task(tasks[0])
+
+
+@pytest.mark.usefixtures("index_ready")
+def test_subscription_put_contention(
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    _subscription("user_1").put()
+    subscription = _subscription("user_2")
+    with patch.object(
+        SubscriberIndexHelper,
+        "_set_subscribed",
+        side_effect=datastore_errors.TransactionFailedError,
+    ):
+        # The Subscription is still written
+        subscription.put()
+    assert subscription.key.get() is not None
+    assert _subscribers() == ["user_1"]
+
+    _run_reindex(taskqueue_stub)
+
+    assert _subscribers() == ["user_1", "user_2"]
+    assert NotificationsSubscriberIndex.index_ready()
+
+
+@pytest.mark.usefixtures("index_ready")
+def test_subscription_delete_contention(
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    subscription = _subscription("user_1")
+    subscription.put()
+    with patch.object(
+        SubscriberIndexHelper,
+        "_set_subscribed",
+        side_effect=datastore_errors.TransactionFailedError,
+    ):
+        subscription.key.delete()
+    assert subscription.key.get() is None
+    assert _subscribers() == ["user_1"]
+
+    _run_reindex(taskqueue_stub)
+
+    assert _subscribers() == []
+
+
+@pytest.mark.usefixtures("index_ready")
+def test_subscription_contention_enqueue_fails() -> None:
+    subscription = _subscription("user_1")
+    with (
+        patch.object(
+            SubscriberIndexHelper,
+            "_set_subscribed",
+            side_effect=datastore_errors.TransactionFailedError,
+        ),
+        patch(
+            "backend.common.helpers.subscriber_index_helper.defer_safe",
+            side_effect=Exception("Queue unavailable"),
+        ),
+    ):
+        subscription.put()
+    assert subscription.key.get() is not None
+
+    # Reads fall back to querying Subscriptions until the index is rebuilt
+    assert not NotificationsSubscriberIndex.index_ready()
+    assert _subscribers() == ["user_1"]
+
+
+def test_clients() -> None:
+    android = _client("user_1", "android")
+    android.put()
+    webhook = _client("user_1", "webhook", client_type=ClientType.WEBHOOK)
+    webhook.put()
+    _client("user_1", "unverified", verified=False).put()
+    _client("user_2", "other").put()
+
+    assert SubscriberIndexHelper.clients(["user_1"]) == [android, webhook]
+    assert SubscriberIndexHelper.clients(["user_1"], [ClientType.WEBHOOK]) == [webhook]
+    assert [
+        client.messaging_id
+        for client in SubscriberIndexHelper.clients(["user_1", "user_2", "user_3"])
+    ] == ["android", "webhook", "other"]
+
+
+def test_client_put_existing() -> None:
+    client = _client("user_1", "android")
+    client.put()
+
+    client.display_name = "Phone"
+    client.put()
+
+    assert MobileClientIndex.get_by_id("user_1").client_keys == [client.key]
+
+
+def test_client_delete() -> None:
+    client = _client("user_1", "android")
+    client.put()
+    other = _client("user_1", "ios", client_type=ClientType.OS_IOS)
+    other.put()
+
+    client.key.delete()
+    assert MobileClientIndex.get_by_id("user_1").client_keys == [other.key]
+
+    other.key.delete()
+    assert MobileClientIndex.get_by_id("user_1") is None
+
+
+@pytest.mark.usefixtures("index_ready")
+def test_clients_deleted_without_parent() -> None:
+    client = _client("user_1", "android")
+    client.put()
+    # Clients should have an Account parent, but if one doesn't, the delete
+    # hook can't find its index entry
+    MobileClientIndex(id="user_1", client_keys=[ndb.Key(MobileClient, 1)]).put()
+
+    assert SubscriberIndexHelper.clients(["user_1"]) == []
+
+
+@pytest.mark.usefixtures("index_ready")
+def test_reads_index_once_ready() -> None:
+    _subscription("user_1").put()
+    _client("user_1", "android").put()
+    # Indexed, but without a Subscription or MobileClient to query
+    SubscriberIndex(
+        id=SubscriberIndex.render_key_name(
+            ModelType.TEAM, "frc7332", NotificationType.MATCH_SCORE
+        ),
+        user_ids=["user_1", "user_2"],
+    ).put()
+    other_client = _client("user_1", "ios", ClientType.OS_IOS)
+    other_client.put()
+    MobileClientIndex(id="user_2", client_keys=[other_client.key]).put()
+
+    assert _subscribers() == ["user_1", "user_2"]
+    assert [
+        client.messaging_id for client in SubscriberIndexHelper.clients(["user_2"])
+    ] == ["ios"]
+
+
+def test_reads_queries_until_index_ready() -> None:
+    _subscription("user_1").put()
+    _subscription("user_2").put()
+    client = _client("user_1", "android")
+    client.put()
+    # Entries written before the rebuild are incomplete
+    ndb.delete_multi(SubscriberIndex.query().fetch(keys_only=True))
+    ndb.delete_multi(MobileClientIndex.query().fetch(keys_only=True))
+
+    assert sorted(_subscribers()) == ["user_1", "user_2"]
+    assert SubscriberIndexHelper.subscribers(
+        [(ModelType.TEAM, "frc254")], NotificationType.MATCH_SCORE
+    ) == [[]]
+    assert SubscriberIndexHelper.clients(["user_1"]) == [client]
+    assert SubscriberIndexHelper.clients(["user_1"], [ClientType.WEBHOOK]) == []
+
+
+def _run_rebuild(taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub) -> int:
+    """
+    Runs the rebuild's tasks until there are none left, and returns how many ran
+    """
+    ran = 0
+    while tasks := taskqueue_stub.get_filtered_tasks(queue_names="admin"):
+        taskqueue_stub.FlushQueue("admin")
+        for task in tasks:
+            run_from_task(task)
+        ran += len(tasks)
+    return ran
+
+
+def test_rebuild_all(
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    _subscription(
+        "user_1",
+        notification_types=[
+            NotificationType.MATCH_SCORE,
+            NotificationType.UPCOMING_MATCH,
+        ],
+    ).put()
+    _subscription("user_2").put()
+    client = _client("user_1", "android")
+    client.put()
+
+    # Stale entries
+    SubscriberIndex(
+        id=SubscriberIndex.render_key_name(
+            ModelType.TEAM, "frc254", NotificationType.MATCH_SCORE
+        ),
+        user_ids=["user_3"],
+    ).put()
+    MobileClientIndex(id="user_3", client_keys=[client.key]).put()
+    ndb.Key(
+        SubscriberIndex,
+        SubscriberIndex.render_key_name(
+            ModelType.TEAM, "frc7332", NotificationType.MATCH_SCORE
+        ),
+    ).delete()
+
+    SubscriberIndexHelper.rebuild_all()
+    # Not switched over until the rebuild is done
+    assert not NotificationsSubscriberIndex.index_ready()
+    assert _run_rebuild(taskqueue_stub) == 4
+    assert NotificationsSubscriberIndex.index_ready()
+
+    assert _subscribers() == ["user_1", "user_2"]
+    assert _subscribers(NotificationType.UPCOMING_MATCH) == ["user_1"]
+    assert SubscriberIndex.query().count() == 2
+    assert MobileClientIndex.get_by_id("user_3") is None
+    assert SubscriberIndexHelper.clients(["user_1"]) == [client]
+
+
+@pytest.mark.usefixtures("index_ready")
+def test_rebuild_all_pages(
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    for user_id in ["user_1", "user_2", "user_3"]:
+        _subscription(user_id).put()
+        _client(user_id, f"android_{user_id}").put()
+    ndb.delete_multi(SubscriberIndex.query().fetch(keys_only=True))
+    ndb.delete_multi(MobileClientIndex.query().fetch(keys_only=True))
+
+    with patch.object(SubscriberIndexHelper, "REBUILD_PAGE_SIZE", 2):
+        SubscriberIndexHelper.rebuild_all()
+        # Subscriptions, MobileClients, then 1 SubscriberIndex and 3
+        # MobileClientIndexes to prune
+        assert _run_rebuild(taskqueue_stub) == 2 + 2 + 1 + 2
+
+    assert sorted(_subscribers()) == ["user_1", "user_2", "user_3"]
+    assert MobileClientIndex.query().count() == 3
+
+
+def test_rebuild_all_merges_concurrent_writes(
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    _subscription("user_1").put()
+    ndb.delete_multi(SubscriberIndex.query().fetch(keys_only=True))
+
+    SubscriberIndexHelper.rebuild_all()
+    # Runs the first page, which indexes user_1
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="admin")
+    taskqueue_stub.FlushQueue("admin")
+    run_from_task(tasks[0])
+
+    # Indexed by the put hook while the rebuild is running
+    _subscription("user_2").put()
+    _client("user_2", "android").put()
+
+    _run_rebuild(taskqueue_stub)
+
+    assert _subscribers() == ["user_1", "user_2"]
+    assert len(SubscriberIndexHelper.clients(["user_2"])) == 1
+
+
+@pytest.mark.usefixtures("index_ready")
+def test_prune_checks_users_missing_from_query() -> None:
+    _subscription("user_1").put()
+    key = ndb.Key(
+        SubscriberIndex,
+        SubscriberIndex.render_key_name(
+            ModelType.TEAM, "frc7332", NotificationType.MATCH_SCORE
+        ),
+    )
+    SubscriberIndexHelper._set_subscribed(key, "user_2", True)
+
+    # The Subscription query is eventually consistent, so a user missing from
+    # it is only removed once their own Subscriptions confirm it
+    with patch.object(
+        SubscriberIndexHelper, "_is_subscribed", return_value=True
+    ) as mock_is_subscribed:
+        SubscriberIndexHelper._prune_subscribers([none_throws(key.get())])
+    mock_is_subscribed.assert_called_once_with(key, "user_2")
+    assert _subscribers() == ["user_1", "user_2"]
+
+    SubscriberIndexHelper._prune_subscribers([none_throws(key.get())])
+    assert _subscribers() == ["user_1"]
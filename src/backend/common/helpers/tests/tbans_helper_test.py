@@ -26,12 +26,17 @@ from backend.common.consts.client_type import NAMES as CLIENT_TYPE_NAMES
 from backend.common.consts.event_type import EventType
 from backend.common.consts.model_type import ModelType
 from backend.common.consts.notification_type import NotificationType
+from backend.common.futures import InstantFuture
 from backend.common.helpers.deferred import run_from_task
 from backend.common.helpers.tbans_helper import (
     _firebase_app,
     _NotificationMode,
     TBANSHelper,
 )
+from backend.common.helpers.webhook_dispatcher import (
+    WebhookDispatcher,
+    WebhookDispatchResult,
+)
 from backend.common.models.account import Account
 from backend.common.models.award import Award
 from backend.common.models.district import District
@@ -59,6 +64,9 @@ from backend.common.models.notifications.tests.mocks.notifications.mock_notifica
 from backend.common.models.subscription import Subscription
 from backend.common.models.team import Team
 from backend.common.queries.mobile_client_query import MobileClientQuery
+from backend.common.sitevars.notifications_subscriber_index import (
+    NotificationsSubscriberIndex,
+)
 from backend.common.tests.creators.event_test_creator import EventTestCreator
 from backend.common.tests.creators.match_test_creator import MatchTestCreator
 
@@ -567,6 +575,51 @@ class TestTBANSHelper(unittest.TestCase):
             notification = notifications[1]
             assert notification.team == self.team
 
+    def test_match_score_event_and_year_subscriber(self):
+        # Subscribed to the Event and to every Event that year
+        for model_key in [self.event.key_name, f"{self.event.year}*"]:
+            Subscription(
+                parent=ndb.Key(Account, "user_id_1"),
+                user_id="user_id_1",
+                model_key=model_key,
+                model_type=ModelType.EVENT,
+                notification_types=[NotificationType.MATCH_SCORE],
+            ).put()
+
+        with patch.object(TBANSHelper, "_batch_send_users") as mock_send:
+            TBANSHelper.match_score(self.match.key_name)
+
+        # Event, Team frc7332, Match
+        assert [call[0][0] for call in mock_send.call_args_list] == [
+            ["user_id_1"],
+            [],
+            [],
+        ]
+        assert mock_send.call_args_list[1][0][1].team == self.team
+
+    def test_match_score_subscriber_index(self):
+        NotificationsSubscriberIndex.set_index_ready(True)
+        Subscription(
+            parent=ndb.Key(Account, "user_id_1"),
+            user_id="user_id_1",
+            model_key=f"{self.match.year}*",
+            model_type=ModelType.EVENT,
+            notification_types=[NotificationType.MATCH_SCORE],
+        ).put()
+
+        with (
+            patch.object(Subscription, "query") as mock_query,
+            patch.object(TBANSHelper, "_batch_send_users") as mock_send,
+        ):
+            TBANSHelper.match_score(self.match.key_name)
+
+        mock_query.assert_not_called()
+        assert [call[0][0] for call in mock_send.call_args_list] == [
+            ["user_id_1"],
+            [],
+            [],
+        ]
+
     def test_match_score_match_upcoming(self):
         # Set some upcoming matches for the Event
         match_creator = MatchTestCreator(self.event)
@@ -1460,8 +1513,7 @@ class TestTBANSHelper(unittest.TestCase):
         ):
             TBANSHelper._send(["user_id"], notification)
             mock_fcm.assert_called_once_with(expected_fcm, notification)
-            for webhook in expected_webhooks:
-                mock_webhook.assert_called_once_with(webhook, notification)
+            mock_webhook.assert_called_once_with(expected_webhooks, notification)
 
     def test_send_webhook_only_empty(self):
         notification = MockNotification()
@@ -1494,8 +1546,7 @@ class TestTBANSHelper(unittest.TestCase):
             # FCM should never be called
             mock_fcm.assert_not_called()
             # Only webhooks should be sent to
-            for webhook in expected_webhooks:
-                mock_webhook.assert_called_once_with(webhook, notification)
+            mock_webhook.assert_called_once_with(expected_webhooks, notification)
 
     def test_defer_fcm(self):
         client = MobileClient(
@@ -1639,12 +1690,12 @@ class TestTBANSHelper(unittest.TestCase):
             patch.object(FCMRequest, "send", return_value=batch_response),
             patch.object(
                 MobileClientQuery,
-                "delete_for_messaging_id",
-                wraps=MobileClientQuery.delete_for_messaging_id,
+                "delete_for_messaging_ids_async",
+                wraps=MobileClientQuery.delete_for_messaging_ids_async,
             ) as mock_delete,
         ):
             TBANSHelper._send_fcm([client], MockNotification())
-            mock_delete.assert_called_once_with("messaging_id")
+            mock_delete.assert_called_once_with(["messaging_id"])
 
         # Sanity check
         assert fcm_messaging_ids("user_id") == []
@@ -1690,13 +1741,13 @@ class TestTBANSHelper(unittest.TestCase):
             patch.object(FCMRequest, "send", return_value=batch_response),
             patch.object(
                 MobileClientQuery,
-                "delete_for_messaging_id",
-                wraps=MobileClientQuery.delete_for_messaging_id,
+                "delete_for_messaging_ids_async",
+                wraps=MobileClientQuery.delete_for_messaging_ids_async,
             ) as mock_delete,
         ):
             TBANSHelper._send_fcm([client_ok, client_bad], MockNotification())
             # Only the bad client should be deleted
-            mock_delete.assert_called_once_with("messaging_id_bad")
+            mock_delete.assert_called_once_with(["messaging_id_bad"])
 
         # The good client should still exist, the bad one should be gone
         assert fcm_messaging_ids("user_id") == ["messaging_id_ok"]
@@ -1705,6 +1756,52 @@ class TestTBANSHelper(unittest.TestCase):
         tasks = self.taskqueue_stub.get_filtered_tasks(queue_names="push-notifications")
         assert len(tasks) == 0
 
+    def test_send_fcm_stale_tokens_batched(self):
+        clients = [
+            MobileClient(
+                parent=ndb.Key(Account, "user_id"),
+                user_id="user_id",
+                messaging_id=f"messaging_id_{i}",
+                client_type=ClientType.OS_IOS,
+            )
+            for i in range(5)
+        ]
+        ndb.put_multi(clients)
+
+        def send(fcm_request):
+            # The last token in each request is still good
+            return messaging.BatchResponse(
+                [
+                    messaging.SendResponse(None, UnregisteredError("code", "message"))
+                    for _ in fcm_request.tokens[:-1]
+                ]
+                + [messaging.SendResponse({"name": "abc"}, None)]
+            )
+
+        with (
+            patch(
+                "backend.common.helpers.tbans_helper.MAXIMUM_TOKENS",
+                3,
+            ),
+            patch.object(FCMRequest, "send", autospec=True, side_effect=send),
+            patch.object(
+                MobileClientQuery,
+                "delete_for_messaging_ids_async",
+                wraps=MobileClientQuery.delete_for_messaging_ids_async,
+            ) as mock_delete,
+        ):
+            TBANSHelper._send_fcm(clients, MockNotification())
+
+        # One cleanup per FCM request, not one per stale token
+        assert [call[0][0] for call in mock_delete.call_args_list] == [
+            ["messaging_id_0", "messaging_id_1"],
+            ["messaging_id_3"],
+        ]
+        assert sorted(fcm_messaging_ids("user_id")) == [
+            "messaging_id_2",
+            "messaging_id_4",
+        ]
+
     def test_send_fcm_sender_id_mismatch_error(self):
         client = MobileClient(
             parent=ndb.Key(Account, "user_id"),
@@ -1724,12 +1821,12 @@ class TestTBANSHelper(unittest.TestCase):
             patch.object(FCMRequest, "send", return_value=batch_response),
             patch.object(
                 MobileClientQuery,
-                "delete_for_messaging_id",
-                wraps=MobileClientQuery.delete_for_messaging_id,
+                "delete_for_messaging_ids_async",
+                wraps=MobileClientQuery.delete_for_messaging_ids_async,
             ) as mock_delete,
         ):
             TBANSHelper._send_fcm([client], MockNotification())
-            mock_delete.assert_called_once_with("messaging_id")
+            mock_delete.assert_called_once_with(["messaging_id"])
 
         # Sanity check
         assert fcm_messaging_ids("user_id") == []
@@ -1980,13 +2077,17 @@ class TestTBANSHelper(unittest.TestCase):
 
         NotificationsEnable.enable_notifications(False)
 
-        with patch.object(
-            NotificationsEnable,
-            "notifications_enabled",
-            wraps=NotificationsEnable.notifications_enabled,
-        ) as mock_check_enabled:
+        with (
+            patch.object(
+                NotificationsEnable,
+                "notifications_enabled",
+                wraps=NotificationsEnable.notifications_enabled,
+            ) as mock_check_enabled,
+            patch.object(WebhookDispatcher, "send") as mock_send,
+        ):
             TBANSHelper._send_webhook([], MockNotification())
             mock_check_enabled.assert_called_once()
+            mock_send.assert_not_called()
 
     def test_send_webhook_filter_webhook_clients(self):
         expected = "client_type_{}".format(ClientType.WEBHOOK)
@@ -2000,12 +2101,14 @@ class TestTBANSHelper(unittest.TestCase):
             for client_type in CLIENT_TYPE_NAMES.keys()
         ]
 
-        with patch(
-            "backend.common.helpers.tbans_helper.WebhookRequest",
-        ) as mock_init:
-            for client in clients:
-                TBANSHelper._send_webhook(client, MockNotification())
-            mock_init.assert_called_once_with(ANY, expected, ANY)
+        notification = MockNotification()
+        with patch.object(
+            WebhookDispatcher, "send", return_value=WebhookDispatchResult()
+        ) as mock_send:
+            TBANSHelper._send_webhook(clients, notification)
+            mock_send.assert_called_once()
+            [(client, _)] = mock_send.call_args[0][0]
+            assert client.messaging_id == expected
 
     def test_send_webhook_filter_webhook_clients_verified(self):
         clients = [
@@ -2025,12 +2128,12 @@ class TestTBANSHelper(unittest.TestCase):
             ),
         ]
 
-        with patch(
-            "backend.common.helpers.tbans_helper.WebhookRequest",
-        ) as mock_init:
-            for client in clients:
-                TBANSHelper._send_webhook(client, MockNotification())
-            mock_init.assert_called_once_with(ANY, "verified", ANY)
+        notification = MockNotification()
+        with patch.object(
+            WebhookDispatcher, "send", return_value=WebhookDispatchResult()
+        ) as mock_send:
+            TBANSHelper._send_webhook(clients, notification)
+            mock_send.assert_called_once_with([(clients[1], notification)])
 
     def test_send_webhook_filter_webhook_clients_from_notification(self):
         clients = [
@@ -2050,33 +2153,71 @@ class TestTBANSHelper(unittest.TestCase):
             ),
         ]
 
-        with patch(
-            "backend.common.models.notifications.requests.webhook_request.WebhookRequest",
-            autospec=True,
-        ) as mock_init:
-            for client in clients:
-                TBANSHelper._send_webhook(client, MockNotification(should_send=False))
-                mock_init.assert_not_called()
+        with patch.object(WebhookDispatcher, "send") as mock_send:
+            TBANSHelper._send_webhook(clients, MockNotification(should_send=False))
+            mock_send.assert_not_called()
 
     def test_send_webhook_multiple(self):
         clients = [
             MobileClient(
                 parent=ndb.Key(Account, "user_id"),
                 user_id="user_id",
-                messaging_id="{}".format(i),
+                messaging_id="https://{}.example.com".format(i),
                 client_type=ClientType.WEBHOOK,
             )
             for i in range(3)
         ]
 
-        batch_response = messaging.BatchResponse([])
         with patch.object(
-            WebhookRequest, "send", return_value=batch_response
+            WebhookRequest, "send_async", return_value=InstantFuture(200)
         ) as mock_send:
-            for client in clients:
-                TBANSHelper._send_webhook(client, MockNotification())
+            TBANSHelper._send_webhook(clients, MockNotification())
             assert mock_send.call_count == 3
 
+        # Nothing to retry
+        tasks = self.taskqueue_stub.get_filtered_tasks(queue_names="push-notifications")
+        assert len(tasks) == 0
+
+    def test_send_webhook_retry(self):
+        clients = [
+            MobileClient(
+                parent=ndb.Key(Account, "user_id"),
+                user_id="user_id",
+                messaging_id="https://{}.example.com".format(i),
+                client_type=ClientType.WEBHOOK,
+            )
+            for i in range(2)
+        ]
+        notification = MockNotification()
+
+        result = WebhookDispatchResult(
+            delivered=[(clients[0], notification)],
+            retry=[(clients[1], notification)],
+        )
+        with patch.object(WebhookDispatcher, "send", return_value=result):
+            TBANSHelper._send_webhook(clients, notification, backoff_iteration=2)
+
+        tasks = self.taskqueue_stub.get_filtered_tasks(queue_names="push-notifications")
+        assert len(tasks) == 1
+        # Waits 2**2 seconds before retrying
+        assert tasks[0].eta > datetime.now(timezone.utc) + timedelta(seconds=3)
+
+        with patch.object(TBANSHelper, "_send_webhook") as mock_send_webhook:
+            run_from_task(tasks[0])
+            mock_send_webhook.assert_called_once_with([clients[1]], ANY, 3)
+
+    def test_send_webhook_retry_backoff_limit(self):
+        client = MobileClient(
+            parent=ndb.Key(Account, "user_id"),
+            user_id="user_id",
+            messaging_id="https://www.example.com",
+            client_type=ClientType.WEBHOOK,
+        )
+
+        with patch.object(WebhookDispatcher, "send") as mock_send:
+            TBANSHelper._send_webhook([client], MockNotification(), backoff_iteration=6)
+            mock_send.assert_not_called()
+
     def test_debug_string(self):
         exception = FirebaseError("code", "message")
         assert TBANSHelper._debug_string(exception) == "code / message"
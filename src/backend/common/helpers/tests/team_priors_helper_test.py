@@ -0,0 +1,264 @@
+import datetime
+from typing import Dict, Optional
+from unittest.mock import patch
+
+import pytest
+from google.appengine.ext import ndb
+
+from backend.common.consts.event_type import EventType
+from backend.common.helpers.team_priors_helper import TeamPriorsHelper
+from backend.common.models.event import Event
+from backend.common.models.event_details import EventDetails
+from backend.common.models.event_predictions import EventPredictions
+from backend.common.models.event_team import EventTeam
+from backend.common.models.team import Team
+from backend.common.models.team_year_priors import TeamYearPriors
+from backend.common.sitevars.team_priors_rebuilt_years import TeamPriorsRebuiltYears
+
+
+@pytest.fixture(autouse=True)
+def auto_add_ndb_stub(ndb_stub) -> None:
+    pass
+
+
+@pytest.fixture
+def rebuilt() -> None:
+    TeamPriorsRebuiltYears.set_rebuilt(2019)
+
+
+def _event(
+    event_short: str,
+    month: int,
+    day: int,
+    event_type: EventType = EventType.REGIONAL,
+    official: bool = True,
+) -> Event:
+    event = Event(
+        id=f"2019{event_short}",
+        year=2019,
+        event_short=event_short,
+        event_type_enum=event_type,
+        official=official,
+        start_date=datetime.datetime(2019, month, day),
+        end_date=datetime.datetime(2019, month, day + 2),
+    )
+    event.put()
+    return event
+
+
+def _details(
+    event: Event,
+    oprs: Dict[str, float],
+    score_means: Optional[Dict[str, float]] = None,
+) -> EventDetails:
+    predictions: Optional[EventPredictions] = None
+    if score_means is not None:
+        predictions = {
+            "match_predictions": None,
+            "match_prediction_stats": None,
+            "stat_mean_vars": {
+                "qual": {
+                    "score": {
+                        "mean": score_means,
+                        "var": {team_key: 1.0 for team_key in score_means},
+                    }
+                },
+            },
+            "ranking_predictions": None,
+            "ranking_prediction_stats": None,
+        }
+    return EventDetails(
+        id=event.key_name, matchstats={"oprs": oprs}, predictions=predictions
+    )
+
+
+def test_get_priors_empty() -> None:
+    event = _event("nyny", 3, 1)
+    assert TeamPriorsHelper.get_priors(event, ["frc254", "frc604"]) == {
+        "frc254": [],
+        "frc604": [],
+    }
+
+
+def test_get_priors_without_entity() -> None:
+    first = _event("casj", 3, 1)
+    second = _event("cada", 3, 15)
+    later = _event("cmptx", 4, 17, EventType.CMP_DIVISION)
+    for event in [first, second, later]:
+        EventTeam(
+            id=f"{event.key_name}_frc254",
+            event=event.key,
+            team=ndb.Key(Team, "frc254"),
+            year=2019,
+        ).put()
+    _details(second, {"254": 20.0}).put()
+    _details(first, {"254": 10.0, "604": 5.0}, {"frc254": 30.0}).put()
+    TeamYearPriors(id=TeamYearPriors.render_key_name("frc604", 2019), events=[]).put()
+    TeamPriorsRebuiltYears.set_rebuilt(2019)
+
+    # Teams without an entry fall back to their events
+    priors = TeamPriorsHelper.get_priors(later, ["frc254", "frc604"])
+    assert priors["frc254"] == [
+        {
+            "event_key": "2019casj",
+            "start_date": "2019-03-01T00:00:00",
+            "end_date": "2019-03-03T00:00:00",
+            "event_type": EventType.REGIONAL,
+            "official": True,
+            "matchstats": {"oprs": 10.0},
+            "stat_mean_vars": {"score": {"mean": 30.0, "var": 1.0}},
+        },
+        {
+            "event_key": "2019cada",
+            "start_date": "2019-03-15T00:00:00",
+            "end_date": "2019-03-17T00:00:00",
+            "event_type": EventType.REGIONAL,
+            "official": True,
+            "matchstats": {"oprs": 20.0},
+            "stat_mean_vars": {},
+        },
+    ]
+    assert priors["frc604"] == []
+
+    priors = TeamPriorsHelper.get_priors(second, ["frc254"])
+    assert [prior["event_key"] for prior in priors["frc254"]] == ["2019casj"]
+
+
+def test_get_priors_before_rebuild() -> None:
+    first = _event("casj", 3, 1)
+    second = _event("cada", 3, 15)
+    later = _event("cmptx", 4, 17, EventType.CMP_DIVISION)
+    for event in [first, second]:
+        EventTeam(
+            id=f"{event.key_name}_frc254",
+            event=event.key,
+            team=ndb.Key(Team, "frc254"),
+            year=2019,
+        ).put()
+    first_details = _details(first, {"254": 10.0})
+    first_details.put()
+    # Priors have only been maintained since the second event
+    TeamPriorsHelper.update_event(second, _details(second, {"254": 20.0}))
+    _details(second, {"254": 20.0}).put()
+
+    # So they're not read until the season is rebuilt
+    priors = TeamPriorsHelper.get_priors(later, ["frc254"])
+    assert [prior["event_key"] for prior in priors["frc254"]] == [
+        "2019casj",
+        "2019cada",
+    ]
+
+    TeamYearPriors(
+        id=TeamYearPriors.render_key_name("frc254", 2019),
+        events=[TeamPriorsHelper._event_priors(first, first_details)["frc254"]],
+    ).put()
+    TeamPriorsRebuiltYears.set_rebuilt(2019)
+    priors = TeamPriorsHelper.get_priors(later, ["frc254"])
+    assert [prior["event_key"] for prior in priors["frc254"]] == ["2019casj"]
+
+
+@pytest.mark.usefixtures("rebuilt")
+def test_update_event() -> None:
+    first = _event("casj", 3, 1)
+    second = _event("cada", 3, 15)
+    later = _event("cmptx", 4, 17, EventType.CMP_DIVISION)
+
+    # Updated out of order
+    TeamPriorsHelper.update_event(second, _details(second, {"254": 20.0}))
+    TeamPriorsHelper.update_event(
+        first, _details(first, {"254": 10.0, "604": 5.0}, {"frc254": 30.0})
+    )
+
+    priors = TeamPriorsHelper.get_priors(later, ["frc254", "frc604", "frc1114"])
+    assert [prior["event_key"] for prior in priors["frc254"]] == [
+        "2019casj",
+        "2019cada",
+    ]
+    assert priors["frc254"][0] == {
+        "event_key": "2019casj",
+        "start_date": "2019-03-01T00:00:00",
+        "end_date": "2019-03-03T00:00:00",
+        "event_type": EventType.REGIONAL,
+        "official": True,
+        "matchstats": {"oprs": 10.0},
+        "stat_mean_vars": {"score": {"mean": 30.0, "var": 1.0}},
+    }
+    assert priors["frc254"][1]["stat_mean_vars"] == {}
+    assert [prior["event_key"] for prior in priors["frc604"]] == ["2019casj"]
+    assert priors["frc1114"] == []
+
+    # Only events that started earlier are priors
+    priors = TeamPriorsHelper.get_priors(second, ["frc254"])
+    assert [prior["event_key"] for prior in priors["frc254"]] == ["2019casj"]
+
+
+@pytest.mark.usefixtures("rebuilt")
+def test_update_event_replaces_priors() -> None:
+    event = _event("casj", 3, 1)
+    later = _event("cmptx", 4, 17, EventType.CMP_DIVISION)
+    EventTeam(
+        id="2019casj_frc604",
+        event=event.key,
+        team=ndb.Key(Team, "frc604"),
+        year=2019,
+    ).put()
+
+    TeamPriorsHelper.update_event(event, _details(event, {"254": 10.0, "604": 5.0}))
+    TeamPriorsHelper.update_event(event, _details(event, {"254": 12.0}))
+
+    priors = TeamPriorsHelper.get_priors(later, ["frc254", "frc604"])
+    assert [prior["matchstats"] for prior in priors["frc254"]] == [{"oprs": 12.0}]
+    assert priors["frc604"] == []
+
+
+def test_update_event_concurrent() -> None:
+    first = _event("casj", 3, 1)
+    second = _event("cada", 3, 15)
+    key = ndb.Key(TeamYearPriors, TeamYearPriors.render_key_name("frc254", 2019))
+
+    # Another event's update lands between the lookup and the write
+    replace_event_prior = TeamPriorsHelper._replace_event_prior
+    interleaved = []
+
+    def update_first_event(*args, **kwargs):
+        if not interleaved:
+            interleaved.append(True)
+            TeamPriorsHelper.update_event(first, _details(first, {"254": 10.0}))
+        return replace_event_prior(*args, **kwargs)
+
+    with patch.object(
+        TeamPriorsHelper, "_replace_event_prior", side_effect=update_first_event
+    ):
+        TeamPriorsHelper.update_event(second, _details(second, {"254": 20.0}))
+
+    assert [prior["event_key"] for prior in key.get().events] == [
+        "2019casj",
+        "2019cada",
+    ]
+
+
+def test_update_event_skips_einstein() -> None:
+    einstein = _event("cmptx", 4, 20, EventType.CMP_FINALS)
+    TeamPriorsHelper.update_event(einstein, _details(einstein, {"254": 10.0}))
+
+    assert TeamYearPriors.query().count() == 0
+
+
+def test_rebuild_year() -> None:
+    first = _event("casj", 3, 1)
+    second = _event("cada", 3, 15)
+    _details(first, {"254": 10.0, "604": 5.0}).put()
+    _details(second, {"254": 20.0}).put()
+    TeamYearPriors(id=TeamYearPriors.render_key_name("frc254", 2019), events=[]).put()
+
+    assert not TeamPriorsRebuiltYears.rebuilt(2019)
+    assert TeamPriorsHelper.rebuild_year(2019) == 2
+    assert TeamPriorsRebuiltYears.rebuilt(2019)
+
+    later = _event("cmptx", 4, 17, EventType.CMP_DIVISION)
+    priors = TeamPriorsHelper.get_priors(later, ["frc254", "frc604"])
+    assert [prior["matchstats"] for prior in priors["frc254"]] == [
+        {"oprs": 10.0},
+        {"oprs": 20.0},
+    ]
+    assert [prior["matchstats"] for prior in priors["frc604"]] == [{"oprs": 5.0}]
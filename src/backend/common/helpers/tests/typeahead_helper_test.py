@@ -0,0 +1,178 @@
+import json
+from typing import List, Optional
+
+import pytest
+from google.appengine.ext import ndb, testbed
+
+from backend.common.consts.event_type import EventType
+from backend.common.helpers.deferred import run_from_task
+from backend.common.helpers.typeahead_helper import TypeaheadHelper
+from backend.common.manipulators.district_manipulator import DistrictManipulator
+from backend.common.manipulators.event_manipulator import EventManipulator
+from backend.common.manipulators.team_manipulator import TeamManipulator
+from backend.common.models.district import District
+from backend.common.models.event import Event
+from backend.common.models.team import Team
+from backend.common.models.typeahead_entry import TypeaheadEntry
+
+
+@pytest.fixture(autouse=True)
+def auto_add_ndb_stub(ndb_stub) -> None:
+    pass
+
+
+def _entry(key_name: str) -> Optional[List[str]]:
+    entry = TypeaheadEntry.get_by_id(key_name)
+    return json.loads(entry.data_json) if entry else None
+
+
+def _event(year: int, short: str, name: str) -> Event:
+    return Event(
+        id=f"{year}{short}",
+        year=year,
+        event_short=short,
+        name=name,
+        event_type_enum=EventType.REGIONAL,
+        official=True,
+    )
+
+
+def _run_hooks(taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub) -> None:
+    for task in taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks"):
+        run_from_task(task)
+    taskqueue_stub.FlushQueue("post-update-hooks")
+
+
+def _put_all() -> None:
+    ndb.put_multi(
+        [
+            Team(id="frc254", team_number=254, nickname="The Cheesy Poofs"),
+            Team(id="frc177", team_number=177),
+            _event(2023, "casj", "Silicon Valley Regional"),
+            _event(2024, "casj", "Silicon Valley Regional"),
+            _event(2024, "cada", "Sacramento Regional"),
+            District(id="2023ne", year=2023, abbreviation="ne", display_name="NE"),
+            District(id="2024ne", year=2024, abbreviation="ne", display_name="NE"),
+            District(id="2024fim", year=2024, abbreviation="fim", display_name="FIM"),
+        ]
+    )
+
+
+def test_rebuild_all() -> None:
+    TypeaheadEntry(id="events-1990", data_json="[]").put()
+    _put_all()
+
+    results = TypeaheadHelper.rebuild_all()
+
+    assert results == {
+        "teams-all": ["177 | Team 177", "254 | The Cheesy Poofs"],
+        "districts-all": results["districts-all"],
+        "events-all": [
+            "2024 Sacramento Regional [CADA]",
+            "2024 Silicon Valley Regional [CASJ]",
+            "2023 Silicon Valley Regional [CASJ]",
+        ],
+        "events-2024": [
+            "2024 Sacramento Regional [CADA]",
+            "2024 Silicon Valley Regional [CASJ]",
+        ],
+        "events-2023": ["2023 Silicon Valley Regional [CASJ]"],
+    }
+    # Districts are only ordered by year
+    assert sorted(results["districts-all"]) == [
+        "FIM District [FIM]",
+        "NE District [NE]",
+    ]
+    for key_name, data in results.items():
+        assert _entry(key_name) == data
+    assert _entry("events-1990") is None
+
+
+def test_update_teams() -> None:
+    _put_all()
+    TypeaheadHelper.rebuild_all()
+
+    TypeaheadHelper.update_teams(
+        [
+            Team(id="frc177", team_number=177, nickname="Bobcat Robotics"),
+            Team(id="frc1", team_number=1, nickname="The Juggernauts"),
+        ],
+        deleted=[254],
+    )
+
+    assert _entry("teams-all") == [
+        "1 | The Juggernauts",
+        "177 | Bobcat Robotics",
+    ]
+
+
+def test_update_teams_without_entry() -> None:
+    TypeaheadHelper.update_teams([Team(id="frc1", team_number=1)])
+    assert _entry("teams-all") is None
+
+
+def test_update_event_years_matches_rebuild() -> None:
+    _put_all()
+    TypeaheadHelper.rebuild_all()
+
+    _event(2024, "cafr", "Central Valley Regional").put()
+    ndb.Key(Event, "2023casj").delete()
+    TypeaheadHelper.update_event_years([2023, 2024])
+
+    assert _entry("events-2023") is None
+    assert _entry("events-2024") == [
+        "2024 Central Valley Regional [CAFR]",
+        "2024 Sacramento Regional [CADA]",
+        "2024 Silicon Valley Regional [CASJ]",
+    ]
+    assert _entry("events-all") == _entry("events-2024")
+    assert TypeaheadHelper.rebuild_all()["events-all"] == _entry("events-all")
+
+
+def test_update_districts_dedups() -> None:
+    _put_all()
+    TypeaheadHelper.update_districts()
+    assert sorted(_entry("districts-all")) == ["FIM District [FIM]", "NE District [NE]"]
+
+
+def test_team_hooks(taskqueue_stub) -> None:
+    _put_all()
+    TypeaheadHelper.rebuild_all()
+
+    TeamManipulator.createOrUpdate(
+        Team(id="frc177", team_number=177, nickname="Bobcat Robotics")
+    )
+    _run_hooks(taskqueue_stub)
+    assert _entry("teams-all") == ["177 | Bobcat Robotics", "254 | The Cheesy Poofs"]
+
+    TeamManipulator.delete_keys([ndb.Key(Team, "frc254")])
+    _run_hooks(taskqueue_stub)
+    assert _entry("teams-all") == ["177 | Bobcat Robotics"]
+
+
+def test_event_hooks(taskqueue_stub) -> None:
+    _put_all()
+    TypeaheadHelper.rebuild_all()
+
+    EventManipulator.createOrUpdate(_event(2023, "cada", "Sacramento Regional"))
+    _run_hooks(taskqueue_stub)
+    assert _entry("events-2023") == [
+        "2023 Sacramento Regional [CADA]",
+        "2023 Silicon Valley Regional [CASJ]",
+    ]
+    assert _entry("events-all")[-2:] == _entry("events-2023")
+
+
+def test_district_hooks(taskqueue_stub) -> None:
+    _put_all()
+    TypeaheadHelper.rebuild_all()
+
+    DistrictManipulator.createOrUpdate(
+        District(id="2024ne", year=2024, abbreviation="ne", display_name="New England")
+    )
+    _run_hooks(taskqueue_stub)
+    # The hook backports the new name to the other years
+    assert sorted(_entry("districts-all")) == [
+        "FIM District [FIM]",
+        "New England District [NE]",
+    ]
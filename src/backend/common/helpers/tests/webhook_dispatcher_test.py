@@ -0,0 +1,163 @@
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+import pytest
+from google.appengine.api import urlfetch_service_pb2
+from google.appengine.ext import ndb, testbed
+from google.appengine.runtime import apiproxy_errors
+
+from backend.common.consts.client_type import ClientType
+from backend.common.helpers.webhook_dispatcher import WebhookDispatcher
+from backend.common.models.account import Account
+from backend.common.models.mobile_client import MobileClient
+from backend.common.models.notifications.tests.mocks.notifications.mock_notification import (
+    MockNotification,
+)
+
+
+@pytest.fixture(autouse=True)
+def auto_add_ndb_stub(ndb_stub) -> None:
+    pass
+
+
+def _mock_webhooks(
+    urlfetch_stub: testbed.urlfetch_stub.URLFetchServiceStub,
+    status_codes: Dict[str, Optional[int]],
+    requested: List[str],
+) -> None:
+    def mock_fetch_fn(
+        url,
+        payload,
+        method,
+        headers,
+        request,
+        response,
+        follow_redirects,
+        deadline,
+        validate_certificate,
+    ):
+        requested.append(url)
+        status_code = status_codes[url]
+        if status_code is None:
+            raise apiproxy_errors.ApplicationError(
+                urlfetch_service_pb2.URLFetchServiceError.FETCH_ERROR,
+                "Connection refused",
+            )
+        if status_code < 0:
+            raise apiproxy_errors.ApplicationError(
+                urlfetch_service_pb2.URLFetchServiceError.DNS_ERROR,
+                "Host not found",
+            )
+        response.StatusCode = status_code
+
+    urlfetch_stub._urlmatchers_to_fetch_functions.append(
+        (lambda url: url in status_codes, mock_fetch_fn)
+    )
+
+
+def _client(url: str) -> MobileClient:
+    return MobileClient(
+        parent=ndb.Key(Account, "user_id"),
+        user_id="user_id",
+        messaging_id=url,
+        secret="secret",
+        client_type=ClientType.WEBHOOK,
+    )
+
+
+def test_send_empty() -> None:
+    result = WebhookDispatcher().send([])
+    assert result.delivered == []
+    assert result.stats == {}
+
+
+def test_send(urlfetch_stub: testbed.urlfetch_stub.URLFetchServiceStub) -> None:
+    urls = [
+        "https://a.example.com/1",
+        "https://a.example.com/2",
+        "https://b.example.com/1",
+    ]
+    requested: List[str] = []
+    _mock_webhooks(urlfetch_stub, {url: 200 for url in urls}, requested)
+
+    notification = MockNotification(webhook_message_data={"data": "value"})
+    deliveries = [(_client(url), notification) for url in urls]
+    result = WebhookDispatcher().send(deliveries)
+
+    assert sorted(requested) == urls
+    assert result.delivered == deliveries
+    assert result.failed == []
+    assert result.retry == []
+    assert result.stats.keys() == {"a.example.com", "b.example.com"}
+    assert result.stats["a.example.com"].sent == 2
+    assert len(result.stats["a.example.com"].latencies) == 2
+    assert result.stats["b.example.com"].sent == 1
+
+
+def test_send_failures(
+    urlfetch_stub: testbed.urlfetch_stub.URLFetchServiceStub,
+) -> None:
+    status_codes: Dict[str, Optional[int]] = {
+        "https://www.example.com/ok": 200,
+        "https://www.example.com/gone": 404,
+        "https://www.example.com/error": 500,
+        "https://www.example.com/busy": 429,
+        "https://unreachable.example.com/": None,
+        # A DNS lookup failure
+        "https://missing.example.com/": -1,
+    }
+    _mock_webhooks(urlfetch_stub, status_codes, [])
+
+    notification = MockNotification()
+    ok, gone, error, busy, unreachable, missing = [
+        (_client(url), notification) for url in status_codes
+    ]
+
+    result = WebhookDispatcher().send([ok, gone, error, busy, unreachable, missing])
+
+    assert result.delivered == [ok]
+    assert result.failed == [gone, missing]
+    assert sorted(client.messaging_id for client, _ in result.retry) == [
+        "https://unreachable.example.com/",
+        "https://www.example.com/busy",
+        "https://www.example.com/error",
+    ]
+    assert result.stats["www.example.com"].sent == 1
+    assert result.stats["www.example.com"].failed == 3
+    assert result.stats["unreachable.example.com"].failed == 1
+    assert result.stats["missing.example.com"].failed == 1
+
+
+def test_send_per_host_limit(
+    urlfetch_stub: testbed.urlfetch_stub.URLFetchServiceStub,
+) -> None:
+    urls = [f"https://a.example.com/{i}" for i in range(5)]
+    requested: List[str] = []
+    _mock_webhooks(urlfetch_stub, {url: 200 for url in urls}, requested)
+
+    notification = MockNotification()
+    dispatcher = WebhookDispatcher(per_host_limit=2)
+    with patch.object(
+        dispatcher, "_send_to_host", wraps=dispatcher._send_to_host
+    ) as mock_send_to_host:
+        result = dispatcher.send([(_client(url), notification) for url in urls])
+
+    # Two senders share the five deliveries
+    assert mock_send_to_host.call_count == 2
+    assert sorted(requested) == urls
+    assert result.stats["a.example.com"].sent == 5
+
+
+@pytest.mark.parametrize(
+    "status_code, retry",
+    [(None, True), (200, False), (404, False), (429, True), (500, True), (503, True)],
+)
+def test_should_retry(status_code, retry) -> None:
+    assert WebhookDispatcher.should_retry(status_code) == retry
+
+
+def test_host() -> None:
+    assert WebhookDispatcher.host("https://www.example.com:8080/a") == (
+        "www.example.com:8080"
+    )
+    assert WebhookDispatcher.host("not a url") == "not a url"
@@ -0,0 +1,227 @@
+import json
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from google.appengine.ext import ndb
+
+from backend.common.models.district import District
+from backend.common.models.event import Event
+from backend.common.models.keys import TeamNumber, Year
+from backend.common.models.team import Team
+from backend.common.models.typeahead_entry import TypeaheadEntry
+
+
+class TypeaheadHelper:
+    """
+    Builds the TypeaheadEntry buckets served to the web typeahead.
+
+    Team, Event and District post-update hooks call into this to rewrite only
+    the buckets a change affects. rebuild_all() regenerates every bucket from
+    scratch, and is kept as a repair path.
+    """
+
+    @staticmethod
+    def team_entry(team: Team) -> str:
+        nickname = team.nickname or f"Team {team.team_number}"
+        return f"{team.team_number} | {nickname}"
+
+    @staticmethod
+    def event_entry(event: Event) -> str:
+        return f"{event.year} {event.name} [{event.event_short.upper()}]"
+
+    @staticmethod
+    def district_entry(district: District) -> str:
+        return f"{district.display_name} District [{district.abbreviation.upper()}]"
+
+    @classmethod
+    def update_teams(
+        cls, teams: Iterable[Team], deleted: Iterable[TeamNumber] = ()
+    ) -> None:
+        """
+        Patches updated and deleted teams into the all-teams bucket, without
+        loading every Team.
+        """
+        updates: Dict[TeamNumber, Optional[str]] = {
+            team.team_number: cls.team_entry(team) for team in teams
+        }
+        updates.update({team_number: None for team_number in deleted})
+        if updates:
+            cls._patch_all_teams(updates)
+
+    @staticmethod
+    @ndb.transactional()
+    def _patch_all_teams(updates: Dict[TeamNumber, Optional[str]]) -> None:
+        entry = TypeaheadEntry.get_by_id(TypeaheadEntry.ALL_TEAMS_KEY)
+        if entry is None:
+            logging.warning(
+                f"No {TypeaheadEntry.ALL_TEAMS_KEY} typeahead entry to update; the next full rebuild will create it"
+            )
+            return
+
+        teams = {
+            int(data.split(" | ", 1)[0]): data for data in json.loads(entry.data_json)
+        }
+        for team_number, data in updates.items():
+            if data is None:
+                teams.pop(team_number, None)
+            else:
+                teams[team_number] = data
+
+        entry.data_json = json.dumps([teams[n] for n in sorted(teams)])
+        entry.put()
+
+    @classmethod
+    def update_event_years(cls, years: Iterable[Year]) -> None:
+        """
+        Rebuilds the bucket for each year from that year's events, then
+        rebuilds the all-events bucket from the year buckets.
+        """
+        years = set(years)
+        if not years:
+            return
+
+        to_put = []
+        to_delete = []
+        for year in years:
+            key_name = TypeaheadEntry.YEAR_EVENTS_KEY.format(year)
+            event_keys = (
+                Event.query(Event.year == year).order(Event.name).fetch(keys_only=True)
+            )
+            data = [cls.event_entry(event) for event in ndb.get_multi(event_keys)]
+            if data:
+                to_put.append(TypeaheadEntry(id=key_name, data_json=json.dumps(data)))
+            else:
+                to_delete.append(ndb.Key(TypeaheadEntry, key_name))
+        ndb.put_multi(to_put)
+        ndb.delete_multi(to_delete)
+
+        cls._rebuild_all_events()
+
+    @classmethod
+    def _rebuild_all_events(cls) -> None:
+        year_keys = sorted(
+            (
+                key
+                for key in TypeaheadEntry.query().fetch(keys_only=True)
+                if cls._year_events_key_year(key.id()) is not None
+            ),
+            key=lambda key: cls._year_events_key_year(key.id()),
+            reverse=True,
+        )
+
+        data: List[str] = []
+        for entry in ndb.get_multi(year_keys):
+            data.extend(json.loads(entry.data_json))
+        TypeaheadEntry(
+            id=TypeaheadEntry.ALL_EVENTS_KEY, data_json=json.dumps(data)
+        ).put()
+
+    @staticmethod
+    def _year_events_key_year(key_name: str) -> Optional[Year]:
+        prefix = TypeaheadEntry.YEAR_EVENTS_KEY.format("")
+        year = key_name.removeprefix(prefix)
+        if key_name.startswith(prefix) and year.isdigit():
+            return int(year)
+        return None
+
+    @classmethod
+    def update_districts(cls) -> None:
+        """
+        Rebuilds the all-districts bucket. There are only a few hundred
+        District entities, so this just reloads them.
+        """
+        district_keys = District.query().order(-District.year).fetch(keys_only=True)
+        data = cls._district_entries(ndb.get_multi(district_keys))
+        TypeaheadEntry(
+            id=TypeaheadEntry.ALL_DISTRICTS_KEY, data_json=json.dumps(data)
+        ).put()
+
+    @classmethod
+    def _district_entries(cls, districts: Iterable[District]) -> List[str]:
+        # One entry per distinct name, in the order first seen
+        return list(dict.fromkeys(cls.district_entry(d) for d in districts))
+
+    @classmethod
+    def rebuild_all(cls) -> Dict[str, List[str]]:
+        """
+        Rebuilds every bucket from all Events, Teams and Districts, and
+        deletes buckets that are no longer used. Returns the new buckets.
+        """
+
+        @ndb.tasklet
+        def get_events_async():
+            event_keys = (
+                yield Event.query()
+                .order(-Event.year)
+                .order(Event.name)
+                .fetch_async(keys_only=True)
+            )
+            events = yield ndb.get_multi_async(event_keys)
+            raise ndb.Return(events)
+
+        @ndb.tasklet
+        def get_teams_async():
+            team_keys = (
+                yield Team.query().order(Team.team_number).fetch_async(keys_only=True)
+            )
+            teams = yield ndb.get_multi_async(team_keys)
+            raise ndb.Return(teams)
+
+        @ndb.tasklet
+        def get_districts_async():
+            district_keys = (
+                yield District.query().order(-District.year).fetch_async(keys_only=True)
+            )
+            districts = yield ndb.get_multi_async(district_keys)
+            raise ndb.Return(districts)
+
+        @ndb.toplevel
+        def get_events_teams_districts():
+            events, teams, districts = (
+                yield get_events_async(),
+                get_teams_async(),
+                get_districts_async(),
+            )
+            raise ndb.Return((events, teams, districts))
+
+        events, teams, districts = get_events_teams_districts()
+
+        results: Dict[str, List[str]] = {}
+        if teams:
+            results[TypeaheadEntry.ALL_TEAMS_KEY] = [
+                cls.team_entry(team) for team in teams
+            ]
+        if districts:
+            results[TypeaheadEntry.ALL_DISTRICTS_KEY] = cls._district_entries(districts)
+        for event in events:
+            data = cls.event_entry(event)
+            results.setdefault(TypeaheadEntry.ALL_EVENTS_KEY, []).append(data)
+            results.setdefault(
+                TypeaheadEntry.YEAR_EVENTS_KEY.format(event.year), []
+            ).append(data)
+
+        # Prepare to remove old entries
+        old_entry_keys_future = TypeaheadEntry.query().fetch_async(keys_only=True)
+
+        # Add new entries
+        ndb.put_multi(
+            [
+                TypeaheadEntry(id=key_name, data_json=json.dumps(data))
+                for key_name, data in results.items()
+            ]
+        )
+
+        # Remove old entries
+        old_entry_keys = set(old_entry_keys_future.get_result())
+        new_entry_keys = {
+            ndb.Key(TypeaheadEntry, key_name) for key_name in results.keys()
+        }
+        keys_to_delete = old_entry_keys.difference(new_entry_keys)
+        logging.info(
+            "Removing the following unused TypeaheadEntries: {}".format(
+                [key.id() for key in keys_to_delete]
+            )
+        )
+        ndb.delete_multi(keys_to_delete)
+
+        return results
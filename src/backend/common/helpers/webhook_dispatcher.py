@@ -0,0 +1,145 @@
+import collections
+import logging
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from google.appengine.ext import ndb
+
+from backend.common.models.mobile_client import MobileClient
+from backend.common.models.notifications.notification import Notification
+from backend.common.models.notifications.requests.webhook_request import (
+    WEBHOOK_DEADLINE,
+    WebhookRequest,
+)
+
+WebhookDelivery = Tuple[MobileClient, Notification]
+
+
+@dataclass
+class WebhookDestinationStats:
+    sent: int = 0
+    failed: int = 0
+    # Seconds per request, in the order they finished
+    latencies: List[float] = field(default_factory=list)
+
+
+@dataclass
+class WebhookDispatchResult:
+    delivered: List[WebhookDelivery] = field(default_factory=list)
+    # Rejected by the destination, or the request can't be made (e.g. an
+    # invalid URL); sending again won't help
+    failed: List[WebhookDelivery] = field(default_factory=list)
+    # Timed out, couldn't connect, or the destination had a server error
+    retry: List[WebhookDelivery] = field(default_factory=list)
+    # Keyed by destination host
+    stats: Dict[str, WebhookDestinationStats] = field(default_factory=dict)
+
+
+class WebhookDispatcher:
+    """
+    Sends a batch of webhook notifications concurrently.
+
+    Each request is an async URL Fetch call through the ndb context, so one
+    task can have many webhooks in flight while URL Fetch manages the
+    connections. Deliveries are grouped by destination host, and at most
+    `per_host_limit` requests are in flight to any one host, so a slow
+    endpoint can't take over the batch and a busy one isn't flooded.
+
+    Deliveries that may succeed later come back in `retry`. The caller decides
+    when to send them again.
+    """
+
+    PER_HOST_LIMIT = 4
+
+    def __init__(
+        self, per_host_limit: int = PER_HOST_LIMIT, deadline: int = WEBHOOK_DEADLINE
+    ) -> None:
+        self.per_host_limit = per_host_limit
+        self.deadline = deadline
+
+    def send(self, deliveries: List[WebhookDelivery]) -> WebhookDispatchResult:
+        result = WebhookDispatchResult()
+        if not deliveries:
+            return result
+
+        pending: Dict[str, Deque[WebhookDelivery]] = collections.defaultdict(
+            collections.deque
+        )
+        for delivery in deliveries:
+            client, _ = delivery
+            pending[self.host(client.messaging_id)].append(delivery)
+
+        futures = [
+            self._send_to_host(host, host_pending, result)
+            for host, host_pending in pending.items()
+            for _ in range(min(self.per_host_limit, len(host_pending)))
+        ]
+        for future in futures:
+            future.get_result()
+
+        self._log_stats(result.stats)
+        return result
+
+    @ndb.tasklet
+    def _send_to_host(
+        self,
+        host: str,
+        pending: Deque[WebhookDelivery],
+        result: WebhookDispatchResult,
+    ):
+        # Several of these run for each host, taking deliveries off the same queue
+        stats = result.stats.setdefault(host, WebhookDestinationStats())
+        while pending:
+            delivery = pending.popleft()
+            client, notification = delivery
+            webhook_request = WebhookRequest(
+                notification, client.messaging_id, client.secret
+            )
+
+            start = time.perf_counter()
+            error: Optional[Exception] = None
+            try:
+                status_code = yield webhook_request.send_async(self.deadline)
+            except Exception as e:
+                status_code, error = None, e
+            stats.latencies.append(time.perf_counter() - start)
+
+            if status_code == 200:
+                stats.sent += 1
+                result.delivered.append(delivery)
+            elif error is not None:
+                logging.warning(f"Webhook to {host} failed: {error!r}")
+                stats.failed += 1
+                result.failed.append(delivery)
+            elif self.should_retry(status_code):
+                stats.failed += 1
+                result.retry.append(delivery)
+            else:
+                stats.failed += 1
+                result.failed.append(delivery)
+
+    @staticmethod
+    def should_retry(status_code: Optional[int]) -> bool:
+        return status_code is None or status_code == 429 or status_code >= 500
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlparse(url).netloc or url
+
+    @staticmethod
+    def _log_stats(stats: Dict[str, WebhookDestinationStats]) -> None:
+        for host, host_stats in sorted(stats.items()):
+            latencies_ms = [latency * 1000 for latency in host_stats.latencies]
+            message = (
+                f"Webhook deliveries to {host}: {host_stats.sent} sent, "
+                f"{host_stats.failed} failed, "
+                f"median {statistics.median(latencies_ms):.0f}ms, "
+                f"max {max(latencies_ms):.0f}ms"
+            )
+            if host_stats.failed:
+                logging.warning(message)
+            else:
+                logging.info(message)
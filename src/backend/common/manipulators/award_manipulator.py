@@ -8,6 +8,7 @@ from pyre_extensions import none_throws
 from backend.common.cache_clearing import get_affected_queries
 from backend.common.consts.event_type import EventType
 from backend.common.helpers.deferred import defer_safe
+from backend.common.helpers.insights_v2.registry import invalidate_season_partials
 from backend.common.helpers.season_helper import SeasonHelper
 from backend.common.helpers.tbans_helper import TBANSHelper
 from backend.common.manipulators.manipulator_base import ManipulatorBase, TUpdatedModel
@@ -87,6 +88,11 @@ def award_post_update_hook(updated_models: List[TUpdatedModel[Award]]) -> None:
                 if team_id:
                     event_new_team_keys[ek].add(team_id)
 
+    # Stored all-time insights partials for these seasons are now stale
+    invalidate_season_partials(
+        {updated_award.model.year for updated_award in updated_models}
+    )
+
     for event_key, new_team_keys in event_new_team_keys.items():
         # Enqueue task to calculate district points
         taskqueue.add(
@@ -125,3 +131,9 @@ def award_post_update_hook(updated_models: List[TUpdatedModel[Award]]) -> None:
                 queue_name="default",
                 countdown=300,  # Wait ~5m so cache clearing can run before we attempt to recalculate district points
             )
+
+
+@AwardManipulator.register_post_delete_hook
+def award_post_delete_hook(deleted_models: List[Award]) -> None:
+    # Stored all-time insights partials for these seasons are now stale
+    invalidate_season_partials({award.year for award in deleted_models})
@@ -1,6 +1,7 @@
 from typing import List
 
 from backend.common.cache_clearing import get_affected_queries
+from backend.common.helpers.typeahead_helper import TypeaheadHelper
 from backend.common.manipulators.manipulator_base import ManipulatorBase, TUpdatedModel
 from backend.common.models.cached_model import TAffectedReferences
 from backend.common.models.district import District
@@ -75,3 +76,14 @@ def district_post_update_hook(updated_models: List[TUpdatedModel[District]]) ->
                     other_district.display_name = updated.model.display_name
                     to_put.append(other_district)
             DistrictManipulator.createOrUpdate(to_put, run_post_update_hook=False)
+
+    if any(
+        updated.is_new or updated.updated_attrs & {"display_name", "abbreviation"}
+        for updated in updated_models
+    ):
+        TypeaheadHelper.update_districts()
+
+
+@DistrictManipulator.register_post_delete_hook
+def district_post_delete_hook(districts: List[District]) -> None:
+    TypeaheadHelper.update_districts()
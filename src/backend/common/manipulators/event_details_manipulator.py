@@ -8,6 +8,7 @@ from backend.common.consts.event_type import EventType
 from backend.common.helpers.deferred import defer_safe
 from backend.common.helpers.season_helper import SeasonHelper
 from backend.common.helpers.tbans_helper import TBANSHelper
+from backend.common.helpers.team_priors_helper import TeamPriorsHelper
 from backend.common.manipulators.manipulator_base import ManipulatorBase, TUpdatedModel
 from backend.common.models.cached_model import TAffectedReferences
 from backend.common.models.event import Event
@@ -104,6 +105,14 @@ def event_details_post_update_hook(
                     f"Error enqueuing regional_champs_points_calc for {event_key}"
                 )
 
+    # Seed OPR and prediction priors at the teams' later events
+    TeamPriorsHelper.update_events(
+        updated_model.model
+        for updated_model in updated_models
+        if updated_model.is_new
+        or {"matchstats", "predictions"} & updated_model.updated_attrs
+    )
+
 
 """ndb
     @classmethod
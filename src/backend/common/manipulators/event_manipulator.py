@@ -4,6 +4,7 @@ from typing import List
 
 from backend.common.cache_clearing import get_affected_queries
 from backend.common.helpers.location_helper import LocationHelper
+from backend.common.helpers.typeahead_helper import TypeaheadHelper
 from backend.common.manipulators.manipulator_base import ManipulatorBase, TUpdatedModel
 from backend.common.models.cached_model import TAffectedReferences
 from backend.common.models.event import Event
@@ -64,6 +65,12 @@ class EventManipulator(ManipulatorBase[Event]):
 
 @EventManipulator.register_post_update_hook
 def event_post_update_hook(updated_models: List[TUpdatedModel[Event]]) -> None:
+    TypeaheadHelper.update_event_years(
+        updated.model.year
+        for updated in updated_models
+        if updated.is_new or updated.updated_attrs & {"name", "event_short", "year"}
+    )
+
     events = []
     for updated in updated_models:
         event: Event = updated.model
@@ -111,3 +118,8 @@ def event_post_update_hook(updated_models: List[TUpdatedModel[Event]]) -> None:
         events.append(event)
 
     EventManipulator.createOrUpdate(events, run_post_update_hook=False)
+
+
+@EventManipulator.register_post_delete_hook
+def event_post_delete_hook(events: List[Event]) -> None:
+    TypeaheadHelper.update_event_years(event.year for event in events)
@@ -1,34 +1,53 @@
 import abc
+import contextlib
 import itertools
 import json
 import logging
-import pickle
+import time
 from collections import defaultdict
 from dataclasses import dataclass
+from datetime import timedelta
 from typing import (
     Any,
     Callable,
     DefaultDict,
+    Dict,
+    Generator,
     Generic,
     Iterable,
     List,
     Optional,
     overload,
     Set,
+    Tuple,
     Type,
     TypeVar,
 )
 
 from google.appengine.ext import ndb
+from werkzeug.local import Local
 
 from backend.common.cache_clearing.get_affected_queries import TCacheKeyAndQuery
+from backend.common.futures import TypedFuture
 from backend.common.helpers.deferred import defer_safe
 from backend.common.helpers.listify import delistify, listify
 from backend.common.models.cached_model import CachedModel, TAffectedReferences
 from backend.common.queries.database_query import CachedDatabaseQuery
+from backend.common.tasklets import typed_tasklet
 
 TModel = TypeVar("TModel", bound=CachedModel)
 
+# Work held while buffer_manipulator_tasks() is active: updated models waiting
+# on post-update hooks, keyed by manipulator then by model key, and affected
+# references waiting to have their caches cleared, keyed by manipulator
+manipulator_context = Local()
+
+# Buffered work is enqueued early once this many models and affected references
+# are waiting, or the oldest has waited this long, so long requests (like
+# datafeed tasks) don't hold every hook and cache clear until they finish
+BUFFER_FLUSH_SIZE = 500
+BUFFER_FLUSH_INTERVAL = timedelta(seconds=10)
+
 
 @dataclass(frozen=True)
 class TUpdatedModel(Generic[TModel]):
@@ -38,16 +57,17 @@ class TUpdatedModel(Generic[TModel]):
     post-update hooks registered with ``register_post_update_hook``.
 
     Attributes:
-        model: The post-merge CachedModel instance that was written to Datastore.
-            For newly created entities, this is the model as provided to
-            ``createOrUpdate``. For updates to existing entities, this is the
-            old model with new values merged in via ``updateMerge``.
+        model: The CachedModel as stored in Datastore. Hook tasks only carry the
+            model's key, so this is read when the hook runs, and includes any
+            later writes to the same entity.
         updated_attrs: The set of NDB property names whose values changed during
             the merge (populated by ``_update_attrs`` from the model's
             ``_mutable_attrs``, ``_json_attrs``, ``_list_attrs``, and
             ``_auto_union_attrs``). Empty for newly created models since no merge
             occurs. May contain synthetic signals (e.g. ``"_video_added"``)
-            injected by specific manipulator subclasses.
+            injected by specific manipulator subclasses. When the model was
+            written more than once in a request, this is the union of each
+            write's changes.
         is_new: True when the model was newly created (no prior version existed
             in Datastore), False when updating an existing entity.
     """
@@ -57,6 +77,119 @@ class TUpdatedModel(Generic[TModel]):
     is_new: bool
 
 
+@dataclass(frozen=True)
+class TUpdatedModelRef:
+    """
+    The task payload for a TUpdatedModel - the model is looked up by key
+    when the hook runs.
+    """
+
+    key: ndb.Key
+    updated_attrs: Set[str]
+    is_new: bool
+
+
+@contextlib.contextmanager
+def buffer_manipulator_tasks() -> Generator[None, None, None]:
+    """
+    Holds the post-update hooks and cache clears from manipulator writes in the
+    block, and enqueues them when it exits. A model written several times is
+    only passed to its hooks once, and the affected references from every
+    manipulator go in a single cache-clearing task, which dedups the cache keys
+    before deleting them. Used by the middleware to flush once per request;
+    nested blocks flush with the outermost one. Long blocks also flush every
+    BUFFER_FLUSH_SIZE models or BUFFER_FLUSH_INTERVAL.
+    """
+    if hasattr(manipulator_context, "post_update_hooks"):
+        yield
+        return
+
+    manipulator_context.post_update_hooks = {}
+    manipulator_context.cache_clears = {}
+    manipulator_context.buffered_count = 0
+    manipulator_context.buffered_since = None
+    try:
+        yield
+    finally:
+        _flush_manipulator_tasks()
+        del manipulator_context.post_update_hooks
+        del manipulator_context.cache_clears
+        del manipulator_context.buffered_count
+        del manipulator_context.buffered_since
+
+
+def _buffered_manipulator_tasks(count: int) -> None:
+    """
+    Records that count models or affected references were just buffered, and
+    flushes the buffer if it's over its size or age
+    """
+    if manipulator_context.buffered_since is None:
+        manipulator_context.buffered_since = time.monotonic()
+    manipulator_context.buffered_count += count
+
+    if (
+        manipulator_context.buffered_count >= BUFFER_FLUSH_SIZE
+        or time.monotonic() - manipulator_context.buffered_since
+        >= BUFFER_FLUSH_INTERVAL.total_seconds()
+    ):
+        _flush_manipulator_tasks()
+
+
+def _flush_manipulator_tasks() -> None:
+    post_update_hooks: Dict[Type[ManipulatorBase], Dict[ndb.Key, TUpdatedModelRef]] = (
+        manipulator_context.post_update_hooks
+    )
+    cache_clears: Dict[Type[ManipulatorBase], List[TAffectedReferences]] = (
+        manipulator_context.cache_clears
+    )
+    manipulator_context.post_update_hooks = {}
+    manipulator_context.cache_clears = {}
+    manipulator_context.buffered_count = 0
+    manipulator_context.buffered_since = None
+
+    if cache_clears:
+        try:
+            defer_safe(
+                _clear_caches_deferred,
+                list(cache_clears.items()),
+                _queue="cache-clearing",
+                _target="py3-tasks-io",
+                _url="/_ah/queue/deferred_clearCaches",
+            )
+        except Exception:
+            logging.exception("Failed to enqueue cache clearing")
+
+    for manipulator, refs in post_update_hooks.items():
+        try:
+            manipulator._enqueue_post_update_hooks(list(refs.values()))
+        except Exception:
+            logging.exception(
+                f"Failed to enqueue {manipulator.__name__} post-update hooks"
+            )
+
+
+def _clear_caches_deferred(
+    pending: List[Tuple[Type["ManipulatorBase"], List[TAffectedReferences]]],
+) -> None:
+    to_clear: DefaultDict[Type[CachedDatabaseQuery], Set[str]] = defaultdict(set)
+    affected_count = 0
+    for manipulator, all_affected_references in pending:
+        for affected_references in all_affected_references:
+            for cache_key, query in manipulator.getCacheKeysAndQueries(
+                affected_references
+            ):
+                affected_count += 1
+                to_clear[query].add(cache_key)
+
+    cleared_count = sum(len(cache_keys) for cache_keys in to_clear.values())
+    logging.info(
+        f"Clearing {cleared_count} query cache keys for {affected_count} affected "
+        f"queries from {len(pending)} manipulators "
+        f"({affected_count - cleared_count} duplicates skipped)"
+    )
+    CachedDatabaseQuery.delete_caches(to_clear)
+
+
 class ManipulatorBase(abc.ABC, Generic[TModel]):
     _post_delete_hooks: List[Callable[[List[TModel]], None]] = None  # pyre-ignore[8]
     _post_update_hooks: List[  # pyre-ignore[8]
@@ -138,12 +271,50 @@ class ManipulatorBase(abc.ABC, Generic[TModel]):
         run_post_update_hook=True,
         update_manual_attrs=True,
     ) -> Any:
+        return cls.createOrUpdate_async(
+            new_models, auto_union, run_post_update_hook, update_manual_attrs
+        ).get_result()
+
+    @overload
+    @classmethod
+    def createOrUpdate_async(
+        cls,
+        new_models: TModel,
+        auto_union: bool = True,
+        run_post_update_hook: bool = True,
+        update_manual_attrs: bool = True,
+    ) -> TypedFuture[TModel]: ...
+
+    @overload
+    @classmethod
+    def createOrUpdate_async(
+        cls,
+        new_models: List[TModel],
+        auto_union: bool = True,
+        run_post_update_hook: bool = True,
+        update_manual_attrs: bool = True,
+    ) -> TypedFuture[List[TModel]]: ...
+
+    @classmethod
+    @typed_tasklet
+    def createOrUpdate_async(
+        cls,
+        new_models,
+        auto_union=True,
+        run_post_update_hook=True,
+        update_manual_attrs=True,
+    ) -> Generator[Any, Any, Any]:
+        """
+        Like createOrUpdate, but the read and write RPCs don't block, so writes
+        through several manipulators can overlap.
+        """
         existing_or_new = listify(
-            cls.findOrSpawn(new_models, auto_union, update_manual_attrs)
+            (yield cls.findOrSpawn_async(new_models, auto_union, update_manual_attrs))
         )
 
         models_to_put = [model for model in existing_or_new if model._dirty]
-        ndb.put_multi(models_to_put)
+        if models_to_put:
+            yield ndb.put_multi_async(models_to_put)
         cls._clearCache(existing_or_new)
 
         if run_post_update_hook:
@@ -224,8 +395,35 @@ class ManipulatorBase(abc.ABC, Generic[TModel]):
 
     @classmethod
     def findOrSpawn(cls, new_models, auto_union=True, update_manual_attrs=True) -> Any:
+        return cls.findOrSpawn_async(
+            new_models, auto_union, update_manual_attrs
+        ).get_result()
+
+    @overload
+    @classmethod
+    def findOrSpawn_async(
+        cls,
+        new_models: TModel,
+        auto_union: bool = True,
+        update_manual_attrs: bool = True,
+    ) -> TypedFuture[TModel]: ...
+
+    @overload
+    @classmethod
+    def findOrSpawn_async(
+        cls,
+        new_models: List[TModel],
+        auto_union: bool = True,
+        update_manual_attrs: bool = True,
+    ) -> TypedFuture[List[TModel]]: ...
+
+    @classmethod
+    @typed_tasklet
+    def findOrSpawn_async(
+        cls, new_models, auto_union=True, update_manual_attrs=True
+    ) -> Generator[Any, Any, Any]:
         new_models = listify(new_models)
-        old_models: List[Optional[TModel]] = ndb.get_multi(
+        old_models: List[Optional[TModel]] = yield ndb.get_multi_async(
             [model.key for model in new_models], use_cache=False, use_memcache=False
         )
 
@@ -353,37 +551,74 @@ class ManipulatorBase(abc.ABC, Generic[TModel]):
     def _run_post_update_hook(cls, models: List[TModel]) -> None:
         """
         Asynchronously runs the manipulator's post update hooks if available.
+        Inside buffer_manipulator_tasks(), the hooks are enqueued when it exits.
         """
         if not models:
             return
 
-        updated_models = [
-            TUpdatedModel(
-                model=model,
-                updated_attrs=model._updated_attrs or set(),
+        refs = [
+            TUpdatedModelRef(
+                key=model.key,
+                updated_attrs=set(model._updated_attrs or set()),
                 is_new=model._is_new,
             )
             for model in models
         ]
 
-        # Split the models into batches to avoid exceeding the task payload limit.
-        BATCH_BYTES_LIMIT = 600000  # Less than 1048487 bytes
-        size_bytes = len(pickle.dumps(updated_models))
-        bytes_per_model = size_bytes / len(updated_models)
-        batch_size = int(BATCH_BYTES_LIMIT / bytes_per_model)
-        logging.info(
-            f"{cls.__name__}._run_post_update_hook() size of {len(updated_models)} updated models: {size_bytes}. Using batch size: {batch_size}"
-        )
-        for batch_models in itertools.batched(updated_models, batch_size):
+        pending = getattr(manipulator_context, "post_update_hooks", None)
+        if pending is None:
+            cls._enqueue_post_update_hooks(refs)
+            return
+
+        buffered: Dict[ndb.Key, TUpdatedModelRef] = pending.setdefault(cls, {})
+        for ref in refs:
+            previous = buffered.get(ref.key)
+            if previous is not None:
+                ref = TUpdatedModelRef(
+                    key=ref.key,
+                    updated_attrs=previous.updated_attrs | ref.updated_attrs,
+                    is_new=previous.is_new or ref.is_new,
+                )
+            buffered[ref.key] = ref
+        _buffered_manipulator_tasks(len(refs))
+
+    @classmethod
+    def _enqueue_post_update_hooks(cls, refs: List[TUpdatedModelRef]) -> None:
+        # Tasks only carry keys, so batches stay far below the task payload limit
+        BATCH_SIZE = 500
+        for batch_refs in itertools.batched(refs, BATCH_SIZE):
             for hook in cls._post_update_hooks:
                 defer_safe(
+                    cls._run_post_update_hook_deferred,
                     hook,
-                    list(batch_models),
+                    list(batch_refs),
                     _queue="post-update-hooks",
                     _target="py3-tasks-io",
                     _url=f"/_ah/queue/deferred_{cls.__name__}_runPostUpdateHook",
                 )
 
+    @classmethod
+    def _run_post_update_hook_deferred(
+        cls,
+        hook: Callable[[List[TUpdatedModel[TModel]]], None],
+        refs: List[TUpdatedModelRef],
+    ) -> None:
+        models: List[Optional[TModel]] = ndb.get_multi(
+            [ref.key for ref in refs], use_cache=False, use_memcache=False
+        )
+        updated_models = [
+            TUpdatedModel(
+                model=model,
+                updated_attrs=ref.updated_attrs,
+                is_new=ref.is_new,
+            )
+            for ref, model in zip(refs, models)
+            # Deleted since it was updated
+            if model is not None
+        ]
+        if updated_models:
+            hook(updated_models)
+
     """
     Helpers for subclasses
     """
@@ -474,34 +709,37 @@ class ManipulatorBase(abc.ABC, Generic[TModel]):
         """
         Make deferred calls to clear caches
         Needs to save _affected_references and the dirty flag
+        Inside buffer_manipulator_tasks(), the references are held until it exits
         """
         all_affected_references: List[TAffectedReferences] = []
         for model in models:
             if model._dirty and model._affected_references:
                 all_affected_references.append(model._affected_references)
 
-        if all_affected_references:
-            defer_safe(
-                cls._clearCacheDeferred,
-                all_affected_references,
-                _queue="cache-clearing",
-                # this does not exist in Cloud Tasks
-                # _transactional=ndb.in_transaction(),
-                _target="py3-tasks-io",
-                _url=f"/_ah/queue/deferred_{cls.__name__}_clearCache",
-            )
+        if not all_affected_references:
+            return
+
+        pending = getattr(manipulator_context, "cache_clears", None)
+        if pending is not None:
+            pending.setdefault(cls, []).extend(all_affected_references)
+            _buffered_manipulator_tasks(len(all_affected_references))
+            return
+
+        defer_safe(
+            cls._clearCacheDeferred,
+            all_affected_references,
+            _queue="cache-clearing",
+            # this does not exist in Cloud Tasks
+            # _transactional=ndb.in_transaction(),
+            _target="py3-tasks-io",
+            _url=f"/_ah/queue/deferred_{cls.__name__}_clearCache",
+        )
 
     @classmethod
     def _clearCacheDeferred(
         cls, all_affected_references: List[TAffectedReferences]
     ) -> None:
-        to_clear: DefaultDict[Type[CachedDatabaseQuery], Set[str]] = defaultdict(set)
-        for affected_references in all_affected_references:
-            for cache_key, query in cls.getCacheKeysAndQueries(affected_references):
-                to_clear[query].add(cache_key)
-
-        for query, cache_keys in to_clear.items():
-            query.delete_cache_multi(cache_keys)
+        _clear_caches_deferred([(cls, all_affected_references)])
 
     @classmethod
     @abc.abstractmethod
@@ -8,11 +8,12 @@ from backend.common.cache_clearing import get_affected_queries
 from backend.common.consts.event_type import EventType
 from backend.common.helpers.deferred import defer_safe
 from backend.common.helpers.firebase_pusher import FirebasePusher
+from backend.common.helpers.insights_v2.registry import invalidate_season_partials
 from backend.common.helpers.season_helper import SeasonHelper
 from backend.common.helpers.tbans_helper import TBANSHelper
 from backend.common.manipulators.manipulator_base import ManipulatorBase, TUpdatedModel
 from backend.common.models.cached_model import TAffectedReferences
-from backend.common.models.keys import EventKey
+from backend.common.models.keys import EventKey, Year
 from backend.common.models.match import Match
 
 if TYPE_CHECKING:
@@ -57,11 +58,15 @@ def match_post_delete_hook(deleted_models: List[Match]) -> None:
         except Exception:
             logging.warning("Firebase delete_match failed!")
 
+    # Stored all-time insights partials for these seasons are now stale
+    invalidate_season_partials({match.year for match in deleted_models})
+
 
 @MatchManipulator.register_post_update_hook
 def match_post_update_hook(updated_models: List[TUpdatedModel[Match]]) -> None:
     affected_stats_event_keys: Set[EventKey] = set()
     affected_stats_events: List[Event] = []
+    affected_stats_years: Set[Year] = set()
 
     for updated_model in updated_models:
         # Nullapalooza: corrupted Match entities can have event=None
@@ -81,6 +86,7 @@ def match_post_update_hook(updated_models: List[TUpdatedModel[Match]]) -> None:
             )
             != set()
         ):
+            affected_stats_years.add(updated_model.model.year)
             event = updated_model.model.event.get()
             if event_key and event and event_key not in affected_stats_event_keys:
                 affected_stats_event_keys.add(event_key)
@@ -90,6 +96,9 @@ def match_post_update_hook(updated_models: List[TUpdatedModel[Match]]) -> None:
     for event in affected_stats_events:
         MatchPostUpdateHooks.enqueue_stats(event)
 
+    # Stored all-time insights partials for these seasons are now stale
+    invalidate_season_partials(affected_stats_years)
+
     # Dispatch push notifications
     unplayed_match_events = []
     for updated_match in updated_models:
@@ -269,7 +278,24 @@ class MatchPostUpdateHooks:
         except Exception:
             logging.exception(f"Error enqueuing advancement update for {event_key}")
 
-        # Enqueue task to calculate matchstats
+        # Enqueue task to apply the changed matches to matchstats right away.
+        # It reads matches from the datastore, so it doesn't wait for cache
+        # clearing.
+        try:
+            taskqueue.add(
+                url=f"/tasks/math/do/event_matchstats_update/{event_key}",
+                method="GET",
+                target="py3-tasks-io",
+                queue_name="stats",
+            )
+        except Exception:
+            logging.exception(
+                f"Error enqueuing event_matchstats_update for {event_key}"
+            )
+
+        # Enqueue task to recalculate matchstats, predictions and insights from
+        # scratch. This also resets the incremental matchstats to the same
+        # matches, as a consistency check.
         try:
             taskqueue.add(
                 url=f"/tasks/math/do/event_matchstats/{event_key}",
@@ -1,7 +1,8 @@
 from typing import List
 
 from backend.common.cache_clearing import get_affected_queries
-from backend.common.manipulators.manipulator_base import ManipulatorBase
+from backend.common.helpers.typeahead_helper import TypeaheadHelper
+from backend.common.manipulators.manipulator_base import ManipulatorBase, TUpdatedModel
 from backend.common.models.cached_model import TAffectedReferences
 from backend.common.models.team import Team
 
@@ -64,3 +65,17 @@ class TeamManipulator(ManipulatorBase[Team]):
             old_model._dirty = True
 
         return old_model
+
+
+@TeamManipulator.register_post_update_hook
+def team_post_update_hook(updated_models: List[TUpdatedModel[Team]]) -> None:
+    TypeaheadHelper.update_teams(
+        updated.model
+        for updated in updated_models
+        if updated.is_new or "nickname" in updated.updated_attrs
+    )
+
+
+@TeamManipulator.register_post_delete_hook
+def team_post_delete_hook(teams: List[Team]) -> None:
+    TypeaheadHelper.update_teams([], deleted=[team.team_number for team in teams])
@@ -12,6 +12,7 @@ from backend.common.consts.award_type import AwardType
 from backend.common.consts.event_type import EventType
 from backend.common.helpers.deferred import run_from_task
 from backend.common.helpers.tbans_helper import TBANSHelper
+from backend.common.manipulators import award_manipulator
 from backend.common.manipulators.award_manipulator import AwardManipulator
 from backend.common.models.award import Award
 from backend.common.models.event import Event
@@ -205,6 +206,33 @@ class TestAwardManipulator(unittest.TestCase):
         task_urls = {t.url for t in tasks}
         assert "/tasks/math/do/regional_champs_pool_points_calc/2025casj" in task_urls
 
+    @patch.object(award_manipulator, "invalidate_season_partials")
+    def test_postUpdateHook_invalidatesInsightsPartials(self, mock_invalidate):
+        AwardManipulator.createOrUpdate(self.new_award)
+
+        tasks = none_throws(self.taskqueue_stub).get_filtered_tasks(
+            queue_names="post-update-hooks"
+        )
+        assert len(tasks) == 1
+        for task in tasks:
+            run_from_task(task)
+
+        mock_invalidate.assert_called_once_with({2013})
+
+    @patch.object(award_manipulator, "invalidate_season_partials")
+    def test_postDeleteHook_invalidatesInsightsPartials(self, mock_invalidate):
+        AwardManipulator.createOrUpdate(self.new_award, run_post_update_hook=False)
+        AwardManipulator.delete(self.new_award)
+
+        tasks = none_throws(self.taskqueue_stub).get_filtered_tasks(
+            queue_names="post-update-hooks"
+        )
+        assert len(tasks) == 1
+        for task in tasks:
+            run_from_task(task)
+
+        mock_invalidate.assert_called_once_with({2013})
+
     def test_postUpdateHook_notifications(self):
         import datetime
 
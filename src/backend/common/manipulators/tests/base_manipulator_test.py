@@ -1,5 +1,8 @@
+import base64
 import json
+import pickle
 from typing import Any, Dict, Generator, List, Optional, Set
+from unittest.mock import patch
 
 import pytest
 import six
@@ -9,7 +12,13 @@ from pyre_extensions import none_throws
 from backend.common.cache_clearing.get_affected_queries import TCacheKeyAndQuery
 from backend.common.consts.api_version import ApiMajorVersion
 from backend.common.helpers.deferred import run_from_task
-from backend.common.manipulators.manipulator_base import ManipulatorBase, TUpdatedModel
+from backend.common.manipulators import manipulator_base
+from backend.common.manipulators.manipulator_base import (
+    buffer_manipulator_tasks,
+    ManipulatorBase,
+    TUpdatedModel,
+    TUpdatedModelRef,
+)
 from backend.common.models.cached_model import CachedModel, TAffectedReferences
 from backend.common.models.cached_query_result import CachedQueryResult
 from backend.common.queries.database_query import CachedDatabaseQuery
@@ -218,6 +227,49 @@ def test_update_model(ndb_context, taskqueue_stub) -> None:
     assert check == expected
 
 
+def test_create_or_update_async(ndb_context, taskqueue_stub) -> None:
+    ManipulatorDummyModel(id="test", int_prop=1337).put()
+
+    update_future = DummyManipulator.createOrUpdate_async(
+        ManipulatorDummyModel(id="test", int_prop=42)
+    )
+    create_future = DummyManipulator.createOrUpdate_async(
+        [
+            ManipulatorDummyModel(id="test2", int_prop=1),
+            ManipulatorDummyModel(id="test3", int_prop=2),
+        ]
+    )
+
+    updated = update_future.get_result()
+    assert updated.int_prop == 42
+    assert updated._is_new is False
+    assert updated._dirty is False
+    created = create_future.get_result()
+    assert [model.key.id() for model in created] == ["test2", "test3"]
+    assert all(model._is_new for model in created)
+
+    assert ManipulatorDummyModel.get_by_id("test").int_prop == 42
+    assert ManipulatorDummyModel.get_by_id("test3").int_prop == 2
+
+    # Same tasks as the sync path - one of each per call
+    assert len(taskqueue_stub.get_filtered_tasks(queue_names="cache-clearing")) == 2
+    assert len(taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")) == 2
+
+
+def test_find_or_spawn_async(ndb_context) -> None:
+    ManipulatorDummyModel(id="test", int_prop=1337, str_prop="abc").put()
+
+    spawned = DummyManipulator.findOrSpawn_async(
+        ManipulatorDummyModel(id="test", int_prop=42)
+    ).get_result()
+
+    assert spawned.int_prop == 42
+    assert spawned.str_prop == "abc"
+    assert spawned._updated_attrs == {"int_prop"}
+    # Nothing is written
+    assert ManipulatorDummyModel.get_by_id("test").int_prop == 1337
+
+
 def test_find_or_spawn_corrupt_old_model_treated_as_create(
     ndb_context, monkeypatch, taskqueue_stub
 ) -> None:
@@ -400,6 +452,57 @@ def test_cache_clearing(ndb_context, taskqueue_stub) -> None:
     assert CachedQueryResult.get_by_id(query.cache_key) is None
 
 
+def test_cache_clearing_buffered(ndb_context, taskqueue_stub) -> None:
+    ManipulatorDummyModel(id="test", int_prop=1337).put()
+    ManipulatorDummyModel(id="test2", int_prop=1337).put()
+    queries = [
+        DummyCachedQuery(model_key="test"),
+        DummyCachedQuery(model_key="test2"),
+    ]
+    for query in queries:
+        query.fetch()
+        assert CachedQueryResult.get_by_id(query.cache_key) is not None
+
+    with buffer_manipulator_tasks():
+        DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test", int_prop=1))
+        DummyManipulator.createOrUpdate(
+            [
+                ManipulatorDummyModel(id="test", int_prop=2),
+                ManipulatorDummyModel(id="test2", int_prop=2),
+            ]
+        )
+        DummyRequiredManipulator.createOrUpdate(
+            ManipulatorDummyModelWithRequiredProp(id="required", required_prop="a")
+        )
+
+        assert taskqueue_stub.get_filtered_tasks(queue_names="cache-clearing") == []
+
+    # A single task clears caches for every manipulator
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="cache-clearing")
+    assert len(tasks) == 1
+
+    with (
+        patch.object(
+            DummyCachedQuery,
+            "delete_cache_multi",
+            wraps=DummyCachedQuery.delete_cache_multi,
+        ) as mock_delete_cache_multi,
+        patch.object(
+            CachedDatabaseQuery,
+            "delete_caches",
+            wraps=CachedDatabaseQuery.delete_caches,
+        ) as mock_delete_caches,
+    ):
+        run_from_task(tasks[0])
+
+    mock_delete_cache_multi.assert_not_called()
+    mock_delete_caches.assert_called_once_with(
+        {DummyCachedQuery: {query.cache_key for query in queries}}
+    )
+    for query in queries:
+        assert CachedQueryResult.get_by_id(query.cache_key) is None
+
+
 def test_post_update_hook(ndb_context, taskqueue_stub) -> None:
     model = ManipulatorDummyModel(id="test", int_prop=1337)
     model.put()
@@ -489,6 +592,136 @@ def test_update_skip_hook(ndb_context, taskqueue_stub) -> None:
     assert len(tasks) == 0
 
 
+def test_update_hook_payload_is_keys(ndb_context, taskqueue_stub) -> None:
+    model = ManipulatorDummyModel(id="test", int_prop=1337)
+    model.put()
+
+    DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test", int_prop=42))
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 1
+    # (manipulator, method name, hook, refs)
+    _, args, _ = pickle.loads(base64.b64decode(tasks[0].payload))
+    assert args[2:] == (
+        post_update_hook,
+        [TUpdatedModelRef(key=model.key, updated_attrs={"int_prop"}, is_new=False)],
+    )
+
+
+def test_update_hook_buffered(ndb_context, taskqueue_stub) -> None:
+    ManipulatorDummyModel(id="test", int_prop=1337).put()
+
+    def update_hook_extra(models: List[TUpdatedModel[ManipulatorDummyModel]]) -> None:
+        assert models == [
+            TUpdatedModel(
+                model=ManipulatorDummyModel.get_by_id("test"),
+                is_new=False,
+                updated_attrs={"int_prop", "mutable_str_prop"},
+            ),
+            TUpdatedModel(
+                model=ManipulatorDummyModel.get_by_id("test2"),
+                is_new=True,
+                updated_attrs={"int_prop"},
+            ),
+        ]
+
+    DummyManipulator.update_hook_extra = update_hook_extra
+    with buffer_manipulator_tasks():
+        DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test", int_prop=42))
+        DummyManipulator.createOrUpdate(
+            [
+                ManipulatorDummyModel(id="test", mutable_str_prop="abc"),
+                ManipulatorDummyModel(id="test2", int_prop=1),
+            ]
+        )
+        DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test2", int_prop=2))
+
+        # Nothing is enqueued until the buffer is flushed
+        assert taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks") == []
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 1
+
+    run_from_task(tasks[0])
+    assert DummyManipulator.update_calls == 1
+    assert ManipulatorDummyModel.get_by_id("test").int_prop == 42
+    assert ManipulatorDummyModel.get_by_id("test2").int_prop == 2
+
+
+def test_update_hook_buffer_nested(ndb_context, taskqueue_stub) -> None:
+    with buffer_manipulator_tasks():
+        with buffer_manipulator_tasks():
+            DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test"))
+
+        assert taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks") == []
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 1
+
+
+def test_update_hook_buffer_flushes_at_size(ndb_context, taskqueue_stub) -> None:
+    # Each new model has one post-update hook and one set of affected references
+    with patch.object(manipulator_base, "BUFFER_FLUSH_SIZE", 4):
+        with buffer_manipulator_tasks():
+            DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test"))
+            assert (
+                taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks") == []
+            )
+
+            DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test2"))
+            assert (
+                len(taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks"))
+                == 1
+            )
+            assert (
+                len(taskqueue_stub.get_filtered_tasks(queue_names="cache-clearing"))
+                == 1
+            )
+
+            DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test3"))
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 2
+    for task in tasks:
+        run_from_task(task)
+    assert DummyManipulator.update_calls == 2
+    assert len(taskqueue_stub.get_filtered_tasks(queue_names="cache-clearing")) == 2
+
+
+def test_update_hook_buffer_flushes_at_interval(ndb_context, taskqueue_stub) -> None:
+    with patch.object(manipulator_base.time, "monotonic", return_value=100.0) as now:
+        with buffer_manipulator_tasks():
+            DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test"))
+            now.return_value += manipulator_base.BUFFER_FLUSH_INTERVAL.total_seconds()
+            assert (
+                taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks") == []
+            )
+
+            DummyManipulator.createOrUpdate(ManipulatorDummyModel(id="test2"))
+            assert (
+                len(taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks"))
+                == 1
+            )
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 2
+    for task in tasks:
+        run_from_task(task)
+    assert DummyManipulator.update_calls == 2
+
+
+def test_update_hook_skips_deleted(ndb_context, taskqueue_stub) -> None:
+    model = ManipulatorDummyModel(id="test", int_prop=1337)
+    DummyManipulator.createOrUpdate(model)
+    model.key.delete()
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 1
+
+    run_from_task(tasks[0])
+    assert DummyManipulator.update_calls == 0
+
+
 def test_delete_by_key(ndb_context, taskqueue_stub) -> None:
     model = ManipulatorDummyModel(id="test", int_prop=1337)
     model.put()
@@ -1,3 +1,4 @@
+import datetime
 import unittest
 from typing import Optional
 from unittest.mock import patch
@@ -14,6 +15,7 @@ from backend.common.manipulators.event_details_manipulator import (
 )
 from backend.common.models.event import Event
 from backend.common.models.event_details import EventDetails
+from backend.common.models.team_year_priors import TeamYearPriors
 
 
 @pytest.mark.usefixtures("ndb_context", "taskqueue_stub")
@@ -239,3 +241,23 @@ class TestEventDetailsManipulator(unittest.TestCase):
 
         # Event is not configured to be within a day - skip it
         mock_alliance_selection.assert_not_called()
+
+    def test_postUpdateHook_teamPriors(self):
+        self.event.start_date = datetime.datetime(2011, 3, 10)
+        self.event.end_date = datetime.datetime(2011, 3, 12)
+        self.event.put()
+        self.old_event_details.put()
+        EventDetailsManipulator.createOrUpdate(self.new_event_details)
+
+        tasks = none_throws(self.taskqueue_stub).get_filtered_tasks(
+            queue_names="post-update-hooks"
+        )
+        for task in tasks:
+            run_from_task(task)
+
+        priors = TeamYearPriors.get_by_id(
+            TeamYearPriors.render_key_name("frc581", 2011)
+        )
+        assert priors is not None
+        assert [prior["event_key"] for prior in priors.events] == ["2011ct"]
+        assert priors.events[0]["matchstats"] == {"oprs": 18.513816255143144}
@@ -1,9 +1,11 @@
+import datetime
 import json
 import unittest
 from unittest import mock
 from unittest.mock import patch
 
 import pytest
+from freezegun import freeze_time
 from google.appengine.api import taskqueue
 from google.appengine.ext import ndb
 from pyre_extensions import none_throws
@@ -12,7 +14,11 @@ from backend.common.consts.alliance_color import AllianceColor
 from backend.common.consts.event_type import EventType
 from backend.common.helpers.deferred import run_from_task
 from backend.common.helpers.firebase_pusher import FirebasePusher
-from backend.common.manipulators.match_manipulator import MatchManipulator
+from backend.common.manipulators import match_manipulator
+from backend.common.manipulators.match_manipulator import (
+    MatchManipulator,
+    MatchPostUpdateHooks,
+)
 from backend.common.models.event import Event
 from backend.common.models.match import Match
 
@@ -208,6 +214,7 @@ def test_updateHook(mock_firebase, ndb_context, taskqueue_stub) -> None:
         set_number=1,
         match_number=1,
     )
+    test_match.put()
     MatchManipulator._run_post_update_hook([test_match])
 
     tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
@@ -230,6 +237,7 @@ def test_updateHook_firebaseThrows(mock_firebase, ndb_context, taskqueue_stub) -
         match_number=1,
     )
     mock_firebase.side_effect = Exception
+    test_match.put()
     MatchManipulator._run_post_update_hook([test_match])
 
     tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
@@ -253,6 +261,7 @@ def test_updateHook_taskqueueThrows(
     )
     test_match._updated_attrs = {"alliances_json"}
     mock_taskqueue.side_effect = Exception
+    test_match.put()
     MatchManipulator._run_post_update_hook([test_match])
 
     tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
@@ -288,6 +297,67 @@ def test_updateHook_enqueueStats(ndb_context, taskqueue_stub) -> None:
     assert "/tasks/math/do/playoff_advancement_update/2012ct" in tasks_urls
     assert "/tasks/math/do/event_team_status/2012ct" in tasks_urls
     assert "/tasks/math/do/district_points_calc/2012ct" in tasks_urls
+    assert "/tasks/math/do/event_matchstats_update/2012ct" in tasks_urls
+    assert "/tasks/math/do/event_matchstats/2012ct" in tasks_urls
+
+
+@mock.patch.object(match_manipulator, "invalidate_season_partials")
+def test_updateHook_invalidatesInsightsPartials(
+    mock_invalidate, ndb_context, taskqueue_stub
+) -> None:
+    Event(
+        id="2012ct", event_short="ct", year=2012, event_type_enum=EventType.REGIONAL
+    ).put()
+    test_match = Match(
+        id="2012ct_qm1",
+        alliances_json="""{"blue": {"score": 57, "teams": ["frc3464", "frc20", "frc1073"]}, "red": {"score": 74, "teams": ["frc69", "frc571", "frc176"]}}""",
+        comp_level="qm",
+        event=ndb.Key(Event, "2012ct"),
+        year=2012,
+        set_number=1,
+        match_number=1,
+    )
+    MatchManipulator.createOrUpdate(test_match)
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 1
+    for task in tasks:
+        run_from_task(task)
+
+    mock_invalidate.assert_called_once_with({2012})
+
+
+def test_updateHook_enqueueStats_full_matchstats_after_each_update(
+    ndb_context, taskqueue_stub
+) -> None:
+    event = Event(
+        id="2012ct", event_short="ct", year=2012, event_type_enum=EventType.REGIONAL
+    )
+
+    with freeze_time("2012-04-01 10:00:00") as frozen_time:
+        MatchPostUpdateHooks.enqueue_stats(event)
+        frozen_time.tick(60)
+        MatchPostUpdateHooks.enqueue_stats(event)
+
+    stats_tasks = taskqueue_stub.get_filtered_tasks(queue_names="stats")
+    update_tasks = [
+        t
+        for t in stats_tasks
+        if t.url == "/tasks/math/do/event_matchstats_update/2012ct"
+    ]
+    full_tasks = [
+        t for t in stats_tasks if t.url == "/tasks/math/do/event_matchstats/2012ct"
+    ]
+    assert len(update_tasks) == 2
+    # Each update refreshes predictions and insights ~90s later
+    assert sorted(t.eta_posix for t in full_tasks) == [
+        datetime.datetime(
+            2012, 4, 1, 10, 1, 30, tzinfo=datetime.timezone.utc
+        ).timestamp(),
+        datetime.datetime(
+            2012, 4, 1, 10, 2, 30, tzinfo=datetime.timezone.utc
+        ).timestamp(),
+    ]
 
 
 def test_updateHook_enqueueStatsRegionalChampsPoints(
@@ -343,6 +413,30 @@ def test_deleteHook(mock_firebase, ndb_context, taskqueue_stub) -> None:
     mock_firebase.assert_called_once_with(test_match)
 
 
+@mock.patch.object(match_manipulator, "invalidate_season_partials")
+@mock.patch.object(FirebasePusher, "delete_match")
+def test_deleteHook_invalidatesInsightsPartials(
+    mock_firebase, mock_invalidate, ndb_context, taskqueue_stub
+) -> None:
+    test_match = Match(
+        id="2012ct_qm1",
+        alliances_json="""{"blue": {"score": 57, "teams": ["frc3464", "frc20", "frc1073"]}, "red": {"score": 74, "teams": ["frc69", "frc571", "frc176"]}}""",
+        comp_level="qm",
+        event=ndb.Key(Event, "2012ct"),
+        year=2012,
+        set_number=1,
+        match_number=1,
+    )
+    MatchManipulator._run_post_delete_hook([test_match])
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 1
+    for task in tasks:
+        run_from_task(task)
+
+    mock_invalidate.assert_called_once_with({2012})
+
+
 @mock.patch.object(FirebasePusher, "delete_match")
 def test_deleteHook_firebaseThrows(mock_firebase, ndb_context, taskqueue_stub) -> None:
     test_match = Match(
@@ -1,6 +1,6 @@
 import datetime
 from datetime import timedelta
-from typing import Dict, Optional, TypedDict
+from typing import Dict, NotRequired, Optional, TypedDict
 
 from backend.common.memcache_models.memcache_model import MemcacheModel
 from backend.common.models.keys import EventKey
@@ -9,6 +9,10 @@ from backend.common.models.keys import EventKey
 class SyncEndpointStatus(TypedDict):
     last_success_time: Optional[str]
     num_consecutive_failures: int
+    # How many successful fetches were processed vs. skipped because the
+    # FRC API response hadn't changed since the last processed one
+    num_processed: NotRequired[int]
+    num_skipped_unchanged: NotRequired[int]
 
 
 EventSyncStatus = Dict[str, SyncEndpointStatus]
@@ -33,6 +37,7 @@ class EventSyncStatusMemcache(MemcacheModel[EventSyncStatus]):
         last_success_time = (now or datetime.datetime.now(utc_timezone)).isoformat()
 
         status[endpoint] = {
+            **status.get(endpoint, {}),
             "last_success_time": last_success_time,
             "num_consecutive_failures": 0,
         }
@@ -49,7 +54,25 @@ class EventSyncStatusMemcache(MemcacheModel[EventSyncStatus]):
         )
 
         status[endpoint] = {
+            **endpoint_status,
             "last_success_time": endpoint_status["last_success_time"],
             "num_consecutive_failures": endpoint_status["num_consecutive_failures"] + 1,
         }
         return self.put(status)
+
+    def record_processed(self, endpoint: str, unchanged: bool) -> bool:
+        status = self.get() or {}
+        endpoint_status = status.get(
+            endpoint,
+            {
+                "last_success_time": None,
+                "num_consecutive_failures": 0,
+            },
+        )
+
+        counter = "num_skipped_unchanged" if unchanged else "num_processed"
+        status[endpoint] = {
+            **endpoint_status,
+            counter: endpoint_status.get(counter, 0) + 1,
+        }
+        return self.put(status)
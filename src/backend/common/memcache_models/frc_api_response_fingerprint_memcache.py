@@ -0,0 +1,21 @@
+import hashlib
+from datetime import timedelta
+
+from backend.common.memcache_models.memcache_model import MemcacheModel
+
+
+class FRCAPIResponseFingerprintMemcache(MemcacheModel[str]):
+    # Also how long a fingerprint is trusted; see FRCAPIResponseFingerprints
+    TTL = timedelta(hours=1)
+
+    def __init__(self, fingerprint_key: str) -> None:
+        super().__init__()
+        self.fingerprint_key = fingerprint_key
+
+    def key(self) -> bytes:
+        # Keys contain URLs, which can be longer than memcache allows for keys
+        fingerprint_key_hash = hashlib.sha1(self.fingerprint_key.encode()).hexdigest()
+        return f"frc_api_response_fingerprint_{fingerprint_key_hash}".encode()
+
+    def ttl(self) -> timedelta:
+        return self.TTL
@@ -0,0 +1,28 @@
+import hashlib
+from datetime import timedelta
+from typing import Optional, TypedDict
+
+from backend.common.memcache_models.memcache_model import MemcacheModel
+
+
+class FRCAPIResponseValidators(TypedDict):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # Fingerprint of the body these validators were returned with
+    content_hash: str
+    # That body, zlib compressed, to answer a 304 without refetching it
+    content: Optional[bytes]
+
+
+class FRCAPIResponseValidatorsMemcache(MemcacheModel[FRCAPIResponseValidators]):
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        self.url = url
+
+    def key(self) -> bytes:
+        # URLs can be longer than memcache allows for keys
+        url_hash = hashlib.sha1(self.url.encode()).hexdigest()
+        return f"frc_api_response_validators_{url_hash}".encode()
+
+    def ttl(self) -> timedelta:
+        return timedelta(days=1)
@@ -7,6 +7,7 @@ from werkzeug.wsgi import ClosingIterator
 
 from backend.common.environment import Environment
 from backend.common.logging import logging_context
+from backend.common.manipulators.manipulator_base import buffer_manipulator_tasks
 from backend.common.profiler import send_traces, Span, trace_context
 from backend.common.run_after_response import execute_callbacks, response_context
 
@@ -58,6 +59,10 @@ class TraceRequestMiddleware:
 class AfterResponseMiddleware:
     """
     A middleware that handles tasks after handling the response.
+
+    Post-update hooks and cache clears from manipulator writes are buffered
+    while the request is handled, and enqueued once when the app returns its
+    response.
     """
 
     app: Callable[[Any, Any], Any]
@@ -68,7 +73,9 @@ class AfterResponseMiddleware:
     @ndb.toplevel
     def __call__(self, environ: Any, start_response: Any):
         response_context.request = Request(environ)
-        return ClosingIterator(self.app(environ, start_response), self._run_after)
+        with buffer_manipulator_tasks():
+            response = self.app(environ, start_response)
+        return ClosingIterator(response, self._run_after)
 
     def _run_after(self):
         with Span("Running AfterResponseMiddleware"):
@@ -59,6 +59,19 @@ class ApiAuthAccess(ndb.Model):
             )
         return super(ApiAuthAccess, self).put(*args, **kwargs)
 
+    def _post_put_hook(self, future) -> None:
+        from backend.common.cache.api_auth_access_cache import ApiAuthAccessCache
+
+        if self.key and self.key.string_id():
+            ApiAuthAccessCache.invalidate(self.key.string_id())
+
+    @classmethod
+    def _post_delete_hook(cls, key: ndb.Key, future) -> None:
+        from backend.common.cache.api_auth_access_cache import ApiAuthAccessCache
+
+        if key.string_id():
+            ApiAuthAccessCache.invalidate(key.string_id())
+
     @property
     def can_edit_event_info(self) -> bool:
         return AuthType.EVENT_INFO in self.auth_types_enum
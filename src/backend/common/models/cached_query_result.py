@@ -4,15 +4,29 @@ from typing import Any, Generator, Iterable, Optional
 
 from google.appengine.ext import ndb
 
+from backend.common.models.cached_query_result_codec import codec_for_name
+from backend.common.models.cached_query_result_invalidation import (
+    CachedQueryResultInvalidation,
+)
+
 
 class CachedQueryResult(ndb.Model):
     """
     A CachedQueryResult stores the result of an NDB query
     """
 
-    # Only one of result or result_dict should ever be populated for one model
+    # Only one of result, result_dict, or result_encoded should ever be populated for one model
     result = ndb.PickleProperty(compressed=True)  # Raw models
     result_dict = ndb.JsonProperty(compressed=True)  # Dict version of models
+    # Dict version of models, serialized by the CachedQueryResultCodec named by `codec`.
+    # Without a codec, this is a JSON response body and `etag` is its hash
+    result_encoded = ndb.BlobProperty()
+    codec = ndb.StringProperty(indexed=False)
+    etag = ndb.StringProperty(indexed=False)
+
+    # When the query that produced the result started. Compared against the
+    # CachedQueryResultInvalidation for queries with stale-while-revalidate
+    computed = ndb.DateTimeProperty(indexed=False)
 
     created = ndb.DateTimeProperty(auto_now_add=True)
     updated = ndb.DateTimeProperty(auto_now=True)
@@ -139,6 +153,32 @@ class CachedQueryResult(ndb.Model):
 
         return deleted
 
+    def invalidated_by(
+        self, invalidation: Optional[CachedQueryResultInvalidation]
+    ) -> bool:
+        """
+        Whether the result was computed before the cache key was last invalidated
+        """
+        if invalidation is None:
+            return False
+        return (self.computed or self.updated) <= invalidation.invalidated
+
+    def decoded_result_dict(self) -> Any:
+        if self.codec is None:
+            return self.result_dict
+        return codec_for_name(self.codec).decode(self.result_encoded)
+
+    def is_corrupted(self) -> bool:
+        """
+        Like _validate_result_properties, but reuses the result computed when
+        the entity was fetched rather than walking every model again.
+        """
+        corrupted = getattr(self, "_corrupted", None)
+        if corrupted is None:
+            corrupted = self._validate_result_properties()
+            self._corrupted = corrupted
+        return corrupted
+
     def _validate_result_properties(self) -> bool:
         """
         Validates that all required properties on models in the result field are set.
@@ -245,4 +285,4 @@ class CachedQueryResult(ndb.Model):
         # Check if the method exists before calling. NDB's hook system can invoke
         # this on different model types (especially when tests manipulate NDB's kind map).
         if entity and hasattr(entity, "_validate_result_properties"):
-            entity._validate_result_properties()
+            entity._corrupted = entity._validate_result_properties()
@@ -0,0 +1,86 @@
+import abc
+import json
+import pickle
+import zlib
+from typing import Any, Dict, Type
+
+
+class CachedQueryResultCodec(abc.ABC):
+    """
+    Serializes a query result into the bytes stored on a CachedQueryResult.
+
+    Codecs are looked up by NAME when reading, so a NAME must never be reused
+    for a different encoding. Changing the default codec for all queries
+    should be paired with a CachedDatabaseQuery.DATABASE_QUERY_VERSION bump.
+    """
+
+    NAME: str
+
+    @classmethod
+    @abc.abstractmethod
+    def encode(cls, value: Any) -> bytes: ...
+
+    @classmethod
+    @abc.abstractmethod
+    def decode(cls, data: bytes) -> Any: ...
+
+
+class PickleZlibCodec(CachedQueryResultCodec):
+    """
+    The same encoding as a compressed ndb.PickleProperty
+    """
+
+    NAME = "pickle_zlib"
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def decode(cls, data: bytes) -> Any:
+        return pickle.loads(zlib.decompress(data))
+
+
+class JsonZlibCodec(CachedQueryResultCodec):
+    """
+    The same encoding as a compressed ndb.JsonProperty
+    """
+
+    NAME = "json_zlib"
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        return zlib.compress(json.dumps(value).encode())
+
+    @classmethod
+    def decode(cls, data: bytes) -> Any:
+        return json.loads(zlib.decompress(data))
+
+
+class PickleCodec(CachedQueryResultCodec):
+    """
+    Uncompressed pickle. Decodes slightly faster than PickleZlibCodec, but is
+    roughly 10x larger, so only suitable for small results.
+    """
+
+    NAME = "pickle"
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def decode(cls, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+CODECS: Dict[str, Type[CachedQueryResultCodec]] = {
+    codec.NAME: codec for codec in [PickleZlibCodec, JsonZlibCodec, PickleCodec]
+}
+
+
+def codec_for_name(name: str) -> Type[CachedQueryResultCodec]:
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown CachedQueryResult codec: {name}")
+    return codec
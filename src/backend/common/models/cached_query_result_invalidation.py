@@ -0,0 +1,12 @@
+from google.appengine.ext import ndb
+
+
+class CachedQueryResultInvalidation(ndb.Model):
+    """
+    Records when the CachedQueryResult with the same key was last invalidated,
+    for queries with stale-while-revalidate. Results computed before then are
+    stale, but are left in place to be served while they're recomputed.
+    key_name format: the CachedQueryResult's cache key
+    """
+
+    invalidated = ndb.DateTimeProperty(auto_now=True, indexed=False)
@@ -0,0 +1,13 @@
+from google.appengine.ext import ndb
+
+
+class FRCAPIResponseFingerprint(ndb.Model):
+    """
+    A hash of the last FRC API response that was fully processed for a URL.
+    Backs FRCAPIResponseFingerprints when memcache has evicted an entry.
+    key_name format: {event_key}:{url}, or just {url} when not scoped to an event
+    """
+
+    content_hash = ndb.StringProperty(required=True, indexed=False)
+
+    updated = ndb.DateTimeProperty(auto_now=True, indexed=False)
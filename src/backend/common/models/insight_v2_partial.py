@@ -0,0 +1,25 @@
+from google.appengine.ext import ndb
+
+from backend.common.models.keys import Year
+
+
+class InsightV2Partial(ndb.Model):
+    """
+    The accumulated state of one insights_v2 calculator over a single season.
+    All-time insights are built by merging these, so completed seasons don't
+    have to be walked again.
+    key_name format: {year}_{calculator_name}_v{state_version}
+    """
+
+    year = ndb.IntegerProperty(required=True)
+    calculator_name = ndb.StringProperty(required=True)
+    calculator = ndb.PickleProperty(required=True, compressed=True)
+
+    created = ndb.DateTimeProperty(auto_now_add=True, indexed=False)
+    updated = ndb.DateTimeProperty(auto_now=True, indexed=False)
+
+    @classmethod
+    def render_key_name(
+        cls, year: Year, calculator_name: str, state_version: int
+    ) -> str:
+        return f"{year}_{calculator_name}_v{state_version}"
@@ -31,6 +31,24 @@ class MobileClient(ndb.Model):
     def __init__(self, *args, **kw):
         super(MobileClient, self).__init__(*args, **kw)
 
+    def _post_put_hook(self, future) -> None:
+        from backend.common.helpers.subscriber_index_helper import (
+            SubscriberIndexHelper,
+        )
+
+        if future.get_exception() is None:
+            SubscriberIndexHelper.add_client(self.user_id, self.key)
+
+    @classmethod
+    def _post_delete_hook(cls, key: ndb.Key, future) -> None:
+        from backend.common.helpers.subscriber_index_helper import (
+            SubscriberIndexHelper,
+        )
+
+        user_id = SubscriberIndexHelper.client_user_id(key)
+        if user_id is not None and future.get_exception() is None:
+            SubscriberIndexHelper.remove_client(user_id, key)
+
     @property
     def type_string(self):
         return client_type.NAMES[self.client_type]
@@ -0,0 +1,21 @@
+from typing import List
+
+from google.appengine.ext import ndb
+
+from backend.common.models.mobile_client import MobileClient
+
+
+class MobileClientIndex(ndb.Model):
+    """
+    The keys of every MobileClient a user has registered, so a user's clients
+    can be loaded by key rather than queried. Maintained by SubscriberIndexHelper
+    from MobileClient's put and delete hooks.
+
+    key_name is the user ID
+    """
+
+    client_keys: List[ndb.Key] = ndb.KeyProperty(  # pyre-ignore[8]
+        kind=MobileClient, repeated=True, indexed=False
+    )
+
+    updated = ndb.DateTimeProperty(auto_now=True, indexed=False)
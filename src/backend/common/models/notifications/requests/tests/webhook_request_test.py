@@ -1,8 +1,9 @@
 from unittest.mock import ANY, patch
 
 import pytest
-from google.appengine.api import urlfetch
+from google.appengine.api import urlfetch, urlfetch_errors
 from google.appengine.ext import testbed
+from google.appengine.runtime import apiproxy_errors
 
 from backend.common.models.notifications.requests.request import Request
 from backend.common.models.notifications.requests.webhook_request import (
@@ -201,3 +202,82 @@ def test_send_error_other(mock_fetch):
     mock_fetch.assert_called_once()
     assert not success
     assert valid_url
+
+
+def test_send_async(urlfetch_stub: testbed.urlfetch_stub.URLFetchServiceStub):
+    request_headers = []
+
+    def mock_fetch_fn(
+        url,
+        payload,
+        method,
+        headers,
+        request,
+        response,
+        follow_redirects,
+        deadline,
+        validate_certificate,
+    ):
+        request_headers.append({h.Key: h.Value for h in request.header})
+        response.StatusCode = 404
+
+    urlfetch_stub._urlmatchers_to_fetch_functions.append(
+        (lambda url: "www.thebluealliance.com" in url, mock_fetch_fn)
+    )
+
+    message = WebhookRequest(
+        MockNotification(webhook_message_data={"data": "value"}),
+        "https://www.thebluealliance.com",
+        "secret",
+    )
+
+    assert message.send_async().get_result() == 404
+    assert request_headers[0]["X-TBA-HMAC"] == message._generate_webhook_hmac(
+        message._json_string()
+    )
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        urlfetch.DownloadError("testing"),
+        urlfetch_errors.DeadlineExceededError("testing"),
+        urlfetch_errors.InternalTransientError("testing"),
+        apiproxy_errors.DeadlineExceededError("testing"),
+    ],
+)
+@patch("google.appengine.ext.ndb.context.Context.urlfetch")
+def test_send_async_transient_error(mock_urlfetch, error):
+    mock_urlfetch.side_effect = error
+
+    message = WebhookRequest(
+        MockNotification(webhook_message_data={"data": "value"}),
+        "https://www.thebluealliance.com",
+        "secret",
+    )
+
+    assert message.send_async().get_result() is None
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        urlfetch.Error("testing"),
+        urlfetch.InvalidURLError("testing"),
+        urlfetch_errors.DNSLookupFailedError("testing"),
+        urlfetch_errors.TooManyRedirectsError("testing"),
+        ValueError("testing"),
+    ],
+)
+@patch("google.appengine.ext.ndb.context.Context.urlfetch")
+def test_send_async_permanent_error(mock_urlfetch, error):
+    mock_urlfetch.side_effect = error
+
+    message = WebhookRequest(
+        MockNotification(webhook_message_data={"data": "value"}),
+        "https://www.thebluealliance.com",
+        "secret",
+    )
+
+    with pytest.raises(type(error)):
+        message.send_async().get_result()
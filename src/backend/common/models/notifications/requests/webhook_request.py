@@ -1,10 +1,27 @@
 import json
+from typing import Any, Generator, Optional
 
-from google.appengine.api import urlfetch
+from google.appengine.api import urlfetch, urlfetch_errors
+from google.appengine.ext import ndb
+from google.appengine.runtime import apiproxy_errors
 
 from backend.common.models.notifications.requests.request import Request
+from backend.common.tasklets import typed_tasklet
 
 WEBHOOK_VERSION = 1
+WEBHOOK_DEADLINE = 10
+
+# Errors that say nothing about the destination, so sending again may succeed
+WEBHOOK_TRANSIENT_ERRORS = (
+    apiproxy_errors.DeadlineExceededError,
+    urlfetch_errors.DownloadError,
+    urlfetch_errors.InternalTransientError,
+)
+# Download errors that will happen again on every attempt
+WEBHOOK_PERMANENT_DOWNLOAD_ERRORS = (
+    urlfetch_errors.DNSLookupFailedError,
+    urlfetch_errors.TooManyRedirectsError,
+)
 
 
 class WebhookRequest(Request):
@@ -35,16 +52,8 @@ class WebhookRequest(Request):
 
     def send(self) -> tuple[bool, bool]:
         """Attempt to send the notification."""
-        # Build the request
-        headers = {
-            "Content-Type": "application/json; charset=utf-8",
-            "X-TBA-Version": "{}".format(WEBHOOK_VERSION),
-        }
         payload = self._json_string()
-        # This checksum is insecure and has been deprecated in favor of an HMAC
-        headers["X-TBA-Checksum"] = self._generate_webhook_checksum(payload)
-        # Generate hmac
-        headers["X-TBA-HMAC"] = self._generate_webhook_hmac(payload)
+        headers = self._headers(payload)
 
         # TODO: Consider more useful way to surface error messages
         # https://github.com/the-blue-alliance/the-blue-alliance/issues/2576
@@ -61,6 +70,47 @@ class WebhookRequest(Request):
 
         return success, valid_url
 
+    @typed_tasklet
+    def send_async(
+        self, deadline: int = WEBHOOK_DEADLINE
+    ) -> Generator[Any, Any, Optional[int]]:
+        """Send the notification without blocking, so many webhooks can be sent at once.
+
+        Returns:
+            int: The response status code, or None if the request timed out or
+                hit a transient transport error, and may succeed if sent again.
+
+        Raises:
+            Exception: Any other error, e.g. an invalid URL. Sending the
+                notification again won't succeed.
+        """
+        payload = self._json_string()
+        try:
+            response = yield ndb.get_context().urlfetch(
+                self.url,
+                payload=payload,
+                method=urlfetch.POST,
+                headers=self._headers(payload),
+                deadline=deadline,
+            )
+        except WEBHOOK_PERMANENT_DOWNLOAD_ERRORS:
+            raise
+        except WEBHOOK_TRANSIENT_ERRORS:
+            return None
+
+        return response.status_code
+
+    def _headers(self, payload: str) -> dict[str, str]:
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "X-TBA-Version": "{}".format(WEBHOOK_VERSION),
+        }
+        # This checksum is insecure and has been deprecated in favor of an HMAC
+        headers["X-TBA-Checksum"] = self._generate_webhook_checksum(payload)
+        # Generate hmac
+        headers["X-TBA-HMAC"] = self._generate_webhook_hmac(payload)
+        return headers
+
     def _json_string(self) -> str:
         """JSON dict representation of an WebhookRequest object.
 
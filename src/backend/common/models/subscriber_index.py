@@ -0,0 +1,38 @@
+from typing import List, Tuple
+
+from google.appengine.ext import ndb
+
+from backend.common.consts.model_type import ModelType
+from backend.common.consts.notification_type import NotificationType
+
+
+class SubscriberIndex(ndb.Model):
+    """
+    The users subscribed to one model for one notification type, so notification
+    fan-out is a key lookup rather than a Subscription query. Maintained by
+    SubscriberIndexHelper from Subscription's put and delete hooks.
+
+    key_name is like `{model_type}:{model_key}:{notification_type}`
+    """
+
+    user_ids: List[str] = ndb.StringProperty(
+        repeated=True, indexed=False
+    )  # pyre-ignore[8]
+
+    updated = ndb.DateTimeProperty(auto_now=True, indexed=False)
+
+    @staticmethod
+    def render_key_name(
+        model_type: ModelType, model_key: str, notification_type: NotificationType
+    ) -> str:
+        return f"{int(model_type)}:{model_key}:{int(notification_type)}"
+
+    @staticmethod
+    def parse_key_name(key_name: str) -> Tuple[ModelType, str, NotificationType]:
+        model_type, rest = key_name.split(":", 1)
+        model_key, notification_type = rest.rsplit(":", 1)
+        return (
+            ModelType(int(model_type)),
+            model_key,
+            NotificationType(int(notification_type)),
+        )
@@ -24,6 +24,26 @@ class Subscription(MyTBAModel):
     def __init__(self, *args, **kwargs) -> None:
         super(Subscription, self).__init__(*args, **kwargs)
 
+    def _post_put_hook(self, future) -> None:
+        from backend.common.helpers.subscriber_index_helper import (
+            SubscriberIndexHelper,
+        )
+
+        if future.get_exception() is None:
+            SubscriberIndexHelper.update_subscription(self)
+
+    @classmethod
+    def _pre_delete_hook(cls, key: ndb.Key) -> None:
+        from backend.common.helpers.subscriber_index_helper import (
+            SubscriberIndexHelper,
+        )
+
+        # Only the key is known once the Subscription is deleted, so unindex it
+        # beforehand
+        subscription = key.get()
+        if subscription is not None:
+            SubscriberIndexHelper.remove_subscription(subscription)
+
     @property
     def notification_names(self) -> List[str]:
         return [
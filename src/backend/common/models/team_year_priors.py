@@ -0,0 +1,44 @@
+from typing import cast, Dict, List, TypedDict
+
+from google.appengine.ext import ndb
+
+from backend.common.consts.event_type import EventType
+from backend.common.models.keys import EventKey, TeamKey, Year
+
+
+class TeamStatMeanVar(TypedDict):
+    mean: float
+    var: float
+
+
+class TeamEventPrior(TypedDict):
+    event_key: EventKey
+    # ISO formatted, to order and filter without loading the Event
+    start_date: str
+    end_date: str
+    event_type: EventType
+    official: bool
+    # The team's OPR/DPR/CCWM at the event, by StatType
+    matchstats: Dict[str, float]
+    # The team's qual prediction contribution for each stat at the event
+    stat_mean_vars: Dict[str, TeamStatMeanVar]
+
+
+class TeamYearPriors(ndb.Model):
+    """
+    A team's stats from each of its events in a season, which seed OPR and
+    prediction estimates at its later events. Lets a whole event's priors be
+    loaded with one batch lookup, rather than querying each team's events.
+    Maintained by TeamPriorsHelper from EventDetails' post-update hook.
+
+    key_name is like `frc254_2019`
+    """
+
+    # Sorted by end date, then start date
+    events: List[TeamEventPrior] = cast(List[TeamEventPrior], ndb.JsonProperty())
+
+    updated = ndb.DateTimeProperty(auto_now=True, indexed=False)
+
+    @staticmethod
+    def render_key_name(team_key: TeamKey, year: Year) -> str:
+        return f"{team_key}_{year}"
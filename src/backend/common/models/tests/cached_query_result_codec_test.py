@@ -0,0 +1,34 @@
+import pytest
+
+from backend.common.models.cached_query_result_codec import (
+    codec_for_name,
+    CODECS,
+    JsonZlibCodec,
+    PickleCodec,
+    PickleZlibCodec,
+)
+
+
+@pytest.mark.parametrize("codec", [PickleZlibCodec, JsonZlibCodec, PickleCodec])
+def test_round_trip(codec) -> None:
+    value = [{"key": "frc254", "team_number": 254, "nickname": None, "tags": []}]
+    encoded = codec.encode(value)
+    assert isinstance(encoded, bytes)
+    assert codec.decode(encoded) == value
+
+
+def test_codec_names_are_unique() -> None:
+    assert len(CODECS) == 3
+    for name, codec in CODECS.items():
+        assert codec.NAME == name
+
+
+def test_codec_for_name() -> None:
+    assert codec_for_name("pickle_zlib") is PickleZlibCodec
+    assert codec_for_name("json_zlib") is JsonZlibCodec
+    assert codec_for_name("pickle") is PickleCodec
+
+
+def test_codec_for_name_unknown() -> None:
+    with pytest.raises(ValueError, match="Unknown CachedQueryResult codec: msgpack"):
+        codec_for_name("msgpack")
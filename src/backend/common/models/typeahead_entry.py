@@ -4,8 +4,9 @@ from google.appengine.ext import ndb
 class TypeaheadEntry(ndb.Model):
     """
     Model for storing precomputed typeahead entries as keys and values, where
-    TypeaheadEntry.id (set in cron_controller.TypeaheadCalcDo) is the key and
-    TypeaheadEntry.data_json is the value.
+    TypeaheadEntry.id (one of the *_KEY buckets below) is the key and
+    TypeaheadEntry.data_json is the value. Entries are maintained by
+    TypeaheadHelper.
     """
 
     ALL_TEAMS_KEY = "teams-all"
@@ -1,18 +1,53 @@
 from __future__ import annotations
 
 import abc
+import hashlib
 import logging
-from typing import Any, Dict, Generator, Generic, List, Optional, Set, Type, Union
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 from google.appengine.ext import ndb
 from pyre_extensions import none_throws
 
 from backend.common.consts.api_version import ApiMajorVersion
 from backend.common.futures import TypedFuture
+from backend.common.memcache import MemcacheClient
 from backend.common.models.cached_query_result import CachedQueryResult
+from backend.common.models.cached_query_result_codec import (
+    CachedQueryResultCodec,
+    PickleZlibCodec,
+)
+from backend.common.models.cached_query_result_invalidation import (
+    CachedQueryResultInvalidation,
+)
 from backend.common.profiler import Span
 from backend.common.queries.dict_converters.converter_base import ConverterBase
+from backend.common.queries.tiered_query_cache import CacheTier, TieredQueryCache
 from backend.common.queries.types import DictQueryReturn, QueryReturn
+from backend.common.tasklets import typed_tasklet
+
+
+def _utcnow() -> datetime:
+    # Naive, like the DateTimeProperty values it's compared with
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CachedJson(NamedTuple):
+    body: bytes
+    etag: str
 
 
 class DatabaseQuery(abc.ABC, Generic[QueryReturn, DictQueryReturn]):
@@ -73,7 +108,7 @@ class CachedDatabaseQuery(
     Generic[QueryReturn, DictQueryReturn],
     metaclass=abc.ABCMeta,
 ):
-    DATABASE_QUERY_VERSION = 6
+    DATABASE_QUERY_VERSION = 7
     BASE_CACHE_KEY_FORMAT: str = (
         "{}:{}:{}"  # (partial_cache_key, cache_version, database_query_version)
     )
@@ -82,7 +117,22 @@ class CachedDatabaseQuery(
     DICT_CACHING_ENABLED: bool = True
     MODEL_CACHING_ENABLED: bool = True
     CACHE_WRITES_ENABLED: bool = True
+    # How dict results are serialized. None stores them in the legacy JsonProperty
+    DICT_RESULT_CODEC: Optional[Type[CachedQueryResultCodec]] = PickleZlibCodec
+    # Read through an in-process LRU and memcache before the CachedQueryResult
+    TIERED_CACHING_ENABLED: bool = False
+    # Mark entries stale on invalidation (with a CachedQueryResultInvalidation,
+    # leaving the result in place) and keep serving them while a single request
+    # (holding a memcache lease) recomputes the result
+    STALE_WHILE_REVALIDATE_ENABLED: bool = False
+    RECOMPUTE_LEASE_TTL = timedelta(seconds=30)
+    # Also cache the final JSON response body for each API model variant
+    JSON_CACHING_ENABLED: bool = False
+    JSON_VARIANTS: Set[str] = {"full", "simple", "keys"}
     _cache_key: Optional[str] = None
+    # Set when _do_dict_query returns something that may be older than the
+    # Datastore entry, which must not be baked into a cached JSON body
+    _dict_result_may_be_stale: bool = False
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -105,21 +155,388 @@ class CachedDatabaseQuery(
         subvserion = none_throws(cls.DICT_CONVERTER).SUBVERSIONS[dict_version]
         return f"{cache_key}~dictv{dict_version}.{subvserion}"
 
+    def json_cache_key(self, dict_version: ApiMajorVersion, variant: str) -> str:
+        return self._json_cache_key(self.dict_cache_key(dict_version), variant)
+
+    @classmethod
+    def _json_cache_key(cls, dict_cache_key: str, variant: str) -> str:
+        return f"{dict_cache_key}~json.{variant}"
+
     @classmethod
     def delete_cache_multi(cls, cache_keys: Set[str]) -> None:
+        CachedDatabaseQuery.delete_caches({cls: cache_keys})
+
+    @staticmethod
+    def delete_caches(
+        to_clear: Dict[Type[CachedDatabaseQuery], Set[str]],
+    ) -> None:
+        """
+        Invalidates cache keys for any number of query classes, batching the
+        Datastore and memcache calls across all of them.
+        """
+        keys_to_delete: List[ndb.Key] = []
+        cache_keys_to_mark_stale: List[str] = []
+        tiered_cache_keys: List[str] = []
+        for query, cache_keys in to_clear.items():
+            all_cache_keys, json_cache_keys = query._cache_keys_to_clear(cache_keys)
+            logging.info("Deleting db query cache keys: {}".format(all_cache_keys))
+
+            # Never served stale, so these are deleted even with stale-while-revalidate
+            keys_to_delete += [
+                ndb.Key(CachedQueryResult, cache_key) for cache_key in json_cache_keys
+            ]
+            if query.TIERED_CACHING_ENABLED:
+                tiered_cache_keys += all_cache_keys
+
+            if query.STALE_WHILE_REVALIDATE_ENABLED:
+                cache_keys_to_mark_stale += all_cache_keys
+            else:
+                keys_to_delete += [
+                    ndb.Key(CachedQueryResult, cache_key)
+                    for cache_key in all_cache_keys
+                ]
+
+        if tiered_cache_keys:
+            TieredQueryCache.delete_multi(tiered_cache_keys)
+
+        if cache_keys_to_mark_stale:
+            # Small blind writes, rather than rewriting the results themselves,
+            # which could clobber a result recomputed in the meantime
+            ndb.put_multi(
+                [
+                    CachedQueryResultInvalidation(id=cache_key)
+                    for cache_key in cache_keys_to_mark_stale
+                ]
+            )
+
+        if keys_to_delete:
+            ndb.delete_multi(keys_to_delete)
+
+    @classmethod
+    def _cache_keys_to_clear(cls, cache_keys: Set[str]) -> Tuple[List[str], List[str]]:
+        """
+        Expands query cache keys to every key stored for them: the keys
+        themselves plus each dict version, and the JSON body keys.
+        """
         all_cache_keys = []
+        json_cache_keys = []
         for cache_key in cache_keys:
             all_cache_keys.append(cache_key)
             if cls.DICT_CONVERTER is not None:
-                all_cache_keys += [
+                dict_cache_keys = [
                     cls._dict_cache_key(cache_key, valid_dict_version)
                     for valid_dict_version in set(ApiMajorVersion)
                 ]
-        logging.info("Deleting db query cache keys: {}".format(all_cache_keys))
-        ndb.delete_multi(
-            [ndb.Key(CachedQueryResult, cache_key) for cache_key in all_cache_keys]
+                all_cache_keys += dict_cache_keys
+                if cls.JSON_CACHING_ENABLED:
+                    json_cache_keys += [
+                        cls._json_cache_key(dict_cache_key, variant)
+                        for dict_cache_key in dict_cache_keys
+                        for variant in cls.JSON_VARIANTS
+                    ]
+        return all_cache_keys, json_cache_keys
+
+    @classmethod
+    def _dict_cached_query_result(
+        cls, cache_key: str, result_dict: Any, computed: datetime
+    ) -> CachedQueryResult:
+        codec = cls.DICT_RESULT_CODEC
+        if codec is None:
+            return CachedQueryResult(
+                id=cache_key, result_dict=result_dict, computed=computed
+            )
+        return CachedQueryResult(
+            id=cache_key,
+            result_encoded=codec.encode(result_dict),
+            codec=codec.NAME,
+            computed=computed,
+        )
+
+    @staticmethod
+    @typed_tasklet
+    def _get_cached_query_results_async(
+        lookups: List[Tuple[Type[CachedDatabaseQuery], str]],
+    ) -> Generator[Any, Any, List[Tuple[Optional[CachedQueryResult], bool]]]:
+        """
+        Fetches the CachedQueryResult for each (query class, cache key), and
+        whether it's stale. Invalidations of queries with stale-while-revalidate
+        are fetched in the same batch.
+        """
+        stale_while_revalidate_indices = [
+            i
+            for i, (query, _) in enumerate(lookups)
+            if query.STALE_WHILE_REVALIDATE_ENABLED
+        ]
+        entities = yield ndb.get_multi_async(
+            [ndb.Key(CachedQueryResult, cache_key) for _, cache_key in lookups]
+            + [
+                ndb.Key(CachedQueryResultInvalidation, lookups[i][1])
+                for i in stale_while_revalidate_indices
+            ]
+        )
+        invalidations = dict(
+            zip(stale_while_revalidate_indices, entities[len(lookups) :])
+        )
+        return [
+            (
+                cached_query_result,
+                cached_query_result is not None
+                and cached_query_result.invalidated_by(invalidations.get(i)),
+            )
+            for i, cached_query_result in enumerate(entities[: len(lookups)])
+        ]
+
+    @classmethod
+    def _recompute_lease_key(cls, cache_key: str) -> bytes:
+        return f"cached_query_result_lease:{cache_key}".encode()
+
+    @classmethod
+    @typed_tasklet
+    def _acquire_recompute_lease(cls, cache_key: str) -> Generator[Any, Any, bool]:
+        """
+        Returns True if the caller should recompute cache_key. Only one request
+        holds the lease at a time; everyone else bumps its herd counter.
+        """
+        lease_key = cls._recompute_lease_key(cache_key)
+        memcache = MemcacheClient.get()
+        acquired = yield memcache.add_async(
+            lease_key, 0, int(cls.RECOMPUTE_LEASE_TTL.total_seconds())
+        )
+        if acquired:
+            return True
+
+        yield memcache.incr_async(lease_key)
+        return False
+
+    @classmethod
+    @typed_tasklet
+    def _release_recompute_lease(
+        cls, cache_key: str, was_stale: bool
+    ) -> Generator[Any, Any, None]:
+        lease_key = cls._recompute_lease_key(cache_key)
+        memcache = MemcacheClient.get()
+        herd_size = (yield memcache.get_async(lease_key)) or 0
+        yield memcache.delete_async(lease_key)
+        logging.info(
+            f"Recomputed {'stale' if was_stale else 'missing'} cache entry {cache_key}. "
+            f"Concurrent requests during recompute: {herd_size}"
         )
 
+    def fetch_json(
+        self,
+        version: ApiMajorVersion,
+        variant: str,
+        serialize: Callable[[DictQueryReturn], bytes],
+    ) -> CachedJson:
+        return self.fetch_json_async(version, variant, serialize).get_result()
+
+    @typed_tasklet
+    def fetch_json_async(
+        self,
+        version: ApiMajorVersion,
+        variant: str,
+        serialize: Callable[[DictQueryReturn], bytes],
+    ) -> Generator[Any, Any, CachedJson]:
+        """Fetch the serialized response body for this query's dict result.
+
+        With JSON_CACHING_ENABLED, the bytes and their ETag are cached next to
+        the dict result, so a hit skips decoding, filtering, and encoding.
+
+        Args:
+            version: The API version of the dict to serialize
+            variant: Which model variant `serialize` produces. One of JSON_VARIANTS
+            serialize: Turns the dict result into the response body
+
+        Returns:
+            The response body and its ETag
+        """
+        if variant not in self.JSON_VARIANTS:
+            raise ValueError(f"Unknown JSON variant: {variant}")
+
+        with Span("{}.fetch_json_async".format(self.__class__.__name__)):
+            cache_key = self.json_cache_key(version, variant)
+            use_cache = self.JSON_CACHING_ENABLED and self.DICT_CACHING_ENABLED
+            if use_cache:
+                cached_query_result = yield CachedQueryResult.get_by_id_async(cache_key)
+                if cached_query_result is not None:
+                    return CachedJson(
+                        body=cached_query_result.result_encoded,
+                        etag=cached_query_result.etag,
+                    )
+
+            result_dict = yield self.fetch_dict_async(version)
+            body = serialize(result_dict)
+            cached_json = CachedJson(body=body, etag=hashlib.sha1(body).hexdigest())
+
+            if (
+                use_cache
+                and self.CACHE_WRITES_ENABLED
+                and not self._dict_result_may_be_stale
+            ):
+                try:
+                    yield CachedQueryResult(
+                        id=cache_key, result_encoded=body, etag=cached_json.etag
+                    ).put_async()
+                except Exception as e:
+                    logging.warning(
+                        f"CachedQueryResult.put_async() failed: {cache_key}"
+                    )
+                    logging.exception(e)
+
+            return cached_json
+
+    @classmethod
+    def fetch_dict_multi(
+        cls, queries: List[CachedDatabaseQuery], version: ApiMajorVersion
+    ) -> List[Any]:
+        return cls.fetch_dict_multi_async(queries, version).get_result()
+
+    @classmethod
+    @typed_tasklet
+    def fetch_dict_multi_async(
+        cls, queries: List[CachedDatabaseQuery], version: ApiMajorVersion
+    ) -> Generator[Any, Any, List[Any]]:
+        """Fetch the dict results of many queries with batched cache RPCs.
+
+        Rather than one CachedQueryResult lookup per query, this does a single
+        ndb.get_multi over every query's dict cache key, runs _query_async only
+        for the misses, and writes those back with a single put_multi.
+
+        Args:
+            queries: Query instances to fetch. These may be of different classes.
+            version: The API version of the dicts to return
+
+        Returns:
+            The dict results, in the same order as queries
+        """
+        with Span("CachedDatabaseQuery.fetch_dict_multi_async"):
+            results: List[Any] = [None] * len(queries)
+            uncached_indices = [
+                i for i, query in enumerate(queries) if not query.DICT_CACHING_ENABLED
+            ]
+            cached_indices = [
+                i for i, query in enumerate(queries) if query.DICT_CACHING_ENABLED
+            ]
+            cache_keys = {i: queries[i].dict_cache_key(version) for i in cached_indices}
+
+            # Uncached queries go through the regular path, concurrently
+            uncached_futures = [
+                queries[i].fetch_dict_async(version) for i in uncached_indices
+            ]
+
+            tiered_indices = [
+                i for i in cached_indices if queries[i].TIERED_CACHING_ENABLED
+            ]
+            tiered_results = yield [
+                TieredQueryCache.get_async(cache_keys[i]) for i in tiered_indices
+            ]
+            for i, tiered_result in zip(tiered_indices, tiered_results):
+                results[i] = tiered_result
+
+            lookup_indices = [i for i in cached_indices if results[i] is None]
+            lookups = yield cls._get_cached_query_results_async(
+                [(type(queries[i]), cache_keys[i]) for i in lookup_indices]
+            )
+
+            # Take the recompute leases for every stale or missing entry at once
+            lease_indices = [
+                i
+                for i, (cached_query_result, is_stale) in zip(lookup_indices, lookups)
+                if queries[i]._uses_recompute_lease(cached_query_result, is_stale)
+            ]
+            acquired_leases = yield [
+                queries[i]._acquire_recompute_lease(cache_keys[i])
+                for i in lease_indices
+            ]
+            acquired_by_index = dict(zip(lease_indices, acquired_leases))
+
+            miss_indices = []
+            backfill_futures = []
+            # Index --> whether the entry we hold a recompute lease for was stale
+            leased_indices: Dict[int, bool] = {}
+            for i, (cached_query_result, is_stale) in zip(lookup_indices, lookups):
+                query = queries[i]
+                if query.TIERED_CACHING_ENABLED:
+                    TieredQueryCache.record(
+                        CacheTier.DATASTORE, cached_query_result is not None
+                    )
+
+                if i in acquired_by_index:
+                    if acquired_by_index[i]:
+                        leased_indices[i] = is_stale
+                    elif is_stale:
+                        results[i] = none_throws(
+                            cached_query_result
+                        ).decoded_result_dict()
+                        continue
+
+                if cached_query_result is None or is_stale:
+                    miss_indices.append(i)
+                    continue
+
+                results[i] = cached_query_result.decoded_result_dict()
+                if query.TIERED_CACHING_ENABLED:
+                    backfill_futures.append(
+                        TieredQueryCache.set_async(cache_keys[i], results[i])
+                    )
+
+            try:
+                computed = _utcnow()
+                query_results = yield [
+                    queries[i]._query_async(**queries[i]._query_args)
+                    for i in miss_indices
+                ]
+
+                to_put = []
+                for i, query_result in zip(miss_indices, query_results):
+                    query = queries[i]
+                    # See https://github.com/facebook/pyre-check/issues/267
+                    results[i] = none_throws(query.DICT_CONVERTER)(  # pyre-ignore[45]
+                        query_result
+                    ).convert(version)
+
+                    if query._should_write_cache(i in leased_indices):
+                        to_put.append(
+                            query._dict_cached_query_result(
+                                cache_keys[i], results[i], computed
+                            )
+                        )
+                        if query.TIERED_CACHING_ENABLED:
+                            backfill_futures.append(
+                                TieredQueryCache.set_async(cache_keys[i], results[i])
+                            )
+
+                if to_put:
+                    try:
+                        yield ndb.put_multi_async(to_put)
+                    except Exception as e:
+                        logging.warning(
+                            "CachedQueryResult.put_multi_async() failed: {}".format(
+                                [m.key.id() for m in to_put]
+                            )
+                        )
+                        logging.exception(e)
+            except Exception:
+                # Free the leases even if a query failed, so the next request
+                # recomputes rather than waiting out their TTL. Not done in a
+                # finally, since a tasklet can't yield while being closed.
+                yield [
+                    queries[i]._release_recompute_lease(cache_keys[i], was_stale)
+                    for i, was_stale in leased_indices.items()
+                ]
+                raise
+            yield [
+                queries[i]._release_recompute_lease(cache_keys[i], was_stale)
+                for i, was_stale in leased_indices.items()
+            ]
+
+            yield backfill_futures
+            uncached_results = yield uncached_futures
+            for i, uncached_result in zip(uncached_indices, uncached_results):
+                results[i] = uncached_result
+
+            return results
+
     @classmethod
     def get_query_class_by_name(
         cls, query_class_name: str
@@ -166,6 +583,24 @@ class CachedDatabaseQuery(
                 "have at least one prior version as a buffer)"
             )
 
+    @classmethod
+    def _uses_recompute_lease(
+        cls, cached_query_result: Optional[CachedQueryResult], is_stale: bool
+    ) -> bool:
+        return (
+            cls.STALE_WHILE_REVALIDATE_ENABLED
+            and cls.CACHE_WRITES_ENABLED
+            and (cached_query_result is None or is_stale)
+        )
+
+    @classmethod
+    def _should_write_cache(cls, holds_lease: bool) -> bool:
+        # With stale-while-revalidate, only the lease holder writes the result
+        # back, so concurrent misses don't all race to put the same entity
+        if not cls.CACHE_WRITES_ENABLED:
+            return False
+        return holds_lease or not cls.STALE_WHILE_REVALIDATE_ENABLED
+
     @ndb.tasklet
     def _do_query(self, *args, **kwargs) -> Generator[Any, Any, QueryReturn]:
         if not self.MODEL_CACHING_ENABLED:
@@ -174,34 +609,66 @@ class CachedDatabaseQuery(
 
         with Span("{}._do_query".format(self.__class__.__name__)):
             cache_key = self.cache_key
-            cached_query_result = yield CachedQueryResult.get_by_id_async(cache_key)
+            if self.TIERED_CACHING_ENABLED:
+                tiered_result = yield TieredQueryCache.get_async(cache_key)
+                if tiered_result is not None:
+                    return tiered_result
+
+            [(cached_query_result, is_stale)] = (
+                yield self._get_cached_query_results_async([(type(self), cache_key)])
+            )
 
             # Validate cached result for corruption and treat as cache miss if corrupted
-            if (
-                cached_query_result is not None
-                and cached_query_result._validate_result_properties()
-            ):
+            if cached_query_result is not None and cached_query_result.is_corrupted():
                 logging.error(
                     "Corrupted cached result detected in _do_query; treating as cache miss. "
                     "cache_key=%s",
                     cache_key,
                 )
                 cached_query_result = None
+                is_stale = False
+
+            if self.TIERED_CACHING_ENABLED:
+                TieredQueryCache.record(
+                    CacheTier.DATASTORE, cached_query_result is not None
+                )
+
+            holds_lease = False
+            if self._uses_recompute_lease(cached_query_result, is_stale):
+                holds_lease = yield self._acquire_recompute_lease(cache_key)
+                if is_stale and not holds_lease:
+                    return none_throws(cached_query_result).result
+            if is_stale:
+                cached_query_result = None
 
             if cached_query_result is None:
-                query_result = yield self._query_async(*args, **kwargs)
-                if self.CACHE_WRITES_ENABLED:
-                    try:
-                        yield CachedQueryResult(
-                            id=cache_key, result=query_result
-                        ).put_async()
-                    except Exception as e:
-                        logging.warning(
-                            f"CachedQueryResult.put_async() failed: {cache_key}"
-                        )
-                        logging.exception(e)
+                try:
+                    computed = _utcnow()
+                    query_result = yield self._query_async(*args, **kwargs)
+                    if self._should_write_cache(holds_lease):
+                        try:
+                            yield CachedQueryResult(
+                                id=cache_key, result=query_result, computed=computed
+                            ).put_async()
+                        except Exception as e:
+                            logging.warning(
+                                f"CachedQueryResult.put_async() failed: {cache_key}"
+                            )
+                            logging.exception(e)
+                        if self.TIERED_CACHING_ENABLED:
+                            yield TieredQueryCache.set_async(cache_key, query_result)
+                except Exception:
+                    # Free the lease even if the query failed, so the next
+                    # request recomputes rather than waiting out its TTL
+                    if holds_lease:
+                        yield self._release_recompute_lease(cache_key, is_stale)
+                    raise
+                if holds_lease:
+                    yield self._release_recompute_lease(cache_key, is_stale)
                 return query_result
 
+            if self.TIERED_CACHING_ENABLED:
+                yield TieredQueryCache.set_async(cache_key, cached_query_result.result)
             return cached_query_result.result
 
     @ndb.tasklet
@@ -214,24 +681,65 @@ class CachedDatabaseQuery(
 
         with Span("{}._do_dict_query".format(self.__class__.__name__)):
             cache_key = self.dict_cache_key(_dict_version)
-            cached_query_result = yield CachedQueryResult.get_by_id_async(cache_key)
-            if cached_query_result is None:
-                query_result = yield self._query_async(*args, **kwargs)
+            if self.TIERED_CACHING_ENABLED:
+                tiered_result = yield TieredQueryCache.get_async(cache_key)
+                if tiered_result is not None:
+                    # The local tier can lag behind invalidations on other instances
+                    self._dict_result_may_be_stale = True
+                    return tiered_result
+
+            [(cached_query_result, is_stale)] = (
+                yield self._get_cached_query_results_async([(type(self), cache_key)])
+            )
+            if self.TIERED_CACHING_ENABLED:
+                TieredQueryCache.record(
+                    CacheTier.DATASTORE, cached_query_result is not None
+                )
 
-                # See https://github.com/facebook/pyre-check/issues/267
-                converted_result = none_throws(self.DICT_CONVERTER)(  # pyre-ignore[45]
-                    query_result
-                ).convert(_dict_version)
+            holds_lease = False
+            if self._uses_recompute_lease(cached_query_result, is_stale):
+                holds_lease = yield self._acquire_recompute_lease(cache_key)
+                if is_stale and not holds_lease:
+                    self._dict_result_may_be_stale = True
+                    return none_throws(cached_query_result).decoded_result_dict()
+            if is_stale:
+                cached_query_result = None
 
-                if self.CACHE_WRITES_ENABLED:
-                    try:
-                        yield CachedQueryResult(
-                            id=cache_key, result_dict=converted_result
-                        ).put_async()
-                    except Exception as e:
-                        logging.warning(
-                            f"CachedQueryResult.put_async() failed: {cache_key}"
-                        )
-                        logging.exception(e)
+            if cached_query_result is None:
+                try:
+                    computed = _utcnow()
+                    query_result = yield self._query_async(*args, **kwargs)
+
+                    # See https://github.com/facebook/pyre-check/issues/267
+                    converted_result = none_throws(
+                        self.DICT_CONVERTER  # pyre-ignore[45]
+                    )(query_result).convert(_dict_version)
+
+                    if self._should_write_cache(holds_lease):
+                        try:
+                            yield self._dict_cached_query_result(
+                                cache_key, converted_result, computed
+                            ).put_async()
+                        except Exception as e:
+                            logging.warning(
+                                f"CachedQueryResult.put_async() failed: {cache_key}"
+                            )
+                            logging.exception(e)
+                        if self.TIERED_CACHING_ENABLED:
+                            yield TieredQueryCache.set_async(
+                                cache_key, converted_result
+                            )
+                except Exception:
+                    # Free the lease even if the query failed, so the next
+                    # request recomputes rather than waiting out its TTL
+                    if holds_lease:
+                        yield self._release_recompute_lease(cache_key, is_stale)
+                    raise
+                if holds_lease:
+                    yield self._release_recompute_lease(cache_key, is_stale)
                 return converted_result
-            return cached_query_result.result_dict
+
+            result_dict = cached_query_result.decoded_result_dict()
+            if self.TIERED_CACHING_ENABLED:
+                yield TieredQueryCache.set_async(cache_key, result_dict)
+            return result_dict
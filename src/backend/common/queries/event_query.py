@@ -38,6 +38,7 @@ class EventListQuery(CachedDatabaseQuery[List[Event], List[EventDict]]):
     CACHE_VERSION = 4
     CACHE_KEY_FORMAT = "event_list_{year}"
     DICT_CONVERTER = EventConverter
+    TIERED_CACHING_ENABLED = True
 
     def __init__(self, year: Year) -> None:
         super().__init__(year=year)
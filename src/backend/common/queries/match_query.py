@@ -32,6 +32,8 @@ class EventMatchesQuery(CachedDatabaseQuery[List[Match], List[MatchDict]]):
     CACHE_VERSION = 2
     CACHE_KEY_FORMAT = "event_matches_{event_key}"
     DICT_CONVERTER = MatchConverter
+    STALE_WHILE_REVALIDATE_ENABLED = True
+    JSON_CACHING_ENABLED = True
 
     def __init__(self, event_key: EventKey) -> None:
         super().__init__(event_key=event_key)
@@ -49,7 +49,27 @@ class MobileClientQuery(DatabaseQuery[list[MobileClient], None]):
         Args:
             messaging_id (string): The messaging_id to filter for.
         """
-        to_delete = MobileClient.query(MobileClient.messaging_id == messaging_id).fetch(
-            keys_only=True
-        )
-        ndb.delete_multi(to_delete)
+        MobileClientQuery.delete_for_messaging_ids_async([messaging_id]).get_result()
+
+    @staticmethod
+    @typed_tasklet
+    def delete_for_messaging_ids_async(
+        messaging_ids: list[str],
+    ) -> Generator[Any, Any, int]:
+        """
+        Delete the mobile client(s) with any of the associated messaging_ids.
+        The lookups run concurrently, and everything found is deleted in one batch.
+        Args:
+            messaging_ids (list): The messaging_ids to filter for.
+        Returns:
+            int: The number of mobile clients deleted.
+        """
+        keys_per_id = yield [
+            MobileClient.query(MobileClient.messaging_id == messaging_id).fetch_async(
+                keys_only=True
+            )
+            for messaging_id in set(messaging_ids)
+        ]
+        to_delete = [key for keys in keys_per_id for key in keys]
+        yield ndb.delete_multi_async(to_delete)
+        return len(to_delete)
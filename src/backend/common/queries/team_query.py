@@ -26,6 +26,7 @@ class TeamQuery(CachedDatabaseQuery[Optional[Team], Optional[TeamDict]]):
     CACHE_KEY_FORMAT = "team_{team_key}"
     MODEL_CACHING_ENABLED = False  # No need to cache a point query
     DICT_CONVERTER = TeamConverter
+    TIERED_CACHING_ENABLED = True
 
     def __init__(self, team_key: TeamKey) -> None:
         super().__init__(team_key=team_key)
@@ -40,6 +41,7 @@ class TeamListQuery(CachedDatabaseQuery[List[Team], List[TeamDict]]):
     CACHE_VERSION = 2
     CACHE_KEY_FORMAT = "team_list_{page}"
     DICT_CONVERTER = TeamConverter
+    JSON_CACHING_ENABLED = True
     PAGE_SIZE: int = 500
 
     def __init__(self, page: int) -> None:
@@ -61,6 +63,7 @@ class TeamListYearQuery(CachedDatabaseQuery[List[Team], List[TeamDict]]):
     CACHE_VERSION = 2
     CACHE_KEY_FORMAT = "team_list_year_{year}_{page}"
     DICT_CONVERTER = TeamConverter
+    JSON_CACHING_ENABLED = True
 
     def __init__(self, year: Year, page: int) -> None:
         super().__init__(year=year, page=page)
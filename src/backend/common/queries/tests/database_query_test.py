@@ -1,15 +1,28 @@
+import hashlib
+import json
 import logging
 from typing import Any, Generator, Iterable, List, TypedDict
 from unittest.mock import patch
 
+import pytest
+
 from google.appengine.ext import ndb
 from pyre_extensions import none_throws
 
 from backend.common.consts.api_version import ApiMajorVersion
+from backend.common.memcache import MemcacheClient
 from backend.common.models.cached_model import CachedModel
 from backend.common.models.cached_query_result import CachedQueryResult
+from backend.common.models.cached_query_result_codec import (
+    JsonZlibCodec,
+    PickleZlibCodec,
+)
+from backend.common.models.cached_query_result_invalidation import (
+    CachedQueryResultInvalidation,
+)
 from backend.common.queries.database_query import CachedDatabaseQuery, DatabaseQuery
 from backend.common.queries.dict_converters.converter_base import ConverterBase
+from backend.common.queries.tiered_query_cache import TieredQueryCache
 
 
 class DummyModel(ndb.Model):
@@ -78,6 +91,100 @@ class CachedDummyModelRangeQuery(
         return list(models)
 
 
+class KeyedDummyModelRangeQuery(CachedDatabaseQuery[List[DummyModel], List[DummyDict]]):
+    CACHE_KEY_FORMAT = "test_keyed_query_{min}_{max}"
+    DICT_CONVERTER = DummyConverter
+    CACHE_WRITES_ENABLED = True
+
+    @ndb.tasklet
+    def _query_async(self, min: int, max: int) -> Generator[Any, Any, List[DummyModel]]:
+        models: Iterable[DummyModel] = yield DummyModel.query(
+            DummyModel.int_prop >= min, DummyModel.int_prop <= max
+        ).fetch_async()
+        return list(models)
+
+
+class TieredDummyModelRangeQuery(
+    CachedDatabaseQuery[List[DummyModel], List[DummyDict]]
+):
+    CACHE_KEY_FORMAT = "test_tiered_query_{min}_{max}"
+    DICT_CONVERTER = DummyConverter
+    CACHE_WRITES_ENABLED = True
+    TIERED_CACHING_ENABLED = True
+
+    @ndb.tasklet
+    def _query_async(self, min: int, max: int) -> Generator[Any, Any, List[DummyModel]]:
+        models: Iterable[DummyModel] = yield DummyModel.query(
+            DummyModel.int_prop >= min, DummyModel.int_prop <= max
+        ).fetch_async()
+        return list(models)
+
+
+class JsonDummyModelRangeQuery(CachedDatabaseQuery[List[DummyModel], List[DummyDict]]):
+    CACHE_KEY_FORMAT = "test_json_query_{min}_{max}"
+    DICT_CONVERTER = DummyConverter
+    CACHE_WRITES_ENABLED = True
+    DICT_RESULT_CODEC = JsonZlibCodec
+
+    @ndb.tasklet
+    def _query_async(self, min: int, max: int) -> Generator[Any, Any, List[DummyModel]]:
+        models: Iterable[DummyModel] = yield DummyModel.query(
+            DummyModel.int_prop >= min, DummyModel.int_prop <= max
+        ).fetch_async()
+        return list(models)
+
+
+class LegacyDictDummyModelRangeQuery(
+    CachedDatabaseQuery[List[DummyModel], List[DummyDict]]
+):
+    CACHE_KEY_FORMAT = "test_legacy_dict_query_{min}_{max}"
+    DICT_CONVERTER = DummyConverter
+    CACHE_WRITES_ENABLED = True
+    DICT_RESULT_CODEC = None
+
+    @ndb.tasklet
+    def _query_async(self, min: int, max: int) -> Generator[Any, Any, List[DummyModel]]:
+        models: Iterable[DummyModel] = yield DummyModel.query(
+            DummyModel.int_prop >= min, DummyModel.int_prop <= max
+        ).fetch_async()
+        return list(models)
+
+
+class StaleDummyModelRangeQuery(CachedDatabaseQuery[List[DummyModel], List[DummyDict]]):
+    CACHE_KEY_FORMAT = "test_stale_query_{min}_{max}"
+    DICT_CONVERTER = DummyConverter
+    CACHE_WRITES_ENABLED = True
+    STALE_WHILE_REVALIDATE_ENABLED = True
+
+    @ndb.tasklet
+    def _query_async(self, min: int, max: int) -> Generator[Any, Any, List[DummyModel]]:
+        models: Iterable[DummyModel] = yield DummyModel.query(
+            DummyModel.int_prop >= min, DummyModel.int_prop <= max
+        ).fetch_async()
+        return list(models)
+
+
+class JsonResponseDummyModelRangeQuery(
+    CachedDatabaseQuery[List[DummyModel], List[DummyDict]]
+):
+    CACHE_KEY_FORMAT = "test_json_response_query_{min}_{max}"
+    DICT_CONVERTER = DummyConverter
+    CACHE_WRITES_ENABLED = True
+    JSON_CACHING_ENABLED = True
+
+    @ndb.tasklet
+    def _query_async(self, min: int, max: int) -> Generator[Any, Any, List[DummyModel]]:
+        models: Iterable[DummyModel] = yield DummyModel.query(
+            DummyModel.int_prop >= min, DummyModel.int_prop <= max
+        ).fetch_async()
+        return list(models)
+
+
+class StaleJsonResponseDummyModelRangeQuery(JsonResponseDummyModelRangeQuery):
+    CACHE_KEY_FORMAT = "test_stale_json_response_query_{min}_{max}"
+    STALE_WHILE_REVALIDATE_ENABLED = True
+
+
 class CachedDummyModelWithRequiredPropQuery(
     CachedDatabaseQuery[List[DummyModelWithRequiredProp], None]
 ):
@@ -233,7 +340,9 @@ def test_cached_dict_query() -> None:
 
     # Verify the correct fields are written
     assert none_throws(cached_result).result is None
-    assert none_throws(cached_result).result_dict is not None
+    assert none_throws(cached_result).result_dict is None
+    assert none_throws(cached_result).codec == PickleZlibCodec.NAME
+    assert none_throws(cached_result).decoded_result_dict() == result
 
     # And if we delete the underlying data out without clearing the cache, we should
     # still read a stale value
@@ -267,6 +376,32 @@ def test_clear_cache() -> None:
     assert len(CachedQueryResult.query().fetch()) == 0
 
 
+def test_delete_caches() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = KeyedDummyModelRangeQuery(min=0, max=2)
+    query.fetch()
+    stale_query = StaleDummyModelRangeQuery(min=0, max=2)
+    stale_query.fetch()
+    other_query = KeyedDummyModelRangeQuery(min=3, max=4)
+    other_query.fetch()
+
+    with patch.object(ndb, "delete_multi", wraps=ndb.delete_multi) as mock_delete:
+        CachedDatabaseQuery.delete_caches(
+            {
+                KeyedDummyModelRangeQuery: {query.cache_key},
+                StaleDummyModelRangeQuery: {stale_query.cache_key},
+            }
+        )
+
+    # One delete for every query class
+    mock_delete.assert_called_once()
+    assert CachedQueryResult.get_by_id(query.cache_key) is None
+    assert CachedQueryResult.get_by_id(stale_query.cache_key) is not None
+    assert CachedQueryResultInvalidation.get_by_id(stale_query.cache_key) is not None
+    assert CachedQueryResult.get_by_id(other_query.cache_key) is not None
+
+
 def test_cached_query_put_exception_logs_cache_key(caplog) -> None:
     keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
     assert len(keys) == 5
@@ -337,3 +472,499 @@ def test_cached_query_corrupt_cache_treated_as_miss(caplog, monkeypatch) -> None
     # Should have refetched valid data from datastore
     assert len(result) == 3
     assert all(model.required_prop is not None for model in result)
+
+
+def test_tiered_cached_query() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = TieredDummyModelRangeQuery(min=0, max=2)
+    assert len(query.fetch()) == 3
+    assert TieredQueryCache.stats()["local"] == {"hits": 0, "misses": 1}
+    assert TieredQueryCache.stats()["memcache"] == {"hits": 0, "misses": 1}
+    assert TieredQueryCache.stats()["datastore"] == {"hits": 0, "misses": 1}
+    assert CachedQueryResult.get_by_id(query.cache_key) is not None
+
+    # The second fetch is served from the local tier
+    query = TieredDummyModelRangeQuery(min=0, max=2)
+    with patch.object(CachedQueryResult, "get_by_id_async") as mock_get:
+        assert len(query.fetch()) == 3
+    mock_get.assert_not_called()
+    assert TieredQueryCache.stats()["local"] == {"hits": 1, "misses": 1}
+
+    # Once the local tier is gone, memcache serves it and refills the local tier
+    TieredQueryCache._local.clear()
+    with patch.object(CachedQueryResult, "get_by_id_async") as mock_get:
+        assert len(query.fetch()) == 3
+        assert len(query.fetch()) == 3
+    mock_get.assert_not_called()
+    assert TieredQueryCache.stats()["memcache"] == {"hits": 1, "misses": 1}
+    assert TieredQueryCache.stats()["local"] == {"hits": 2, "misses": 2}
+
+
+def test_tiered_cached_query_backfills_from_datastore() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = TieredDummyModelRangeQuery(min=0, max=2)
+    query.fetch()
+    TieredQueryCache.delete_multi([query.cache_key])
+    TieredQueryCache.reset()
+
+    assert len(query.fetch()) == 3
+    assert TieredQueryCache.stats()["datastore"] == {"hits": 1, "misses": 0}
+
+    assert len(query.fetch()) == 3
+    assert TieredQueryCache.stats()["local"] == {"hits": 1, "misses": 1}
+
+
+def test_tiered_cached_dict_query() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = TieredDummyModelRangeQuery(min=0, max=2)
+    result = query.fetch_dict(ApiMajorVersion.API_V3)
+    assert len(result) == 3
+    assert (
+        CachedQueryResult.get_by_id(query.dict_cache_key(ApiMajorVersion.API_V3))
+        is not None
+    )
+
+    with patch.object(CachedQueryResult, "get_by_id_async") as mock_get:
+        assert query.fetch_dict(ApiMajorVersion.API_V3) == result
+    mock_get.assert_not_called()
+
+
+def test_tiered_clear_cache() -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = TieredDummyModelRangeQuery(min=0, max=2)
+    assert len(query.fetch()) == 3
+    assert len(query.fetch_dict(ApiMajorVersion.API_V3)) == 3
+
+    ndb.delete_multi(keys[:1])
+    TieredDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+    assert len(CachedQueryResult.query().fetch()) == 0
+
+    # Every tier was invalidated, so we see the fresh value
+    query = TieredDummyModelRangeQuery(min=0, max=2)
+    assert len(query.fetch()) == 2
+    assert len(query.fetch_dict(ApiMajorVersion.API_V3)) == 2
+
+
+def test_fetch_dict_multi() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    queries: List[CachedDatabaseQuery] = [
+        KeyedDummyModelRangeQuery(min=0, max=2),
+        TieredDummyModelRangeQuery(min=1, max=4),
+        KeyedDummyModelRangeQuery(min=3, max=3),
+    ]
+    results = CachedDatabaseQuery.fetch_dict_multi(queries, ApiMajorVersion.API_V3)
+    assert [len(r) for r in results] == [3, 4, 1]
+
+    # Every miss was written back
+    for query in queries:
+        cache_key = query.dict_cache_key(ApiMajorVersion.API_V3)
+        assert CachedQueryResult.get_by_id(cache_key) is not None
+
+    # And the results match what a regular fetch returns
+    for query, result in zip(queries, results):
+        assert query.fetch_dict(ApiMajorVersion.API_V3) == result
+
+
+def test_fetch_dict_multi_batches_lookups() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    queries: List[CachedDatabaseQuery] = [
+        KeyedDummyModelRangeQuery(min=i, max=i) for i in range(0, 5)
+    ]
+    CachedDatabaseQuery.fetch_dict_multi(queries, ApiMajorVersion.API_V3)
+
+    with (
+        patch.object(
+            ndb, "get_multi_async", wraps=ndb.get_multi_async
+        ) as mock_get_multi,
+        patch.object(KeyedDummyModelRangeQuery, "_query_async") as mock_query,
+    ):
+        results = CachedDatabaseQuery.fetch_dict_multi(queries, ApiMajorVersion.API_V3)
+
+    mock_get_multi.assert_called_once()
+    mock_query.assert_not_called()
+    assert results == [[{"int_val": i}] for i in range(0, 5)]
+
+
+def test_fetch_dict_multi_uses_tiered_cache() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = TieredDummyModelRangeQuery(min=0, max=2)
+    expected = query.fetch_dict(ApiMajorVersion.API_V3)
+
+    with patch.object(CachedQueryResult, "get_by_id_async") as mock_get:
+        results = CachedDatabaseQuery.fetch_dict_multi([query], ApiMajorVersion.API_V3)
+    mock_get.assert_not_called()
+    assert results == [expected]
+
+
+def test_fetch_dict_multi_empty() -> None:
+    assert CachedDatabaseQuery.fetch_dict_multi([], ApiMajorVersion.API_V3) == []
+
+
+def test_fetch_dict_multi_put_exception_logs_cache_key(caplog) -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = KeyedDummyModelRangeQuery(min=0, max=2)
+    with caplog.at_level(logging.WARNING):
+        with patch.object(ndb, "put_multi_async", side_effect=Exception("too large")):
+            results = CachedDatabaseQuery.fetch_dict_multi(
+                [query], ApiMajorVersion.API_V3
+            )
+    assert len(results[0]) == 3
+    assert query.dict_cache_key(ApiMajorVersion.API_V3) in caplog.text
+
+
+def test_stale_while_revalidate_marks_stale() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleDummyModelRangeQuery(min=0, max=2)
+    query.fetch()
+    query.fetch_dict(ApiMajorVersion.API_V3)
+
+    cached_results = CachedQueryResult.query().fetch()
+    assert len(cached_results) == 2
+
+    with patch.object(ndb, "get_multi", wraps=ndb.get_multi) as mock_get:
+        StaleDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+    # Results aren't read or rewritten to mark them stale
+    mock_get.assert_not_called()
+    assert CachedQueryResult.query().fetch() == cached_results
+    assert all(
+        cached_result.invalidated_by(
+            CachedQueryResultInvalidation.get_by_id(cached_result.key.id())
+        )
+        for cached_result in cached_results
+    )
+
+
+def test_stale_while_revalidate_recompute_started_before_invalidation() -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleDummyModelRangeQuery(min=0, max=2)
+    assert len(query.fetch()) == 3
+    ndb.delete_multi(keys[:1])
+    StaleDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+
+    # The models change again while the entry is being recomputed
+    query_async = StaleDummyModelRangeQuery._query_async
+
+    def query_then_invalidate(self, *args, **kwargs):
+        result = query_async(self, *args, **kwargs)
+        StaleDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+        return result
+
+    with patch.object(StaleDummyModelRangeQuery, "_query_async", query_then_invalidate):
+        assert len(query.fetch()) == 2
+
+    # The recomputed result is written, but is still stale
+    cached_result = none_throws(CachedQueryResult.get_by_id(query.cache_key))
+    assert len(cached_result.result) == 2
+    assert cached_result.invalidated_by(
+        CachedQueryResultInvalidation.get_by_id(query.cache_key)
+    )
+
+
+def test_stale_while_revalidate_recomputes_with_lease(caplog) -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleDummyModelRangeQuery(min=0, max=2)
+    assert len(query.fetch()) == 3
+
+    ndb.delete_multi(keys[:1])
+    StaleDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+
+    with caplog.at_level(logging.INFO):
+        assert len(query.fetch()) == 2
+    assert f"Recomputed stale cache entry {query.cache_key}" in caplog.text
+
+    cached_result = none_throws(CachedQueryResult.get_by_id(query.cache_key))
+    assert not cached_result.invalidated_by(
+        CachedQueryResultInvalidation.get_by_id(query.cache_key)
+    )
+    assert len(cached_result.result) == 2
+
+    # The lease has been released
+    assert (
+        MemcacheClient.get().get(
+            StaleDummyModelRangeQuery._recompute_lease_key(query.cache_key)
+        )
+        is None
+    )
+
+
+def test_stale_while_revalidate_serves_stale_while_leased(caplog) -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleDummyModelRangeQuery(min=0, max=2)
+    assert len(query.fetch()) == 3
+    assert len(query.fetch_dict(ApiMajorVersion.API_V3)) == 3
+
+    ndb.delete_multi(keys[:1])
+    StaleDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+
+    # Another request is already recomputing this entry
+    assert StaleDummyModelRangeQuery._acquire_recompute_lease(
+        query.cache_key
+    ).get_result()
+    assert StaleDummyModelRangeQuery._acquire_recompute_lease(
+        query.dict_cache_key(ApiMajorVersion.API_V3)
+    ).get_result()
+
+    with patch.object(StaleDummyModelRangeQuery, "_query_async") as mock_query:
+        assert len(query.fetch()) == 3
+        assert len(query.fetch_dict(ApiMajorVersion.API_V3)) == 3
+        assert CachedDatabaseQuery.fetch_dict_multi(
+            [query], ApiMajorVersion.API_V3
+        ) == [[{"int_val": i} for i in range(0, 3)]]
+    mock_query.assert_not_called()
+
+    # The lease holder logs how many requests piled up behind it
+    with caplog.at_level(logging.INFO):
+        StaleDummyModelRangeQuery._release_recompute_lease(
+            query.cache_key, True
+        ).get_result()
+    assert "Concurrent requests during recompute: 1" in caplog.text
+
+
+def test_stale_while_revalidate_miss_without_lease_skips_write() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleDummyModelRangeQuery(min=0, max=2)
+    assert StaleDummyModelRangeQuery._acquire_recompute_lease(
+        query.cache_key
+    ).get_result()
+
+    # Nothing to serve, so compute inline, but leave the write to the lease holder
+    assert len(query.fetch()) == 3
+    assert CachedQueryResult.get_by_id(query.cache_key) is None
+
+
+@pytest.mark.parametrize("fetch", ["fetch", "fetch_dict", "fetch_dict_multi"])
+def test_stale_while_revalidate_releases_lease_on_failure(fetch: str) -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleDummyModelRangeQuery(min=0, max=2)
+    query.fetch()
+    query.fetch_dict(ApiMajorVersion.API_V3)
+
+    ndb.delete_multi(keys[:1])
+    StaleDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+
+    with patch.object(
+        StaleDummyModelRangeQuery, "_query_async", side_effect=Exception("boom")
+    ):
+        with pytest.raises(Exception, match="boom"):
+            if fetch == "fetch":
+                query.fetch()
+            elif fetch == "fetch_dict":
+                query.fetch_dict(ApiMajorVersion.API_V3)
+            else:
+                CachedDatabaseQuery.fetch_dict_multi([query], ApiMajorVersion.API_V3)
+
+    # The next request can take the lease and recompute
+    cache_key = (
+        query.cache_key
+        if fetch == "fetch"
+        else query.dict_cache_key(ApiMajorVersion.API_V3)
+    )
+    assert (
+        MemcacheClient.get().get(
+            StaleDummyModelRangeQuery._recompute_lease_key(cache_key)
+        )
+        is None
+    )
+
+
+def test_fetch_dict_multi_recomputes_stale() -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleDummyModelRangeQuery(min=0, max=2)
+    CachedDatabaseQuery.fetch_dict_multi([query], ApiMajorVersion.API_V3)
+
+    ndb.delete_multi(keys[:1])
+    StaleDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+
+    results = CachedDatabaseQuery.fetch_dict_multi([query], ApiMajorVersion.API_V3)
+    assert len(results[0]) == 2
+    cache_key = query.dict_cache_key(ApiMajorVersion.API_V3)
+    cached_result = none_throws(CachedQueryResult.get_by_id(cache_key))
+    assert not cached_result.invalidated_by(
+        CachedQueryResultInvalidation.get_by_id(cache_key)
+    )
+
+
+def test_dict_result_codec() -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = JsonDummyModelRangeQuery(min=0, max=2)
+    result = query.fetch_dict(ApiMajorVersion.API_V3)
+    assert len(result) == 3
+
+    cache_key = query.dict_cache_key(ApiMajorVersion.API_V3)
+    cached_result = none_throws(CachedQueryResult.get_by_id(cache_key))
+    assert cached_result.codec == JsonZlibCodec.NAME
+    assert cached_result.result_dict is None
+    assert JsonZlibCodec.decode(cached_result.result_encoded) == result
+
+    # Served from the cache, even after the underlying data is gone
+    ndb.delete_multi(keys)
+    assert (
+        JsonDummyModelRangeQuery(min=0, max=2).fetch_dict(ApiMajorVersion.API_V3)
+        == result
+    )
+    assert CachedDatabaseQuery.fetch_dict_multi(
+        [JsonDummyModelRangeQuery(min=0, max=2)], ApiMajorVersion.API_V3
+    ) == [result]
+
+
+def test_legacy_dict_result() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = LegacyDictDummyModelRangeQuery(min=0, max=2)
+    result = query.fetch_dict(ApiMajorVersion.API_V3)
+
+    cache_key = query.dict_cache_key(ApiMajorVersion.API_V3)
+    cached_result = none_throws(CachedQueryResult.get_by_id(cache_key))
+    assert cached_result.codec is None
+    assert cached_result.result_encoded is None
+    assert cached_result.result_dict == result
+    assert query.fetch_dict(ApiMajorVersion.API_V3) == result
+
+
+def test_cached_query_validates_once_per_fetch(monkeypatch) -> None:
+    ndb.put_multi(
+        [
+            DummyModelWithRequiredProp(
+                id=f"{i}", required_prop=f"value_{i}", int_prop=i
+            )
+            for i in range(0, 5)
+        ]
+    )
+    query = CachedDummyModelWithRequiredPropQuery(min=0, max=2)
+    query.fetch()
+    ndb.get_context().clear_cache()
+
+    with patch.object(
+        CachedQueryResult,
+        "_validate_result_properties",
+        autospec=True,
+        return_value=False,
+    ) as mock_validate:
+        assert len(query.fetch()) == 3
+    assert mock_validate.call_count == 1
+
+
+def _serialize(result: List[DummyDict]) -> bytes:
+    return json.dumps(result).encode()
+
+
+def test_fetch_json() -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = JsonResponseDummyModelRangeQuery(min=0, max=2)
+    cached_json = query.fetch_json(ApiMajorVersion.API_V3, "full", _serialize)
+    assert json.loads(cached_json.body) == [{"int_val": i} for i in range(0, 3)]
+    assert cached_json.etag == hashlib.sha1(cached_json.body).hexdigest()
+
+    cached_result = none_throws(
+        CachedQueryResult.get_by_id(
+            query.json_cache_key(ApiMajorVersion.API_V3, "full")
+        )
+    )
+    assert cached_result.result_encoded == cached_json.body
+    assert cached_result.etag == cached_json.etag
+
+    # Served from the cache without serializing again
+    ndb.delete_multi(keys)
+    with patch.object(JsonResponseDummyModelRangeQuery, "_query_async") as mock_query:
+        assert (
+            JsonResponseDummyModelRangeQuery(min=0, max=2).fetch_json(
+                ApiMajorVersion.API_V3, "full", lambda _: b"unused"
+            )
+            == cached_json
+        )
+    mock_query.assert_not_called()
+
+
+def test_fetch_json_variants() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = JsonResponseDummyModelRangeQuery(min=0, max=2)
+    full = query.fetch_json(ApiMajorVersion.API_V3, "full", _serialize)
+    keys = query.fetch_json(
+        ApiMajorVersion.API_V3, "keys", lambda result: _serialize(result[:1])
+    )
+    assert full.body != keys.body
+    assert query.fetch_json(ApiMajorVersion.API_V3, "keys", _serialize) == keys
+
+    with pytest.raises(ValueError, match="Unknown JSON variant: search"):
+        query.fetch_json(ApiMajorVersion.API_V3, "search", _serialize)
+
+
+def test_fetch_json_disabled() -> None:
+    ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = KeyedDummyModelRangeQuery(min=0, max=2)
+    cached_json = query.fetch_json(ApiMajorVersion.API_V3, "full", _serialize)
+    assert cached_json.etag == hashlib.sha1(cached_json.body).hexdigest()
+    assert (
+        CachedQueryResult.get_by_id(
+            query.json_cache_key(ApiMajorVersion.API_V3, "full")
+        )
+        is None
+    )
+
+
+def test_clear_cache_deletes_json() -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleJsonResponseDummyModelRangeQuery(min=0, max=2)
+    query.fetch_json(ApiMajorVersion.API_V3, "full", _serialize)
+    query.fetch_json(ApiMajorVersion.API_V3, "simple", _serialize)
+
+    ndb.delete_multi(keys[:1])
+    StaleJsonResponseDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+
+    # JSON bodies are deleted outright, even with stale-while-revalidate
+    for variant in ["full", "simple"]:
+        assert (
+            CachedQueryResult.get_by_id(
+                query.json_cache_key(ApiMajorVersion.API_V3, variant)
+            )
+            is None
+        )
+
+    cached_json = StaleJsonResponseDummyModelRangeQuery(min=0, max=2).fetch_json(
+        ApiMajorVersion.API_V3, "full", _serialize
+    )
+    assert json.loads(cached_json.body) == [{"int_val": i} for i in range(1, 3)]
+
+
+def test_fetch_json_does_not_cache_stale_dict() -> None:
+    keys = ndb.put_multi([DummyModel(id=f"{i}", int_prop=i) for i in range(0, 5)])
+
+    query = StaleJsonResponseDummyModelRangeQuery(min=0, max=2)
+    query.fetch_dict(ApiMajorVersion.API_V3)
+
+    ndb.delete_multi(keys[:1])
+    StaleJsonResponseDummyModelRangeQuery.delete_cache_multi({query.cache_key})
+
+    # Another request is already recomputing the dict, so we serve it stale
+    assert StaleJsonResponseDummyModelRangeQuery._acquire_recompute_lease(
+        query.dict_cache_key(ApiMajorVersion.API_V3)
+    ).get_result()
+    query = StaleJsonResponseDummyModelRangeQuery(min=0, max=2)
+    cached_json = query.fetch_json(ApiMajorVersion.API_V3, "full", _serialize)
+    assert len(json.loads(cached_json.body)) == 3
+    assert (
+        CachedQueryResult.get_by_id(
+            query.json_cache_key(ApiMajorVersion.API_V3, "full")
+        )
+        is None
+    )
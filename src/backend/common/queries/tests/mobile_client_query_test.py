@@ -145,3 +145,28 @@ def test_delete_for_messaging_id():
     assert clients_two == [messaging_id_three]
 
     MobileClientQuery.delete_for_messaging_id("does_not_exist")
+
+
+def test_delete_for_messaging_ids_async():
+    for user_id, messaging_id in [
+        ("user_id_one", "messaging_id1"),
+        ("user_id_one", "messaging_id2"),
+        ("user_id_two", "messaging_id1"),
+        ("user_id_two", "messaging_id3"),
+    ]:
+        MobileClient(
+            parent=ndb.Key(Account, user_id),
+            user_id=user_id,
+            messaging_id=messaging_id,
+            client_type=ClientType.OS_IOS,
+        ).put()
+
+    deleted = MobileClientQuery.delete_for_messaging_ids_async(
+        ["messaging_id1", "messaging_id2", "messaging_id1", "does_not_exist"]
+    ).get_result()
+
+    assert deleted == 3
+    assert [
+        client.messaging_id
+        for client in MobileClientQuery(user_ids=["user_id_one", "user_id_two"]).fetch()
+    ] == ["messaging_id3"]
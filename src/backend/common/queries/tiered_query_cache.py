@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import enum
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Generator, Iterable, Optional, TypedDict
+
+from backend.common.cache.lru_cache import LRUCache
+from backend.common.memcache import MemcacheClient
+from backend.common.tasklets import typed_tasklet
+
+
+@enum.unique
+class CacheTier(enum.Enum):
+    LOCAL = "local"
+    MEMCACHE = "memcache"
+    DATASTORE = "datastore"
+
+
+class TierStats(TypedDict):
+    hits: int
+    misses: int
+
+
+class TieredQueryCache:
+    """
+    Read-through tiers that sit in front of the CachedQueryResult entities:
+    a bounded in-process LRU, then memcache, then the Datastore entity itself.
+
+    Queries opt in by setting `CachedDatabaseQuery.TIERED_CACHING_ENABLED`.
+    Invalidation via `CachedDatabaseQuery.delete_cache_multi` clears the local
+    LRU on the current instance and memcache everywhere, so other instances can
+    serve a stale value for at most `LOCAL_TTL`.
+
+    `None` results are only cached at the Datastore tier.
+    """
+
+    LOCAL_TTL = timedelta(seconds=60)
+    LOCAL_MAX_ITEMS = 2000
+    LOCAL_MAX_BYTES = 64 * 1024 * 1024
+    MEMCACHE_TTL = timedelta(minutes=10)
+    MEMCACHE_KEY_FORMAT = "cached_query_result:{}"
+
+    _local: LRUCache[str, Any] = LRUCache(
+        max_items=LOCAL_MAX_ITEMS,
+        max_bytes=LOCAL_MAX_BYTES,
+        ttl=LOCAL_TTL,
+    )
+    _stats: Dict[CacheTier, TierStats] = {
+        tier: TierStats(hits=0, misses=0) for tier in CacheTier
+    }
+
+    @classmethod
+    def _memcache_key(cls, cache_key: str) -> bytes:
+        return cls.MEMCACHE_KEY_FORMAT.format(cache_key).encode()
+
+    @classmethod
+    def record(cls, tier: CacheTier, hit: bool) -> None:
+        cls._stats[tier]["hits" if hit else "misses"] += 1
+
+    @classmethod
+    @typed_tasklet
+    def get_async(cls, cache_key: str) -> Generator[Any, Any, Optional[Any]]:
+        """
+        Looks up a result in the local and memcache tiers. Memcache hits are
+        backfilled into the local tier. Returns None on a miss in both.
+        """
+        result = cls._local.get(cache_key)
+        cls.record(CacheTier.LOCAL, result is not None)
+        if result is not None:
+            return result
+
+        try:
+            result = yield MemcacheClient.get().get_async(cls._memcache_key(cache_key))
+        except Exception:
+            logging.exception(f"Tiered cache memcache get failed: {cache_key}")
+            result = None
+        cls.record(CacheTier.MEMCACHE, result is not None)
+        if result is not None:
+            cls._local.set(cache_key, result)
+        return result
+
+    @classmethod
+    @typed_tasklet
+    def set_async(cls, cache_key: str, result: Any) -> Generator[Any, Any, None]:
+        if result is None:
+            return
+
+        cls._local.set(cache_key, result)
+
+        try:
+            yield MemcacheClient.get().set_async(
+                cls._memcache_key(cache_key),
+                result,
+                int(cls.MEMCACHE_TTL.total_seconds()),
+            )
+        except Exception:
+            # Most likely the value exceeds the memcache item size limit
+            logging.warning(f"Tiered cache memcache set failed: {cache_key}")
+
+    @classmethod
+    def delete_multi(cls, cache_keys: Iterable[str]) -> None:
+        cache_keys = list(cache_keys)
+        cls._local.delete_multi(cache_keys)
+        MemcacheClient.get().delete_multi(
+            [cls._memcache_key(cache_key) for cache_key in cache_keys]
+        )
+
+    @classmethod
+    def stats(cls) -> Dict[str, TierStats]:
+        return {tier.value: TierStats(**stats) for tier, stats in cls._stats.items()}
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._local.clear()
+        for stats in cls._stats.values():
+            stats["hits"] = 0
+            stats["misses"] = 0
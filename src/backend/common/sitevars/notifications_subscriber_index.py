@@ -0,0 +1,26 @@
+from backend.common.sitevars.sitevar import Sitevar
+
+
+class NotificationsSubscriberIndex(Sitevar[bool]):
+    @staticmethod
+    def key() -> str:
+        return "notifications.subscriber_index"
+
+    @staticmethod
+    def description() -> str:
+        return "For reading notification recipients from the subscriber index, once it's built"
+
+    @staticmethod
+    def default_value() -> bool:
+        return False
+
+    @classmethod
+    def index_ready(cls) -> bool:
+        return cls.get()
+
+    @classmethod
+    def set_index_ready(cls, ready: bool) -> None:
+        cls.update(
+            should_update=lambda v: v is not ready,
+            update_f=lambda _: ready,
+        )
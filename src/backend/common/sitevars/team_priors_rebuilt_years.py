@@ -0,0 +1,29 @@
+from typing import List
+
+from backend.common.models.keys import Year
+from backend.common.sitevars.sitevar import Sitevar
+
+
+class TeamPriorsRebuiltYears(Sitevar[List[Year]]):
+    @staticmethod
+    def key() -> str:
+        return "team_priors.rebuilt_years"
+
+    @staticmethod
+    def description() -> str:
+        return "Seasons whose team priors have been rebuilt, so they can be read instead of each team's events"
+
+    @staticmethod
+    def default_value() -> List[Year]:
+        return []
+
+    @classmethod
+    def rebuilt(cls, year: Year) -> bool:
+        return year in cls.get()
+
+    @classmethod
+    def set_rebuilt(cls, year: Year) -> None:
+        cls.update(
+            should_update=lambda v: year not in v,
+            update_f=lambda v: sorted(v + [year]),
+        )
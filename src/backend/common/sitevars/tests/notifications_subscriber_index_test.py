@@ -0,0 +1,21 @@
+from backend.common.sitevars.notifications_subscriber_index import (
+    NotificationsSubscriberIndex,
+)
+
+
+def test_key():
+    assert NotificationsSubscriberIndex.key() == "notifications.subscriber_index"
+
+
+def test_default_sitevar():
+    default_sitevar = NotificationsSubscriberIndex._fetch_sitevar()
+    assert default_sitevar is not None
+    assert default_sitevar.contents is False
+
+
+def test_set_index_ready():
+    assert not NotificationsSubscriberIndex.index_ready()
+    NotificationsSubscriberIndex.set_index_ready(True)
+    assert NotificationsSubscriberIndex.index_ready()
+    NotificationsSubscriberIndex.set_index_ready(False)
+    assert not NotificationsSubscriberIndex.index_ready()
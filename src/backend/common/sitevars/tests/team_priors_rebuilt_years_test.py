@@ -0,0 +1,21 @@
+from backend.common.sitevars.team_priors_rebuilt_years import TeamPriorsRebuiltYears
+
+
+def test_key():
+    assert TeamPriorsRebuiltYears.key() == "team_priors.rebuilt_years"
+
+
+def test_default_sitevar():
+    default_sitevar = TeamPriorsRebuiltYears._fetch_sitevar()
+    assert default_sitevar is not None
+    assert default_sitevar.contents == []
+
+
+def test_set_rebuilt():
+    assert not TeamPriorsRebuiltYears.rebuilt(2019)
+    TeamPriorsRebuiltYears.set_rebuilt(2019)
+    TeamPriorsRebuiltYears.set_rebuilt(2018)
+    TeamPriorsRebuiltYears.set_rebuilt(2019)
+    assert TeamPriorsRebuiltYears.rebuilt(2019)
+    assert not TeamPriorsRebuiltYears.rebuilt(2020)
+    assert TeamPriorsRebuiltYears.get() == [2018, 2019]
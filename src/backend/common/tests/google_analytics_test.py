@@ -125,3 +125,62 @@ def test_GoogleAnalytics_track_event_urlfetch_failure() -> None:
             )
             mock_warning.assert_called_once()
             assert "Failed to send GA4 event" in mock_warning.call_args[0][0]
+
+
+def test_GoogleAnalytics_track_events() -> None:
+    from backend.common.sitevars.google_analytics_id import GoogleAnalyticsID
+
+    sitevar = GoogleAnalyticsID._fetch_sitevar()
+    sitevar.contents["GOOGLE_ANALYTICS_ID"] = "G-ABC123DEF4"
+    sitevar.contents["API_SECRET"] = "test_secret"
+
+    mock_future = MagicMock()
+    mock_context = MagicMock()
+    mock_context.urlfetch.return_value = mock_future
+
+    events = [("client_a", "test_event", {"i": i}) for i in range(30)] + [
+        ("client_b", "test_event", {"i": 0})
+    ]
+    with patch("google.appengine.ext.ndb.get_context", return_value=mock_context):
+        GoogleAnalytics.track_events(events)
+
+    # client_a is split at 25 events per request
+    assert mock_context.urlfetch.call_count == 3
+    assert mock_future.get_result.call_count == 3
+
+    import uuid
+
+    payloads = [
+        json.loads(call.kwargs["payload"].decode("utf-8"))
+        for call in mock_context.urlfetch.call_args_list
+    ]
+    assert [(payload["client_id"], len(payload["events"])) for payload in payloads] == [
+        (str(uuid.uuid3(uuid.NAMESPACE_X500, "client_a")), 25),
+        (str(uuid.uuid3(uuid.NAMESPACE_X500, "client_a")), 5),
+        (str(uuid.uuid3(uuid.NAMESPACE_X500, "client_b")), 1),
+    ]
+    assert payloads[1]["events"][0] == {"name": "test_event", "params": {"i": 25}}
+
+
+def test_GoogleAnalytics_track_events_urlfetch_failure() -> None:
+    from backend.common.sitevars.google_analytics_id import GoogleAnalyticsID
+
+    sitevar = GoogleAnalyticsID._fetch_sitevar()
+    sitevar.contents["GOOGLE_ANALYTICS_ID"] = "G-ABC123DEF4"
+    sitevar.contents["API_SECRET"] = "test_secret"
+
+    failed_future = MagicMock()
+    failed_future.get_result.side_effect = Exception("urlfetch deadline exceeded")
+    ok_future = MagicMock()
+    mock_context = MagicMock()
+    mock_context.urlfetch.side_effect = [failed_future, ok_future]
+
+    with patch("google.appengine.ext.ndb.get_context", return_value=mock_context):
+        with patch("logging.warning") as mock_warning:
+            GoogleAnalytics.track_events(
+                [("client_a", "test_event", {}), ("client_b", "test_event", {})]
+            )
+            mock_warning.assert_called_once()
+
+    # The other request still completes
+    ok_future.get_result.assert_called_once()
@@ -5,12 +5,14 @@ from wsgiref.types import WSGIApplication
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 from flask import Flask
+from google.appengine.ext import testbed
 from werkzeug.test import create_environ, run_wsgi_app
 from werkzeug.wrappers import Request
 
 from backend.common import middleware
 from backend.common.environment import Environment
 from backend.common.logging import logging_context
+from backend.common.manipulators.team_manipulator import TeamManipulator
 from backend.common.middleware import (
     _set_secret_key,
     AfterResponseMiddleware,
@@ -18,6 +20,7 @@ from backend.common.middleware import (
     install_middleware,
     TraceRequestMiddleware,
 )
+from backend.common.models.team import Team
 from backend.common.profiler import trace_context
 from backend.common.run_after_response import run_after_response
 
@@ -188,6 +191,32 @@ def test_AfterResponseMiddleware_callable(app: Flask) -> None:
     callback2.assert_called_once()
 
 
+def test_AfterResponseMiddleware_buffers_post_update_hooks(
+    app: Flask, taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub
+) -> None:
+    middleware = cast(WSGIApplication, AfterResponseMiddleware(app))
+    tasks_during_request = []
+
+    @app.route("/team")
+    def test_handler():
+        TeamManipulator.createOrUpdate(Team(id="frc254", team_number=254))
+        TeamManipulator.createOrUpdate(
+            Team(id="frc254", team_number=254, nickname="Cheesy Poofs")
+        )
+        tasks_during_request.extend(
+            taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+        )
+        return "Hello!"
+
+    environ = create_environ(path="/team", base_url="http://localhost")
+    run_wsgi_app(middleware, environ, buffered=True)
+
+    # Both writes are flushed together, once the request is handled
+    assert tasks_during_request == []
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="post-update-hooks")
+    assert len(tasks) == 1
+
+
 @patch.object(middleware, "_set_secret_key")
 def test_install_middleware(mock_set_secret_key: Mock, app: Flask) -> None:
     assert not isinstance(app.wsgi_app, AfterResponseMiddleware)
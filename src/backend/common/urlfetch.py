@@ -50,6 +50,14 @@ class TypedURLFetchResult(Generic[T]):
     def url(self) -> str:
         return self.final_url or self.request_url
 
+    @property
+    def json_type(self) -> type[T]:
+        return self._json_type
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
     def json(self) -> T | None:
         if not self.content:
             return None
@@ -73,6 +81,30 @@ class TypedURLFetchResult(Generic[T]):
         return _URLFetchResult(response_proto)
 
 
+class NotModifiedURLFetchResult(TypedURLFetchResult[T]):
+    """
+    A 304 response to a conditional request. `content_hash` identifies the
+    unchanged body the request's validators were returned with, and
+    `content` is that body when it was cached alongside them (otherwise it's
+    empty).
+    """
+
+    content_hash: str
+
+    def __init__(
+        self,
+        url: str,
+        res: _URLFetchResult,
+        json_type: type[T],
+        content_hash: str,
+        content: Optional[str] = None,
+    ) -> None:
+        super().__init__(url, res, json_type)
+        self.content_hash = content_hash
+        if content is not None:
+            self.content = content
+
+
 class URLFetchResult(TypedURLFetchResult[JSON]):
 
     def __init__(self, url: str, res: _URLFetchResult) -> None:
@@ -7,8 +7,10 @@ from google.appengine.api import apiproxy_rpc
 from google.appengine.api import datastore_types
 from google.appengine.ext import ndb, testbed
 
+from backend.common.cache.api_auth_access_cache import ApiAuthAccessCache
 from backend.common.context_cache import context_cache
 from backend.common.models.cached_query_result import CachedQueryResult
+from backend.common.queries.tiered_query_cache import TieredQueryCache
 from backend.common.storage.clients.cloudstorage.stub_dispatcher import (
     dispatch as dispatch_gcs_stub,
 )
@@ -42,6 +44,16 @@ def clear_context_cache(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(context_cache, "CACHE_DATA", {})
 
 
+@pytest.fixture(autouse=True)
+def clear_tiered_query_cache() -> None:
+    TieredQueryCache.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_api_auth_access_cache() -> None:
+    ApiAuthAccessCache.reset()
+
+
 @pytest.fixture()
 def gae_testbed() -> Generator[testbed.Testbed, None, None]:
     tb = testbed.Testbed()
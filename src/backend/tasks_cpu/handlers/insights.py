@@ -1,5 +1,6 @@
 import logging
 import time
+from datetime import datetime, timezone
 from html import escape
 from typing import Optional
 
@@ -20,7 +21,11 @@ from backend.common.helpers.insights_leaderboard_team_helper import (
     InsightsLeaderboardTeamCalculator,
 )
 from backend.common.helpers.insights_notable_helper import InsightsNotableHelper
-from backend.common.helpers.insights_v2.registry import make_all_insights
+from backend.common.helpers.insights_v2.registry import (
+    make_all_insights,
+    pending_season_partials,
+    store_season_partials,
+)
 from backend.common.helpers.season_helper import SeasonHelper
 from backend.common.manipulators.insight_manipulator import InsightManipulator
 from backend.common.manipulators.insight_v2_manipulator import InsightV2Manipulator
@@ -31,6 +36,11 @@ from backend.common.queries.district_query import DistrictsInYearQuery
 
 blueprint = Blueprint("insights", __name__)
 
+# Give the per-season partial tasks a head start before the first reduce
+INSIGHTS_V2_REDUCE_COUNTDOWN = 120
+# The reduce task is retried (see queue.yaml) this many times while waiting
+INSIGHTS_V2_REDUCE_MAX_WAITS = 10
+
 
 @blueprint.route("/backend-tasks-b2/enqueue/math/insights/<kind>/<int:year>")
 @blueprint.route(
@@ -429,13 +439,87 @@ def enqueue_insights_v2_all() -> Response:
             target="py3-tasks-cpu",
             queue_name="backend-tasks",
         )
+    _enqueue_insights_v2_all_time()
 
     return make_response("enqueued insights_v2 for all years")
 
 
+@blueprint.route("/backend-tasks-b2/enqueue/math/insights_v2/all_time")
+def enqueue_insights_v2_all_time() -> Response:
+    """
+    Enqueues the all-time (year=0) insights_v2 as a map/reduce: one task per
+    season stores that season's calculator partials, and a reduce task merges
+    them into the year=0 insights once they're all ready.
+    """
+    _enqueue_insights_v2_all_time(
+        refresh_partials=request.args.get("refresh_partials") == "true"
+    )
+
+    return make_response("enqueued all-time insights_v2")
+
+
+def _enqueue_insights_v2_all_time(refresh_partials: bool = False) -> None:
+    params = {"refresh_partials": "true"} if refresh_partials else {}
+    for year in SeasonHelper.get_valid_years():
+        taskqueue.add(
+            url=url_for("insights.do_insights_v2_partials", year=year, **params),
+            method="GET",
+            target="py3-tasks-cpu",
+            queue_name="insights-v2",
+        )
+
+    taskqueue.add(
+        url=url_for(
+            "insights.do_insights_v2_all_time", since=int(time.time()), **params
+        ),
+        method="GET",
+        target="py3-tasks-cpu",
+        queue_name="insights-v2",
+        countdown=INSIGHTS_V2_REDUCE_COUNTDOWN,
+    )
+
+
 @blueprint.route("/backend-tasks-b2/do/math/insights_v2/<int:year>")
 def do_insights_v2(year: Year) -> Response:
-    insights = make_all_insights(year)
+    insights = make_all_insights(
+        year, refresh_partials=request.args.get("refresh_partials") == "true"
+    )
+
+    if insights:
+        InsightV2Manipulator.createOrUpdate(insights)
+
+    return make_response(repr(insights))
+
+
+@blueprint.route("/backend-tasks-b2/do/math/insights_v2/partials/<int:year>")
+def do_insights_v2_partials(year: Year) -> Response:
+    store_season_partials(
+        year, refresh_partials=request.args.get("refresh_partials") == "true"
+    )
+
+    return make_response(f"stored insights_v2 partials for year {year}")
+
+
+@blueprint.route("/backend-tasks-b2/do/math/insights_v2/all_time")
+def do_insights_v2_all_time() -> Response:
+    """
+    Merges the stored per-season partials into the year=0 insights. While
+    partials are still being computed, this fails so the task is retried;
+    after INSIGHTS_V2_REDUCE_MAX_WAITS retries, whatever is still missing is
+    computed inline.
+    """
+    since = datetime.fromtimestamp(
+        request.args.get("since", type=int, default=0), timezone.utc
+    ).replace(tzinfo=None)
+    refresh_partials = request.args.get("refresh_partials") == "true"
+
+    pending = pending_season_partials(since, refresh_partials)
+    retry_count = int(request.headers.get("X-AppEngine-TaskRetryCount", 0))
+    if pending and retry_count < INSIGHTS_V2_REDUCE_MAX_WAITS:
+        logging.info(f"Waiting on insights_v2 partials for {pending}")
+        return make_response(f"waiting on partials for {pending}", 503)
+
+    insights = make_all_insights(0, refresh_partials, partials_since=since)
 
     if insights:
         InsightV2Manipulator.createOrUpdate(insights)
@@ -1,6 +1,10 @@
+from datetime import datetime
+from unittest.mock import patch
+
 from google.appengine.ext import testbed
 from werkzeug.test import Client
 
+from backend.common.helpers.season_helper import SeasonHelper
 from backend.common.models.insight_v2 import InsightV2
 
 
@@ -46,8 +50,108 @@ def test_enqueue_all(
     resp = tasks_cpu_client.get("/backend-tasks-b2/enqueue/math/insights_v2/all")
     assert resp.status_code == 200
 
+    # The per-year insights run one at a time, without retries
     tasks = taskqueue_stub.get_filtered_tasks(queue_names="backend-tasks")
-    assert len(tasks) >= 1
+    assert "/backend-tasks-b2/do/math/insights_v2/2024" in [t.url for t in tasks]
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="insights-v2")
+    urls = [t.url for t in tasks]
+    assert "/backend-tasks-b2/do/math/insights_v2/2024" not in urls
+    assert "/backend-tasks-b2/do/math/insights_v2/partials/2024" in urls
+    assert any(
+        url.startswith("/backend-tasks-b2/do/math/insights_v2/all_time") for url in urls
+    )
+
+
+@patch.object(SeasonHelper, "get_valid_years", return_value=[2023, 2024])
+def test_enqueue_all_time(
+    mock_years,
+    tasks_cpu_client: Client,
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    with patch("time.time", return_value=1700000000):
+        resp = tasks_cpu_client.get(
+            "/backend-tasks-b2/enqueue/math/insights_v2/all_time?refresh_partials=true"
+        )
+    assert resp.status_code == 200
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="insights-v2")
+    assert [t.url for t in tasks] == [
+        "/backend-tasks-b2/do/math/insights_v2/partials/2023?refresh_partials=true",
+        "/backend-tasks-b2/do/math/insights_v2/partials/2024?refresh_partials=true",
+        "/backend-tasks-b2/do/math/insights_v2/all_time?since=1700000000&refresh_partials=true",
+    ]
+
+
+@patch("backend.tasks_cpu.handlers.insights.store_season_partials")
+def test_do_partials(mock_store, tasks_cpu_client: Client) -> None:
+    resp = tasks_cpu_client.get(
+        "/backend-tasks-b2/do/math/insights_v2/partials/2024?refresh_partials=true"
+    )
+    assert resp.status_code == 200
+    mock_store.assert_called_once_with(2024, refresh_partials=True)
+
+
+@patch("backend.tasks_cpu.handlers.insights.make_all_insights")
+@patch(
+    "backend.tasks_cpu.handlers.insights.pending_season_partials",
+    return_value=[2024],
+)
+def test_do_all_time_waits_for_partials(
+    mock_pending, mock_make, tasks_cpu_client: Client
+) -> None:
+    resp = tasks_cpu_client.get(
+        "/backend-tasks-b2/do/math/insights_v2/all_time?since=1700000000"
+    )
+    assert resp.status_code == 503
+    mock_pending.assert_called_once_with(datetime(2023, 11, 14, 22, 13, 20), False)
+    mock_make.assert_not_called()
+
+
+@patch("backend.tasks_cpu.handlers.insights.make_all_insights", return_value=[])
+@patch(
+    "backend.tasks_cpu.handlers.insights.pending_season_partials",
+    return_value=[2024],
+)
+def test_do_all_time_stops_waiting_after_retries(
+    mock_pending, mock_make, tasks_cpu_client: Client
+) -> None:
+    resp = tasks_cpu_client.get(
+        "/backend-tasks-b2/do/math/insights_v2/all_time?since=1700000000",
+        headers={"X-AppEngine-TaskRetryCount": "10"},
+    )
+    assert resp.status_code == 200
+    mock_make.assert_called_once_with(
+        0, False, partials_since=datetime(2023, 11, 14, 22, 13, 20)
+    )
+
+
+@patch.object(SeasonHelper, "get_current_season", return_value=2024)
+@patch.object(SeasonHelper, "get_valid_years", return_value=[2024])
+def test_do_all_time_writes_insights(
+    mock_years,
+    mock_current,
+    tasks_cpu_client: Client,
+    ndb_stub,
+    test_data_importer,
+) -> None:
+    test_data_importer.import_event(
+        __file__, "../../../common/helpers/tests/data/2024nytr.json"
+    )
+    test_data_importer.import_award_list(
+        __file__, "../../../common/helpers/tests/data/2024nytr_awards.json"
+    )
+
+    resp = tasks_cpu_client.get("/backend-tasks-b2/do/math/insights_v2/partials/2024")
+    assert resp.status_code == 200
+
+    with patch("backend.common.helpers.insights_v2.registry._run_season_events") as m:
+        resp = tasks_cpu_client.get(
+            "/backend-tasks-b2/do/math/insights_v2/all_time?since=0"
+        )
+        m.assert_not_called()
+    assert resp.status_code == 200
+    assert InsightV2.query(InsightV2.year == 0).count() > 0
 
 
 def test_delete_by_name_removes_all_years(tasks_cpu_client: Client, ndb_stub) -> None:
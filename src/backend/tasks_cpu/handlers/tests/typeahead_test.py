@@ -0,0 +1,31 @@
+from google.appengine.ext import testbed
+from werkzeug.test import Client
+
+from backend.common.models.team import Team
+from backend.common.models.typeahead_entry import TypeaheadEntry
+
+
+def test_enqueue(
+    tasks_cpu_client: Client,
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    resp = tasks_cpu_client.get("/backend-tasks-b2/enqueue/math/typeaheadcalc")
+    assert resp.status_code == 200
+
+    tasks = taskqueue_stub.get_filtered_tasks(queue_names="backend-tasks")
+    assert len(tasks) == 1
+    assert tasks[0].url == "/backend-tasks-b2/do/math/typeaheadcalc"
+
+
+def test_do_rebuilds_entries(tasks_cpu_client: Client, ndb_stub) -> None:
+    Team(id="frc254", team_number=254, nickname="The Cheesy Poofs").put()
+
+    resp = tasks_cpu_client.get(
+        "/backend-tasks-b2/do/math/typeaheadcalc",
+        headers={"X-Appengine-Taskname": "test"},
+    )
+    assert resp.status_code == 200
+
+    entry = TypeaheadEntry.get_by_id(TypeaheadEntry.ALL_TEAMS_KEY)
+    assert entry is not None
+    assert entry.data_json == '["254 | The Cheesy Poofs"]'
@@ -15,6 +15,7 @@ from backend.common.datafeeds.parsers.parser_base import (
 )
 from backend.common.frc_api import FRCAPI
 from backend.common.frc_api.frc_api import TScoreDetailReturn
+from backend.common.frc_api.response_fingerprints import FRCAPIResponseFingerprints
 from backend.common.frc_api.types import (
     AllianceListModelV2,
     ApiIndexModelV2,
@@ -29,6 +30,7 @@ from backend.common.frc_api.types import (
     SeasonTeamListModelV2,
     TeamAvatarListingsModelV2,
 )
+from backend.common.futures import InstantFuture
 from backend.common.memcache_models.event_sync_status_memcache import (
     EventSyncStatusMemcache,
 )
@@ -49,7 +51,11 @@ from backend.common.models.team import Team
 from backend.common.profiler import Span
 from backend.common.sitevars.apistatus_fmsapi_down import ApiStatusFMSApiDown
 from backend.common.tasklets import typed_tasklet
-from backend.common.urlfetch import TypedURLFetchResult, URLFetchResult
+from backend.common.urlfetch import (
+    NotModifiedURLFetchResult,
+    TypedURLFetchResult,
+    URLFetchResult,
+)
 from backend.tasks_io.datafeeds.parsers.fms_api.fms_api_awards_parser import (
     FMSAPIAwardsParser,
 )
@@ -116,17 +122,37 @@ class DatafeedFMSAPI:
         "tur": "hotu",
     }
 
+    class ResponseUnchanged(Exception):
+        """
+        Raised (with skip_unchanged) when every FRC API response a call needs
+        matches the last one that was processed, so parsing and writes can be
+        skipped.
+        """
+
+        pass
+
     def __init__(
         self,
         sim_time: Optional[datetime.datetime] = None,
         sim_api_version: Optional[str] = None,
         save_response: bool = False,
+        skip_unchanged: bool = False,
     ) -> None:
+        """
+        With skip_unchanged, get_event_matches, get_event_rankings and
+        get_awards raise ResponseUnchanged instead of parsing responses that
+        haven't changed. Callers must call commit_response_fingerprints()
+        once they have written the results, so the next unchanged poll can
+        be skipped.
+        """
         self.api = FRCAPI(
             sim_time=sim_time,
             sim_api_version=sim_api_version,
             save_response=save_response,
+            conditional=skip_unchanged,
         )
+        self._skip_unchanged = skip_unchanged
+        self._pending_fingerprints: Dict[str, str] = {}
 
     @typed_tasklet
     def get_root_info(self) -> Generator[Any, Any, Optional[RootInfo]]:
@@ -238,6 +264,10 @@ class DatafeedFMSAPI:
         )
 
         # 8 subdivisions from 2015-2021 have awards listed under 4 divisions
+        division_response: Optional[TypedURLFetchResult[AwardAssignmentListModelV2]] = (
+            None
+        )
+        valid_team_nums: Set[int] = set()
         if (
             event.event_type_enum == EventType.CMP_DIVISION
             and event.year >= 2015
@@ -255,17 +285,7 @@ class DatafeedFMSAPI:
             else:
                 division = self.SUBDIV_TO_DIV[event.event_short]
 
-            api_awards_response: TypedURLFetchResult[AwardAssignmentListModelV2] = (
-                yield self.api.awards(event.year, event_code=division)
-            )
-            awards += (
-                self._parse(
-                    api_awards_response,
-                    FMSAPIAwardsParser(event, valid_team_nums),
-                    event_key=event_key_name,
-                )
-                or []
-            )
+            division_response = yield self.api.awards(event.year, event_code=division)
 
         api_awards_response: TypedURLFetchResult[AwardAssignmentListModelV2] = (
             yield self.api.awards(
@@ -275,6 +295,25 @@ class DatafeedFMSAPI:
                 ),
             )
         )
+        if division_response is not None:
+            division_response, api_awards_response = yield self._check_unchanged(
+                [division_response, api_awards_response], event_key_name
+            )
+        else:
+            (api_awards_response,) = yield self._check_unchanged(
+                [api_awards_response], event_key_name
+            )
+
+        if division_response is not None:
+            awards += (
+                self._parse(
+                    division_response,
+                    FMSAPIAwardsParser(event, valid_team_nums),
+                    event_key=event_key_name,
+                )
+                or []
+            )
+
         awards += (
             self._parse(
                 api_awards_response,
@@ -314,6 +353,7 @@ class DatafeedFMSAPI:
         api_response: TypedURLFetchResult[EventRankingListModelV2] = (
             yield self.api.rankings(year, api_event_short)
         )
+        (api_response,) = yield self._check_unchanged([api_response], event_key)
         return self._parse(
             api_response, FMSAPIEventRankingsParser(year), event_key=event_key
         )
@@ -369,6 +409,20 @@ class DatafeedFMSAPI:
             playoff_hybrid_schedule_result,
             playoff_scores_result,
         ) = yield (qual_fetches + playoff_fetches)
+        (
+            qual_hybrid_schedule_result,
+            qual_scores_result,
+            playoff_hybrid_schedule_result,
+            playoff_scores_result,
+        ) = yield self._check_unchanged(
+            [
+                qual_hybrid_schedule_result,
+                qual_scores_result,
+                playoff_hybrid_schedule_result,
+                playoff_scores_result,
+            ],
+            event_key,
+        )
 
         qual_matches_merged = self._parse(
             qual_hybrid_schedule_result,
@@ -525,13 +579,97 @@ class DatafeedFMSAPI:
             return event.first_api_code
         return Event.compute_first_api_code(year, event_short)
 
+    @typed_tasklet
+    def _check_unchanged(
+        self,
+        responses: List[TypedURLFetchResult],
+        event_key: Optional[EventKey] = None,
+    ) -> Generator[Any, Any, List[TypedURLFetchResult]]:
+        """
+        Raises ResponseUnchanged if skip_unchanged is set and every response
+        matches its last processed fingerprint. Otherwise, refetches the full
+        body of any not modified responses whose body wasn't cached with
+        their validators, so they can be parsed, and remembers the
+        responses' fingerprints for commit_response_fingerprints().
+        """
+        if not self._skip_unchanged:
+            return responses
+
+        fingerprints = self._response_fingerprints(responses, event_key)
+        if fingerprints:
+            stored = FRCAPIResponseFingerprints.get_multi(list(fingerprints))
+            if all(stored[key] == f for key, f in fingerprints.items()):
+                if event_key:
+                    self._record_sync_status_success(event_key)
+                    self._record_sync_status_processed(event_key, unchanged=True)
+                raise self.ResponseUnchanged()
+
+        if any(self._needs_refetch(response) for response in responses):
+            responses = yield [
+                (
+                    self.api.refetch(response)
+                    if self._needs_refetch(response)
+                    else InstantFuture(response)
+                )
+                for response in responses
+            ]
+            fingerprints = self._response_fingerprints(responses, event_key)
+
+        if fingerprints:
+            self._pending_fingerprints.update(fingerprints)
+        return responses
+
+    @staticmethod
+    def _needs_refetch(response: TypedURLFetchResult) -> bool:
+        return response.not_modified and not response.content
+
+    @staticmethod
+    def _response_fingerprints(
+        responses: List[TypedURLFetchResult],
+        event_key: Optional[EventKey] = None,
+    ) -> Optional[Dict[str, str]]:
+        # Stubbed fetches for disabled syncs have no URL, and always match
+        fetched = [response for response in responses if response.url]
+        if not fetched or any(
+            r.status_code != 200 and not r.not_modified for r in fetched
+        ):
+            # Let _parse deal with the failures
+            return None
+
+        # Scoped to the event, since some responses (like 2015-2021 division
+        # awards) are shared between events
+        return {
+            f"{event_key}:{response.url}" if event_key else response.url: (
+                response.content_hash
+                if isinstance(response, NotModifiedURLFetchResult)
+                else FRCAPIResponseFingerprints.fingerprint(response.content)
+            )
+            for response in fetched
+        }
+
+    def commit_response_fingerprints(
+        self, event_key: Optional[EventKey] = None
+    ) -> None:
+        """
+        Stores the fingerprints of the responses this datafeed has returned
+        results for. Call this once those results have been written.
+        """
+        if not self._pending_fingerprints:
+            return
+
+        FRCAPIResponseFingerprints.put_multi(self._pending_fingerprints)
+        self._pending_fingerprints = {}
+        if event_key:
+            self._record_sync_status_processed(event_key, unchanged=False)
+
     def _parse(
         self,
         response: TypedURLFetchResult[TParserInput],
         parser: ParserBase[TParserInput, TParsedResponse],
         event_key: Optional[EventKey] = None,
     ) -> Optional[TParsedResponse]:
-        if response.status_code == 200:
+        # A not modified response with content carries the cached body
+        if response.status_code == 200 or (response.not_modified and response.content):
             ApiStatusFMSApiDown.set_down(False)
 
             if event_key and response.url:
@@ -570,6 +708,13 @@ class DatafeedFMSAPI:
         if endpoint:
             EventSyncStatusMemcache(event_key).record_failure(endpoint)
 
+    def _record_sync_status_processed(
+        self, event_key: EventKey, unchanged: bool
+    ) -> None:
+        endpoint = self._request_endpoint()
+        if endpoint:
+            EventSyncStatusMemcache(event_key).record_processed(endpoint, unchanged)
+
     @ndb.tasklet
     def _stub_fetch_hybrid_schedule(self):
         return URLFetchResult.mock_for_content(
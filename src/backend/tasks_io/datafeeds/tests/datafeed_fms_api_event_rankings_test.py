@@ -1,14 +1,17 @@
+from typing import Optional
 from unittest.mock import patch
 
 import pytest
+from pyre_extensions import JSON
 
 from backend.common.frc_api import FRCAPI
+from backend.common.frc_api.response_fingerprints import FRCAPIResponseFingerprints
 from backend.common.futures import InstantFuture
 from backend.common.sitevars.fms_api_secrets import (
     ContentType as FMSApiSecretsContentType,
 )
 from backend.common.sitevars.fms_api_secrets import FMSApiSecrets
-from backend.common.urlfetch import URLFetchResult
+from backend.common.urlfetch import NotModifiedURLFetchResult, URLFetchResult
 from backend.tasks_io.datafeeds.datafeed_fms_api import DatafeedFMSAPI
 from backend.tasks_io.datafeeds.parsers.fms_api.fms_api_event_rankings_parser import (
     FMSAPIEventRankingsParser,
@@ -60,3 +63,170 @@ def test_get_event_rankings_cmp() -> None:
 
     mock_api.assert_called_once_with(2014, "galileo")
     mock_parse.assert_called_once_with(response.json())
+
+
+def _rankings_response(content: str) -> URLFetchResult:
+    return URLFetchResult.mock_for_content(
+        "https://frc-api.firstinspires.org/v3.0/2020/rankings/MIKET",
+        200,
+        content,
+    )
+
+
+def test_get_event_rankings_skip_unchanged(memcache_stub) -> None:
+    response = _rankings_response('{"Rankings": []}')
+
+    df = DatafeedFMSAPI(skip_unchanged=True)
+    with (
+        patch.object(FRCAPI, "rankings", return_value=InstantFuture(response)),
+        patch.object(FMSAPIEventRankingsParser, "parse") as mock_parse,
+    ):
+        mock_parse.return_value = []
+        df.get_event_rankings("2020miket").get_result()
+        df.commit_response_fingerprints("2020miket")
+
+        df = DatafeedFMSAPI(skip_unchanged=True)
+        with pytest.raises(DatafeedFMSAPI.ResponseUnchanged):
+            df.get_event_rankings("2020miket").get_result()
+
+    mock_parse.assert_called_once()
+
+
+def test_get_event_rankings_skip_unchanged_not_committed(memcache_stub) -> None:
+    response = _rankings_response('{"Rankings": []}')
+
+    with (
+        patch.object(FRCAPI, "rankings", return_value=InstantFuture(response)),
+        patch.object(FMSAPIEventRankingsParser, "parse") as mock_parse,
+    ):
+        mock_parse.return_value = []
+        # Without a commit (eg. the write failed), the next poll reprocesses
+        DatafeedFMSAPI(skip_unchanged=True).get_event_rankings("2020miket").get_result()
+        DatafeedFMSAPI(skip_unchanged=True).get_event_rankings("2020miket").get_result()
+
+    assert mock_parse.call_count == 2
+
+
+def test_get_event_rankings_skip_unchanged_changed(memcache_stub) -> None:
+    df = DatafeedFMSAPI(skip_unchanged=True)
+    with (
+        patch.object(
+            FRCAPI,
+            "rankings",
+            side_effect=[
+                InstantFuture(_rankings_response('{"Rankings": []}')),
+                InstantFuture(_rankings_response('{"Rankings": [{"rank": 1}]}')),
+            ],
+        ),
+        patch.object(FMSAPIEventRankingsParser, "parse") as mock_parse,
+    ):
+        mock_parse.return_value = []
+        df.get_event_rankings("2020miket").get_result()
+        df.commit_response_fingerprints("2020miket")
+
+        df = DatafeedFMSAPI(skip_unchanged=True)
+        df.get_event_rankings("2020miket").get_result()
+
+    assert mock_parse.call_count == 2
+
+
+def test_get_event_rankings_skip_unchanged_disabled(memcache_stub) -> None:
+    response = _rankings_response('{"Rankings": []}')
+
+    with (
+        patch.object(FRCAPI, "rankings", return_value=InstantFuture(response)),
+        patch.object(FMSAPIEventRankingsParser, "parse") as mock_parse,
+    ):
+        mock_parse.return_value = []
+        df = DatafeedFMSAPI(skip_unchanged=True)
+        df.get_event_rankings("2020miket").get_result()
+        df.commit_response_fingerprints("2020miket")
+
+        DatafeedFMSAPI().get_event_rankings("2020miket").get_result()
+
+    assert mock_parse.call_count == 2
+
+
+def _not_modified_response(
+    content: str, cached_content: Optional[str] = None
+) -> NotModifiedURLFetchResult:
+    return NotModifiedURLFetchResult(
+        "https://frc-api.firstinspires.org/v3.0/2020/rankings/MIKET",
+        URLFetchResult.mock_urlfetch_result("", 304, ""),
+        JSON,
+        FRCAPIResponseFingerprints.fingerprint(content),
+        cached_content,
+    )
+
+
+def test_get_event_rankings_not_modified(memcache_stub) -> None:
+    content = '{"Rankings": []}'
+
+    with (
+        patch.object(
+            FRCAPI,
+            "rankings",
+            side_effect=[
+                InstantFuture(_rankings_response(content)),
+                InstantFuture(_not_modified_response(content)),
+            ],
+        ),
+        patch.object(FRCAPI, "refetch") as mock_refetch,
+        patch.object(FMSAPIEventRankingsParser, "parse") as mock_parse,
+    ):
+        mock_parse.return_value = []
+        df = DatafeedFMSAPI(skip_unchanged=True)
+        df.get_event_rankings("2020miket").get_result()
+        df.commit_response_fingerprints("2020miket")
+
+        df = DatafeedFMSAPI(skip_unchanged=True)
+        with pytest.raises(DatafeedFMSAPI.ResponseUnchanged):
+            df.get_event_rankings("2020miket").get_result()
+
+    mock_parse.assert_called_once()
+    mock_refetch.assert_not_called()
+
+
+def test_get_event_rankings_not_modified_not_processed(memcache_stub) -> None:
+    # Not modified since another fetch, but never processed for this event
+    content = '{"Rankings": []}'
+    response = _rankings_response(content)
+
+    df = DatafeedFMSAPI(skip_unchanged=True)
+    with (
+        patch.object(
+            FRCAPI,
+            "rankings",
+            return_value=InstantFuture(_not_modified_response(content)),
+        ),
+        patch.object(
+            FRCAPI, "refetch", return_value=InstantFuture(response)
+        ) as mock_refetch,
+        patch.object(FMSAPIEventRankingsParser, "parse") as mock_parse,
+    ):
+        mock_parse.return_value = []
+        df.get_event_rankings("2020miket").get_result()
+
+    mock_refetch.assert_called_once()
+    mock_parse.assert_called_once_with(response.json())
+
+
+def test_get_event_rankings_not_modified_cached_body(memcache_stub) -> None:
+    # Not processed for this event, but the body was cached with the validators
+    content = '{"Rankings": []}'
+
+    df = DatafeedFMSAPI(skip_unchanged=True)
+    with (
+        patch.object(
+            FRCAPI,
+            "rankings",
+            return_value=InstantFuture(_not_modified_response(content, content)),
+        ),
+        patch.object(FRCAPI, "refetch") as mock_refetch,
+        patch.object(FMSAPIEventRankingsParser, "parse") as mock_parse,
+    ):
+        mock_parse.return_value = []
+        df.get_event_rankings("2020miket").get_result()
+
+    mock_refetch.assert_not_called()
+    mock_parse.assert_called_once_with({"Rankings": []})
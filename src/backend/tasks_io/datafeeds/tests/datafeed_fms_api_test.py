@@ -194,3 +194,32 @@ def test_parse_records_event_sync_failure(fms_api_secrets, ndb_stub) -> None:
     status = cache.get()
     assert status is not None
     assert status["tasks.get.fmsapi_matches"]["num_consecutive_failures"] == 1
+
+
+def test_skip_unchanged_records_event_sync_processed(fms_api_secrets) -> None:
+    response = URLFetchResult.mock_for_content(
+        "https://frc-api.firstinspires.org/v3.0/2025/rankings/CASJ",
+        200,
+        json.dumps({"Rankings": []}),
+    )
+
+    with patch.object(
+        DatafeedFMSAPI,
+        "_request_endpoint",
+        return_value="tasks.get.fmsapi_event_rankings",
+    ):
+        df = DatafeedFMSAPI(skip_unchanged=True)
+        df._check_unchanged([response], "2025casj").get_result()
+        df.commit_response_fingerprints("2025casj")
+
+        df = DatafeedFMSAPI(skip_unchanged=True)
+        with pytest.raises(DatafeedFMSAPI.ResponseUnchanged):
+            df._check_unchanged([response], "2025casj").get_result()
+
+    status = EventSyncStatusMemcache("2025casj").get()
+    assert status is not None
+    endpoint_status = status["tasks.get.fmsapi_event_rankings"]
+    assert endpoint_status.get("num_processed") == 1
+    assert endpoint_status.get("num_skipped_unchanged") == 1
+    assert endpoint_status["num_consecutive_failures"] == 0
+    assert endpoint_status["last_success_time"] is not None
@@ -4,6 +4,8 @@ from google.appengine.api import users as gae_login
 from backend.tasks_io.handlers.admin.tasks import (
     admin_clear_eventteams,
     admin_post_division_tasks,
+    admin_rebuild_subscriber_index,
+    admin_rebuild_team_priors,
 )
 
 """
@@ -38,3 +40,9 @@ admin_routes.add_url_rule(
 admin_routes.add_url_rule(
     "/do/post_division_tasks/<event_key>", view_func=admin_post_division_tasks
 )
+admin_routes.add_url_rule(
+    "/do/rebuild_subscriber_index", view_func=admin_rebuild_subscriber_index
+)
+admin_routes.add_url_rule(
+    "/do/rebuild_team_priors/<int:year>", view_func=admin_rebuild_team_priors
+)
@@ -3,11 +3,13 @@ from typing import Any, cast, Dict
 from flask import abort
 from google.appengine.api import taskqueue
 
+from backend.common.helpers.subscriber_index_helper import SubscriberIndexHelper
+from backend.common.helpers.team_priors_helper import TeamPriorsHelper
 from backend.common.manipulators.event_manipulator import EventManipulator
 from backend.common.manipulators.event_team_manipulator import EventTeamManipulator
 from backend.common.models.event import Event, EventSyncOverrides
 from backend.common.models.event_team import EventTeam
-from backend.common.models.keys import EventKey
+from backend.common.models.keys import EventKey, Year
 
 
 def admin_clear_eventteams(event_key: EventKey) -> str:
@@ -64,3 +66,13 @@ def admin_post_division_tasks(event_key: EventKey) -> str:
     )
 
     return f"post_division_tasks complete for {event_key}"
+
+
+def admin_rebuild_subscriber_index() -> str:
+    SubscriberIndexHelper.rebuild_all()
+    return "Enqueued subscriber index rebuild"
+
+
+def admin_rebuild_team_priors(year: Year) -> str:
+    entries = TeamPriorsHelper.rebuild_year(year)
+    return f"Rebuilt {entries} team priors for {year}"
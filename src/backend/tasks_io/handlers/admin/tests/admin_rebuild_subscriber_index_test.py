@@ -0,0 +1,65 @@
+from google.appengine.ext import ndb, testbed
+from werkzeug.test import Client
+
+from backend.common.consts.client_type import ClientType
+from backend.common.consts.model_type import ModelType
+from backend.common.consts.notification_type import NotificationType
+from backend.common.helpers.deferred import run_from_task
+from backend.common.helpers.subscriber_index_helper import SubscriberIndexHelper
+from backend.common.models.account import Account
+from backend.common.models.mobile_client import MobileClient
+from backend.common.models.mobile_client_index import MobileClientIndex
+from backend.common.models.subscriber_index import SubscriberIndex
+from backend.common.models.subscription import Subscription
+from backend.common.sitevars.notifications_subscriber_index import (
+    NotificationsSubscriberIndex,
+)
+
+
+def test_unauthenticated(tasks_client: Client) -> None:
+    resp = tasks_client.get("/tasks/admin/do/rebuild_subscriber_index")
+    assert resp.status_code == 401
+
+
+def test_rebuild_subscriber_index(
+    tasks_client: Client,
+    login_gae_admin,
+    taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub,
+) -> None:
+    Subscription(
+        parent=ndb.Key(Account, "user_id"),
+        user_id="user_id",
+        model_key="frc7332",
+        model_type=ModelType.TEAM,
+        notification_types=[NotificationType.MATCH_SCORE],
+    ).put()
+    MobileClient(
+        parent=ndb.Key(Account, "user_id"),
+        user_id="user_id",
+        messaging_id="token",
+        client_type=ClientType.OS_ANDROID,
+    ).put()
+    # Lose the index
+    ndb.delete_multi(SubscriberIndex.query().fetch(keys_only=True))
+    ndb.delete_multi(MobileClientIndex.query().fetch(keys_only=True))
+
+    resp = tasks_client.get("/tasks/admin/do/rebuild_subscriber_index")
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True) == "Enqueued subscriber index rebuild"
+
+    # One task per stage, since each fits in a page
+    for _ in range(4):
+        assert not NotificationsSubscriberIndex.index_ready()
+        tasks = taskqueue_stub.get_filtered_tasks(queue_names="admin")
+        assert len(tasks) == 1
+        taskqueue_stub.FlushQueue("admin")
+        run_from_task(tasks[0])
+
+    assert taskqueue_stub.get_filtered_tasks(queue_names="admin") == []
+    assert NotificationsSubscriberIndex.index_ready()
+    assert SubscriberIndexHelper.subscribers(
+        [(ModelType.TEAM, "frc7332")], NotificationType.MATCH_SCORE
+    ) == [["user_id"]]
+    assert [
+        client.messaging_id for client in SubscriberIndexHelper.clients(["user_id"])
+    ] == ["token"]
@@ -0,0 +1,46 @@
+import datetime
+
+from google.appengine.ext import ndb
+from werkzeug.test import Client
+
+from backend.common.consts.event_type import EventType
+from backend.common.helpers.team_priors_helper import TeamPriorsHelper
+from backend.common.models.event import Event
+from backend.common.models.event_details import EventDetails
+from backend.common.models.team_year_priors import TeamYearPriors
+
+
+def test_unauthenticated(tasks_client: Client) -> None:
+    resp = tasks_client.get("/tasks/admin/do/rebuild_team_priors/2019")
+    assert resp.status_code == 401
+
+
+def test_rebuild_team_priors(tasks_client: Client, login_gae_admin) -> None:
+    Event(
+        id="2019nyny",
+        year=2019,
+        event_short="nyny",
+        event_type_enum=EventType.REGIONAL,
+        official=True,
+        start_date=datetime.datetime(2019, 3, 1),
+        end_date=datetime.datetime(2019, 3, 3),
+    ).put()
+    EventDetails(id="2019nyny", matchstats={"oprs": {"254": 10.0, "604": 5.0}}).put()
+    later_event = Event(
+        id="2019cmptx",
+        year=2019,
+        event_short="cmptx",
+        event_type_enum=EventType.CMP_DIVISION,
+        official=True,
+        start_date=datetime.datetime(2019, 4, 17),
+        end_date=datetime.datetime(2019, 4, 20),
+    )
+    later_event.put()
+    # Lose the priors
+    ndb.delete_multi(TeamYearPriors.query().fetch(keys_only=True))
+
+    resp = tasks_client.get("/tasks/admin/do/rebuild_team_priors/2019")
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True) == "Rebuilt 2 team priors for 2019"
+    priors = TeamPriorsHelper.get_priors(later_event, ["frc254"])
+    assert [prior["matchstats"] for prior in priors["frc254"]] == [{"oprs": 10.0}]
@@ -74,6 +74,12 @@ def splay_delay_for(
     return now + delay
 
 
+def _in_taskqueue() -> bool:
+    # Polls from the task queue skip unchanged FRC API responses; manual
+    # requests always reprocess, so their output is complete
+    return "X-Appengine-Taskname" in request.headers
+
+
 @blueprint.route("/tasks/enqueue/fmsapi_team_details_rolling")
 def enqueue_rolling_team_details() -> Response:
     """
@@ -392,9 +398,14 @@ def event_details(event_key: EventKey) -> Response:
     ).fetch_async()
 
     fmsapi_events, fmsapi_districts = event_details_future.get_result()
-    event = EventManipulator.createOrUpdate(fmsapi_events[0], update_manual_attrs=False)
-
-    DistrictManipulator.createOrUpdate(fmsapi_districts, update_manual_attrs=False)
+    event_future = EventManipulator.createOrUpdate_async(
+        fmsapi_events[0], update_manual_attrs=False
+    )
+    districts_future = DistrictManipulator.createOrUpdate_async(
+        fmsapi_districts, update_manual_attrs=False
+    )
+    event = event_future.get_result()
+    districts_future.get_result()
 
     models = event_teams_future.get_result()
 
@@ -432,22 +443,31 @@ def event_details(event_key: EventKey) -> Response:
         if isinstance(robot, Robot):
             robots.append(robot)
 
-    # Write new models
+    # Write new models. None of these depend on each other, so their reads and
+    # writes run concurrently
+    teams_future = None
     if (
         teams and event.year == SeasonHelper.get_max_year() or Environment.is_dev()
     ):  # Only update from latest year
-        teams = TeamManipulator.createOrUpdate(teams, update_manual_attrs=False)
-
-    district_teams = DistrictTeamManipulator.createOrUpdate(
+        teams_future = TeamManipulator.createOrUpdate_async(
+            teams, update_manual_attrs=False
+        )
+    district_teams_future = DistrictTeamManipulator.createOrUpdate_async(
         district_teams, update_manual_attrs=False
     )
-    robots = RobotManipulator.createOrUpdate(robots, update_manual_attrs=False)
-    regional_pool_teams = listify(
-        RegionalPoolTeamManipulator.createOrUpdate(
-            regional_pool_teams, update_manual_attrs=False
-        )
+    robots_future = RobotManipulator.createOrUpdate_async(
+        robots, update_manual_attrs=False
+    )
+    regional_pool_teams_future = RegionalPoolTeamManipulator.createOrUpdate_async(
+        regional_pool_teams, update_manual_attrs=False
     )
 
+    if teams_future is not None:
+        teams = teams_future.get_result()
+    district_teams = district_teams_future.get_result()
+    robots = robots_future.get_result()
+    regional_pool_teams = listify(regional_pool_teams_future.get_result())
+
     if not teams:
         # No teams found registered for this event
         teams = []
@@ -680,12 +700,15 @@ def enqueue_event_rankings(year: Optional[Year]) -> Response:
 
 @blueprint.route("/tasks/get/fmsapi_event_rankings/<event_key>")
 def event_rankings(event_key: EventKey) -> Response:
-    df = DatafeedFMSAPI(save_response=True)
+    df = DatafeedFMSAPI(save_response=True, skip_unchanged=_in_taskqueue())
     event = Event.get_by_id(event_key) if Event.validate_key_name(event_key) else None
     if event is None:
         return make_response(f"No Event for key: {Markup.escape(event_key)}", 404)
 
-    rankings2 = df.get_event_rankings(event_key).get_result()
+    try:
+        rankings2 = df.get_event_rankings(event_key).get_result()
+    except DatafeedFMSAPI.ResponseUnchanged:
+        return make_response("")
 
     if rankings2 is not None:
         if event and event.remap_teams:
@@ -693,6 +716,7 @@ def event_rankings(event_key: EventKey) -> Response:
 
         event_details = EventDetails(id=event_key, rankings2=rankings2)
         EventDetailsManipulator.createOrUpdate(event_details, update_manual_attrs=False)
+    df.commit_response_fingerprints(event_key)
 
     template_values = {"rankings": rankings2, "event_name": event_key}
 
@@ -755,11 +779,15 @@ def event_matches(event_key: EventKey) -> Response:
     if event is None:
         return make_response(f"No Event for key: {Markup.escape(event_key)}", 404)
 
-    # Prefetch exisitng matches to merge with new matches
-    event.prep_matches()
+    df = DatafeedFMSAPI(save_response=True, skip_unchanged=_in_taskqueue())
+    try:
+        matches = df.get_event_matches(event_key).get_result()
+    except DatafeedFMSAPI.ResponseUnchanged:
+        return make_response("")
 
-    df = DatafeedFMSAPI(save_response=True)
-    matches = df.get_event_matches(event_key).get_result()
+    # Load existing matches to merge with new matches, once we know there's
+    # something to merge
+    event.prep_matches()
     existing_matches = event.matches
 
     # Add existing matches to the new matches if they aren't present.
@@ -816,6 +844,7 @@ def event_matches(event_key: EventKey) -> Response:
             ],
             update_manual_attrs=False,
         )
+    df.commit_response_fingerprints(event_key)
 
     template_values = {"matches": new_matches, "deleted_keys": keys_to_delete}
 
@@ -881,8 +910,11 @@ def awards_event(event_key: EventKey) -> Response:
     if event is None:
         return make_response(f"No Event for key: {Markup.escape(event_key)}", 404)
 
-    datafeed = DatafeedFMSAPI(save_response=True)
-    awards = datafeed.get_awards(event).get_result()
+    datafeed = DatafeedFMSAPI(save_response=True, skip_unchanged=_in_taskqueue())
+    try:
+        awards = datafeed.get_awards(event).get_result()
+    except DatafeedFMSAPI.ResponseUnchanged:
+        return make_response("")
 
     if event.remap_teams:
         EventRemapTeamsHelper.remapteams_awards(awards, event.remap_teams)
@@ -920,6 +952,7 @@ def awards_event(event_key: EventKey) -> Response:
             ],
             update_manual_attrs=False,
         )
+    datafeed.commit_response_fingerprints(event_key)
 
     # Only write out if not in taskqueue
     if "X-Appengine-Taskname" not in request.headers:
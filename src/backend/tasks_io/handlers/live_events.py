@@ -193,13 +193,20 @@ def update_event_team_status(event_key: EventKey) -> Response:
         abort(404)
 
     event_teams = EventTeam.query(EventTeam.event == event.key).fetch()
+    statuses = EventTeamStatusHelper.generate_event_statuses(
+        event, [event_team.team.id() for event_team in event_teams]
+    )
+
+    # Only write the statuses that changed
+    changed_event_teams = []
     for event_team in event_teams:
-        status = EventTeamStatusHelper.generate_team_at_event_status(
-            event_team.team.id(), event
-        )
-        event_team.status = status
-        # FirebasePusher.update_event_team_status(event_key, event_team.team.id(), status)
-    EventTeamManipulator.createOrUpdate(event_teams)
+        status = statuses[event_team.team.id()]
+        if event_team.status != status:
+            event_team.status = status
+            changed_event_teams.append(event_team)
+            # FirebasePusher.update_event_team_status(event_key, event_team.team.id(), status)
+    if changed_event_teams:
+        EventTeamManipulator.createOrUpdate(changed_event_teams)
 
     if (
         "X-Appengine-Taskname" not in request.headers
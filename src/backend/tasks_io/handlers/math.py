@@ -1,5 +1,6 @@
 import json
 import logging
+import time
 from typing import List, Optional
 
 from flask import abort, Blueprint, make_response, render_template, request, url_for
@@ -33,6 +34,7 @@ from backend.common.models.district_ranking import DistrictRanking
 from backend.common.models.event import Event
 from backend.common.models.event_details import EventDetails
 from backend.common.models.keys import DistrictKey, EventKey, Year
+from backend.common.models.match import Match
 from backend.common.models.regional_champs_pool import RegionalChampsPool
 from backend.common.models.regional_pool_ranking import RegionalPoolRanking
 from backend.common.models.team import Team
@@ -422,15 +424,25 @@ def event_matchstats_calc(event_key: EventKey) -> Response:
     if not event:
         abort(404)
 
-    matchstats_dict = MatchstatsHelper.calculate_matchstats(event.matches, event.year)
+    start = time.perf_counter()
+    matchstats_dict, coprs_dict = MatchstatsHelper.calculate_stats(
+        event.matches, event.year
+    )
+    logging.info(
+        f"Calculated matchstats and {len(coprs_dict)} COPRs for {event_key} "
+        f"from {len(event.matches)} matches in "
+        f"{(time.perf_counter() - start) * 1000:.1f}ms"
+    )
     if not any([v != {} for v in matchstats_dict.values()]):
         logging.warning("Matchstat calculation for {} failed!".format(event_key))
         matchstats_dict = None
 
-    coprs_dict = MatchstatsHelper.calculate_coprs(event.matches, event.year)
     if len(coprs_dict.keys()) == 0:
         logging.warning(f"COPR calculation for {event_key} failed!")
         coprs_dict = None
+    # Reset the incremental state to these matches, so the next update only
+    # applies the ones that change after this
+    MatchstatsHelper.save_state(event.key, event.matches)
 
     predictions_dict = None
     if (
@@ -485,6 +497,52 @@ def event_matchstats_calc(event_key: EventKey) -> Response:
     return make_response("")
 
 
+@blueprint.route("/tasks/math/do/event_matchstats_update/<event_key>")
+def event_matchstats_update(event_key: EventKey) -> Response:
+    """
+    Updates match stats (OPR/DPR/CCWM) and COPRs for an event with only the
+    matches that changed since the last update. Enqueued whenever a match
+    changes, so stats follow scores during an event. event_matchstats_calc
+    still recalculates everything periodically.
+    """
+    event = Event.get_by_id(event_key)
+    if not event:
+        abort(404)
+
+    start = time.perf_counter()
+    # Not EventMatchesQuery, since its cache may not have been cleared yet
+    matches = Match.query(Match.event == event.key).fetch()
+    matchstats_dict, coprs_dict = MatchstatsHelper.update_event_stats(
+        event.key, matches
+    )
+    logging.info(
+        f"Updated matchstats and {len(coprs_dict)} COPRs for {event_key} in "
+        f"{(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+
+    if any(matchstats_dict.values()):
+        EventDetailsManipulator.createOrUpdate(
+            EventDetails(
+                id=event_key,
+                matchstats=matchstats_dict,
+                coprs=coprs_dict or None,
+            )
+        )
+
+    if (
+        "X-Appengine-Taskname" not in request.headers
+    ):  # Only write out if not in taskqueue
+        template_values = {
+            "matchstats_dict": matchstats_dict,
+            "coprs_dict": coprs_dict,
+        }
+        return make_response(
+            render_template("math/event_matchstats_do.html", **template_values)
+        )
+
+    return make_response("")
+
+
 @blueprint.route("/tasks/math/enqueue/eventteam_update/<when>")
 def enqueue_eventteam_update(when: str) -> Response:
     event_keys: List[ndb.Key] = []
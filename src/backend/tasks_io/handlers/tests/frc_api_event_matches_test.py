@@ -165,6 +165,25 @@ def test_get_no_matches_no_output_in_taskqueue(
     assert len(resp.data) == 0
 
 
+@mock.patch.object(Event, "prep_matches")
+@mock.patch.object(DatafeedFMSAPI, "get_event_matches")
+def test_get_unchanged_in_taskqueue(
+    fmsapi_matches_mock, prep_matches_mock, tasks_client: Client
+) -> None:
+    create_event(official=True)
+    fmsapi_matches_mock.side_effect = DatafeedFMSAPI.ResponseUnchanged()
+
+    resp = tasks_client.get(
+        "/tasks/get/fmsapi_matches/2020nyny",
+        headers={"X-Appengine-Taskname": "test"},
+    )
+    assert resp.status_code == 200
+    assert len(resp.data) == 0
+
+    # Existing matches aren't loaded for an unchanged response
+    prep_matches_mock.assert_not_called()
+
+
 @mock.patch.object(DatafeedFMSAPI, "get_event_matches")
 def test_get(
     fmsapi_matches_mock,
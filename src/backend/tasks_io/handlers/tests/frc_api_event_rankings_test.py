@@ -185,6 +185,37 @@ def test_get_no_events_no_output_in_taskqueue(
     assert len(resp.data) == 0
 
 
+@mock.patch.object(DatafeedFMSAPI, "get_event_rankings")
+def test_get_unchanged_in_taskqueue(
+    fmsapi_event_rankings_mock, tasks_client: Client
+) -> None:
+    create_event(official=True)
+    fmsapi_event_rankings_mock.side_effect = DatafeedFMSAPI.ResponseUnchanged()
+
+    resp = tasks_client.get(
+        "/tasks/get/fmsapi_event_rankings/2020nyny",
+        headers={"X-Appengine-Taskname": "test"},
+    )
+    assert resp.status_code == 200
+    assert len(resp.data) == 0
+
+    # Nothing is written for an unchanged response
+    assert EventDetails.get_by_id("2020nyny") is None
+
+
+@mock.patch.object(DatafeedFMSAPI, "commit_response_fingerprints")
+@mock.patch.object(DatafeedFMSAPI, "get_event_rankings")
+def test_get_commits_response_fingerprints(
+    fmsapi_event_rankings_mock, commit_mock, tasks_client: Client
+) -> None:
+    create_event(official=True)
+    fmsapi_event_rankings_mock.return_value = InstantFuture([])
+
+    resp = tasks_client.get("/tasks/get/fmsapi_event_rankings/2020nyny")
+    assert resp.status_code == 200
+    commit_mock.assert_called_once_with("2020nyny")
+
+
 @mock.patch.object(DatafeedFMSAPI, "get_event_rankings")
 def test_get(
     fmsapi_event_rankings_mock,
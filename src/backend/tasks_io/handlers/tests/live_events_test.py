@@ -30,6 +30,7 @@ from backend.common.helpers.youtube_video_helper import (
     YouTubeUpcomingStream,
     YouTubeVideoHelper,
 )
+from backend.common.manipulators.event_team_manipulator import EventTeamManipulator
 from backend.common.memcache_models.district_webcast_last_updated_memcache import (
     DistrictWebcastLastUpdatedData,
     DistrictWebcastLastUpdatedMemcache,
@@ -143,7 +144,7 @@ def test_do_eventteam_status_not_found(
     assert len(tasks) == 0
 
 
-@mock.patch.object(EventTeamStatusHelper, "generate_team_at_event_status")
+@mock.patch.object(EventTeamStatusHelper, "generate_event_statuses")
 def test_do_eventteam_status(
     status_mock: mock.Mock,
     tasks_client: Client,
@@ -168,7 +169,7 @@ def test_do_eventteam_status(
         last_match_key=None,
         next_match_key=None,
     )
-    status_mock.return_value = status
+    status_mock.return_value = {"frc254": status}
 
     resp = tasks_client.get("/tasks/math/do/event_team_status/2020test")
     assert resp.status_code == 200
@@ -179,6 +180,69 @@ def test_do_eventteam_status(
     assert et.status == status
 
 
+@mock.patch.object(EventTeamManipulator, "createOrUpdate")
+@mock.patch.object(EventTeamStatusHelper, "generate_event_statuses")
+def test_do_eventteam_status_only_writes_changed(
+    status_mock: mock.Mock,
+    create_or_update_mock: mock.Mock,
+    tasks_client: Client,
+) -> None:
+    Event(
+        id="2020test",
+        year=2020,
+        event_short="test",
+        event_type_enum=EventType.REGIONAL,
+    ).put()
+    unchanged_status = EventTeamStatus(
+        qual=None,
+        playoff=None,
+        alliance=None,
+        last_match_key="2020test_qm1",
+        next_match_key="2020test_qm2",
+    )
+    for team_key in ["frc254", "frc604"]:
+        EventTeam(
+            id=f"2020test_{team_key}",
+            year=2020,
+            event=ndb.Key(Event, "2020test"),
+            team=ndb.Key(Team, team_key),
+            status=unchanged_status,
+        ).put()
+
+    changed_status = EventTeamStatus(
+        qual=None,
+        playoff=None,
+        alliance=None,
+        last_match_key="2020test_qm2",
+        next_match_key="2020test_qm3",
+    )
+    status_mock.return_value = {
+        "frc254": changed_status,
+        "frc604": unchanged_status,
+    }
+
+    resp = tasks_client.get("/tasks/math/do/event_team_status/2020test")
+    assert resp.status_code == 200
+    status_mock.assert_called_once()
+    assert sorted(status_mock.call_args[0][1]) == ["frc254", "frc604"]
+
+    create_or_update_mock.assert_called_once()
+    [written] = create_or_update_mock.call_args[0][0]
+    assert written.key_name == "2020test_frc254"
+    assert written.status == changed_status
+
+    # Nothing is written when no statuses changed
+    create_or_update_mock.reset_mock()
+    status_mock.return_value = {
+        "frc254": unchanged_status,
+        "frc604": unchanged_status,
+    }
+
+    resp = tasks_client.get("/tasks/math/do/event_team_status/2020test")
+    assert resp.status_code == 200
+    create_or_update_mock.assert_not_called()
+
+
 def test_enqueue_playoff_advancement_all(
     tasks_client: Client, taskqueue_stub: testbed.taskqueue_stub.TaskQueueServiceStub
 ) -> None:
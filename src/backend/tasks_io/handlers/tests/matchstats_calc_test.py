@@ -1,11 +1,14 @@
+import json
 from datetime import datetime
 from typing import Tuple
 from unittest import mock
 
+import pytest
 from freezegun import freeze_time
-from google.appengine.ext import testbed
+from google.appengine.ext import ndb, testbed
 from werkzeug.test import Client
 
+from backend.common.consts.comp_level import CompLevel
 from backend.common.consts.event_type import EventType
 from backend.common.helpers.event_insights_helper import EventInsightsHelper
 from backend.common.helpers.matchstats_helper import MatchstatsHelper
@@ -22,6 +25,7 @@ from backend.common.models.event_predictions import (
     TRankingPredictions,
     TRankingPredictionStats,
 )
+from backend.common.models.match import Match
 from backend.common.models.stats import EventMatchStats, StatType
 
 
@@ -89,10 +93,8 @@ def test_calc_no_event(tasks_client: Client) -> None:
 @mock.patch.object(EventInsightsHelper, "calculate_event_insights")
 @mock.patch.object(PredictionHelper, "get_ranking_predictions")
 @mock.patch.object(PredictionHelper, "get_match_predictions")
-@mock.patch.object(MatchstatsHelper, "calculate_matchstats")
-@mock.patch.object(MatchstatsHelper, "calculate_coprs")
+@mock.patch.object(MatchstatsHelper, "calculate_stats")
 def test_calc_matchstats(
-    coprs_mock: mock.Mock,
     matchstats_mock: mock.Mock,
     match_prediction_mock: mock.Mock,
     ranking_prediction_mock: mock.Mock,
@@ -128,11 +130,10 @@ def test_calc_matchstats(
         qual=None,
         playoff=None,
     )
-    matchstats_mock.return_value = matchstats
+    matchstats_mock.return_value = (matchstats, coprs)
     match_prediction_mock.return_value = match_predictions
     ranking_prediction_mock.return_value = ranking_predictions
     event_insights_mock.return_value = event_insights
-    coprs_mock.return_value = coprs
 
     resp = tasks_client.get("/tasks/math/do/event_matchstats/2020test")
     assert resp.status_code == 200
@@ -155,10 +156,8 @@ def test_calc_matchstats(
 @mock.patch.object(EventInsightsHelper, "calculate_event_insights")
 @mock.patch.object(PredictionHelper, "get_ranking_predictions")
 @mock.patch.object(PredictionHelper, "get_match_predictions")
-@mock.patch.object(MatchstatsHelper, "calculate_matchstats")
-@mock.patch.object(MatchstatsHelper, "calculate_coprs")
+@mock.patch.object(MatchstatsHelper, "calculate_stats")
 def test_calc_matchstats_no_output_in_taskqueue(
-    coprs_mock: mock.Mock,
     matchstats_mock: mock.Mock,
     match_prediction_mock: mock.Mock,
     ranking_prediction_mock: mock.Mock,
@@ -194,11 +193,10 @@ def test_calc_matchstats_no_output_in_taskqueue(
         qual=None,
         playoff=None,
     )
-    matchstats_mock.return_value = matchstats
+    matchstats_mock.return_value = (matchstats, coprs)
     match_prediction_mock.return_value = match_predictions
     ranking_prediction_mock.return_value = ranking_predictions
     event_insights_mock.return_value = event_insights
-    coprs_mock.return_value = coprs
 
     resp = tasks_client.get(
         "/tasks/math/do/event_matchstats/2020test",
@@ -208,3 +206,113 @@ def test_calc_matchstats_no_output_in_taskqueue(
     )
     assert resp.status_code == 200
     assert len(resp.data) == 0
+
+
+def test_update_no_event(tasks_client: Client) -> None:
+    resp = tasks_client.get("/tasks/math/do/event_matchstats_update/2020test")
+    assert resp.status_code == 404
+
+
+def test_update_matchstats(tasks_client: Client) -> None:
+    Event(
+        id="2020test",
+        year=2020,
+        event_short="test",
+        event_type_enum=EventType.REGIONAL,
+    ).put()
+    EventDetails(id="2020test", insights=EventInsights(qual=None, playoff=None)).put()
+    Match(
+        id="2020test_qm1",
+        event=ndb.Key(Event, "2020test"),
+        year=2020,
+        comp_level=CompLevel.QM,
+        set_number=1,
+        match_number=1,
+        alliances_json=json.dumps(
+            {
+                "red": {"teams": ["frc254", "frc1", "frc2"], "score": 30},
+                "blue": {"teams": ["frc3", "frc4", "frc5"], "score": 60},
+            }
+        ),
+    ).put()
+
+    resp = tasks_client.get(
+        "/tasks/math/do/event_matchstats_update/2020test",
+        headers={
+            "X-Appengine-Taskname": "test",
+        },
+    )
+    assert resp.status_code == 200
+    assert len(resp.data) == 0
+
+    ed = EventDetails.get_by_id("2020test")
+    assert ed is not None
+    assert ed.matchstats is not None
+    assert ed.matchstats[StatType.OPR]["254"] == pytest.approx(10)
+    assert ed.matchstats[StatType.CCWM]["5"] == pytest.approx(10)
+    # Everything else is left for the full recalculation
+    assert ed.insights == EventInsights(qual=None, playoff=None)
+
+
+def test_update_matchstats_after_calc(tasks_client: Client) -> None:
+    Event(
+        id="2020test",
+        year=2020,
+        event_short="test",
+        event_type_enum=EventType.REGIONAL,
+    ).put()
+    matches = [
+        Match(
+            id=f"2020test_qm{match_number}",
+            event=ndb.Key(Event, "2020test"),
+            year=2020,
+            comp_level=CompLevel.QM,
+            set_number=1,
+            match_number=match_number,
+            alliances_json=json.dumps(
+                {
+                    "red": {"teams": ["frc254", "frc1", "frc2"], "score": 30},
+                    "blue": {"teams": ["frc3", "frc4", "frc5"], "score": 60},
+                }
+            ),
+        )
+        for match_number in [1, 2]
+    ]
+    ndb.put_multi(matches)
+
+    resp = tasks_client.get("/tasks/math/do/event_matchstats/2020test")
+    assert resp.status_code == 200
+
+    matches[1].alliances_json = json.dumps(
+        {
+            "red": {"teams": ["frc254", "frc1", "frc2"], "score": 90},
+            "blue": {"teams": ["frc3", "frc4", "frc5"], "score": 60},
+        }
+    )
+    matches[1].put()
+
+    update_state = MatchstatsHelper.update_state
+    changed = []
+
+    def record_update_state(state, matches):
+        changed.append(update_state(state, matches))
+        return changed[-1]
+
+    with (
+        mock.patch.object(
+            MatchstatsHelper, "build_state", wraps=MatchstatsHelper.build_state
+        ) as build_state_mock,
+        mock.patch.object(
+            MatchstatsHelper, "update_state", side_effect=record_update_state
+        ),
+    ):
+        resp = tasks_client.get("/tasks/math/do/event_matchstats_update/2020test")
+        assert resp.status_code == 200
+
+    # Only the changed match is applied to the state the full calculation saved
+    build_state_mock.assert_not_called()
+    assert changed == [1]
+    ed = EventDetails.get_by_id("2020test")
+    assert ed is not None
+    assert ed.matchstats is not None
+    assert ed.matchstats[StatType.OPR]["254"] == pytest.approx(20)